@@ -13,6 +13,9 @@ setup(
         'requests>=2.25.1',
         'python-dateutil>=2.8.2',
     ],
+    extras_require={
+        'async': ['aiohttp>=3.8', 'qasync>=0.23'],
+    },
     python_requires='>=3.6',
     packages=find_packages(),
     package_data={
@@ -20,7 +23,7 @@ setup(
     },
     entry_points={
         'console_scripts': [
-            'tvhplayer=tvhplayer.tvhplayer:main',
+            'tvhplayer=tvhplayer.cli:main',
         ],
     },
     data_files=[
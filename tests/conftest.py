@@ -0,0 +1,71 @@
+import base64
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FileServer(ThreadingHTTPServer):
+    """Serves `content` at any path behind basic auth, answering Range requests"""
+
+    daemon_threads = True
+
+    def __init__(self, content, username='user', password='secret'):
+        super().__init__(('127.0.0.1', 0), FileHandler)
+        self.content = content
+        self.credentials = 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
+        self.ranges = True
+        self.requests = []  # Range headers received, None for whole-file requests
+        self.url = f'http://127.0.0.1:{self.server_address[1]}'
+        self.config = {'url': self.url, 'username': username, 'password': password}
+
+    def handle_error(self, request, client_address):
+        pass  # clients hang up on purpose, e.g. after refusing a whole-file answer
+
+
+class FileHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.answer(body=False)
+
+    def do_GET(self):
+        self.answer(body=True)
+
+    def answer(self, body):
+        server = self.server
+        if self.headers.get('Authorization') != server.credentials:
+            self.send_response(401)
+            self.send_header('WWW-Authenticate', 'Basic realm="tvheadend"')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        content = server.content
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range', ''))
+        server.requests.append(self.headers.get('Range'))
+        if match and server.ranges:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(content) - 1), len(content) - 1)
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(content)}')
+            data = content[start:end + 1]
+        else:
+            self.send_response(200)
+            data = content
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if body:
+            self.wfile.write(data)
+
+
+@pytest.fixture
+def file_server():
+    server = FileServer(bytes(range(256)) * 4096)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
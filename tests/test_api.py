@@ -0,0 +1,172 @@
+import asyncio
+import json
+import socket
+import threading
+
+import pytest
+import requests
+
+from tvhplayer import api, resilience
+from tvhplayer.api import ApiError, Endpoints, TVHApi
+
+
+CHANNELS = {'entries': [{'uuid': 'c1', 'name': 'One', 'number': 1}, {'uuid': 'c2', 'name': 'Two', 'number': 2}]}
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"HTTP {status}", response=response)
+
+
+class FakeApi(TVHApi):
+    """TVHApi answering from a dict of path -> JSON, or exception to raise"""
+
+    def __init__(self, answers, url='http://fake-blocking:9981'):
+        super().__init__({'url': url})
+        self.answers = answers
+        self.sent = []
+
+    def get(self, path, params=None):
+        self.sent.append(('GET', path, params))
+        answer = self.answers[path]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def post(self, path, data=None):
+        self.sent.append(('POST', path, data))
+        return self.answers[path]
+
+
+@api.coroutine_endpoints
+class FakeAsyncApi(Endpoints):
+    """The same answers through the coroutine drivers"""
+
+    def __init__(self, answers, url='http://fake-async:9981'):
+        super().__init__({'url': url})
+        self.blocking = FakeApi(answers, url)
+
+    async def drive(self, calls):
+        try:
+            call = next(calls)
+            while True:
+                await asyncio.sleep(0)
+                try:
+                    if call.method == 'GET':
+                        result = self.blocking.get(call.path, call.params)
+                    else:
+                        result = self.blocking.post(call.path, call.data)
+                except Exception as e:
+                    call = calls.throw(e)
+                else:
+                    call = calls.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+
+def test_endpoints_parse_answers():
+    client = FakeApi({'/api/channel/grid': CHANNELS})
+    assert [channel.name for channel in client.channels()] == ['One', 'Two']
+    assert client.channel_uuid('Two') == 'c2'
+    assert client.channel_uuid('Three') is None
+
+
+def test_coroutine_client_shares_endpoints():
+    client = FakeAsyncApi({'/api/channel/grid': CHANNELS, '/api/dvr/entry/create': {'uuid': 'new'}})
+    assert asyncio.run(client.channel_uuid('One')) == 'c1'
+    assert asyncio.run(client.create_recording('c1', 10, 20, 'Title', comment='note')) == 'new'
+    method, path, data = client.blocking.sent[-1]
+    assert (method, path) == ('POST', '/api/dvr/entry/create')
+    assert json.loads(data['conf']) == {'start': 10, 'stop': 20, 'channel': 'c1', 'title': {'eng': 'Title'},
+                                        'comment': 'note'}
+
+
+def test_endpoint_wrappers_keep_signature_and_docs():
+    assert TVHApi.channel_uuid.__doc__ == Endpoints.channel_uuid.__doc__
+    assert asyncio.iscoroutinefunction(api.AioTVHApi.channels)
+    assert not asyncio.iscoroutinefunction(TVHApi.channels)
+
+
+def test_stream_profiles_fall_back_to_list_on_http_error():
+    answers = {'/api/profile/grid': http_error(403),
+               '/api/profile/list': {'entries': [{'key': 'p1', 'val': 'pass'}]}}
+    assert [profile.name for profile in FakeApi(answers).stream_profiles()] == ['pass']
+    answers['/api/profile/grid'] = ApiError("HTTP 403", 403)
+    assert [profile.name for profile in asyncio.run(FakeAsyncApi(answers).stream_profiles())] == ['pass']
+
+
+def test_stream_profiles_pass_other_errors_on():
+    client = FakeApi({'/api/profile/grid': requests.ConnectionError("down")})
+    with pytest.raises(requests.ConnectionError):
+        client.stream_profiles()
+
+
+def test_channel_grid_serves_last_good_answer():
+    answers = {'/api/channel/grid': CHANNELS}
+    url = 'http://fake-stale:9981'
+    assert FakeApi(answers, url).channel_grid() == (CHANNELS['entries'], False)
+    answers['/api/channel/grid'] = requests.ConnectionError("down")
+    assert FakeApi(answers, url).channel_grid() == (CHANNELS['entries'], True)
+    with pytest.raises(requests.ConnectionError):
+        FakeApi(answers, 'http://fake-never-answered:9981').channel_grid()
+
+
+def test_running_entries_filters_what_the_server_ignores():
+    answers = {'/api/dvr/entry/grid_upcoming': {'total': 2, 'entries': [
+        {'uuid': 'a', 'status': 'Running'}, {'uuid': 'b', 'status': 'Scheduled'}]}}
+    assert [entry.uuid for entry in FakeApi(answers).running_dvr_entries()] == ['a']
+
+
+def silent_server():
+    """A socket that accepts connections and never answers"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen()
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(listener.accept()), daemon=True).start()
+    return listener, f'http://127.0.0.1:{listener.getsockname()[1]}'
+
+
+def test_cancelled_aiohttp_probe_is_released():
+    pytest.importorskip('aiohttp')
+    listener, url = silent_server()
+    breaker = resilience.get_circuit_breaker(url)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= 1000
+
+    async def cancelled_request():
+        client = api.AioTVHApi({'url': url})
+        task = asyncio.ensure_future(client.server_info())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await client.close()
+
+    try:
+        asyncio.run(cancelled_request())
+    finally:
+        listener.close()
+    assert breaker.state == resilience.CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_entry_action_from_the_client_pool_does_not_wait_on_itself():
+    client = FakeApi({'/api/dvr/entry/stop': {}})
+    client.pool_size = 1
+    uuids = [f'e{i}' for i in range(3 * api.ACTION_BATCH_SIZE)]
+    future = client.executor.submit(client.stop_dvr_entries, uuids)
+    assert future.result(timeout=5) == len(uuids)
+    assert [len(json.loads(data['uuid'])) for _, _, data in client.sent] == [api.ACTION_BATCH_SIZE] * 3
+    client.close()
+
+
+def test_async_front_end_runs_entry_actions():
+    blocking = FakeApi({'/api/dvr/entry/cancel': {}})
+    progress = []
+    done = asyncio.run(api.AsyncTVHApi(blocking).cancel_dvr_entries(
+        ['a', 'b'], lambda done, total: progress.append((done, total))))
+    assert done == 2 and progress == [(2, 2)]
+    blocking.close()
@@ -0,0 +1,58 @@
+import random
+import re
+
+import pytest
+
+from tvhplayer import autorecord
+from tvhplayer.autorecord import Rule, RuleEngine, title_literals
+
+
+@pytest.mark.parametrize('pattern, literals', [
+    ('Doctor Who', ['doctor who']),
+    ('^News', ['news']),
+    (r'\bQuiz\b', ['quiz']),
+    ('^(Match of the Day)$', ['match of the day']),
+    ('(?:Top) Gear', ['top']),
+    ('(?P<show>Panorama)', ['panorama']),
+    ('(?i)Horizon', ['horizon']),
+    ('Simpsons|News', ['news', 'simpsons']),
+    ('Colou?r', ['colo']),
+    ('(The )?Bill', ['']),
+    ('(?=Doc)Doctor', ['']),
+    ('(Doctor|Mister) Who', ['']),
+    ('[Nn]ews', ['']),
+    ('News|.*', ['']),
+])
+def test_title_literals(pattern, literals):
+    assert title_literals(pattern) == literals
+
+
+def test_every_literal_is_in_every_match():
+    rng = random.Random(3)
+    for pattern in [r'\bQuiz\b', '^(Match) of', 'Simpsons|News|Quiz Night', '(?:Top) Gear', 'Colou?r']:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        for text in ['Quiz', 'The Big Quiz', 'Match of the Day', 'News at Ten', 'Top Gear', 'Color', 'colour',
+                     'Quiz Night', 'The Simpsons', ''.join(rng.choice('abc ') for _ in range(20))]:
+            if compiled.search(text):
+                assert any(literal in text.lower() for literal in title_literals(pattern)), (pattern, text)
+
+
+def test_engine_matches_like_the_patterns():
+    rng = random.Random(7)
+    words = ['news', 'quiz', 'match', 'day', 'doctor', 'who', 'gear', 'top', 'bill']
+    titles = [' '.join(rng.choice(words) for _ in range(rng.randrange(1, 4))).title() for _ in range(300)]
+    patterns = [r'\b{}\b', '^({})', '{}|Bill', '(?:{}) day', '{}', '(The )?{}', '[{}]']
+    rules = [Rule(f'r{i}', title=form.format(rng.choice(words)))
+             for i, form in enumerate(rng.choice(patterns) for _ in range(60))]
+    engine = RuleEngine(rules)
+    for title in titles:
+        expected = [rule for rule in rules if rule.pattern.search(title)]
+        assert engine.rules_for_title(title) == expected, title
+
+
+def test_rules_with_anchors_and_alternatives_are_indexed():
+    engine = RuleEngine([Rule('a', title=r'\bQuiz\b'), Rule('b', title='^(News)$'), Rule('c', title='Simpsons|News'),
+                         Rule('d', title='[Nn]ews')])
+    assert [rule.name for _, rule in engine.unindexed] == ['d']
+    assert {key for key, bucket in engine.indexed.items() if bucket} == {'qui', 'new', 'sim'}
+    assert autorecord.INDEX_LETTERS == 3
@@ -0,0 +1,183 @@
+import random
+import threading
+import time
+
+import pytest
+
+from tvhplayer import conflicts
+from tvhplayer.conflicts import Booking, ConflictAnalyser, IntervalTree
+
+
+def booking(channel, start, stop, title=None):
+    return Booking(channel, channel.upper(), title or f'{channel}@{start}', start, stop)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_interval_tree_matches_brute_force(seed):
+    rng = random.Random(seed)
+    intervals = []
+    for item in range(rng.randrange(0, 200)):
+        start = rng.randrange(0, 1000)
+        intervals.append((start, start + rng.randrange(1, 120), item))
+    tree = IntervalTree(intervals)
+    for _ in range(50):
+        start = rng.randrange(-50, 1100)
+        stop = start + rng.randrange(1, 200)
+        expected = {item for a, b, item in intervals if a < stop and b > start}
+        found = tree.overlapping(start, stop)
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+
+def test_interval_tree_is_half_open():
+    tree = IntervalTree([(0, 10, 'a'), (10, 20, 'b')])
+    assert tree.overlapping(10, 15) == ['b']
+    assert tree.overlapping(5, 10) == ['a']
+    assert sorted(tree.overlapping(9, 11)) == ['a', 'b']
+    assert IntervalTree().overlapping(0, 100) == []
+
+
+def test_no_conflict_with_free_tuners():
+    analyser = ConflictAnalyser([booking('a', 0, 100)], {}, tuners=2)
+    assert analyser.conflicts('b', 50, 150) == []
+
+
+def test_conflict_covers_only_the_overbooked_stretch():
+    analyser = ConflictAnalyser([booking('a', 0, 100), booking('b', 50, 200)], {}, tuners=2)
+    found = analyser.conflicts('c', 20, 300)
+    assert [(c.start, c.stop, c.needed) for c in found] == [(50, 100, 3)]
+    assert [b.channel_uuid for b in found[0].bookings] == ['a', 'b']
+
+
+def test_channels_on_one_mux_share_a_tuner():
+    muxes = {'a': ('m1',), 'b': ('m1',), 'c': ('m2',)}
+    analyser = ConflictAnalyser([booking('a', 0, 100), booking('c', 0, 100)], muxes, tuners=2)
+    assert analyser.conflicts('b', 0, 100) == []
+    assert ConflictAnalyser([booking('a', 0, 100), booking('c', 0, 100)], {}, tuners=2).conflicts('b', 0, 100)
+
+
+def test_channel_on_several_muxes_joins_a_tuned_one():
+    muxes = {'a': ('m1',), 'b': ('m2', 'm1')}
+    analyser = ConflictAnalyser([booking('a', 0, 100)], muxes, tuners=1)
+    assert analyser.conflicts('b', 0, 100) == []
+
+
+def test_the_event_itself_is_not_a_conflict():
+    analyser = ConflictAnalyser([booking('a', 0, 100)], {}, tuners=1)
+    assert analyser.conflicts('a', 0, 100) == []
+    assert analyser.conflicts('b', 0, 100)
+
+
+def test_unknown_tuner_count_never_conflicts():
+    assert ConflictAnalyser([booking('a', 0, 100)], {}, tuners=None).conflicts('b', 0, 100) == []
+
+
+def test_adjacent_stretches_with_the_same_recordings_merge():
+    analyser = ConflictAnalyser([booking('a', 0, 100), booking('b', 0, 100), booking('c', 40, 60)], {}, tuners=3)
+    assert [(c.start, c.stop) for c in analyser.conflicts('d', 0, 100)] == [(40, 60)]
+    analyser = ConflictAnalyser([booking('a', 0, 100), booking('b', 0, 50), booking('c', 50, 100)], {}, tuners=2)
+    assert [(c.start, c.stop) for c in analyser.conflicts('d', 0, 100)] == [(0, 50), (50, 100)]
+
+
+def test_added_booking_counts():
+    analyser = ConflictAnalyser([booking('a', 0, 100)], {}, tuners=2)
+    analyser.add(booking('b', 0, 100))
+    assert analyser.conflicts('c', 0, 100)
+
+
+class SlowLoads:
+    """Stands in for load_analyser; loads after the first wait until released"""
+
+    def __init__(self, wait_from=2):
+        self.release = threading.Event()
+        self.bookings = [booking('a', 0, 100)]
+        self.count = 0
+        self.wait_from = wait_from
+        self.fail = False
+
+    def __call__(self, api, tuners=None):
+        self.count += 1
+        if self.count >= self.wait_from:
+            assert self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("server down")
+        return ConflictAnalyser(list(self.bookings), {}, tuners=1)
+
+
+@pytest.fixture
+def slow_loads(monkeypatch):
+    loads = SlowLoads()
+    monkeypatch.setattr(conflicts, 'load_analyser', loads)
+    monkeypatch.setattr(conflicts, '_analysers', {})
+    monkeypatch.setattr(conflicts, '_loads', {})
+    yield loads
+    loads.release.set()
+
+
+def wait_for(condition):
+    for _ in range(250):
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_stale_analyser_is_served_while_reloading(slow_loads):
+    server = {'url': 'http://conflicts:9981'}
+    first = conflicts.analyser_for(server, None)
+    assert conflicts.analyser_for(server, None) is first and slow_loads.count == 1
+    first.loaded -= conflicts.MAX_AGE + 1
+
+    started = time.monotonic()
+    assert conflicts.analyser_for(server, None) is first
+    # The lock is free during the load
+    conflicts.add_booking(server, booking('b', 200, 300))
+    assert conflicts.analyser_for(server, None) is first
+    assert time.monotonic() - started < 1
+    assert wait_for(lambda: slow_loads.count == 2)
+    conflicts.analyser_for(server, None)
+    assert slow_loads.count == 2  # one reload at a time
+
+    slow_loads.release.set()
+    assert wait_for(lambda: conflicts.analyser_for(server, None) is not first)
+    fresh = conflicts.analyser_for(server, None)
+    # The booking added during the reload is carried over, once
+    assert [b.channel_uuid for b in fresh.tree.overlapping(0, 1000)].count('b') == 1
+
+
+def test_callers_during_the_first_load_wait_for_it(slow_loads):
+    slow_loads.wait_from = 1
+    server = {'url': 'http://conflicts-first:9981'}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(conflicts.analyser_for(server, None)))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: slow_loads.count == 1)
+    time.sleep(0.1)
+    slow_loads.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert slow_loads.count == 1
+    assert len(results) == 3 and results[0] is results[1] is results[2]
+
+
+def test_failed_first_load_is_raised_and_tried_again(slow_loads):
+    server = {'url': 'http://conflicts-down:9981'}
+    slow_loads.fail = True
+    with pytest.raises(ConnectionError):
+        conflicts.analyser_for(server, None)
+    slow_loads.fail = False
+    slow_loads.release.set()
+    assert len(conflicts.analyser_for(server, None)) == 1
+
+
+def test_failed_reload_keeps_the_old_analyser(slow_loads):
+    server = {'url': 'http://conflicts-flaky:9981'}
+    first = conflicts.analyser_for(server, None)
+    first.loaded -= conflicts.MAX_AGE + 1
+    slow_loads.fail = True
+    slow_loads.release.set()
+    assert conflicts.analyser_for(server, None) is first
+    assert wait_for(lambda: not conflicts._loads)
+    assert conflicts.analyser_for(server, None) is first
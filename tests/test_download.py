@@ -0,0 +1,151 @@
+import json
+import os
+
+import pytest
+import requests
+
+from tvhplayer import api, download
+from tvhplayer.download import Download, DownloadManager, RateLimiter
+
+CHUNK = 64 * 1024
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep in the download module"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(download.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(download.time, 'sleep', clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def client(file_server):
+    client = api.TVHApi(file_server.config)
+    yield client
+    client.close()
+
+
+def file_download(file_server, client, tmp_path, **kwargs):
+    return Download(client.session, client.dvr_file_url('rec'), str(tmp_path / 'rec.ts'),
+                    chunk_size=CHUNK, **kwargs)
+
+
+def test_download_sends_the_server_credentials(file_server, client, tmp_path):
+    job = file_download(file_server, client, tmp_path)
+    job.run()
+    assert job.state == download.DONE, job.error
+    assert (tmp_path / 'rec.ts').read_bytes() == file_server.content
+    assert not os.path.exists(job.part_path) and not os.path.exists(job.journal_path)
+
+
+def test_download_without_credentials_fails(file_server, tmp_path):
+    job = Download(requests.Session(), file_server.url + '/dvrfile/rec', str(tmp_path / 'rec.ts'))
+    job.run()
+    assert job.state == download.FAILED and '401' in job.error
+
+
+def test_download_resumes_from_the_journal(file_server, client, tmp_path):
+    content = file_server.content
+    job = file_download(file_server, client, tmp_path, size=len(content))
+    done = [0, 1, 5]
+    with open(job.part_path, 'wb') as f:
+        f.truncate(len(content))
+        for index in done:
+            f.seek(index * CHUNK)
+            f.write(content[index * CHUNK:(index + 1) * CHUNK])
+    with open(job.journal_path, 'w') as f:
+        json.dump({'url': job.url, 'size': len(content), 'chunk_size': CHUNK, 'done': done}, f)
+
+    job.run()
+    assert job.state == download.DONE, job.error
+    assert (tmp_path / 'rec.ts').read_bytes() == content
+    fetched = sorted(int(header.split('=')[1].split('-')[0]) // CHUNK for header in file_server.requests)
+    assert fetched == [i for i in range(len(content) // CHUNK) if i not in done]
+
+
+def test_download_starts_over_when_the_journal_does_not_match(file_server, client, tmp_path):
+    content = file_server.content
+    job = file_download(file_server, client, tmp_path, size=len(content))
+    with open(job.part_path, 'wb') as f:
+        f.truncate(len(content))
+    with open(job.journal_path, 'w') as f:
+        json.dump({'url': job.url, 'size': len(content), 'chunk_size': CHUNK * 2, 'done': [0]}, f)
+
+    job.run()
+    assert (tmp_path / 'rec.ts').read_bytes() == content
+    assert len(file_server.requests) == len(content) // CHUNK
+
+
+def test_download_journal_records_finished_chunks(file_server, client, tmp_path):
+    job = file_download(file_server, client, tmp_path)
+    job.size = len(file_server.content)
+    job._prepare()
+    job._fetch_chunk(2)
+    with open(job.journal_path) as f:
+        assert json.load(f)['done'] == [2]
+    assert job.received == CHUNK
+
+
+def test_rate_limiter_unlimited_never_waits(clock):
+    limiter = RateLimiter()
+    for _ in range(100):
+        limiter.consume(10 ** 9)
+    assert clock.slept == []
+
+
+def test_rate_limiter_keeps_to_the_rate(clock):
+    limiter = RateLimiter(1000)
+    for _ in range(10):
+        limiter.consume(500)
+    assert sum(clock.slept) == pytest.approx(5.0)
+
+
+def test_rate_limiter_bursts_up_to_one_second(clock):
+    limiter = RateLimiter(1000)
+    clock.now += 60
+    limiter.consume(1000)
+    assert clock.slept == []
+    limiter.consume(250)
+    assert clock.slept == [pytest.approx(0.25)]
+
+
+def test_rate_limiter_overdraws(clock):
+    limiter = RateLimiter(1000)
+    limiter.consume(3000)
+    assert clock.slept == [pytest.approx(3.0)]
+
+
+def test_rate_limiter_new_rate_applies_at_once(clock):
+    limiter = RateLimiter(1000)
+    limiter.set_rate(0)
+    limiter.consume(10 ** 6)
+    limiter.set_rate(2000)
+    limiter.consume(1000)
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_manager_reports_changes(tmp_path):
+    changed = []
+    manager = DownloadManager(on_change=changed.append)
+    job = Download(requests.Session(), 'http://127.0.0.1:9/dvrfile/x', str(tmp_path / 'x.ts'))
+    manager.add(job, start=False)
+    manager.resume(job)
+    manager.pause(job)
+    manager.remove(job)
+    assert len(changed) >= 4 and set(map(id, changed)) == {id(job)}
+    assert manager.unfinished() == []
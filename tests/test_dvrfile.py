@@ -0,0 +1,81 @@
+import time
+
+import pytest
+import requests
+
+from tvhplayer import api, dvrfile
+from tvhplayer.dvrfile import RangeNotSupported, RangeReader
+
+
+def reader_for(file_server, **kwargs):
+    client = api.TVHApi(file_server.config)
+    return client, RangeReader(client.session, client.dvr_file_url('rec'), **kwargs)
+
+
+def wait_for(condition):
+    for _ in range(250):
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_range_reader_sends_the_server_credentials(file_server):
+    client, reader = reader_for(file_server, block_size=64 * 1024)
+    try:
+        assert reader.open() == len(file_server.content)
+        reader.seek(100000)
+        assert reader.read(1000) == file_server.content[100000:101000]
+    finally:
+        reader.close()
+        client.close()
+
+
+def test_range_reader_refuses_servers_without_ranges(file_server):
+    file_server.ranges = False
+    client, reader = reader_for(file_server)
+    with pytest.raises(RangeNotSupported):
+        reader.open()
+    client.close()
+
+
+class FlakySession:
+    """Wraps a session; requests for the range starting at `failing` raise while `down` is set"""
+
+    def __init__(self, session, failing):
+        self.session = session
+        self.failing = f'bytes={failing}-'
+        self.down = True
+        self.failures = 0
+
+    def get(self, url, headers=None, **kwargs):
+        if self.down and headers['Range'].startswith(self.failing):
+            self.failures += 1
+            raise requests.ConnectionError("connection reset")
+        return self.session.get(url, headers=headers, **kwargs)
+
+
+def test_read_ahead_backs_off_and_leaves_a_failing_block_to_read(file_server, monkeypatch):
+    monkeypatch.setattr(dvrfile, 'PREFETCH_RETRY_DELAY', 0.05)
+    block_size = 64 * 1024
+    client = api.TVHApi(file_server.config)
+    session = FlakySession(client.session, block_size)
+    reader = RangeReader(session, client.dvr_file_url('rec'), block_size=block_size)
+    try:
+        started = time.monotonic()
+        reader.open()
+        last = reader.block_count - 1
+        assert wait_for(lambda: reader.failures.get(1) == dvrfile.PREFETCH_ATTEMPTS and last in reader.blocks)
+        # Waits of 0.05, 0.1 and 0.2 s between the attempts
+        assert time.monotonic() - started >= 0.35
+        time.sleep(0.2)
+        assert session.failures == dvrfile.PREFETCH_ATTEMPTS
+        assert 1 not in reader.blocks
+
+        session.down = False
+        reader.seek(block_size + 10)
+        assert reader.read(100) == file_server.content[block_size + 10:block_size + 110]
+        assert 1 not in reader.failures
+    finally:
+        reader.close()
+        client.close()
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+from tvhplayer import latency
+from tvhplayer.latency import LatencyMeter, parse_tdt, serve_test_feed, tdt_packet, ts_packet
+
+
+@pytest.fixture
+def test_feed():
+    server = serve_test_feed(delay=2.0)
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+def test_measures_the_test_feed_delay(test_feed):
+    report = latency.measure(test_feed, duration=1.5)
+    assert report['source'] == 'pcr'
+    assert report['source_delay'] == pytest.approx(2.0, abs=0.2)
+    assert report['pts_lead'] == pytest.approx(0.5, abs=0.01)
+    assert report['glass_to_glass'] == pytest.approx(report['source_delay'] + report['pts_lead'])
+    assert report['pcr_samples'] >= 10
+
+
+def test_tdt_round_trip():
+    now = time.time()
+    assert parse_tdt(tdt_packet(now)) == int(now)
+    assert parse_tdt(tdt_packet(now, delay=2.0)) == int(now - 2.0)
+    assert parse_tdt(ts_packet(latency.TDT_PID, b'\x00\x42', pusi=True)) is None
+
+
+def test_stream_split_at_odd_offsets():
+    meter = LatencyMeter()
+    data = b''.join(b''.join(latency.test_feed_packets(1000 + i * 0.04, delay=1.0)) for i in range(20))
+    for offset in range(0, len(data), 100):
+        meter.feed(data[offset:offset + 100], arrival=1000 + offset / len(data) * 0.8)
+    report = meter.report()
+    assert meter.packets == len(data) // latency.TS_PACKET_SIZE
+    assert report['pcr_samples'] == 20
+    assert report['source'] == 'pcr'
+
+
+def test_tdt_is_used_without_a_wall_clock_pcr():
+    meter = LatencyMeter()
+    now = time.time()
+    for i in range(20):
+        meter.feed(ts_packet(0x100, pcr=i * 0.04), arrival=now + i * 0.04)
+    meter.feed(tdt_packet(now, delay=3.0), arrival=now)
+    report = meter.report()
+    assert report['source'] == 'tdt'
+    assert report['source_delay'] == pytest.approx(3.0, abs=1.0)
+    assert report['jitter_ms'] == pytest.approx(0.0, abs=0.01)
@@ -0,0 +1,111 @@
+import pytest
+import requests
+
+from tvhplayer import resilience
+from tvhplayer.resilience import CircuitBreaker, CircuitOpenError
+
+
+def tripped_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def expire(breaker):
+    breaker.opened_at -= 1000
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_in() > 0
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = tripped_breaker()
+    expire(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes():
+    breaker = tripped_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_failed_probe_backs_off():
+    breaker = tripped_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.reset_timeout == 20.0
+    assert not breaker.allow_request()
+
+
+def test_released_probe_can_be_repeated():
+    breaker = tripped_breaker()
+    expire(breaker)
+    breaker.allow_request()
+    breaker.release_probe()
+    assert breaker.allow_request()
+
+
+class RaisingSession:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def request(self, *args, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+def half_open_server(url):
+    server = {'url': url}
+    breaker = resilience.get_circuit_breaker(url)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    expire(breaker)
+    return server, breaker
+
+
+@pytest.mark.parametrize('error', [
+    requests.exceptions.ChunkedEncodingError("broken body"),
+    requests.exceptions.TooManyRedirects("loop"),
+    requests.exceptions.InvalidURL("bad"),
+])
+def test_probe_failing_with_other_request_errors_reopens(error):
+    server, breaker = half_open_server(f'http://breaker-{type(error).__name__}.invalid')
+    with pytest.raises(type(error)):
+        resilience.request(server, 'GET', '/api/serverinfo', session=RaisingSession(error))
+    assert breaker.state == CircuitBreaker.OPEN
+    expire(breaker)
+    assert breaker.allow_request()
+
+
+def test_interrupted_probe_is_released():
+    server, breaker = half_open_server('http://breaker-interrupted.invalid')
+    with pytest.raises(KeyboardInterrupt):
+        resilience.request(server, 'GET', '/api/serverinfo', session=RaisingSession(KeyboardInterrupt()))
+    assert breaker.allow_request()
+
+
+def test_open_circuit_refuses_without_sending():
+    server, breaker = half_open_server('http://breaker-open.invalid')
+    breaker.allow_request()
+    breaker.record_failure()
+    session = RaisingSession(AssertionError("must not be sent"))
+    with pytest.raises(CircuitOpenError):
+        resilience.request(server, 'GET', '/api/serverinfo', session=session)
+    assert session.calls == 0
@@ -0,0 +1,141 @@
+import json
+import time
+
+import pytest
+
+from tvhplayer import scheduler
+from tvhplayer.scheduler import LocalJob, LocalScheduler
+
+
+class FakeProcess:
+    """Stands in for the ffmpeg process of a capture"""
+
+    def __init__(self):
+        self.returncode = None
+        self.terminated = False
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.terminated = True
+        self.returncode = -15
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def kill(self):
+        self.returncode = -9
+
+
+class FakeCaptures:
+    """start_capture that writes a little data into each part and records the call"""
+
+    def __init__(self):
+        self.started = []  # (job id, path, seconds)
+        self.processes = []
+
+    def __call__(self, job, path, seconds):
+        with open(path, 'wb') as f:
+            f.write(b'\x47' * 188)
+        self.started.append((job.id, path, seconds))
+        self.processes.append(FakeProcess())
+        return self.processes[-1]
+
+
+@pytest.fixture
+def captures():
+    return FakeCaptures()
+
+
+def make_job(tmp_path, start, stop, **kwargs):
+    return LocalJob('http://tvh:9981', 'c1', 'One', 'News', start, stop, str(tmp_path / 'News.ts'),
+                    pre_padding=60, post_padding=60, **kwargs)
+
+
+def test_stale_heap_entries_are_skipped(tmp_path, captures):
+    now = time.time()
+    local = LocalScheduler(str(tmp_path / 'schedule.json'), captures)
+    removed = make_job(tmp_path, now + 600, now + 1200)
+    assert local.add(removed)
+    local.remove(removed.id)
+    assert local.next_wakeup() is None
+
+    job = make_job(tmp_path, now + 600, now + 1200)
+    local.add(job)
+    # A second START for the job is skipped once the first one started it
+    local._push(job.begin, scheduler.START, job)
+    local.run_due(now=job.begin)
+    assert len(captures.started) == 1 and job.state == scheduler.RECORDING
+
+    # Removing a recording job leaves its CHECK and STOP events behind
+    local.remove(job.id)
+    assert captures.processes[0].terminated
+    assert local.next_wakeup() is None
+    local.run_due(now=job.end + scheduler.STOP_GRACE)
+    assert len(captures.started) == 1
+
+
+def test_job_journaled_as_recording_catches_up(tmp_path, captures):
+    now = time.time()
+    journal = tmp_path / 'schedule.json'
+    job = make_job(tmp_path, now - 600, now + 600, state=scheduler.RECORDING)
+    first_part = tmp_path / 'News.ts'
+    first_part.write_bytes(b'\x47' * 188)
+    job.captures = [str(first_part)]
+    journal.write_text(json.dumps([job.to_dict()]))
+
+    finished = []
+    local = LocalScheduler(str(journal), captures, on_finished=finished.append)
+    resumed = local.jobs[job.id]
+    assert resumed.state == scheduler.SCHEDULED
+    # The rest of the window is recorded into a new part
+    later = time.time()
+    assert local.next_wakeup() <= later
+    local.run_due(now=later)
+    assert captures.started == [(job.id, str(tmp_path / 'News (2).ts'), pytest.approx(job.end - later))]
+    assert resumed.state == scheduler.RECORDING
+    assert resumed.captures == [str(first_part), str(tmp_path / 'News (2).ts')]
+
+    local.run_due(now=job.end + scheduler.STOP_GRACE)
+    assert resumed.state == scheduler.DONE and finished == [resumed]
+    assert json.loads(journal.read_text())[0]['state'] == scheduler.DONE
+
+
+def test_capture_that_died_early_restarts_into_a_new_part(tmp_path, captures):
+    now = time.time()
+    finished = []
+    local = LocalScheduler(str(tmp_path / 'schedule.json'), captures, on_finished=finished.append)
+    job = make_job(tmp_path, now + 600, now + 1200)
+    local.add(job)
+    local.run_due(now=job.begin)
+    assert len(captures.started) == 1
+
+    # Still running at the first check: nothing happens
+    local.run_due(now=job.begin + scheduler.CHECK_INTERVAL)
+    assert len(captures.started) == 1
+
+    captures.processes[0].returncode = 1
+    restart = job.begin + 2 * scheduler.CHECK_INTERVAL
+    local.run_due(now=restart)
+    assert [path for _, path, _ in captures.started] == [str(tmp_path / 'News.ts'), str(tmp_path / 'News (2).ts')]
+    assert captures.started[1][2] == pytest.approx(job.end - restart)
+    assert job.state == scheduler.RECORDING
+
+    local.run_due(now=job.end + scheduler.STOP_GRACE)
+    assert job.state == scheduler.DONE and finished == [job]
+    assert job.captures == [str(tmp_path / 'News.ts'), str(tmp_path / 'News (2).ts')]
+    assert captures.processes[1].terminated
+
+
+def test_capture_dying_near_the_end_is_not_restarted(tmp_path, captures):
+    now = time.time()
+    local = LocalScheduler(str(tmp_path / 'schedule.json'), captures)
+    job = make_job(tmp_path, now + 600, now + 1200)
+    local.add(job)
+    local.run_due(now=job.begin)
+    captures.processes[0].returncode = 0
+    local.run_due(now=job.end - scheduler.MIN_RESTART_SECONDS / 2)
+    assert len(captures.started) == 1
+    local.run_due(now=job.end + scheduler.STOP_GRACE)
+    assert job.state == scheduler.DONE
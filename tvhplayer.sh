@@ -1,3 +1,2 @@
 #!/bin/bash
-cd /app/share/tvhplayer
-python3 tvhplayer.py "$@" 
\ No newline at end of file
+exec python3 /app/share/tvhplayer/cli.py "$@"
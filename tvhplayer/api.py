@@ -0,0 +1,916 @@
+"""Qt-free client for the TVHeadend HTTP API.
+
+URL building, authentication and JSON parsing for every endpoint the player
+uses live here, so the rest of the code never touches raw responses. Results
+are small immutable NamedTuples. All calls go through the retry / circuit
+breaker policy in `resilience` over one pooled keep-alive session per server.
+"""
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import quote
+
+try:
+    from . import resilience
+except ImportError:
+    import resilience
+
+
+# ETSI EN 300 468 content nibble level 1
+GENRE_NAMES = {
+    0x1: 'Movie/Drama',
+    0x2: 'News/Current affairs',
+    0x3: 'Show/Game show',
+    0x4: 'Sports',
+    0x5: 'Children/Youth',
+    0x6: 'Music/Ballet/Dance',
+    0x7: 'Arts/Culture',
+    0x8: 'Social/Political/Economics',
+    0x9: 'Education/Science',
+    0xA: 'Leisure/Hobbies',
+    0xB: 'Special characteristics',
+}
+
+# DVB service_type values of radio services (ETSI EN 300 468 table 87):
+# digital radio sound, FM radio and advanced codec digital radio sound
+RADIO_SERVICE_TYPES = {0x02, 0x07, 0x0A}
+
+
+def genre_text(genres):
+    """Return readable genre names for a list of ETSI content codes"""
+    names = []
+    for code in genres or []:
+        try:
+            name = GENRE_NAMES.get(int(code) >> 4)
+        except (TypeError, ValueError):
+            continue
+        if name and name not in names:
+            names.append(name)
+    return ', '.join(names)
+
+
+def radio_channel_uuids(entries, tags, radio_services):
+    """UUIDs of the radio channels among raw channel grid entries.
+
+    A channel is radio if one of its services has a radio service type or it
+    carries a tag named like "Radio" (TVHeadend's type-based tags, or the
+    user's own). `tags` maps tag uuid to name.
+    """
+    radio_tags = {uuid for uuid, name in tags.items() if 'radio' in name.lower()}
+    return {entry['uuid'] for entry in entries
+            if radio_tags.intersection(entry.get('tags') or ())
+            or radio_services.intersection(entry.get('services') or ())}
+
+
+def service_mux_map(entries):
+    """Map of service uuid to mux uuid from raw service grid entries"""
+    # Older servers only have the mux's name, which still tells muxes apart
+    return {entry['uuid']: entry.get('multiplex_uuid') or entry.get('multiplex')
+            for entry in entries if entry.get('multiplex_uuid') or entry.get('multiplex')}
+
+
+def localized(value):
+    """EPG and DVR text fields may be plain strings or {language: text} dicts"""
+    if isinstance(value, dict):
+        return value.get('eng') or next(iter(value.values()), '')
+    return value or ''
+
+
+class Channel(NamedTuple):
+    uuid: str
+    name: str
+    number: int
+    icon: str
+    enabled: bool
+    tags: Tuple[str, ...]
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(
+            entry.get('uuid', ''),
+            entry.get('name', 'Unknown Channel'),
+            entry.get('number') or 0,
+            entry.get('icon_public_url') or '',
+            entry.get('enabled', True),
+            tuple(entry.get('tags') or ()),
+        )
+
+
+class StreamProfile(NamedTuple):
+    uuid: str
+    name: str
+    transcode: bool
+    bitrate: int  # video kb/s of a transcode profile, 0 when unknown
+
+    @classmethod
+    def from_grid(cls, entry):
+        # Transcode profiles are the ones with video codec settings; the
+        # field names differ between TVHeadend 4.2 and 4.3
+        transcode = any('vcodec' in key for key in entry)
+        bitrate = entry.get('vbitrate') or entry.get('bit_rate') or 0
+        return cls(entry.get('uuid', ''), entry.get('name', ''), transcode, int(bitrate or 0))
+
+    @classmethod
+    def from_list(cls, entry):
+        # The plain list has names only; go by TVHeadend's naming of transcode profiles
+        name = entry.get('val', '')
+        transcode = 'transcode' in name.lower() or name.startswith('webtv-')
+        return cls(entry.get('key', ''), name, transcode, 0)
+
+
+class DVREntry(NamedTuple):
+    uuid: str
+    title: str
+    subtitle: str
+    channel_uuid: str
+    channel_name: str
+    start: int
+    stop: int
+    duration: int
+    status: str
+    sched_status: str
+    errors: int
+    errorcode: int
+    error: str
+    filename: str
+    filesize: int
+    episode: str
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(
+            entry.get('uuid', ''),
+            entry.get('disp_title') or localized(entry.get('title')) or 'Unknown',
+            entry.get('disp_subtitle') or localized(entry.get('subtitle')),
+            entry.get('channel', ''),
+            entry.get('channelname', 'Unknown'),
+            entry.get('start', 0),
+            entry.get('stop', 0),
+            entry.get('duration', 0),
+            entry.get('status', ''),
+            entry.get('sched_status', ''),
+            entry.get('errors') or 0,
+            entry.get('errorcode') or 0,
+            entry.get('error') or '',
+            entry.get('filename') or '',
+            entry.get('filesize') or 0,
+            localized(entry.get('episode_disp') or entry.get('episode')),
+        )
+
+    @property
+    def is_recording(self):
+        return self.status in ('Running', 'recording')
+
+    @property
+    def state(self):
+        """One of 'recording', 'scheduled', 'finished', 'failed', or '' if unknown"""
+        status = self.status.lower()
+        if self.is_recording:
+            return 'recording'
+        if 'scheduled' in status or self.sched_status.lower() == 'scheduled':
+            return 'scheduled'
+        if 'completed' in status or status == 'finished':
+            return 'finished'
+        if ('failed' in status or 'invalid' in status or 'error' in status
+                or self.errors > 0 or self.errorcode != 0):
+            return 'failed'
+        return ''
+
+    @property
+    def error_message(self):
+        if self.error:
+            return self.error
+        if self.errors > 0:
+            return f"Recording failed with {self.errors} errors"
+        if self.errorcode != 0:
+            return f"Error code: {self.errorcode}"
+        return "Unknown error"
+
+
+class EPGEvent(NamedTuple):
+    event_id: int
+    channel_uuid: str
+    channel_name: str
+    channel_number: str
+    start: int
+    stop: int
+    title: str
+    subtitle: str
+    summary: str
+    description: str
+    genre: str
+    episode: str
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(
+            entry.get('eventId'),
+            entry.get('channelUuid', ''),
+            entry.get('channelName', ''),
+            str(entry.get('channelNumber', '')),
+            entry.get('start', 0),
+            entry.get('stop', 0),
+            localized(entry.get('title')),
+            localized(entry.get('subtitle')),
+            localized(entry.get('summary')),
+            localized(entry.get('description')),
+            genre_text(entry.get('genre')),
+            entry.get('episodeOnscreen') or entry.get('episodeUri') or '',
+        )
+
+
+class ServerInfo(NamedTuple):
+    sw_version: str
+    api_version: str
+    name: str
+    capabilities: Tuple[str, ...]
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            str(data.get('sw_version', 'Unknown')),
+            str(data.get('api_version', 'Unknown')),
+            str(data.get('server_name', 'Unknown')),
+            tuple(data.get('capabilities') or ()),
+        )
+
+
+class InputStatus(NamedTuple):
+    uuid: str
+    input: str
+    stream: str
+    subs: int
+    weight: int
+    signal: Optional[int]
+    signal_scale: int
+    snr: Optional[int]
+    snr_scale: int
+    ber: int
+    unc: int
+    bps: int
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(
+            entry.get('uuid', ''),
+            str(entry.get('input', 'Unknown')),
+            str(entry.get('stream', 'N/A')),
+            entry.get('subs', 0),
+            entry.get('weight', 0),
+            entry.get('signal'),
+            entry.get('signal_scale', 0),
+            entry.get('snr'),
+            entry.get('snr_scale', 0),
+            entry.get('ber', 0),
+            entry.get('unc', 0),
+            entry.get('bps', 0),
+        )
+
+
+class Connection(NamedTuple):
+    id: int
+    peer: str
+    user: str
+    started: int
+    type: str
+
+    @classmethod
+    def from_json(cls, entry):
+        return cls(
+            entry.get('id', 0),
+            str(entry.get('peer', 'Unknown')),
+            str(entry.get('user', 'N/A')),
+            entry.get('started', 0),
+            entry.get('type', ''),
+        )
+
+
+class Subscription(NamedTuple):
+    id: int
+    channel: str
+    username: str
+    hostname: str
+    start: int
+    state: str
+    service: str
+    errors: int
+
+    @classmethod
+    def from_json(cls, entry):
+        channel = entry.get('channel', 'Unknown')
+        if isinstance(channel, dict):
+            channel = channel.get('name', 'Unknown')
+        return cls(
+            entry.get('id', 0),
+            str(channel),
+            str(entry.get('username', 'N/A')),
+            str(entry.get('hostname', '')),
+            entry.get('start', 0),
+            str(entry.get('state', 'Unknown')),
+            str(entry.get('service', '')),
+            entry.get('errors', 0),
+        )
+
+
+# The split DVR grids; the server filters and pages them, unlike the full grid
+DVR_GRIDS = ('upcoming', 'finished', 'failed', 'removed')
+
+# Entries per DVR action request; bigger selections are split into several
+# requests that run concurrently
+ACTION_BATCH_SIZE = 100
+ACTION_CONCURRENCY = 4
+
+# idnode grid filter that keeps only the entries being recorded now
+RUNNING_FILTER = json.dumps([{'type': 'string', 'field': 'sched_status', 'value': 'recording'}])
+
+
+def action_batches(uuids):
+    uuids = list(uuids)
+    return [uuids[i:i + ACTION_BATCH_SIZE] for i in range(0, len(uuids), ACTION_BATCH_SIZE)]
+
+
+def dvr_grid_request(kind, start, limit, sort, direction, filter):
+    if kind not in DVR_GRIDS:
+        raise ValueError(f"Unknown DVR grid: {kind}")
+    params = {'start': start, 'limit': limit, 'sort': sort, 'dir': direction}
+    if filter:
+        params['filter'] = filter
+    return f'/api/dvr/entry/grid_{kind}', params
+
+
+class ApiError(Exception):
+    """An HTTP error status returned by the async client"""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+def is_http_error(error):
+    """True for an HTTP error status from either client"""
+    return isinstance(error, ApiError) or getattr(error, 'response', None) is not None
+
+
+class Call(NamedTuple):
+    """One request of an endpoint, for the client's transport to send"""
+    method: str
+    path: str
+    params: Optional[dict] = None
+    data: Optional[dict] = None
+
+
+class Endpoints:
+    """What every API call sends and how its answer is read, for any transport.
+
+    Each call is a generator that yields Calls, is sent their decoded JSON
+    (or has the transport's error thrown in) and returns the result. TVHApi
+    and AioTVHApi drive them with blocking and aiohttp requests; see
+    `blocking_endpoints` and `coroutine_endpoints`. Inside a call, other
+    calls are reached as `yield from Endpoints.name(self, ...)`.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.base_url = resilience.normalize_url(server['url'])
+
+    # Channels and streams
+
+    def channel_grid(self, limit=10000):
+        """Return (entries, stale): raw channel grid entries, possibly from the last good response"""
+        path, params = '/api/channel/grid', {'limit': limit}
+        try:
+            data = yield Call('GET', path, params)
+        except Exception:
+            cached = resilience.last_response(self.server, path, params)
+            if cached is None:
+                raise
+            print(f"Debug: Serving cached response for {path}")
+            return cached['entries'], True
+        resilience.remember_response(self.server, path, params, data)
+        return data['entries'], False
+
+    def channels(self) -> List[Channel]:
+        entries, _ = yield from Endpoints.channel_grid(self)
+        return [Channel.from_json(entry) for entry in entries]
+
+    def channel_uuid(self, name) -> Optional[str]:
+        """Look up a channel by its exact name"""
+        entries, _ = yield from Endpoints.channel_grid(self)
+        for entry in entries:
+            if entry.get('name') == name:
+                return entry.get('uuid')
+        return None
+
+    def channel_tags(self):
+        """Map of channel tag uuid to name"""
+        data = yield Call('GET', '/api/channeltag/list')
+        return {entry['key']: entry.get('val', '') for entry in data.get('entries', [])}
+
+    def radio_service_uuids(self):
+        """UUIDs of the services with a radio service type; needs admin access"""
+        data = yield Call('GET', '/api/mpegts/service/grid', {'limit': 100000})
+        return {entry['uuid'] for entry in data.get('entries', [])
+                if entry.get('dvb_servicetype') in RADIO_SERVICE_TYPES}
+
+    def service_muxes(self):
+        """Map of service uuid to the mux carrying it; needs admin access"""
+        data = yield Call('GET', '/api/mpegts/service/grid', {'limit': 100000})
+        return service_mux_map(data.get('entries', []))
+
+    def stream_profiles(self) -> List[StreamProfile]:
+        """The server's enabled stream profiles.
+
+        The profile grid tells transcode profiles and their bitrates apart but
+        needs admin access; other accounts get the names from the plain list.
+        """
+        try:
+            data = yield Call('GET', '/api/profile/grid', {'limit': 1000})
+        except Exception as error:
+            if not is_http_error(error):
+                raise
+            data = yield Call('GET', '/api/profile/list')
+            return [StreamProfile.from_list(e) for e in data.get('entries', [])]
+        return [StreamProfile.from_grid(e) for e in data.get('entries', []) if e.get('enabled', True)]
+
+    def _url_base(self, embed_auth):
+        base_url = self.base_url
+        auth = resilience.server_auth(self.server)
+        if embed_auth and auth:
+            scheme, rest = base_url.split('://', 1)
+            base_url = f"{scheme}://{quote(auth[0], safe='')}:{quote(auth[1], safe='')}@{rest}"
+        return base_url
+
+    def stream_url(self, channel_uuid, embed_auth=False, profile=None):
+        """URL of a channel's live stream, through `profile` if given.
+
+        Players and ffmpeg can't be handed a requests auth object, so
+        `embed_auth` puts the credentials into the URL instead.
+        """
+        url = f'{self._url_base(embed_auth)}/stream/channel/{channel_uuid}'
+        if profile:
+            url += f"?profile={quote(profile, safe='')}"
+        return url
+
+    def dvr_file_url(self, entry_uuid, embed_auth=False):
+        """URL of a finished recording's file; the server answers Range requests"""
+        return f'{self._url_base(embed_auth)}/dvrfile/{entry_uuid}'
+
+    # DVR
+
+    def dvr_page(self, kind, start=0, limit=50, sort='start', direction='ASC',
+                 filter=None) -> Tuple[int, List[DVREntry]]:
+        """Return (total, entries) for one page of the 'upcoming', 'finished',
+        'failed' or 'removed' grid, sorted by `sort` on the server"""
+        data = yield Call('GET', *dvr_grid_request(kind, start, limit, sort, direction, filter))
+        entries = data.get('entries', [])
+        return data.get('total', start + len(entries)), [DVREntry.from_json(e) for e in entries]
+
+    def running_dvr_entries(self) -> List[DVREntry]:
+        """The entries being recorded now"""
+        _, entries = yield from Endpoints.dvr_page(self, 'upcoming', limit=1000, filter=RUNNING_FILTER)
+        # Servers that ignore the filter return all upcoming entries
+        return [entry for entry in entries if entry.is_recording]
+
+    def create_dvr_entry(self, conf):
+        """Create a DVR entry from a raw conf dict; returns its uuid"""
+        data = yield Call('POST', '/api/dvr/entry/create', data={'conf': json.dumps(conf)})
+        return data.get('uuid', '')
+
+    def create_recording(self, channel_uuid, start, stop, title, subtitle=None,
+                         description=None, comment=None, lang='eng'):
+        conf = {
+            'start': start,
+            'stop': stop,
+            'channel': channel_uuid,
+            'title': {lang: title},
+        }
+        if subtitle is not None:
+            conf['subtitle'] = {lang: subtitle}
+        if description is not None:
+            conf['description'] = {lang: description}
+        if comment is not None:
+            conf['comment'] = comment
+        return (yield from Endpoints.create_dvr_entry(self, conf))
+
+    # EPG
+
+    def epg_events(self, channel_uuid=None, start=0, limit=24) -> Tuple[int, List[EPGEvent]]:
+        """Return (total, events) for one page of the EPG grid"""
+        params = {'start': start, 'limit': limit}
+        if channel_uuid:
+            params['channel'] = channel_uuid
+        data = yield Call('GET', '/api/epg/events/grid', params)
+        entries = data.get('entries', [])
+        total = data.get('totalCount', start + len(entries))
+        return total, [EPGEvent.from_json(entry) for entry in entries]
+
+    # Status
+
+    def server_info(self) -> ServerInfo:
+        return ServerInfo.from_json((yield Call('GET', '/api/serverinfo')))
+
+    def inputs(self) -> List[InputStatus]:
+        data = yield Call('GET', '/api/status/inputs')
+        return [InputStatus.from_json(e) for e in data.get('entries', [])]
+
+    def connections(self) -> List[Connection]:
+        data = yield Call('GET', '/api/status/connections')
+        return [Connection.from_json(e) for e in data.get('entries', [])]
+
+    def subscriptions(self) -> List[Subscription]:
+        data = yield Call('GET', '/api/status/subscriptions')
+        return [Subscription.from_json(e) for e in data.get('entries', [])]
+
+
+def _endpoint_calls():
+    return [(name, func) for name, func in vars(Endpoints).items() if inspect.isgeneratorfunction(func)]
+
+
+def blocking_endpoints(cls):
+    """Class decorator: every Endpoints call becomes a method run through `cls.drive`"""
+    for name, endpoint in _endpoint_calls():
+        def method(self, *args, endpoint=endpoint, **kwargs):
+            return self.drive(endpoint(self, *args, **kwargs))
+        setattr(cls, name, functools.wraps(endpoint)(method))
+    return cls
+
+
+def coroutine_endpoints(cls):
+    """Class decorator: every Endpoints call becomes a coroutine awaiting `cls.drive`"""
+    for name, endpoint in _endpoint_calls():
+        async def method(self, *args, endpoint=endpoint, **kwargs):
+            return await self.drive(endpoint(self, *args, **kwargs))
+        setattr(cls, name, functools.wraps(endpoint)(method))
+    return cls
+
+
+@blocking_endpoints
+class TVHApi(Endpoints):
+    """Blocking client for one TVHeadend server.
+
+    Safe to share between threads: requests reuse connections from one
+    session and `batch()` runs independent calls concurrently on it.
+    """
+
+    def __init__(self, server, pool_size=8):
+        super().__init__(server)
+        self.pool_size = pool_size
+        self._session = None
+        self._executor = None
+        self._action_executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled requests session, carrying the server's credentials for
+        whoever uses it directly (range reads, downloads)"""
+        with self._lock:
+            if self._session is None:
+                import requests  # deferred, see resilience
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.auth = resilience.server_auth(self.server)
+                self._session = session
+            return self._session
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size,
+                                                    thread_name_prefix='tvh-api')
+            return self._executor
+
+    @property
+    def action_executor(self):
+        """Pool for the requests of `_entry_action`. Kept apart from `executor`,
+        whose threads may be the ones waiting for those requests."""
+        with self._lock:
+            if self._action_executor is None:
+                self._action_executor = ThreadPoolExecutor(max_workers=ACTION_CONCURRENCY,
+                                                           thread_name_prefix='tvh-api-action')
+            return self._action_executor
+
+    def close(self):
+        with self._lock:
+            session, self._session = self._session, None
+            executors = [self._executor, self._action_executor]
+            self._executor = self._action_executor = None
+        for executor in executors:
+            if executor:
+                executor.shutdown(wait=False)
+        if session:
+            session.close()
+
+    # Transport
+
+    def request(self, method, path, **kwargs):
+        return resilience.request(self.server, method, path, session=self.session, **kwargs)
+
+    def get(self, path, params=None):
+        response = self.request('GET', path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def post(self, path, data=None):
+        response = self.request('POST', path, data=data)
+        response.raise_for_status()
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+
+    def drive(self, calls):
+        """Run an Endpoints call to completion with blocking requests"""
+        try:
+            call = next(calls)
+            while True:
+                try:
+                    if call.method == 'GET':
+                        result = self.get(call.path, call.params)
+                    else:
+                        result = self.post(call.path, call.data)
+                except Exception as e:
+                    call = calls.throw(e)
+                else:
+                    call = calls.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+    def batch(self, *calls):
+        """Run independent zero-argument calls (e.g. `api.inputs`) concurrently.
+
+        Returns the results in order; a call that failed yields its exception.
+        """
+        futures = [self.executor.submit(call) for call in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # DVR
+
+    def iter_dvr_entries(self, kind, page_size=500, sort='start', direction='ASC'):
+        """Yield every entry of one split grid, a page at a time"""
+        start = 0
+        while True:
+            total, entries = self.dvr_page(kind, start, page_size, sort, direction)
+            yield from entries
+            start += len(entries)
+            if not entries or start >= total:
+                return
+
+    def _entry_action(self, path, uuids, progress=None):
+        """Apply an idnode action to entries; returns how many were done.
+
+        The action endpoints take a JSON list of uuids, so each request covers
+        up to ACTION_BATCH_SIZE entries and larger selections are sent as
+        concurrent requests on the action pool. `progress(done, total)` is
+        called as requests complete, from the calling thread. The first error
+        is raised once every request has finished.
+        """
+        batches = action_batches(uuids)
+        total = sum(len(batch) for batch in batches)
+        futures = {self.action_executor.submit(self.post, path, {'uuid': json.dumps(batch)}): len(batch)
+                   for batch in batches}
+        done = 0
+        error = None
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            done += futures[future]
+            if progress:
+                progress(done, total)
+        if error:
+            raise error
+        return done
+
+    def stop_dvr_entries(self, uuids, progress=None):
+        return self._entry_action('/api/dvr/entry/stop', uuids, progress)
+
+    def cancel_dvr_entries(self, uuids, progress=None):
+        return self._entry_action('/api/dvr/entry/cancel', uuids, progress)
+
+    def remove_dvr_entries(self, uuids, progress=None):
+        return self._entry_action('/api/dvr/entry/remove', uuids, progress)
+
+
+class AsyncTVHApi:
+    """asyncio front-end to a TVHApi: each API method becomes a coroutine.
+
+    The blocking calls run on the client's pooled executor, so any number of
+    them can be awaited concurrently from one event loop.
+    """
+
+    def __init__(self, api):
+        self.api = api
+
+    def stream_url(self, channel_uuid, embed_auth=False, profile=None):
+        return self.api.stream_url(channel_uuid, embed_auth, profile)
+
+    def dvr_file_url(self, entry_uuid, embed_auth=False):
+        return self.api.dvr_file_url(entry_uuid, embed_auth)
+
+    def __getattr__(self, name):
+        attr = getattr(self.api, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            import asyncio
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self.api.executor, functools.partial(attr, *args, **kwargs))
+        return call
+
+    async def batch(self, *calls):
+        """Await coroutine functions (e.g. `api.inputs`) together, like TVHApi.batch"""
+        import asyncio
+        return await asyncio.gather(*(call() for call in calls), return_exceptions=True)
+
+
+@coroutine_endpoints
+class AioTVHApi(Endpoints):
+    """Native asyncio client on aiohttp: one connection pool, no thread per request.
+
+    Sends the same Endpoints calls as TVHApi under the same retry policy,
+    circuit breakers and stale channel list. Use it only from the event loop
+    it was first used on.
+    """
+
+    def __init__(self, server, pool_size=16):
+        super().__init__(server)
+        self.pool_size = pool_size
+        self._session = None
+
+    def _get_session(self):
+        import aiohttp
+        if self._session is None or self._session.closed:
+            auth = resilience.server_auth(self.server)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                auth=aiohttp.BasicAuth(*auth) if auth else None)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    # Transport
+
+    async def request(self, method, path, params=None, data=None, retry_policy=None):
+        """Send a request under the resilience policy; returns (status, body bytes)"""
+        import asyncio
+        import aiohttp
+
+        attempts = resilience.Attempts(self.server['url'], method, path, retry_policy)
+        connect, read = resilience.endpoint_timeout(path)
+        timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        if params:
+            params = {key: str(value) for key, value in params.items()}
+        session = self._get_session()
+
+        while True:
+            attempts.start()
+            try:
+                async with session.request(attempts.method, attempts.url, params=params,
+                                           data=data, timeout=timeout) as response:
+                    status = response.status
+                    body = await response.read()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                delay = attempts.failed(e)
+            except aiohttp.ClientError:
+                attempts.broken()
+                raise
+            except BaseException:
+                attempts.interrupted()
+                raise
+            else:
+                if status < 500:
+                    attempts.succeeded()
+                    return status, body
+                delay = attempts.failed(ApiError(f"Server error {status} for {path}", status))
+            try:
+                await asyncio.sleep(delay)
+            except BaseException:
+                attempts.interrupted()
+                raise
+
+    async def get(self, path, params=None):
+        status, body = await self.request('GET', path, params=params)
+        if status >= 400:
+            raise ApiError(f"HTTP {status} for {path}", status)
+        return json.loads(body)
+
+    async def post(self, path, data=None):
+        status, body = await self.request('POST', path, data=data)
+        if status >= 400:
+            raise ApiError(f"HTTP {status} for {path}", status)
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {}
+
+    async def drive(self, calls):
+        """Run an Endpoints call to completion with aiohttp requests"""
+        try:
+            call = next(calls)
+            while True:
+                try:
+                    if call.method == 'GET':
+                        result = await self.get(call.path, call.params)
+                    else:
+                        result = await self.post(call.path, call.data)
+                except Exception as e:
+                    call = calls.throw(e)
+                else:
+                    call = calls.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+    async def batch(self, *calls):
+        """Await coroutine functions (e.g. `api.inputs`) together, like TVHApi.batch"""
+        import asyncio
+        return await asyncio.gather(*(call() for call in calls), return_exceptions=True)
+
+    # DVR
+
+    async def _entry_action(self, path, uuids, progress=None):
+        import asyncio
+        batches = action_batches(uuids)
+        total = sum(len(batch) for batch in batches)
+        semaphore = asyncio.Semaphore(ACTION_CONCURRENCY)
+        done = 0
+
+        async def send(batch):
+            nonlocal done
+            async with semaphore:
+                await self.post(path, {'uuid': json.dumps(batch)})
+            done += len(batch)
+            if progress:
+                progress(done, total)
+
+        results = await asyncio.gather(*(send(batch) for batch in batches), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return done
+
+    async def stop_dvr_entries(self, uuids, progress=None):
+        return await self._entry_action('/api/dvr/entry/stop', uuids, progress)
+
+    async def cancel_dvr_entries(self, uuids, progress=None):
+        return await self._entry_action('/api/dvr/entry/cancel', uuids, progress)
+
+    async def remove_dvr_entries(self, uuids, progress=None):
+        return await self._entry_action('/api/dvr/entry/remove', uuids, progress)
+
+
+_clients = {}
+_async_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client_key(server):
+    return (resilience.normalize_url(server['url']), server.get('username') or '', server.get('password') or '')
+
+
+def get_api(server) -> TVHApi:
+    """Return the shared client for a server config, creating it on first use"""
+    key = _client_key(server)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = TVHApi(server)
+        return client
+
+
+def get_async_api(server):
+    """Return the shared coroutine client for a server config.
+
+    That is an AioTVHApi when aiohttp is installed, otherwise an AsyncTVHApi
+    running the blocking client on its thread pool.
+    """
+    key = _client_key(server)
+    with _clients_lock:
+        client = _async_clients.get(key)
+        if client is None:
+            try:
+                import aiohttp  # noqa: F401
+                client = AioTVHApi(server)
+            except ImportError:
+                client = AsyncTVHApi(get_api(server))
+            _async_clients[key] = client
+        return client
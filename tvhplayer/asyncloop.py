@@ -0,0 +1,176 @@
+"""asyncio event loop integration for the Qt GUI.
+
+With qasync installed the asyncio loop *is* the Qt event loop. Otherwise a
+single background thread runs the loop and completion callbacks are sent
+back to the GUI thread through a queued Qt signal. Either way every
+coroutine shares one thread, and a TaskScope cancels a UI object's tasks
+together when it goes away.
+"""
+import asyncio
+import functools
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class _Dispatcher(QObject):
+    """Runs callables on the thread it lives in (the GUI thread)"""
+    call = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.call.connect(self._run)
+
+    def _run(self, func):
+        try:
+            func()
+        except Exception as e:
+            print(f"Debug: Async callback failed: {str(e)}")
+
+
+class AsyncBridge:
+    def __init__(self):
+        self.loop = None
+        self.integrated = False
+        self._thread = None
+        self._dispatcher = None
+
+    def install(self, app):
+        """Create the event loop; call once, right after the QApplication"""
+        self._dispatcher = _Dispatcher()
+        try:
+            import qasync
+        except ImportError:
+            qasync = None
+        if qasync is not None:
+            self.loop = qasync.QEventLoop(app)
+            asyncio.set_event_loop(self.loop)
+            self.integrated = True
+        else:
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name='asyncio', daemon=True)
+            self._thread.start()
+        print(f"Debug: asyncio loop {'integrated via qasync' if self.integrated else 'on a worker thread'}")
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def exec_(self, app):
+        """Run the GUI until the application quits; returns its exit code"""
+        if self.integrated:
+            with self.loop:
+                return self.loop.run_forever() or 0
+        code = app.exec_()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
+        return code
+
+    def call_in_gui(self, func, *args):
+        """Run `func(*args)` on the GUI thread; safe to call from coroutines"""
+        self._dispatcher.call.emit(functools.partial(func, *args))
+
+    def spawn(self, coro, on_done=None, on_error=None):
+        """Schedule a coroutine on the loop.
+
+        `on_done(result)` or `on_error(exception)` runs on the GUI thread; neither
+        runs if the task was cancelled. Returns a future with cancel() and done().
+        """
+        if self.integrated:
+            future = asyncio.ensure_future(coro, loop=self.loop)
+        else:
+            future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        future.add_done_callback(functools.partial(self._finished, on_done=on_done, on_error=on_error))
+        return future
+
+    def _finished(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                self.call_in_gui(on_error, error)
+            else:
+                print(f"Debug: Background task failed: {error!r}")
+        elif on_done:
+            self.call_in_gui(on_done, future.result())
+
+
+bridge = AsyncBridge()
+
+
+async def run_blocking(func, *args):
+    """Run blocking work (disk, sqlite) on the default executor from a coroutine"""
+    return await asyncio.get_event_loop().run_in_executor(None, functools.partial(func, *args))
+
+
+async def drain_pipe(pipe, lines):
+    """Read a subprocess pipe until EOF, appending decoded lines to `lines` (e.g. a deque).
+
+    Keeps the child from blocking on a full pipe without tying up a thread.
+    """
+    loop = asyncio.get_event_loop()
+    reader = asyncio.StreamReader()
+    try:
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    except (NotImplementedError, OSError, ValueError):
+        # The Windows proactor can't watch ordinary pipes; block on the executor instead
+        while True:
+            line = await loop.run_in_executor(None, pipe.readline)
+            if not line:
+                return
+            lines.append(line.decode(errors='replace').rstrip())
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            lines.append(line.decode(errors='replace').rstrip())
+    finally:
+        transport.close()
+
+
+class TaskScope:
+    """The tasks of one UI object, cancelled together when it closes.
+
+    Callbacks of tasks that finish after cancel() are dropped, so they never
+    touch a closed dialog.
+    """
+
+    def __init__(self, owner_bridge=None):
+        self.bridge = owner_bridge or bridge
+        self.tasks = set()
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def spawn(self, coro, on_done=None, on_error=None):
+        if self.closed:
+            coro.close()
+            return None
+        future = self.bridge.spawn(coro, self._guard(on_done), self._guard(on_error))
+        with self._lock:
+            self.tasks.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _guard(self, callback):
+        if callback is None:
+            return None
+
+        def guarded(value):
+            if not self.closed:
+                callback(value)
+        return guarded
+
+    def _discard(self, future):
+        with self._lock:
+            self.tasks.discard(future)
+
+    def cancel(self):
+        """Cancel every running task; the scope accepts no new ones afterwards"""
+        self.closed = True
+        with self._lock:
+            tasks = list(self.tasks)
+            self.tasks.clear()
+        for future in tasks:
+            future.cancel()
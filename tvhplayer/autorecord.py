@@ -0,0 +1,382 @@
+"""Series links: rules that schedule DVR recordings of matching EPG events.
+
+A Rule matches on a title regex, a set of channels, a window of start
+times and weekdays, and a genre. Rules are evaluated against the events an
+EPG sync found new (see EPGSearchIndex.replace_events), so each sync costs
+time in proportion to what changed, not to the whole guide. Matches are
+scheduled as ordinary DVR entries through the API.
+
+Titles repeat a lot in a guide, so RuleEngine tests each distinct title
+against the rules once; an event whose title no rule wants costs one dict
+lookup. Past anchors and groups, most patterns start with plain text a
+title has to contain, or with one such text per alternative. The engine
+indexes rules by their first three letters, so a title is only tried
+against the rules whose letters occur in it. Repeats are recognized by
+their episode number or, failing that, their subtitle: a DedupeIndex of
+those, built from the server's DVR entries and a history of what the rules
+scheduled, makes each check a set lookup.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+try:
+    from . import resilience
+    from .api import get_api
+    from .config import atomic_write_json
+except ImportError:
+    import resilience
+    from api import get_api
+    from config import atomic_write_json
+
+
+DVR_PAGE_SIZE = 1000
+# Keys in the history of one server beyond this are dropped, oldest first
+HISTORY_LIMIT = 20000
+COMMENT_PREFIX = "Autorecord: "
+# The GUI syncs the EPG of servers with rules this often, and this long after starting
+SYNC_INTERVAL = 6 * 3600
+STARTUP_DELAY = 120
+
+REGEX_SYNTAX = re.compile(r'[.^$*+?{}\[\]\\|()]')
+# Zero-width and flag syntax a title can start with: ^, \b, \A, (?i)
+LEADING_SYNTAX = re.compile(r'\^|\\[bA]|\(\?[aiLmsux]+\)')
+# Openings of groups whose text is matched as it is
+GROUP_OPENING = re.compile(r'\((?:\?:|\?P<\w+>)?')
+# Length of the literal prefixes rules are indexed by
+INDEX_LETTERS = 3
+
+
+class RuleError(Exception):
+    pass
+
+
+def normalized(text):
+    """Text reduced to lower-case words, so punctuation and spacing don't tell repeats apart"""
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+def episode_keys(title, episode='', subtitle=''):
+    """Keys a recording of this programme is known by; empty if it can't be told from others"""
+    title = normalized(title)
+    keys = []
+    if normalized(episode):
+        keys.append(f'{title}|e|{normalized(episode)}')
+    if normalized(subtitle):
+        keys.append(f'{title}|s|{normalized(subtitle)}')
+    return keys
+
+
+def alternatives(pattern):
+    """The top-level branches of a pattern"""
+    branches = []
+    depth = 0
+    in_class = False
+    start = i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            branches.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def group_end(pattern):
+    """Index of the parenthesis closing the group `pattern` starts with, or None"""
+    depth = 0
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            i += 1
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return None
+
+
+def branch_literal(text):
+    """Lower-cased plain text every match of a branch contains, from its start; '' if unknown"""
+    if '|' in text:
+        return ''  # alternatives within a group
+    while True:
+        leading = LEADING_SYNTAX.match(text)
+        if leading:
+            text = text[leading.end():]
+            continue
+        opening = GROUP_OPENING.match(text)
+        if opening and text[opening.end():opening.end() + 1] not in ('?', '=', '!', '<'):
+            end = group_end(text)
+            if end is None or text[end + 1:end + 2] in ('?', '*', '{'):
+                return ''  # the group may be left out
+            text = text[opening.end():]
+            continue
+        break
+    syntax = REGEX_SYNTAX.search(text)
+    if syntax is None:
+        return text.lower()
+    literal = text[:syntax.start()]
+    if syntax.group() in '?*{':
+        literal = literal[:-1]  # the quantifier makes the last character optional
+    return literal.lower()
+
+
+def title_literals(pattern):
+    """Lower-cased plain texts of which every title the pattern matches contains
+    one, one per alternative; [''] if some alternative has none"""
+    literals = [branch_literal(branch) for branch in alternatives(pattern)]
+    return [''] if '' in literals else sorted(set(literals))
+
+
+def parse_clock(text):
+    """Minutes after midnight of 'HH:MM', or None for an empty string"""
+    if not text:
+        return None
+    match = re.match(r'^(\d{1,2}):(\d{2})$', text.strip())
+    if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+        raise RuleError(f"Invalid time: {text}")
+    return int(match.group(1)) * 60 + int(match.group(2))
+
+
+class Rule:
+    """What to record on the server with normalized URL `server`. Empty criteria
+    match everything; `channels` are channel names, `weekdays` are 0 (Monday)
+    to 6, `after` and `before` bound the start time as 'HH:MM' and may wrap
+    around midnight."""
+
+    def __init__(self, name, server='', title='', channels=(), genre='', after='', before='', weekdays=(),
+                 dedupe=True, enabled=True, id=None):
+        self.id = id or uuid.uuid4().hex[:12]
+        self.name = name
+        self.server = server
+        self.title = title
+        self.channels = list(channels)
+        self.genre = genre
+        self.after = after
+        self.before = before
+        self.weekdays = sorted(set(weekdays))
+        self.dedupe = dedupe
+        self.enabled = enabled
+        # Checked here so a broken rule is refused when it is saved, not when it runs
+        try:
+            self.pattern = re.compile(title, re.IGNORECASE) if title else None
+        except re.error as e:
+            raise RuleError(f"Invalid title pattern: {e}")
+        self.literals = title_literals(title)
+        self.window = (parse_clock(after), parse_clock(before))
+        self.channel_set = {name.strip().lower() for name in self.channels if name.strip()}
+        self.genre_text = genre.strip().lower()
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in (
+            'id', 'name', 'server', 'title', 'channels', 'genre', 'after', 'before', 'weekdays', 'dedupe', 'enabled')}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def matches_title(self, title, lowered):
+        if not any(literal in lowered for literal in self.literals):
+            return False
+        return self.pattern is None or self.pattern.search(title) is not None
+
+    def matches_rest(self, event):
+        """Everything but the title"""
+        if self.channel_set and event.channel_name.lower() not in self.channel_set:
+            return False
+        if self.genre_text and self.genre_text not in event.genre.lower():
+            return False
+        after, before = self.window
+        if self.weekdays or after is not None or before is not None:
+            start = time.localtime(event.start)
+            if self.weekdays and start.tm_wday not in self.weekdays:
+                return False
+            minute = start.tm_hour * 60 + start.tm_min
+            if after is not None and before is not None and after > before:
+                if before < minute < after:  # the window wraps around midnight
+                    return False
+            elif (after is not None and minute < after) or (before is not None and minute > before):
+                return False
+        return True
+
+
+class RuleEngine:
+    """Matches EPG events against a set of rules"""
+
+    def __init__(self, rules):
+        self.rules = [rule for rule in rules if rule.enabled]
+        # Rules are kept with their position, as the first matching rule wins
+        self.indexed = defaultdict(list)  # first letters of a rule's literals -> (position, rule)
+        self.unindexed = []               # rules with too short a literal, tried on every title
+        for position, rule in enumerate(self.rules):
+            if min(len(literal) for literal in rule.literals) >= INDEX_LETTERS:
+                for key in {literal[:INDEX_LETTERS] for literal in rule.literals}:
+                    self.indexed[key].append((position, rule))
+            else:
+                self.unindexed.append((position, rule))
+        self.title_rules = {}  # title -> the rules whose pattern it matches
+
+    def rules_for_title(self, title):
+        rules = self.title_rules.get(title)
+        if rules is None:
+            lowered = title.lower()
+            candidates = dict(self.unindexed)
+            for key in {lowered[i:i + INDEX_LETTERS] for i in range(len(lowered) - INDEX_LETTERS + 1)}:
+                bucket = self.indexed.get(key)
+                if bucket:
+                    candidates.update(bucket)
+            rules = self.title_rules[title] = [candidates[position] for position in sorted(candidates)
+                                               if candidates[position].matches_title(title, lowered)]
+        return rules
+
+    def matches(self, events, now=None):
+        """(rule, event) pairs for the events still to come, in start order; the first rule wins"""
+        now = time.time() if now is None else now
+        found = []
+        for event in events:
+            if event.stop <= now:
+                continue
+            for rule in self.rules_for_title(event.title):
+                if rule.matches_rest(event):
+                    found.append((rule, event))
+                    break
+        found.sort(key=lambda match: (match[1].start, match[1].channel_name))
+        return found
+
+
+class DedupeIndex:
+    """What a server records or recorded, by slot and by episode"""
+
+    def __init__(self):
+        self.slots = set()     # (channel uuid, start)
+        self.episodes = set()  # episode_keys()
+
+    def add_entry(self, entry):
+        self.slots.add((entry.channel_uuid, entry.start))
+        self.episodes.update(episode_keys(entry.title, entry.episode, entry.subtitle))
+
+    def add_event(self, event):
+        self.slots.add((event.channel_uuid, event.start))
+        self.episodes.update(episode_keys(event.title, event.episode, event.subtitle))
+
+    def scheduled(self, event):
+        return (event.channel_uuid, event.start) in self.slots
+
+    def recorded(self, event):
+        return not self.episodes.isdisjoint(episode_keys(event.title, event.episode, event.subtitle))
+
+
+class History:
+    """Episode keys the rules have scheduled, per server, in a JSON journal.
+
+    Keeps repeats out after their recordings were deleted from the server.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = {}  # server -> keys, oldest first
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.keys = {server: list(keys) for server, keys in json.load(f).items()}
+        except (OSError, ValueError, AttributeError) as e:
+            if os.path.exists(path):
+                print(f"Debug: Cannot read the autorecord history: {e}")
+
+    def get(self, server_key):
+        return self.keys.get(server_key, [])
+
+    def add(self, server_key, keys):
+        known = self.keys.setdefault(server_key, [])
+        known.extend(key for key in keys if key not in known)
+        del known[:-HISTORY_LIMIT]
+
+    def save(self):
+        try:
+            atomic_write_json(self.path, self.keys, indent=None)
+        except OSError as e:
+            print(f"Debug: Cannot write the autorecord history: {e}")
+
+
+def load_dedupe_index(api, history_keys):
+    """DedupeIndex of a server's upcoming and finished entries plus the history"""
+    index = DedupeIndex()
+    for kind in ('upcoming', 'finished'):
+        for entry in api.iter_dvr_entries(kind, page_size=DVR_PAGE_SIZE):
+            index.add_entry(entry)
+    index.episodes.update(history_keys)
+    return index
+
+
+# One application at a time, so overlapping syncs can't both schedule an event
+_apply_lock = threading.Lock()
+
+
+def apply_rules(server, rules, events, history_path, on_scheduled=None):
+    """Schedule the events any rule matches; returns the scheduled (rule, event) pairs.
+
+    Blocks on the network, so run it on a worker thread. `on_scheduled(event)`
+    is called after each recording was created.
+    """
+    matches = RuleEngine(rules).matches(events)
+    print(f"Debug: Autorecord: {len(matches)} of {len(events)} events match a rule")
+    if not matches:
+        return []
+    with _apply_lock:
+        return _schedule(server, matches, history_path, on_scheduled)
+
+
+def _schedule(server, matches, history_path, on_scheduled):
+    api = get_api(server)
+    server_key = resilience.normalize_url(server['url'])
+    history = History(history_path)
+    index = load_dedupe_index(api, history.get(server_key))
+    scheduled = []
+    for rule, event in matches:
+        if index.scheduled(event) or (rule.dedupe and index.recorded(event)):
+            continue
+        try:
+            api.create_recording(
+                event.channel_uuid, event.start, event.stop,
+                event.title or 'Scheduled Recording',
+                subtitle=event.subtitle or None,
+                description=event.description,
+                comment=COMMENT_PREFIX + rule.name
+            )
+        except Exception as e:
+            print(f"Debug: Autorecord could not schedule {event.title}: {e}")
+            continue
+        print(f"Debug: Autorecord rule {rule.name} scheduled {event.title} on {event.channel_name}")
+        # Later airings in this batch are repeats now
+        index.add_event(event)
+        history.add(server_key, episode_keys(event.title, event.episode, event.subtitle))
+        scheduled.append((rule, event))
+        if on_scheduled:
+            on_scheduled(event)
+    if scheduled:
+        history.save()
+    return scheduled
@@ -0,0 +1,152 @@
+"""Adaptive libVLC network-caching per server and channel.
+
+A fixed cache wastes a second of latency on a LAN and still rebuffers on a
+poor WAN link. CachingTuner starts from a value estimated from the server's
+round-trip jitter, then learns from playback: a rebuffer raises the value
+for that channel, a long clean stretch lowers it again. The next time the
+channel is played it gets the learned value. What was learned persists in a
+small JSON file.
+"""
+import copy
+import json
+import os
+import statistics
+import threading
+import time
+
+try:
+    from .config import atomic_write_json
+except ImportError:
+    from config import atomic_write_json
+
+
+DEFAULT_CACHING_MS = 1000
+MIN_CACHING_MS = 200
+MAX_CACHING_MS = 5000
+
+# Raise the cache by this factor after a rebuffer...
+BACKOFF_FACTOR = 1.5
+# ...and lower it by this one after CLEAN_SECONDS of playback without one,
+# so the value settles just above where rebuffers start
+DECAY_FACTOR = 0.85
+CLEAN_SECONDS = 600
+
+# Server probes older than this are repeated
+PROBE_MAX_AGE = 3600
+
+
+def clamp(ms):
+    return int(min(MAX_CACHING_MS, max(MIN_CACHING_MS, ms)))
+
+
+def estimate_from_rtts(rtts):
+    """Starting cache (ms) for a server from request round-trip times in seconds.
+
+    Jitter is the mean difference between consecutive samples (as in RFC
+    3550); the cache must absorb several times that plus the slow tail.
+    """
+    rtts_ms = [rtt * 1000 for rtt in rtts]
+    jitter = statistics.mean(abs(b - a) for a, b in zip(rtts_ms, rtts_ms[1:])) if len(rtts_ms) > 1 else 0.0
+    return clamp(MIN_CACHING_MS + 2 * max(rtts_ms) + 6 * jitter), jitter
+
+
+class CachingTuner:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.servers = {}   # server url -> {'probed_at', 'rtt_ms', 'jitter_ms', 'estimate'}
+        self.channels = {}  # "server url|channel uuid" -> {'caching', 'clean_seconds'}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.servers = data.get('servers', {})
+            self.channels = data.get('channels', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def save(self):
+        """Write learned values if anything changed; does file I/O, keep off the GUI thread"""
+        with self._lock:
+            if not self.dirty:
+                return
+            data = copy.deepcopy({'servers': self.servers, 'channels': self.channels})
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            atomic_write_json(self.path, data)
+        except OSError as e:
+            print(f"Debug: Could not save caching values: {e}")
+
+    @staticmethod
+    def _key(server_url, channel_uuid):
+        return f"{server_url}|{channel_uuid}"
+
+    def caching_for(self, server_url, channel_uuid):
+        """The network-caching value (ms) to open a channel with"""
+        with self._lock:
+            learned = self.channels.get(self._key(server_url, channel_uuid))
+            if learned:
+                return learned['caching']
+            server = self.servers.get(server_url)
+            if server:
+                return server['estimate']
+            return DEFAULT_CACHING_MS
+
+    def needs_probe(self, server_url):
+        with self._lock:
+            server = self.servers.get(server_url)
+            return server is None or time.time() - server.get('probed_at', 0) > PROBE_MAX_AGE
+
+    def record_probe(self, server_url, rtts):
+        """Store a server's round-trip times (seconds); returns the new estimate"""
+        if not rtts:
+            return None
+        estimate, jitter = estimate_from_rtts(rtts)
+        with self._lock:
+            self.servers[server_url] = {
+                'probed_at': time.time(),
+                'rtt_ms': round(statistics.median(rtts) * 1000, 1),
+                'jitter_ms': round(jitter, 1),
+                'estimate': estimate,
+            }
+            self.dirty = True
+        print(f"Debug: {server_url} rtt {statistics.median(rtts) * 1000:.0f} ms, "
+              f"jitter {jitter:.0f} ms -> caching estimate {estimate} ms")
+        return estimate
+
+    def observe(self, server_url, channel_uuid, seconds, rebuffers):
+        """Account `seconds` of playback with `rebuffers` rebuffer events.
+
+        Returns the channel's caching value for its next playback.
+        """
+        key = self._key(server_url, channel_uuid)
+        current = self.caching_for(server_url, channel_uuid)
+        with self._lock:
+            state = self.channels.setdefault(key, {'caching': current, 'clean_seconds': 0})
+            if rebuffers:
+                state['caching'] = clamp(state['caching'] * BACKOFF_FACTOR ** rebuffers)
+                state['clean_seconds'] = 0
+            else:
+                state['clean_seconds'] += seconds
+                if state['clean_seconds'] >= CLEAN_SECONDS:
+                    state['caching'] = clamp(state['caching'] * DECAY_FACTOR)
+                    state['clean_seconds'] = 0
+            if state['caching'] != current or rebuffers:
+                print(f"Debug: Network caching for {channel_uuid}: {current} -> {state['caching']} ms "
+                      f"({rebuffers} rebuffers in {seconds:.0f} s)")
+            self.dirty = True
+            return state['caching']
+
+
+async def probe_rtts(api, samples=5):
+    """Time `samples` sequential light requests to a server through an async API client"""
+    rtts = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await api.server_info()
+        rtts.append(time.perf_counter() - started)
+    return rtts
@@ -0,0 +1,483 @@
+"""Command-line entry point.
+
+Without a subcommand `tvhplayer` starts the GUI. The subcommands run
+headless for cron jobs and servers without a display: they share the API
+client, EPG paging and ffmpeg recorder with the GUI but never import PyQt5
+or libVLC.
+
+    tvhplayer record --channel "BBC One" --duration 1h
+    tvhplayer epg export --days 7 --format json
+    tvhplayer dvr schedule --title-regex "^Match of the Day"
+    tvhplayer dvr download --title-regex "Planet Earth" --limit 50
+    tvhplayer status --json
+    tvhplayer latency --channel "BBC One" --seconds 30
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import re
+import signal
+import sys
+import time
+from datetime import datetime
+
+try:
+    from . import download, latency, postprocess, resilience, recorder
+    from .api import DVR_GRIDS, get_api
+    from .config import DEFAULT_CONFIG, default_config_dir, read_config
+    from .epgsearch import iter_epg_events
+except ImportError:
+    import download
+    import latency
+    import postprocess
+    import resilience
+    import recorder
+    from api import DVR_GRIDS, get_api
+    from config import DEFAULT_CONFIG, default_config_dir, read_config
+    from epgsearch import iter_epg_events
+
+
+SUBCOMMANDS = ('record', 'epg', 'dvr', 'status', 'latency')
+
+# Grids listed by 'dvr list' unless --kind picks others
+DVR_LIST_KINDS = ('upcoming', 'finished', 'failed')
+
+
+class CommandError(Exception):
+    """A user error; reported without a traceback"""
+
+
+def parse_duration(text):
+    """Parse '90', '90s', '45m', '1h' or '1h30m' into seconds"""
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text)
+    match = re.fullmatch(r'(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s)?', text)
+    if not text or not match:
+        raise argparse.ArgumentTypeError(f"invalid duration: {text!r} (use e.g. 90m, 1h or 1h30m)")
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def select_server(args, config):
+    """Return the server config dict selected by --url or --server"""
+    if args.url:
+        return {
+            'name': args.url,
+            'url': args.url,
+            'username': args.username or '',
+            'password': os.environ.get('TVHPLAYER_PASSWORD', ''),
+        }
+    servers = config.get('servers', [])
+    if not servers:
+        raise CommandError("no servers configured; add one in the GUI or pass --url")
+    if args.server is None:
+        index = config.get('last_server', 0)
+        return servers[index if 0 <= index < len(servers) else 0]
+    for server in servers:
+        if server.get('name') == args.server:
+            return server
+    for server in servers:
+        if server.get('name', '').lower() == args.server.lower():
+            return server
+    if args.server.isdigit() and int(args.server) < len(servers):
+        return servers[int(args.server)]
+    names = ', '.join(s.get('name', '?') for s in servers)
+    raise CommandError(f"unknown server {args.server!r} (configured: {names})")
+
+
+def find_channel(api, name):
+    """Return the Channel named `name`, preferring an exact over a case-insensitive match"""
+    channels = api.channels()
+    for channel in channels:
+        if channel.name == name:
+            return channel
+    for channel in channels:
+        if channel.name.lower() == name.lower():
+            return channel
+    raise CommandError(f"channel not found: {name!r}")
+
+
+# Commands
+
+def cmd_record(args, server, config, out):
+    api = get_api(server)
+    channel = find_channel(api, args.channel)
+    output = args.output
+    if not output:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        directory = config.get('recording_path') or DEFAULT_CONFIG['recording_path']
+        output = os.path.join(directory, f"recording_{channel.name}_{timestamp}.{args.format}")
+
+    auth = resilience.server_auth(server)
+    # Capture as MPEG-TS with the streams copied; convert once the capture is done
+    capture = recorder.capture_path(output)
+    cmd = recorder.ffmpeg_command(api.stream_url(channel.uuid, profile=args.profile), capture, auth, args.duration)
+    print(f"Debug: {recorder.printable_command(cmd, auth)}")
+
+    # ffmpeg's own warnings go straight to our stderr, where cron collects them
+    try:
+        process = recorder.start_ffmpeg(cmd, capture_log=False)
+    except FileNotFoundError:
+        raise CommandError("ffmpeg not found; install it or add it to PATH")
+    print(f"Recording {channel.name} to {output}", file=out, flush=True)
+    try:
+        # ffmpeg stops itself after --duration; the extra margin covers a slow start
+        return_code = process.wait(timeout=args.duration + 60 if args.duration else None)
+    except BaseException:
+        # Timeout, Ctrl+C or SIGTERM: let ffmpeg finalize the file
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except Exception:
+            process.kill()
+        raise
+
+    size = os.path.getsize(capture) if os.path.exists(capture) else 0
+    if return_code != 0 or size == 0:
+        print(f"Recording failed (ffmpeg exit code {return_code}, {size} bytes written)", file=sys.stderr)
+        return 1
+    print(f"Recorded {size / (1024 * 1024):.1f} MB", file=out)
+    if capture != output:
+        print(f"Converting to {output}", file=out, flush=True)
+        try:
+            postprocess.convert(capture, output)
+        except postprocess.PostProcessError as e:
+            print(f"Conversion failed, the recording is kept as {capture}: {e}", file=sys.stderr)
+            return 1
+        os.remove(capture)
+    return 0
+
+
+EVENT_FIELDS = ('event_id', 'channel_uuid', 'channel_name', 'channel_number', 'start', 'stop',
+                'start_time', 'stop_time', 'title', 'subtitle', 'summary', 'description',
+                'genre', 'episode')
+
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp).astimezone().isoformat(timespec='seconds')
+
+
+def event_dict(event):
+    data = event._asdict()
+    data['start_time'] = iso_time(event.start)
+    data['stop_time'] = iso_time(event.stop)
+    return {field: data[field] for field in EVENT_FIELDS}
+
+
+def event_row(event):
+    data = event_dict(event)
+    return [data[field] for field in EVENT_FIELDS]
+
+
+def cmd_epg_export(args, server, config, out):
+    channel_uuid = None
+    if args.channel:
+        channel_uuid = find_channel(get_api(server), args.channel).uuid
+
+    count = 0
+    events = iter_epg_events(server, args.days, channel_uuid=channel_uuid)
+
+    # Events are written as pages arrive, so memory use doesn't grow with the guide
+    if args.format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(EVENT_FIELDS)
+        for event in events:
+            writer.writerow(event_row(event))
+            count += 1
+    elif args.format == 'jsonl':
+        for event in events:
+            out.write(json.dumps(event_dict(event), ensure_ascii=False) + '\n')
+            count += 1
+    else:
+        out.write('[')
+        for event in events:
+            out.write(',\n' if count else '\n')
+            out.write(json.dumps(event_dict(event), ensure_ascii=False))
+            count += 1
+        out.write('\n]\n')
+    out.flush()
+    print(f"Debug: Exported {count} EPG events")
+    return 0
+
+
+def cmd_dvr_schedule(args, server, config, out):
+    try:
+        pattern = re.compile(args.title_regex, re.IGNORECASE if args.ignore_case else 0)
+    except re.error as e:
+        raise CommandError(f"invalid --title-regex: {e}")
+
+    api = get_api(server)
+    channel_uuid = find_channel(api, args.channel).uuid if args.channel else None
+    # Repeated runs (e.g. from cron) must not create duplicates; only future
+    # programmes are scheduled, so only the upcoming entries can clash
+    existing = {(entry.channel_uuid, entry.start) for entry in api.iter_dvr_entries('upcoming')}
+
+    now = time.time()
+    scheduled = 0
+    for event in iter_epg_events(server, args.days, channel_uuid=channel_uuid):
+        if event.stop <= now or not pattern.search(event.title):
+            continue
+        if (event.channel_uuid, event.start) in existing:
+            continue
+        when = datetime.fromtimestamp(event.start).strftime('%Y-%m-%d %H:%M')
+        if not args.dry_run:
+            api.create_recording(
+                event.channel_uuid, event.start, event.stop,
+                event.title or 'Scheduled Recording',
+                description=event.description,
+                comment="Scheduled via TVHplayer"
+            )
+        existing.add((event.channel_uuid, event.start))
+        scheduled += 1
+        print(f"{'Would schedule' if args.dry_run else 'Scheduled'}: {when}  {event.channel_name}  {event.title}",
+              file=out, flush=True)
+    if not scheduled:
+        print("No new matching programmes", file=out)
+    return 0
+
+
+def cmd_dvr_download(args, server, config, out):
+    try:
+        pattern = re.compile(args.title_regex, re.IGNORECASE if args.ignore_case else 0)
+    except re.error as e:
+        raise CommandError(f"invalid --title-regex: {e}")
+
+    api = get_api(server)
+    directory = args.output_dir or config.get('recording_path') or DEFAULT_CONFIG['recording_path']
+    limiter = download.RateLimiter(args.limit * 125000)
+    failed = 0
+    for entry in api.iter_dvr_entries('finished'):
+        if not pattern.search(entry.title):
+            continue
+        path = os.path.join(directory, download.local_filename(entry))
+        if entry.filesize and os.path.exists(path) and os.path.getsize(path) == entry.filesize:
+            print(f"Already downloaded: {path}", file=out)
+            continue
+        # An interrupted run leaves a journal; the next run continues from it
+        job = download.Download(api.session, api.dvr_file_url(entry.uuid), path, entry.filesize or None,
+                                entry.title, args.connections, limiter)
+        started = time.monotonic()
+        job.run()
+        if job.state != download.DONE:
+            print(f"Failed: {entry.title}: {job.error}", file=out, flush=True)
+            failed += 1
+            continue
+        seconds = time.monotonic() - started
+        print(f"Downloaded: {path} ({job.size / 1e6:.0f} MB in {seconds:.0f} s)", file=out, flush=True)
+    return 1 if failed else 0
+
+
+def cmd_dvr_list(args, server, config, out):
+    api = get_api(server)
+    # The split grids are paged, so large DVR logs arrive a page at a time
+    entries = sorted(((kind, entry) for kind in args.kind or DVR_LIST_KINDS
+                      for entry in api.iter_dvr_entries(kind)),
+                     key=lambda item: item[1].start)
+    if args.json:
+        json.dump([dict(entry._asdict(), kind=kind) for kind, entry in entries],
+                  out, indent=2, ensure_ascii=False)
+        out.write('\n')
+        return 0
+    for kind, entry in entries:
+        when = datetime.fromtimestamp(entry.start).strftime('%Y-%m-%d %H:%M')
+        print(f"{when}  {kind:<9} {entry.state or entry.status:<10} {entry.channel_name}  {entry.title}",
+              file=out)
+    return 0
+
+
+def cmd_status(args, server, config, out):
+    api = get_api(server)
+    server_data, inputs, connections, subscriptions = api.batch(
+        api.server_info, api.inputs, api.connections, api.subscriptions)
+    # The server being unreachable is the one failure worth a non-zero exit
+    if isinstance(server_data, Exception):
+        raise server_data
+
+    def as_json(value):
+        if isinstance(value, Exception):
+            return {'error': str(value)}
+        if isinstance(value, list):
+            return [item._asdict() for item in value]
+        return value._asdict()
+
+    if args.json:
+        json.dump({
+            'server': {'name': server.get('name', ''), 'url': server.get('url', '')},
+            'info': as_json(server_data),
+            'inputs': as_json(inputs),
+            'connections': as_json(connections),
+            'subscriptions': as_json(subscriptions),
+        }, out, indent=2, ensure_ascii=False)
+        out.write('\n')
+        return 0
+
+    print(f"{server.get('name', '')} ({server.get('url', '')}): "
+          f"{server_data.name}, version {server_data.sw_version}", file=out)
+    if not isinstance(inputs, Exception):
+        for status in inputs:
+            print(f"  input {status.input}: {status.stream}, {status.subs} subscriptions", file=out)
+    if not isinstance(subscriptions, Exception):
+        print(f"  {len(subscriptions)} active subscriptions", file=out)
+        for sub in subscriptions:
+            print(f"    {sub.channel} ({sub.username}, {sub.state})", file=out)
+    if not isinstance(connections, Exception):
+        print(f"  {len(connections)} connections", file=out)
+    return 0
+
+
+def cmd_latency(args, server, config, out):
+    auth = None
+    url = args.stream
+    if not url:
+        api = get_api(server)
+        url = api.stream_url(find_channel(api, args.channel).uuid, profile=args.profile)
+        auth = resilience.server_auth(server)
+
+    def show(report):
+        if not args.json:
+            print(' | '.join(latency.format_report(report)[1:]), file=out, flush=True)
+
+    report = latency.measure(url, auth, args.seconds, on_update=show, update_interval=args.interval,
+                             player_caching_ms=args.caching)
+    if args.json:
+        json.dump(report, out, indent=2)
+        out.write('\n')
+    else:
+        print('\n'.join(latency.format_report(report)), file=out)
+    return 0
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--server', help="server name (or index) from the GUI configuration; "
+                                         "defaults to the last used one")
+    common.add_argument('--url', help="use this server URL instead of the configuration")
+    common.add_argument('--username', help="user name for --url; the password is read from "
+                                           "the TVHPLAYER_PASSWORD environment variable")
+    common.add_argument('--config', help="path of tvhplayer.conf")
+    common.add_argument('-v', '--verbose', action='store_true', help="print debug output to stderr")
+
+    parser = argparse.ArgumentParser(
+        prog='tvhplayer',
+        description="TVHeadend client. Run without arguments to start the GUI.")
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND')
+
+    record = commands.add_parser('record', parents=[common], help="record a channel locally with ffmpeg")
+    record.add_argument('--channel', required=True, help="channel name")
+    record.add_argument('--duration', required=True, type=parse_duration,
+                        help="how long to record, e.g. 90m, 1h or 1h30m")
+    record.add_argument('--output', help="output file; .ts, or .mp4/.mkv converted from a .ts capture afterwards "
+                             "(default: recording path from the configuration)")
+    record.add_argument('--format', choices=('ts', 'mp4', 'mkv'), default='ts', help="container when --output is not given")
+    record.add_argument('--profile', help="server stream profile, e.g. pass (default: the server's default profile)")
+    record.set_defaults(func=cmd_record)
+
+    epg = commands.add_parser('epg', help="electronic programme guide").add_subparsers(
+        dest='epg_command', metavar='COMMAND')
+    epg.required = True
+    export = epg.add_parser('export', parents=[common], help="write the EPG to stdout or a file")
+    export.add_argument('--days', type=int, default=7, help="programmes starting within this many days")
+    export.add_argument('--format', choices=('json', 'jsonl', 'csv'), default='json')
+    export.add_argument('--channel', help="only this channel")
+    export.add_argument('--output', help="output file (default: stdout)")
+    export.set_defaults(func=cmd_epg_export)
+
+    dvr = commands.add_parser('dvr', help="server-side recordings").add_subparsers(
+        dest='dvr_command', metavar='COMMAND')
+    dvr.required = True
+    schedule = dvr.add_parser('schedule', parents=[common],
+                              help="schedule every upcoming programme whose title matches")
+    schedule.add_argument('--title-regex', required=True, help="regular expression searched in titles")
+    schedule.add_argument('-i', '--ignore-case', action='store_true')
+    schedule.add_argument('--channel', help="only this channel")
+    schedule.add_argument('--days', type=int, default=7, help="look this many days ahead")
+    schedule.add_argument('-n', '--dry-run', action='store_true', help="only list what would be scheduled")
+    schedule.set_defaults(func=cmd_dvr_schedule)
+    fetch = dvr.add_parser('download', parents=[common],
+                           help="download finished recordings whose title matches")
+    fetch.add_argument('--title-regex', required=True, help="regular expression searched in titles")
+    fetch.add_argument('-i', '--ignore-case', action='store_true')
+    fetch.add_argument('--output-dir', help="directory (default: recording path from the configuration)")
+    fetch.add_argument('--connections', type=int, default=download.DEFAULT_CONNECTIONS,
+                       help="parallel connections per file")
+    fetch.add_argument('--limit', type=int, default=0, help="bandwidth cap in Mb/s (default: none)")
+    fetch.set_defaults(func=cmd_dvr_download)
+    dvr_list = dvr.add_parser('list', parents=[common], help="list DVR entries")
+    dvr_list.add_argument('--kind', action='append', choices=DVR_GRIDS,
+                          help="only this grid; repeat for several (default: upcoming, finished, failed)")
+    dvr_list.add_argument('--json', action='store_true')
+    dvr_list.set_defaults(func=cmd_dvr_list)
+
+    status = commands.add_parser('status', parents=[common], help="show server, tuner and stream status")
+    status.add_argument('--json', action='store_true')
+    status.set_defaults(func=cmd_status)
+
+    measure = commands.add_parser('latency', parents=[common],
+                                  help="measure source delay, jitter and drift of a live stream")
+    target = measure.add_mutually_exclusive_group(required=True)
+    target.add_argument('--channel', help="channel name")
+    target.add_argument('--stream', help="measure this TS URL instead, e.g. a local test feed")
+    measure.add_argument('--seconds', type=parse_duration, default=30, help="how long to measure")
+    measure.add_argument('--interval', type=float, default=5.0, help="seconds between progress lines")
+    measure.add_argument('--caching', type=int, help="player cache (ms) to include in the estimate")
+    measure.add_argument('--profile', help="server stream profile for --channel")
+    measure.add_argument('--json', action='store_true', help="print only the final report as JSON")
+    measure.set_defaults(func=cmd_latency)
+    return parser
+
+
+def run_command(argv):
+    args = build_parser().parse_args(argv)
+    if not hasattr(args, 'func'):
+        build_parser().print_help()
+        return 2
+
+    config = read_config(args.config or os.path.join(default_config_dir(), 'tvhplayer.conf'))
+    # Let cron's SIGTERM unwind like Ctrl+C so a running ffmpeg is stopped cleanly
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    out = sys.stdout
+    output_path = getattr(args, 'output', None) if args.func is cmd_epg_export else None
+    # The shared modules report progress with print(); keep that off stdout,
+    # which carries the command's output
+    log = sys.stderr if args.verbose else open(os.devnull, 'w')
+    try:
+        with contextlib.ExitStack() as stack:
+            if output_path:
+                out = stack.enter_context(open(output_path, 'w', encoding='utf-8', newline=''))
+            stack.enter_context(contextlib.redirect_stdout(log))
+            # A test feed given with --stream needs no server
+            server = None if getattr(args, 'stream', None) else select_server(args, config)
+            return args.func(args, server, config, out)
+    except CommandError as e:
+        print(f"tvhplayer: error: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"tvhplayer: {args.command} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if log is not sys.stderr:
+            log.close()
+
+
+def main():
+    """Console script: run a headless subcommand, or the GUI when none is given"""
+    argv = sys.argv[1:]
+    if argv and (argv[0] in SUBCOMMANDS or argv[0] in ('-h', '--help')):
+        sys.exit(run_command(argv))
+
+    # Qt options such as -style are passed on to the GUI untouched
+    try:
+        from .tvhplayer import main as gui_main
+    except ImportError:
+        from tvhplayer import main as gui_main
+    gui_main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Configuration storage with debounced, atomic background writes"""
+import copy
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+# Bump when the layout of tvhplayer.conf changes and add a migration below
+CONFIG_SCHEMA_VERSION = 1
+
+DEFAULT_CONFIG = {
+    'config_version': CONFIG_SCHEMA_VERSION,
+    'volume': 50,
+    'last_server': 0,
+    'servers': [],
+    'recording_path': str(Path.home()),
+    'window_geometry': {
+        'x': 100,
+        'y': 100,
+        'width': 1200,
+        'height': 700
+    },
+}
+
+
+def default_config_dir():
+    """Return the OS-specific configuration directory"""
+    if sys.platform == 'darwin':  # macOS
+        return os.path.join(os.path.expanduser('~/Library/Application Support'), 'TVHplayer')
+    elif sys.platform == 'win32':  # Windows
+        return os.path.join(os.getenv('APPDATA'), 'TVHplayer')
+    else:  # Linux/Unix
+        config_home = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+        return os.path.join(config_home, "tvhplayer")
+
+
+def atomic_write(path, text):
+    """Replace `path` with `text` so readers see either the old or the new file, never a mix"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Persist the rename itself (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(path, data, indent=2):
+    atomic_write(path, json.dumps(data, indent=indent))
+
+
+def _migrate_0_to_1(data):
+    # Unversioned files written by older releases; fill in anything missing
+    for key, value in DEFAULT_CONFIG.items():
+        data.setdefault(key, copy.deepcopy(value))
+    return data
+
+
+MIGRATIONS = {
+    0: _migrate_0_to_1,
+}
+
+
+def migrate(data):
+    """Upgrade a loaded config dict to CONFIG_SCHEMA_VERSION"""
+    version = data.get('config_version', 0)
+    while version < CONFIG_SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+        data['config_version'] = version
+    return data
+
+
+def read_config(path):
+    """Read and migrate the config without writing anything, e.g. for headless commands"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return copy.deepcopy(DEFAULT_CONFIG)
+    if not isinstance(data, dict):
+        return copy.deepcopy(DEFAULT_CONFIG)
+    return migrate(data)
+
+
+class ConfigStore:
+    """Holds the config dict and writes it to disk off the GUI thread.
+
+    `save()` only serializes the dict (cheap) and wakes the writer thread,
+    which waits until no save has happened for `delay` seconds (at most
+    `max_delay` after the first one) and then writes the latest snapshot
+    atomically. `flush()` writes synchronously and is meant for shutdown.
+    """
+
+    def __init__(self, path, delay=1.0, max_delay=5.0):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max_delay
+        self.data = self.load()
+
+        self._cond = threading.Condition()
+        self._pending = None        # latest serialized snapshot not yet on disk
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._writer, name='config-writer', daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """Read the config file, migrating old schemas; defaults if there is none"""
+        if not os.path.exists(self.path):
+            return copy.deepcopy(DEFAULT_CONFIG)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                raise ValueError("config root is not an object")
+        except (OSError, ValueError) as e:
+            # Keep the unreadable file for inspection instead of silently overwriting it
+            aside = f"{self.path}.corrupt-{time.strftime('%Y%m%d_%H%M%S')}"
+            print(f"Warning: Could not read config ({e}), moved to {aside}")
+            try:
+                os.replace(self.path, aside)
+            except OSError:
+                pass
+            return copy.deepcopy(DEFAULT_CONFIG)
+
+        if data.get('config_version', 0) < CONFIG_SCHEMA_VERSION:
+            backup = f"{self.path}.v{data.get('config_version', 0)}.bak"
+            print(f"Debug: Migrating config to schema {CONFIG_SCHEMA_VERSION}, backup at {backup}")
+            try:
+                atomic_write_json(backup, data)
+            except OSError as e:
+                print(f"Warning: Could not back up config: {e}")
+            data = migrate(data)
+        return data
+
+    def save(self):
+        """Schedule the current config to be written"""
+        snapshot = json.dumps(self.data, indent=2)
+        now = time.monotonic()
+        with self._cond:
+            if self._pending is None:
+                self._first_change = now
+            self._pending = snapshot
+            self._last_change = now
+            self._cond.notify()
+
+    def flush(self):
+        """Write any pending change now, on the calling thread"""
+        with self._cond:
+            snapshot, self._pending = self._pending, None
+        if snapshot is not None:
+            self._write(snapshot)
+
+    def close(self):
+        """Stop the writer thread and write the current config"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.save()
+        self.flush()
+
+    def _write(self, snapshot):
+        try:
+            atomic_write(self.path, snapshot)
+            print("Debug: Configuration saved successfully")
+        except OSError as e:
+            print(f"Debug: Error saving config: {str(e)}")
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                # Coalesce bursts of changes into one write
+                while not self._closed:
+                    now = time.monotonic()
+                    due = min(self._last_change + self.delay, self._first_change + self.max_delay)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                if self._closed:
+                    return
+                snapshot, self._pending = self._pending, None
+            self._write(snapshot)
+
+
+class ChannelListCache:
+    """Last channel grid received from each server.
+
+    Lets the main window show a channel list at startup before the server has
+    answered. Files are keyed by server URL and replaced atomically.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, server_url):
+        key = hashlib.sha1(server_url.rstrip('/').encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'channels-{key}.json')
+
+    def load(self, server_url):
+        """Return the cached channel entries of a server, or None"""
+        try:
+            with open(self._path(server_url), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data['entries']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def store(self, server_url, entries):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            atomic_write(self._path(server_url),
+                         json.dumps({'fetched_at': time.time(), 'entries': entries}))
+        except OSError as e:
+            print(f"Debug: Could not cache channel list: {e}")
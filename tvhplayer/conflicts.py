@@ -0,0 +1,270 @@
+"""Tuner conflicts among upcoming DVR recordings.
+
+A recording occupies a tuner for its mux, and recordings of channels on
+the same mux share one. ConflictAnalyser keeps a server's upcoming entries
+in an interval tree, so the entries overlapping a programme are found in
+O(log n + k) however long the schedule is, and counts the tuners that
+overlap needs against the server's.
+
+The channel -> mux mapping comes from the service grid, which needs admin
+access; without it every channel counts as a mux of its own, which can
+only overstate the tuners needed. The tuner count is the number of inputs
+/api/status/inputs reports, unless the server config sets `tuners`.
+"""
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future
+from typing import NamedTuple, Tuple
+
+try:
+    from . import resilience
+except ImportError:
+    import resilience
+
+
+# Reload a schedule in the background once it is this old; entries created
+# through the analyser are added to it meanwhile
+MAX_AGE = 120
+UPCOMING_PAGE_SIZE = 1000
+
+
+class Booking(NamedTuple):
+    channel_uuid: str
+    channel_name: str
+    title: str
+    start: int
+    stop: int
+
+    @classmethod
+    def from_entry(cls, entry):
+        return cls(entry.channel_uuid, entry.channel_name, entry.title, entry.start, entry.stop)
+
+
+class Conflict(NamedTuple):
+    start: int
+    stop: int
+    needed: int                     # tuners needed in this stretch
+    bookings: Tuple[Booking, ...]   # the other recordings on air in it
+
+
+class IntervalTree:
+    """Static interval tree over half-open (start, stop, item) intervals.
+
+    The intervals are sorted by start and form an implicit balanced tree,
+    the middle of every slice being its root; `max_stop[i]` is the latest
+    stop within the subtree rooted at i, so whole subtrees that end before
+    a query are skipped.
+    """
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals, key=lambda interval: (interval[0], interval[1]))
+        self.starts = [interval[0] for interval in self.intervals]
+        self.max_stop = [0] * len(self.intervals)
+        # Children before parents, so every subtree's maximum is known when its root is reached
+        order = []
+        stack = [(0, len(self.intervals))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo < hi:
+                mid = (lo + hi) // 2
+                order.append((lo, mid, hi))
+                stack.append((lo, mid))
+                stack.append((mid + 1, hi))
+        for lo, mid, hi in reversed(order):
+            stop = self.intervals[mid][1]
+            if lo < mid:
+                stop = max(stop, self.max_stop[(lo + mid) // 2])
+            if mid + 1 < hi:
+                stop = max(stop, self.max_stop[(mid + 1 + hi) // 2])
+            self.max_stop[mid] = stop
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def overlapping(self, start, stop):
+        """Items of the intervals that overlap [start, stop)"""
+        # Only intervals that start before `stop` can overlap
+        limit = bisect_left(self.starts, stop)
+        found = []
+        stack = [(0, len(self.intervals))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= min(hi, limit):
+                continue
+            mid = (lo + hi) // 2
+            if self.max_stop[mid] <= start:
+                continue
+            stack.append((lo, mid))
+            if mid < limit:
+                if self.intervals[mid][1] > start:
+                    found.append(self.intervals[mid][2])
+                stack.append((mid + 1, hi))
+        return found
+
+
+def channel_muxes(channel_entries, service_muxes):
+    """Map of channel uuid to the muxes its services are on, from raw channel grid entries"""
+    muxes = {}
+    for entry in channel_entries:
+        options = tuple(dict.fromkeys(service_muxes[service] for service in entry.get('services') or ()
+                                      if service in service_muxes))
+        if options:
+            muxes[entry['uuid']] = options
+    return muxes
+
+
+def tuner_count(inputs):
+    """Tuners a server has, going by its input status; None if it reports none"""
+    return len({status.input for status in inputs}) or None
+
+
+class ConflictAnalyser:
+    """Answers whether a programme fits next to the upcoming recordings of one server"""
+
+    def __init__(self, bookings, channel_muxes, tuners):
+        self.channel_muxes = channel_muxes
+        self.tuners = tuners
+        self.tree = IntervalTree((booking.start, booking.stop, booking) for booking in bookings)
+        self.loaded = time.monotonic()
+        self.added = []  # bookings from add(), to carry over to a reloaded analyser
+
+    def __len__(self):
+        return len(self.tree)
+
+    def add(self, booking):
+        """Account for a recording scheduled after the analyser was loaded"""
+        self.tree = IntervalTree(self.tree.intervals + [(booking.start, booking.stop, booking)])
+        self.added.append(booking)
+
+    def booked(self, booking):
+        return any((other.channel_uuid, other.start) == (booking.channel_uuid, booking.start)
+                   for other in self.tree.overlapping(booking.start, booking.stop))
+
+    def muxes(self, channel_uuid):
+        # A channel whose mux is unknown is taken to be alone on its mux
+        return self.channel_muxes.get(channel_uuid) or (channel_uuid,)
+
+    def tuners_needed(self, channel_uuids):
+        """Tuners needed to record these channels at once"""
+        used = set()
+        # Channels with a single mux first, so the others can join a mux already tuned
+        for options in sorted((self.muxes(uuid) for uuid in set(channel_uuids)), key=len):
+            if used.isdisjoint(options):
+                used.add(options[0])
+        return len(used)
+
+    def conflicts(self, channel_uuid, start, stop):
+        """Conflicts for the stretches of [start, stop) that would need more tuners than there are"""
+        if not self.tuners:
+            return []
+        bookings = sorted((booking for booking in self.tree.overlapping(start, stop)
+                           if (booking.channel_uuid, booking.start) != (channel_uuid, start)),
+                          key=lambda booking: (booking.start, booking.channel_name))
+        if len(bookings) < self.tuners:
+            return []  # fewer recordings than tuners can't conflict, muxes or not
+        edges = sorted({start, stop}.union(
+            edge for booking in bookings for edge in (booking.start, booking.stop) if start < edge < stop))
+        conflicts = []
+        for begin, end in zip(edges, edges[1:]):
+            on_air = tuple(booking for booking in bookings if booking.start < end and booking.stop > begin)
+            needed = self.tuners_needed([channel_uuid] + [booking.channel_uuid for booking in on_air])
+            if needed <= self.tuners:
+                continue
+            last = conflicts[-1] if conflicts else None
+            if last and last.stop == begin and last.bookings == on_air:
+                conflicts[-1] = last._replace(stop=end)
+            else:
+                conflicts.append(Conflict(begin, end, needed, on_air))
+        return conflicts
+
+
+def load_analyser(api, tuners=None):
+    """ConflictAnalyser from a server's upcoming entries, channels, services and inputs.
+
+    `tuners` overrides the count from the input status.
+    """
+    entries, channels, services, inputs = api.batch(
+        lambda: list(api.iter_dvr_entries('upcoming', page_size=UPCOMING_PAGE_SIZE)),
+        lambda: api.channel_grid()[0],
+        api.service_muxes,
+        api.inputs)
+    if isinstance(entries, Exception):
+        raise entries
+    if isinstance(channels, Exception) or isinstance(services, Exception):
+        print(f"Debug: Channel muxes unknown, each channel counts as its own mux: "
+              f"{channels if isinstance(channels, Exception) else services}")
+        muxes = {}
+    else:
+        muxes = channel_muxes(channels, services)
+    if not tuners:
+        if isinstance(inputs, Exception):
+            print(f"Debug: Could not fetch the input status: {inputs}")
+        else:
+            tuners = tuner_count(inputs)
+    # Finished or failed entries sometimes linger in the upcoming grid for a moment
+    bookings = [Booking.from_entry(entry) for entry in entries if entry.state not in ('finished', 'failed')]
+    print(f"Debug: Conflict check: {len(bookings)} upcoming recordings, {tuners or 'unknown'} tuners, "
+          f"{len(set(m for options in muxes.values() for m in options))} muxes")
+    return ConflictAnalyser(bookings, muxes, tuners)
+
+
+_analysers = {}
+_loads = {}  # server -> Future of the analyser being loaded for it
+_analysers_lock = threading.Lock()
+
+
+def analyser_for(server, api):
+    """The server's ConflictAnalyser; blocks, so call it on a worker thread.
+
+    Only the first use of a server waits for the schedule to load, and
+    callers that come while it loads wait for that same load. Once an
+    analyser is older than MAX_AGE it is still returned while a thread loads
+    its successor.
+    """
+    key = resilience.normalize_url(server['url'])
+    with _analysers_lock:
+        analyser = _analysers.get(key)
+        load = _loads.get(key)
+        start = load is None and (analyser is None or time.monotonic() - analyser.loaded > MAX_AGE)
+        if start:
+            load = _loads[key] = Future()
+            # Where the analyser's own additions stand as the load starts
+            known = len(analyser.added) if analyser else 0
+    if start:
+        if analyser is None:
+            _load(key, server, api, load, None, 0)
+        else:
+            threading.Thread(target=_load, args=(key, server, api, load, analyser, known),
+                             name='conflicts-refresh', daemon=True).start()
+    return analyser if analyser is not None else load.result()
+
+
+def _load(key, server, api, load, previous, known):
+    try:
+        analyser = load_analyser(api, server.get('tuners'))
+    except Exception as e:
+        with _analysers_lock:
+            del _loads[key]
+        if previous is not None:
+            print(f"Debug: Could not reload upcoming recordings, keeping the old ones: {e}")
+        load.set_exception(e)
+        return
+    with _analysers_lock:
+        current = _analysers.get(key)
+        if current is not None:
+            # Recordings scheduled while loading may be missing from what the server sent
+            for booking in current.added[known if current is previous else 0:]:
+                if not analyser.booked(booking):
+                    analyser.add(booking)
+        _analysers[key] = analyser
+        del _loads[key]
+    load.set_result(analyser)
+
+
+def add_booking(server, booking):
+    """Add a recording just scheduled on a server to its analyser, if one is loaded"""
+    with _analysers_lock:
+        analyser = _analysers.get(resilience.normalize_url(server['url']))
+        if analyser is not None:
+            analyser.add(booking)
@@ -0,0 +1,337 @@
+"""Segmented, resumable downloads of server recordings.
+
+A Download splits the file into CHUNK_SIZE byte ranges, fetched over
+several pooled connections at once straight into their place in a
+preallocated (sparse where the file system allows) `<file>.part`. Finished
+chunks are recorded in a `<file>.part.json` journal after they are synced
+to disk, so an interrupted download continues with the missing chunks.
+The size is verified before the part file gets its final name.
+DownloadManager runs a queue of downloads under one bandwidth cap.
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+try:
+    from .config import atomic_write_json
+except ImportError:
+    from config import atomic_write_json
+
+
+CHUNK_SIZE = 8 * 1024 * 1024
+DEFAULT_CONNECTIONS = 4
+READ_SIZE = 64 * 1024
+REQUEST_TIMEOUT = (10, 60)
+
+# Download.state values
+QUEUED = 'queued'
+DOWNLOADING = 'downloading'
+PAUSED = 'paused'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class DownloadError(Exception):
+    pass
+
+
+class RateLimiter:
+    """Token bucket shared by all connections; a rate of 0 means unlimited.
+
+    Callers may overdraw it: the debt is slept off by whoever drew last, so
+    reads bigger than one second's worth still work at low rates.
+    """
+
+    def __init__(self, bytes_per_second=0):
+        self.rate = bytes_per_second
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, bytes_per_second):
+        with self._lock:
+            self.rate = bytes_per_second
+            self.tokens = 0.0
+
+    def consume(self, amount):
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            # Allow bursts of up to one second's worth
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+def local_filename(entry):
+    """File name for a downloaded DVREntry: the server's own, else title and start time"""
+    name = os.path.basename(entry.filename.replace('\\', '/')) if entry.filename else ''
+    if not name:
+        when = datetime.fromtimestamp(entry.start).strftime('%Y-%m-%d %H-%M')
+        name = f"{entry.title} {when}.ts"
+    return re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', name)
+
+
+def probe_size(session, url):
+    """Size of a file on the server from a one-byte range request"""
+    response = session.get(url, headers={'Range': 'bytes=0-0'}, timeout=REQUEST_TIMEOUT, stream=True)
+    response.raise_for_status()
+    response.close()
+    if response.status_code == 206:
+        total = response.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+        if total.isdigit():
+            return int(total)
+    length = response.headers.get('Content-Length')
+    if response.status_code == 200 and length and length.isdigit():
+        return int(length)
+    raise DownloadError(f"Could not determine the size of {url}")
+
+
+class Download:
+    """One file fetched in ranges into `path`; run() blocks, so call it on a worker thread"""
+
+    def __init__(self, session, url, path, size=None, title='', connections=DEFAULT_CONNECTIONS,
+                 limiter=None, chunk_size=CHUNK_SIZE):
+        self.session = session
+        self.url = url
+        self.path = path
+        self.size = size
+        self.title = title or os.path.basename(path)
+        self.connections = connections
+        self.limiter = limiter
+        self.chunk_size = chunk_size
+        self.part_path = path + '.part'
+        self.journal_path = path + '.part.json'
+        self.state = QUEUED
+        self.error = None
+        self.received = 0
+        self.done_chunks = set()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def chunk_count(self):
+        return -(-self.size // self.chunk_size)
+
+    def progress(self):
+        """Fraction done, 0.0 to 1.0"""
+        if not self.size:
+            return 0.0
+        return min(self.received / self.size, 1.0)
+
+    def queue(self):
+        """Make a paused or failed download runnable again"""
+        self._stop.clear()
+        self.state = QUEUED
+
+    def pause(self):
+        self._stop.set()
+        if self.state == QUEUED:
+            self.state = PAUSED
+
+    def discard(self):
+        """Delete the partial file and its journal; only while not running"""
+        for path in (self.part_path, self.journal_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def run(self):
+        if self._stop.is_set():
+            self.state = PAUSED
+            return
+        self.state = DOWNLOADING
+        self.error = None
+        try:
+            self._prepare()
+            pending = [i for i in range(self.chunk_count) if i not in self.done_chunks]
+            errors = []
+            with ThreadPoolExecutor(max_workers=self.connections) as pool:
+                futures = [pool.submit(self._fetch_chunk, i) for i in pending]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Stop the other connections; what they finished stays in the journal
+                        self._stop.set()
+                        errors.append(e)
+            if errors:
+                raise errors[0]
+            if self._stop.is_set():
+                self.state = PAUSED
+                return
+            self._finish()
+            self.state = DONE
+            print(f"Debug: Downloaded {self.title} to {self.path}")
+        except Exception as e:
+            print(f"Debug: Download of {self.title} failed: {e}")
+            self.error = str(e)
+            self.state = FAILED
+
+    def _prepare(self):
+        if self.size is None:
+            self.size = probe_size(self.session, self.url)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        journal = None
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                journal = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if (journal and journal.get('url') == self.url and journal.get('size') == self.size
+                and journal.get('chunk_size') == self.chunk_size
+                and os.path.exists(self.part_path) and os.path.getsize(self.part_path) == self.size):
+            self.done_chunks = set(journal.get('done', []))
+            print(f"Debug: Resuming {self.title}: {len(self.done_chunks)}/{self.chunk_count} chunks done")
+        else:
+            with open(self.part_path, 'wb') as f:
+                f.truncate(self.size)  # sparse where the file system supports it
+            self.done_chunks = set()
+            self._save_journal()
+        self.received = sum(self._chunk_length(i) for i in self.done_chunks)
+
+    def _chunk_length(self, index):
+        start = index * self.chunk_size
+        return min(start + self.chunk_size, self.size) - start
+
+    def _save_journal(self):
+        atomic_write_json(self.journal_path, {
+            'url': self.url,
+            'size': self.size,
+            'chunk_size': self.chunk_size,
+            'done': sorted(self.done_chunks),
+        }, indent=None)
+
+    def _fetch_chunk(self, index):
+        if self._stop.is_set():
+            return
+        start = index * self.chunk_size
+        end = start + self._chunk_length(index) - 1
+        response = self.session.get(self.url, headers={'Range': f'bytes={start}-{end}'},
+                                    timeout=REQUEST_TIMEOUT, stream=True)
+        written = 0
+        try:
+            response.raise_for_status()
+            if response.status_code != 206 and (start, end) != (0, self.size - 1):
+                raise DownloadError("The server does not support range requests")
+            with open(self.part_path, 'r+b') as f:
+                f.seek(start)
+                for data in response.iter_content(READ_SIZE):
+                    if self._stop.is_set():
+                        with self._lock:
+                            self.received -= written
+                        return
+                    if self.limiter is not None:
+                        self.limiter.consume(len(data))
+                    f.write(data)
+                    written += len(data)
+                    with self._lock:
+                        self.received += len(data)
+                if written != end - start + 1:
+                    raise DownloadError(f"Chunk {index}: got {written} of {end - start + 1} bytes")
+                # On disk before the journal says so
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            with self._lock:
+                self.received -= written
+            raise
+        finally:
+            response.close()
+        with self._lock:
+            self.done_chunks.add(index)
+            self._save_journal()
+
+    def _finish(self):
+        actual = os.path.getsize(self.part_path)
+        if actual != self.size or len(self.done_chunks) != self.chunk_count:
+            raise DownloadError(f"Size check failed: {actual} bytes on disk, expected {self.size}")
+        os.replace(self.part_path, self.path)
+        os.remove(self.journal_path)
+
+
+class DownloadManager:
+    """Runs queued downloads, `max_active` at a time, under one bandwidth cap (bytes/s).
+
+    `on_change(download)` is called when a download is added or removed or
+    changes state, on the calling thread or the download's own.
+    """
+
+    def __init__(self, max_active=2, rate=0, on_change=None):
+        self.max_active = max_active
+        self.on_change = on_change
+        self.limiter = RateLimiter(rate)
+        self.downloads = []
+        self._lock = threading.Lock()
+        self._running = set()
+        self._discard = set()
+
+    def add(self, download, start=True):
+        download.limiter = self.limiter
+        if not start:
+            download.state = PAUSED
+        with self._lock:
+            self.downloads.append(download)
+        self._changed(download)
+        self._schedule()
+
+    def resume(self, download):
+        if download.state in (PAUSED, FAILED):
+            download.queue()
+            self._changed(download)
+            self._schedule()
+
+    def pause(self, download):
+        # A running download pauses when its thread notices, see _run()
+        download.pause()
+        self._changed(download)
+
+    def remove(self, download):
+        """Stop a download and delete its partial file"""
+        download.pause()
+        with self._lock:
+            if download in self.downloads:
+                self.downloads.remove(download)
+            running = id(download) in self._running
+            if running:
+                self._discard.add(id(download))  # cleaned up when its thread ends
+        if not running and download.state != DONE:
+            download.discard()
+        self._changed(download)
+
+    def unfinished(self):
+        return [d for d in self.downloads if d.state != DONE]
+
+    def _changed(self, download):
+        if self.on_change:
+            self.on_change(download)
+
+    def _schedule(self):
+        with self._lock:
+            for download in self.downloads:
+                if len(self._running) >= self.max_active:
+                    break
+                if download.state == QUEUED and id(download) not in self._running:
+                    self._running.add(id(download))
+                    threading.Thread(target=self._run, args=(download,),
+                                     name='download', daemon=True).start()
+
+    def _run(self, download):
+        download.run()
+        with self._lock:
+            self._running.discard(id(download))
+            discard = id(download) in self._discard
+            self._discard.discard(id(download))
+        if discard:
+            download.discard()
+        self._changed(download)
+        self._schedule()
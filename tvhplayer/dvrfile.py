@@ -0,0 +1,318 @@
+"""Playback of finished recordings over HTTP with range requests.
+
+libVLC reads the file through RangeReader (see `media_from_reader`), which
+fetches it from /dvrfile/<uuid> in fixed-size blocks with HTTP Range
+requests. A background thread keeps the next few seconds of blocks cached
+ahead of the read position, and already fetched blocks stay in a bounded
+LRU cache, so a seek needs at most one block from the server before
+playback continues and scrubbing back needs none.
+
+While blocks arrive, TimeIndex records the MPEG-TS clock (PCR) found at
+their offsets. The seek bar maps times to byte offsets through it, which is
+exact where the file has been read and interpolated elsewhere.
+"""
+import bisect
+import ctypes
+import threading
+from collections import OrderedDict
+
+try:
+    from .latency import parse_pcr, TS_PACKET_SIZE, SYNC_BYTE, PTS_HZ, PTS_WRAP
+except ImportError:
+    from latency import parse_pcr, TS_PACKET_SIZE, SYNC_BYTE, PTS_HZ, PTS_WRAP
+
+
+BLOCK_SIZE = 512 * 1024
+CACHE_BLOCKS = 128  # 64 MiB
+READAHEAD_SECONDS = 8
+FALLBACK_BYTE_RATE = 1024 * 1024  # for the read-ahead when the duration is unknown
+REQUEST_TIMEOUT = (5, 30)
+# The read-ahead retries a failed block after 1, 2, 4... seconds and after
+# this many failures leaves it to read(), which reports the error to libVLC
+PREFETCH_RETRY_DELAY = 1.0
+PREFETCH_ATTEMPTS = 4
+
+
+class RangeNotSupported(Exception):
+    pass
+
+
+def find_pcr(data):
+    """Return (offset in data, PCR seconds) of the first PCR in a chunk of TS, or None"""
+    # Blocks don't start on packet boundaries; find two sync bytes a packet apart
+    for start in range(min(TS_PACKET_SIZE, len(data))):
+        if data[start] == SYNC_BYTE and data[start + TS_PACKET_SIZE:start + TS_PACKET_SIZE + 1] == bytes([SYNC_BYTE]):
+            break
+    else:
+        return None
+    for offset in range(start, len(data) - TS_PACKET_SIZE + 1, TS_PACKET_SIZE):
+        packet = data[offset:offset + TS_PACKET_SIZE]
+        if packet[0] != SYNC_BYTE:
+            return None
+        pcr = parse_pcr(packet)
+        if pcr is not None:
+            return offset, pcr
+    return None
+
+
+class TimeIndex:
+    """Maps byte offsets to media time (seconds from the start) and back"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.offsets = []
+        self.seconds = []
+        self.first_pcr = None
+        self.size = None
+        self.duration = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def scan(self, offset, data):
+        """Index the first PCR in a chunk that starts at byte `offset`"""
+        found = find_pcr(data)
+        if found is None:
+            return
+        position, pcr = found
+        with self._lock:
+            if self.first_pcr is None:
+                if offset > 0:
+                    return  # times are relative to the first packet of the file
+                self.first_pcr = pcr
+            seconds = (pcr - self.first_pcr) % (PTS_WRAP / PTS_HZ)
+            i = bisect.bisect_left(self.offsets, offset + position)
+            if i < len(self.offsets) and self.offsets[i] == offset + position:
+                return
+            self.offsets.insert(i, offset + position)
+            self.seconds.insert(i, seconds)
+
+    def _points(self):
+        offsets, seconds = [0] + self.offsets, [0.0] + self.seconds
+        if self.size and self.duration:
+            offsets.append(self.size)
+            seconds.append(max(self.duration, seconds[-1]))
+        return offsets, seconds
+
+    @staticmethod
+    def _interpolate(x, xs, ys):
+        if len(xs) < 2:
+            return None
+        i = min(max(bisect.bisect_right(xs, x), 1), len(xs) - 1)
+        x0, x1, y0, y1 = xs[i - 1], xs[i], ys[i - 1], ys[i]
+        if x1 == x0:
+            return y0
+        return y0 + (x - x0) * (y1 - y0) / (x1 - x0)
+
+    def offset_for(self, seconds):
+        """Byte offset of a media time, or None without enough information"""
+        with self._lock:
+            offsets, times = self._points()
+        offset = self._interpolate(seconds, times, offsets)
+        return None if offset is None else int(offset)
+
+    def seconds_for(self, offset):
+        with self._lock:
+            offsets, times = self._points()
+        return self._interpolate(offset, offsets, times)
+
+
+class RangeReader:
+    """Random access to a file on an HTTP server, cached and read ahead in blocks.
+
+    `session` is a requests session carrying the server's credentials.
+    `duration` (seconds) sizes the read-ahead window; read(), seek() and
+    close() are called from libVLC's input thread.
+    """
+
+    def __init__(self, session, url, duration=None, block_size=BLOCK_SIZE,
+                 cache_blocks=CACHE_BLOCKS, readahead_seconds=READAHEAD_SECONDS):
+        self.session = session
+        self.url = url
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.readahead_seconds = readahead_seconds
+        self.index = TimeIndex()
+        self.index.duration = duration
+        self.size = None
+        self.position = 0
+        self.blocks = OrderedDict()  # block number -> bytes, least recently used first
+        self.pending = set()  # blocks being fetched
+        self.failures = {}    # block number -> failed read-ahead attempts
+        self.wanted = 0       # the read position's block; read-ahead continues from here
+        self.closed = False
+        self.fetched_bytes = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._callbacks = None  # keeps the ctypes callbacks of media_from_reader alive
+
+    def open(self):
+        """Fetch the first block, which also gives the file size, and start reading ahead"""
+        self._fetch(0)
+        self._thread = threading.Thread(target=self._prefetch, name='dvrfile-prefetch', daemon=True)
+        self._thread.start()
+        return self.size
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    @property
+    def block_count(self):
+        return -(-self.size // self.block_size)
+
+    def readahead_blocks(self):
+        duration = self.index.duration
+        byte_rate = self.size / duration if duration else FALLBACK_BYTE_RATE
+        blocks = -(-int(byte_rate * self.readahead_seconds) // self.block_size)
+        return max(1, min(blocks, self.cache_blocks // 2))
+
+    def _fetch(self, number):
+        start = number * self.block_size
+        end = start + self.block_size - 1
+        if self.size is not None:
+            end = min(end, self.size - 1)
+        try:
+            response = self.session.get(self.url, headers={'Range': f'bytes={start}-{end}'},
+                                        timeout=REQUEST_TIMEOUT, stream=True)
+            response.raise_for_status()
+            if response.status_code != 206:
+                response.close()
+                raise RangeNotSupported(f"Server ignored the range request for {self.url}")
+            content_range = response.headers.get('Content-Range', '')
+            data = response.content
+        except Exception:
+            with self._cond:
+                self.pending.discard(number)
+                self._cond.notify_all()
+            raise
+        if self.size is None:
+            # "bytes 0-524287/1234567"
+            total = content_range.rsplit('/', 1)[-1]
+            self.size = int(total) if total.isdigit() else start + len(data)
+            self.index.size = self.size
+        self.index.scan(start, data)
+        with self._cond:
+            self.pending.discard(number)
+            self.failures.pop(number, None)
+            self.fetched_bytes += len(data)
+            self.blocks[number] = data
+            self.blocks.move_to_end(number)
+            while len(self.blocks) > self.cache_blocks:
+                self.blocks.popitem(last=False)
+            self._cond.notify_all()
+        return data
+
+    def _block(self, number):
+        with self._cond:
+            while True:
+                if number in self.blocks:
+                    self.blocks.move_to_end(number)
+                    return self.blocks[number]
+                if number not in self.pending:
+                    self.pending.add(number)
+                    break
+                # The read-ahead thread is fetching it already
+                self._cond.wait(1.0)
+                if self.closed:
+                    return b''
+        return self._fetch(number)
+
+    def read(self, length):
+        if self.position >= self.size:
+            return b''
+        number = self.position // self.block_size
+        with self._cond:
+            self.wanted = number
+            self._cond.notify_all()
+        data = self._block(number)
+        offset = self.position - number * self.block_size
+        chunk = data[offset:offset + length]
+        self.position += len(chunk)
+        return chunk
+
+    def seek(self, offset):
+        self.position = min(max(offset, 0), self.size)
+        with self._cond:
+            self.wanted = self.position // self.block_size
+            self._cond.notify_all()
+
+    def buffered_seconds(self):
+        """How far ahead of the read position the cache reaches, in media seconds"""
+        with self._cond:
+            number = self.position // self.block_size
+            while number in self.blocks:
+                number += 1
+        end = min(number * self.block_size, self.size)
+        ahead = self.index.seconds_for(end)
+        here = self.index.seconds_for(self.position)
+        if ahead is None or here is None:
+            return 0.0
+        return max(ahead - here, 0.0)
+
+    def _next_to_fetch(self):
+        last = min(self.wanted + self.readahead_blocks(), self.block_count - 1)
+        for number in range(self.wanted, last + 1):
+            if (number not in self.blocks and number not in self.pending
+                    and self.failures.get(number, 0) < PREFETCH_ATTEMPTS):
+                return number
+        return None
+
+    def _prefetch(self):
+        while True:
+            with self._cond:
+                number = None
+                while not self.closed:
+                    number = self._next_to_fetch()
+                    if number is not None:
+                        break
+                    self._cond.wait()
+                if self.closed:
+                    return
+                self.pending.add(number)
+            try:
+                self._fetch(number)
+            except Exception as e:
+                with self._cond:
+                    failures = self.failures[number] = self.failures.get(number, 0) + 1
+                    if failures >= PREFETCH_ATTEMPTS:
+                        print(f"Debug: Read-ahead of block {number} failed {failures} times, giving up: {e}")
+                        continue
+                    print(f"Debug: Read-ahead of block {number} failed: {e}")
+                    # Back off, unless a seek moves the read position elsewhere
+                    wanted = self.wanted
+                    self._cond.wait_for(lambda: self.closed or self.wanted != wanted,
+                                        PREFETCH_RETRY_DELAY * 2 ** (failures - 1))
+
+
+def media_from_reader(instance, reader):
+    """A vlc.Media that reads through `reader`, which must be open()ed"""
+    import vlc
+
+    @vlc.CallbackDecorators.MediaOpenCb
+    def open_cb(opaque, data_pointer, size_pointer):
+        size_pointer.contents.value = reader.size
+        return 0
+
+    @vlc.CallbackDecorators.MediaReadCb
+    def read_cb(opaque, buffer, length):
+        try:
+            data = reader.read(length)
+        except Exception as e:
+            print(f"Debug: Reading {reader.url} failed: {e}")
+            return -1
+        ctypes.memmove(buffer, data, len(data))
+        return len(data)
+
+    @vlc.CallbackDecorators.MediaSeekCb
+    def seek_cb(opaque, offset):
+        reader.seek(offset)
+        return 0
+
+    @vlc.CallbackDecorators.MediaCloseCb
+    def close_cb(opaque):
+        reader.close()
+
+    reader._callbacks = (open_cb, read_cb, seek_cb, close_cb)
+    return instance.media_new_callbacks(open_cb, read_cb, seek_cb, close_cb, None)
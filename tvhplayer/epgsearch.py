@@ -0,0 +1,272 @@
+"""Local full-text index of TVHeadend EPG events"""
+import sqlite3
+import threading
+import time
+
+try:
+    from . import resilience
+    from .api import EPGEvent, get_api, get_async_api
+except ImportError:
+    import resilience
+    from api import EPGEvent, get_api, get_async_api
+
+
+# Events fetched per /api/epg/events/grid request during a sync
+SYNC_PAGE_SIZE = 2000
+
+# bm25 column weights: title, subtitle, summary, description, genre
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 3.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    server TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    channel_uuid TEXT,
+    channel_name TEXT,
+    channel_number TEXT,
+    start INTEGER,
+    stop INTEGER,
+    title TEXT,
+    subtitle TEXT,
+    summary TEXT,
+    description TEXT,
+    genre TEXT,
+    episode TEXT,
+    PRIMARY KEY (server, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_server_stop ON events (server, stop);
+CREATE TABLE IF NOT EXISTS sync_state (
+    server TEXT PRIMARY KEY,
+    synced_at REAL
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(
+    title, subtitle, summary, description, genre,
+    content='events', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Stored columns map one-to-one onto EPGEvent fields
+EVENT_COLUMNS = EPGEvent._fields
+
+
+def fts_query(text):
+    """Turn user input into an FTS5 query: every word must match as a prefix"""
+    words = [w.replace('"', '') for w in text.split()]
+    return ' '.join(f'"{w}"*' for w in words if w)
+
+
+class EPGSearchIndex:
+    """SQLite index of EPG events with FTS5 ranking.
+
+    One instance per thread - the sqlite connection is not shared. Falls back
+    to LIKE matching when the sqlite library was built without FTS5.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            print(f"Debug: FTS5 not available, EPG search falls back to LIKE: {e}")
+            self.has_fts = False
+
+    def close(self):
+        self.conn.close()
+
+    def last_sync(self, server_url):
+        row = self.conn.execute('SELECT synced_at FROM sync_state WHERE server = ?',
+                                (resilience.normalize_url(server_url),)).fetchone()
+        return row['synced_at'] if row else 0
+
+    def event_count(self, server_url):
+        row = self.conn.execute('SELECT COUNT(*) FROM events WHERE server = ?',
+                                (resilience.normalize_url(server_url),)).fetchone()
+        return row[0]
+
+    def replace_events(self, server_url, events):
+        """Replace all stored EPGEvents of a server; returns the events not seen before"""
+        server_key = resilience.normalize_url(server_url)
+        known = {row[0] for row in self.conn.execute(
+            'SELECT event_id FROM events WHERE server = ?', (server_key,))}
+        rows = []
+        new_events = []
+        for event in events:
+            if event.event_id is None:
+                continue
+            rows.append((server_key,) + tuple(event))
+            if event.event_id not in known:
+                new_events.append(event)
+
+        with self.conn:
+            self.conn.execute('DELETE FROM events WHERE server = ?', (server_key,))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO events (server, ' + ', '.join(EVENT_COLUMNS) + ') '
+                'VALUES (' + ', '.join('?' * (len(EVENT_COLUMNS) + 1)) + ')', rows)
+            if self.has_fts:
+                self.conn.execute("INSERT INTO events_fts(events_fts) VALUES('rebuild')")
+            self.conn.execute('INSERT OR REPLACE INTO sync_state (server, synced_at) VALUES (?, ?)',
+                              (server_key, time.time()))
+        return new_events
+
+    def upcoming_events(self, server_url):
+        """Every stored EPGEvent of a server that has not ended, in start order"""
+        rows = self.conn.execute(
+            'SELECT ' + ', '.join(EVENT_COLUMNS) + ' FROM events WHERE server = ? AND stop > ? ORDER BY start',
+            (resilience.normalize_url(server_url), int(time.time()))).fetchall()
+        return [self.row_to_event(row) for row in rows]
+
+    def search(self, server_url, text, offset=0, limit=50, include_past=False):
+        """Return (total, results) for a query; results are EPGEvents"""
+        server_key = resilience.normalize_url(server_url)
+        now = 0 if include_past else int(time.time())
+        if not text.strip():
+            return 0, []
+
+        if self.has_fts:
+            query = fts_query(text)
+            if not query:
+                return 0, []
+            where = 'events_fts MATCH ? AND e.server = ? AND e.stop > ?'
+            # CROSS JOIN pins the FTS table as the outer loop; otherwise SQLite may
+            # scan events and run the MATCH once per row
+            base = 'FROM events_fts CROSS JOIN events e ON e.rowid = events_fts.rowid WHERE ' + where
+            params = (query, server_key, now)
+            order = 'ORDER BY bm25(events_fts, %s), e.start' % ', '.join(map(str, FTS_WEIGHTS))
+        else:
+            pattern = f'%{text.strip()}%'
+            where = ('(e.title LIKE ? OR e.subtitle LIKE ? OR e.summary LIKE ? '
+                     'OR e.description LIKE ? OR e.genre LIKE ?) AND e.server = ? AND e.stop > ?')
+            base = 'FROM events e WHERE ' + where
+            params = (pattern,) * 5 + (server_key, now)
+            order = 'ORDER BY e.start'
+
+        try:
+            total = self.conn.execute('SELECT COUNT(*) ' + base, params).fetchone()[0]
+            rows = self.conn.execute(
+                'SELECT ' + ', '.join(f'e.{c}' for c in EVENT_COLUMNS) + ' ' + base + ' ' + order
+                + ' LIMIT ? OFFSET ?', params + (limit, offset)).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"Debug: EPG search query failed: {e}")
+            return 0, []
+
+        return total, [self.row_to_event(row) for row in rows]
+
+    @staticmethod
+    def row_to_event(row):
+        event = EPGEvent(*row)
+        if not event.description:
+            event = event._replace(description=event.summary)
+        return event
+
+
+def iter_epg_events(server, days=7, progress=None, cancelled=None, channel_uuid=None):
+    """Yield the EPG events of a server (or one channel) starting within `days`, a page at a time.
+
+    `progress(fetched, total)` is called after every page; stops early when
+    `cancelled()` is true. Only one page is held in memory.
+    """
+    api = get_api(server)
+    horizon = time.time() + days * 86400
+    start = 0
+    total = None
+    while total is None or start < total:
+        if cancelled and cancelled():
+            break
+        total, page = api.epg_events(channel_uuid, start=start, limit=SYNC_PAGE_SIZE)
+        for event in page:
+            if event.start <= horizon:
+                yield event
+        start += len(page)
+        if progress:
+            progress(start, total)
+        if not page:
+            break
+
+
+def fetch_epg_events(server, days=7, progress=None, cancelled=None):
+    """Fetch all EPG events of a server starting within `days` as a list of EPGEvents"""
+    return list(iter_epg_events(server, days, progress, cancelled))
+
+
+async def fetch_epg_events_async(server, days=7, progress=None, concurrency=4):
+    """Coroutine version of fetch_epg_events that requests up to `concurrency` pages at once"""
+    import asyncio  # deferred: headless commands never need it
+    api = get_async_api(server)
+    horizon = time.time() + days * 86400
+    total, first = await api.epg_events(start=0, limit=SYNC_PAGE_SIZE)
+    if progress:
+        progress(len(first), total)
+    if not first:
+        return []
+
+    # The server may cap the page size; page by what it actually returned
+    page_size = len(first)
+    pages = {0: first}
+    fetched = page_size
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(start):
+        nonlocal fetched
+        async with semaphore:
+            _, page = await api.epg_events(start=start, limit=page_size)
+        pages[start] = page
+        fetched += len(page)
+        if progress:
+            progress(fetched, total)
+
+    await asyncio.gather(*(fetch_page(start) for start in range(page_size, total, page_size)))
+    return [e for start in sorted(pages) for e in pages[start] if e.start <= horizon]
+
+
+def load_upcoming_events(server_url, db_path):
+    """EPGSearchIndex.upcoming_events through a connection of its own, for worker threads"""
+    index = EPGSearchIndex(db_path)
+    try:
+        return index.upcoming_events(server_url)
+    finally:
+        index.close()
+
+
+def store_events(server_url, db_path, events):
+    """Write a full EPG snapshot into the index; returns the events not seen before"""
+    index = EPGSearchIndex(db_path)
+    try:
+        return index.replace_events(server_url, events)
+    finally:
+        index.close()
+
+
+async def sync_epg_async(server, db_path, days=7, progress=None):
+    """Fetch a server's EPG concurrently and store it; sqlite work runs on the executor"""
+    import asyncio
+    events = await fetch_epg_events_async(server, days, progress)
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, store_events, server['url'], db_path, events)
+
+
+class EPGSyncJob:
+    """Fetch a server's EPG and store it in the index; runs on a worker thread"""
+
+    def __init__(self, server, db_path, days=7):
+        self.server = server
+        self.db_path = db_path
+        self.days = days
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self, progress=None):
+        """Returns the list of events that were not in the index before"""
+        events = fetch_epg_events(self.server, self.days, progress, self._cancel.is_set)
+        if self._cancel.is_set():
+            return []
+        return store_events(self.server['url'], self.db_path, events)
@@ -0,0 +1,345 @@
+"""Live latency measurement on an MPEG transport stream.
+
+Reads a channel's stream alongside (or instead of) playback and compares
+the clocks inside the stream with wall-clock arrival time:
+
+- source delay: broadcast UTC time from the DVB TDT/TOT tables against the
+  local clock (one second resolution, needs NTP on this machine). Test
+  feeds that stamp the PCR with wall-clock time give a precise value
+  instead.
+- PTS lead: how far presentation stamps run ahead of the PCR, i.e. how
+  long a decoder has to buffer before it may show a frame.
+- delivery jitter and drift: the spread and the trend of (arrival - PCR),
+  which show network/server buffering and a clock running away.
+
+Adding the player's own cache to source delay and PTS lead estimates the
+glass-to-glass delay. `serve_test_feed()` generates a wall-clock stamped
+stream for checking all this offline.
+"""
+import statistics
+import threading
+import time
+from collections import deque
+
+TS_PACKET_SIZE = 188
+SYNC_BYTE = 0x47
+TDT_PID = 0x14
+PTS_HZ = 90000
+PTS_WRAP = 1 << 33  # 33-bit PCR base / PTS, wraps every ~26.5 hours
+
+# A PCR step larger than this is a discontinuity (e.g. a new programme source)
+MAX_PCR_STEP = 10.0
+
+
+def parse_pcr(packet):
+    """Return the PCR of a TS packet in seconds, or None"""
+    if not packet[3] & 0x20 or packet[4] < 7 or not packet[5] & 0x10:
+        return None
+    b = packet
+    base = (b[6] << 25) | (b[7] << 17) | (b[8] << 9) | (b[9] << 1) | (b[10] >> 7)
+    extension = ((b[10] & 1) << 8) | b[11]
+    return base / PTS_HZ + extension / 27000000
+
+
+def payload_offset(packet):
+    if packet[3] & 0x20:
+        return 5 + packet[4]
+    return 4
+
+
+def parse_pts(packet):
+    """Return the PTS (seconds) of a video PES starting in this packet, or None"""
+    if not packet[1] & 0x40 or not packet[3] & 0x10:
+        return None
+    p = payload_offset(packet)
+    if p + 14 > TS_PACKET_SIZE or packet[p:p + 3] != b'\x00\x00\x01':
+        return None
+    if not 0xE0 <= packet[p + 3] <= 0xEF or not packet[p + 7] & 0x80:
+        return None
+    b = packet[p + 9:p + 14]
+    pts = (((b[0] >> 1) & 7) << 30) | (b[1] << 22) | ((b[2] >> 1) << 15) | (b[3] << 7) | (b[4] >> 1)
+    return pts / PTS_HZ
+
+
+def bcd(value):
+    return (value >> 4) * 10 + (value & 0x0F)
+
+
+def parse_tdt(packet):
+    """Return the UTC time (unix seconds) of a TDT/TOT section, or None"""
+    if not packet[1] & 0x40:
+        return None
+    p = payload_offset(packet)
+    if p >= TS_PACKET_SIZE:
+        return None
+    p += 1 + packet[p]  # pointer_field
+    if p + 8 > TS_PACKET_SIZE or packet[p] not in (0x70, 0x73):
+        return None
+    mjd = (packet[p + 3] << 8) | packet[p + 4]
+    seconds = bcd(packet[p + 5]) * 3600 + bcd(packet[p + 6]) * 60 + bcd(packet[p + 7])
+    return (mjd - 40587) * 86400 + seconds
+
+
+def encode_tdt_time(unix_time):
+    """MJD + BCD hh:mm:ss as stored in a TDT"""
+    days, seconds = divmod(int(unix_time), 86400)
+    mjd = days + 40587
+    fields = (seconds // 3600, seconds // 60 % 60, seconds % 60)
+    return bytes([mjd >> 8, mjd & 0xFF] + [((v // 10) << 4) | (v % 10) for v in fields])
+
+
+class LatencyMeter:
+    """Collects clock observations from a TS and derives latency figures.
+
+    `feed(data, arrival)` accepts arbitrary chunks of the stream; `arrival`
+    is time.time() when the chunk was received. `window` bounds how many PCR
+    observations are kept for the jitter/drift statistics.
+    """
+
+    def __init__(self, window=3000):
+        self._buffer = b''
+        self.pcr_pid = None
+        self.last_pcr = None
+        self.pcr_unwrap = 0.0
+        self.offsets = deque(maxlen=window)  # (arrival, arrival - unwrapped PCR)
+        self.source_delays = deque(maxlen=120)  # TDT based, seconds
+        self.wallclock_delays = deque(maxlen=window)  # arrival - PCR for wall-clock stamped feeds
+        self.pts_leads = deque(maxlen=600)
+        self.packets = 0
+        self.started = None
+
+    def feed(self, data, arrival=None):
+        arrival = time.time() if arrival is None else arrival
+        if self.started is None:
+            self.started = arrival
+        data = self._buffer + data
+        start = data.find(bytes([SYNC_BYTE]))
+        if start < 0:
+            self._buffer = b''
+            return
+        end = start + (len(data) - start) // TS_PACKET_SIZE * TS_PACKET_SIZE
+        for offset in range(start, end, TS_PACKET_SIZE):
+            packet = data[offset:offset + TS_PACKET_SIZE]
+            if packet[0] != SYNC_BYTE:
+                # Lost sync: resume at the next sync byte with the rest of the data
+                self._buffer = b''
+                self.feed(data[offset + 1:], arrival)
+                return
+            self.packets += 1
+            self._packet(packet, arrival)
+        self._buffer = data[end:]
+
+    def _packet(self, packet, arrival):
+        pid = ((packet[1] & 0x1F) << 8) | packet[2]
+        if pid == TDT_PID:
+            utc = parse_tdt(packet)
+            if utc is not None:
+                self.source_delays.append(arrival - utc)
+            return
+        if packet[3] & 0x20 and packet[4]:
+            pcr = parse_pcr(packet)
+            if pcr is not None and (self.pcr_pid is None or pid == self.pcr_pid):
+                self.pcr_pid = pid
+                self._pcr(pcr, arrival)
+        if packet[1] & 0x40 and self.last_pcr is not None:
+            pts = parse_pts(packet)
+            if pts is not None:
+                lead = (pts - self.last_pcr) % (PTS_WRAP / PTS_HZ)
+                if lead < MAX_PCR_STEP:
+                    self.pts_leads.append(lead)
+
+    def _pcr(self, pcr, arrival):
+        if self.last_pcr is not None:
+            step = pcr - self.last_pcr
+            if step < -(PTS_WRAP / PTS_HZ) / 2:
+                self.pcr_unwrap += PTS_WRAP / PTS_HZ
+            elif abs(step) > MAX_PCR_STEP:
+                # Discontinuity: the old offsets no longer describe this clock
+                self.offsets.clear()
+        self.last_pcr = pcr
+        self.offsets.append((arrival, arrival - (pcr + self.pcr_unwrap)))
+        wallclock_delay = (arrival - pcr) % (PTS_WRAP / PTS_HZ)
+        if wallclock_delay < 60:
+            self.wallclock_delays.append(wallclock_delay)
+
+    def report(self, player_caching_ms=None):
+        """Current figures as a dict; values are None until enough data arrived"""
+        result = {
+            'seconds': (self.offsets[-1][0] - self.started) if self.offsets and self.started else 0.0,
+            'packets': self.packets,
+            'pcr_samples': len(self.offsets),
+            'source_delay': None,
+            'source': None,
+            'pts_lead': statistics.median(self.pts_leads) if self.pts_leads else None,
+            'jitter_ms': None,
+            'drift_ms_per_min': None,
+            'glass_to_glass': None,
+        }
+        if len(self.wallclock_delays) >= 10 and len(self.wallclock_delays) == len(self.offsets):
+            # Every PCR matched the wall clock: a feed stamped with real time
+            result['source_delay'] = statistics.median(self.wallclock_delays)
+            result['source'] = 'pcr'
+        elif self.source_delays:
+            result['source_delay'] = statistics.median(self.source_delays)
+            result['source'] = 'tdt'
+        if len(self.offsets) >= 10:
+            arrivals = [a for a, _ in self.offsets]
+            offsets = [o for _, o in self.offsets]
+            slope = linear_slope(arrivals, offsets)
+            t0, o0 = arrivals[0], offsets[0]
+            residuals = [o - (o0 + slope * (a - t0)) for a, o in zip(arrivals, offsets)]
+            result['jitter_ms'] = statistics.pstdev(residuals) * 1000
+            result['drift_ms_per_min'] = slope * 60000
+        if result['source_delay'] is not None:
+            total = result['source_delay'] + (result['pts_lead'] or 0.0)
+            if player_caching_ms:
+                total += player_caching_ms / 1000
+            result['glass_to_glass'] = total
+        return result
+
+
+def linear_slope(xs, ys):
+    mean_x = statistics.mean(xs)
+    mean_y = statistics.mean(ys)
+    var = sum((x - mean_x) ** 2 for x in xs)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+
+
+def format_report(report):
+    """Human readable lines for a LatencyMeter report"""
+    def ms(value):
+        return f"{value * 1000:.0f} ms" if value is not None else "n/a"
+
+    lines = [f"Measured for {report['seconds']:.0f} s ({report['pcr_samples']} PCR samples)"]
+    source = {'pcr': 'wall-clock PCR', 'tdt': 'TDT, 1 s resolution'}.get(report['source'])
+    lines.append(f"Source delay: {ms(report['source_delay'])}" + (f" ({source})" if source else ""))
+    lines.append(f"PTS lead over PCR: {ms(report['pts_lead'])}")
+    if report['jitter_ms'] is not None:
+        lines.append(f"Delivery jitter: {report['jitter_ms']:.1f} ms")
+        lines.append(f"Drift: {report['drift_ms_per_min']:+.1f} ms/min")
+    lines.append(f"Estimated glass-to-glass: {ms(report['glass_to_glass'])}")
+    return lines
+
+
+def measure(url, auth=None, duration=30, on_update=None, cancelled=None,
+            player_caching_ms=None, update_interval=1.0):
+    """Read `url` for `duration` seconds (None: until cancelled) and return the final report.
+
+    `on_update(report)` is called about every `update_interval` seconds;
+    `cancelled()` returning true ends the measurement early. Blocking.
+    """
+    import requests  # deferred, see resilience
+
+    meter = LatencyMeter()
+    started = time.monotonic()
+    next_update = started + update_interval
+    with requests.get(url, auth=auth, stream=True, timeout=(5, 10)) as response:
+        response.raise_for_status()
+        # Small reads keep the arrival timestamps close to the real arrival
+        for chunk in response.iter_content(TS_PACKET_SIZE * 7):
+            meter.feed(chunk, time.time())
+            now = time.monotonic()
+            if on_update and now >= next_update:
+                on_update(meter.report(player_caching_ms))
+                next_update = now + update_interval
+            if (duration is not None and now - started >= duration) or (cancelled and cancelled()):
+                break
+    return meter.report(player_caching_ms)
+
+
+# Offline test feed
+
+def ts_packet(pid, payload=b'', pusi=False, pcr=None, counter=0):
+    """Build one 188 byte TS packet, stuffed with an adaptation field as needed"""
+    header = bytes([SYNC_BYTE, (0x40 if pusi else 0) | (pid >> 8), pid & 0xFF])
+    adaptation = b''
+    if pcr is not None:
+        base = int(pcr * PTS_HZ) % PTS_WRAP
+        adaptation = bytes([0x10, (base >> 25) & 0xFF, (base >> 17) & 0xFF, (base >> 9) & 0xFF,
+                            (base >> 1) & 0xFF, ((base & 1) << 7) | 0x7E, 0])
+    space = TS_PACKET_SIZE - 4 - len(payload)
+    if adaptation or space > 0:
+        stuffing = space - 1 - len(adaptation)
+        if stuffing < 0:
+            raise ValueError("payload too large")
+        if not adaptation and stuffing > 0:
+            adaptation = b'\x00'
+            stuffing -= 1
+        adaptation = bytes([len(adaptation) + stuffing]) + adaptation + b'\xff' * stuffing
+        control = 0x30 if payload else 0x20
+    else:
+        control = 0x10
+    return header + bytes([control | (counter & 0x0F)]) + adaptation + payload
+
+
+NULL_PACKET = bytes([SYNC_BYTE, 0x1F, 0xFF, 0x10]) + b'\xff' * (TS_PACKET_SIZE - 4)
+
+
+def pes_header(pts):
+    ticks = int(pts * PTS_HZ) % PTS_WRAP
+    pts_bytes = bytes([0x21 | ((ticks >> 29) & 0x0E), (ticks >> 22) & 0xFF, ((ticks >> 14) & 0xFE) | 1,
+                       (ticks >> 7) & 0xFF, ((ticks << 1) & 0xFE) | 1])
+    return b'\x00\x00\x01\xe0\x00\x00\x80\x80\x05' + pts_bytes
+
+
+def test_feed_packets(now, delay=0.0, pts_lead=0.5):
+    """The packets of one 40 ms frame of a wall-clock stamped test feed"""
+    clock = now - delay
+    # Null packets bring the feed to about 1 Mbit/s, like a low bitrate channel
+    return [
+        ts_packet(0x100, pcr=clock),
+        ts_packet(0x100, pes_header(clock + pts_lead), pusi=True),
+    ] + [NULL_PACKET] * 24
+
+
+def tdt_packet(now, delay=0.0):
+    section = bytes([0x70, 0x70, 0x05]) + encode_tdt_time(now - delay)
+    return ts_packet(TDT_PID, b'\x00' + section, pusi=True)
+
+
+def serve_test_feed(port=0, delay=0.0, pts_lead=0.5, host='127.0.0.1'):
+    """Serve an endless TS over HTTP whose PCR and TDT carry wall-clock time minus `delay`.
+
+    Returns the running server; its URL is http://host:server.server_port/.
+    Only clock-bearing packets are sent, enough for LatencyMeter, not for a player.
+    """
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'video/mp2t')
+            self.end_headers()
+            next_tdt = 0.0
+            try:
+                while True:
+                    now = time.time()
+                    data = b''.join(test_feed_packets(now, delay, pts_lead))
+                    if now >= next_tdt:
+                        data += tdt_packet(now, delay)
+                        next_tdt = now + 1.0
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                    time.sleep(0.04)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='ts-test-feed', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    feed = serve_test_feed(8765, delay=2.0)
+    print(f"Test feed with 2 s source delay on http://127.0.0.1:{feed.server_port}/ (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,292 @@
+"""Index of local recordings with metadata from ffprobe.
+
+The recording directories are walked on every scan, but only files whose
+fingerprint (size and modification time) differs from the stored one are
+probed again, so a rescan of a large, mostly unchanged archive costs little
+more than listing it. Probe results, failures included, are kept in SQLite
+until the file changes.
+"""
+import json
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+MEDIA_EXTENSIONS = {'.ts', '.m2ts', '.mts', '.mp4', '.m4v', '.mkv', '.mov', '.avi', '.mpg', '.mpeg', '.webm'}
+
+# Concurrent ffprobe processes during a scan
+PROBE_WORKERS = min(4, os.cpu_count() or 1)
+PROBE_TIMEOUT = 30
+# Probe results are written in transactions of this many files
+COMMIT_EVERY = 50
+
+# start_local_recording names files recording_<channel>_<YYYYmmdd_HHMMSS>.ts
+LOCAL_RECORDING_NAME = re.compile(r'^recording_(?P<channel>.+)_\d{8}_\d{6}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    path TEXT PRIMARY KEY,
+    root TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    probed INTEGER NOT NULL DEFAULT 0,
+    title TEXT,
+    channel TEXT,
+    duration REAL,
+    bitrate INTEGER,
+    video_codec TEXT,
+    audio_codec TEXT,
+    width INTEGER,
+    height INTEGER,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS recordings_root ON recordings (root);
+"""
+
+
+class Recording(NamedTuple):
+    path: str
+    root: str
+    size: int
+    mtime: int          # nanoseconds
+    probed: int
+    title: str
+    channel: str
+    duration: float     # seconds
+    bitrate: int        # bits/s
+    video_codec: str
+    audio_codec: str
+    width: int
+    height: int
+    error: str
+
+
+COLUMNS = Recording._fields
+
+# Orders the library can be listed in; the values are trusted SQL
+SORT_KEYS = {
+    'title': 'title COLLATE NOCASE',
+    'channel': 'channel COLLATE NOCASE',
+    'recorded': 'mtime',
+    'duration': 'duration',
+    'size': 'size',
+    'bitrate': 'bitrate',
+    'codecs': 'video_codec, audio_codec',
+}
+
+
+class ScanResult(NamedTuple):
+    files: int
+    probed: int
+    removed: int
+    failed: int
+
+
+def walk_media(root):
+    """Yield (path, size, mtime in ns) of the media files below `root`"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            print(f"Debug: Cannot list {directory}: {e}")
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS:
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime_ns
+            except OSError:
+                continue
+
+
+def names_from_path(path):
+    """(title, channel) guessed from a file name, for files ffprobe can't tell about"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    match = LOCAL_RECORDING_NAME.match(stem)
+    return stem, match.group('channel') if match else ''
+
+
+def probe_command(path, ffprobe='ffprobe'):
+    return [ffprobe, '-v', 'error', '-print_format', 'json',
+            '-show_format', '-show_streams', '-show_programs', path]
+
+
+def parse_probe(output, path, size):
+    """Metadata columns from ffprobe's JSON output"""
+    info = json.loads(output or '{}')
+    fmt = info.get('format', {})
+    tags = {k.lower(): v for k, v in fmt.get('tags', {}).items()}
+    # MPEG-TS carries the channel as the program's service name
+    for program in info.get('programs', []):
+        for key, value in program.get('tags', {}).items():
+            tags.setdefault(key.lower(), value)
+
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), {})
+    audio = next((s for s in info.get('streams', []) if s.get('codec_type') == 'audio'), {})
+    try:
+        duration = float(fmt.get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    try:
+        bitrate = int(fmt.get('bit_rate'))
+    except (TypeError, ValueError):
+        bitrate = int(size * 8 / duration) if duration else None
+
+    title, channel = names_from_path(path)
+    return {
+        'title': tags.get('title') or title,
+        'channel': tags.get('service_name') or channel,
+        'duration': duration,
+        'bitrate': bitrate,
+        'video_codec': video.get('codec_name'),
+        'audio_codec': audio.get('codec_name'),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'error': None,
+    }
+
+
+def probe_file(path, size, ffprobe='ffprobe'):
+    """Run ffprobe on one file; returns the metadata columns, with `error` set on failure"""
+    try:
+        result = subprocess.run(probe_command(path, ffprobe), stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=PROBE_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or
+                               f"ffprobe exit code {result.returncode}")
+        return parse_probe(result.stdout.decode('utf-8', 'replace'), path, size)
+    except (OSError, ValueError, RuntimeError, subprocess.TimeoutExpired) as e:
+        title, channel = names_from_path(path)
+        return {'title': title, 'channel': channel, 'duration': None, 'bitrate': None,
+                'video_codec': None, 'audio_codec': None, 'width': None, 'height': None,
+                'error': str(e) or type(e).__name__}
+
+
+class RecordingLibrary:
+    """SQLite index of the recordings below a set of directories.
+
+    One instance per thread - the sqlite connection is not shared.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM recordings').fetchone()[0]
+
+    def recordings(self, sort='recorded', descending=True, text=''):
+        """All indexed Recordings, optionally only those whose title or channel contains `text`"""
+        order = SORT_KEYS.get(sort, SORT_KEYS['recorded'])
+        if descending:
+            order = ', '.join(f'{key} DESC' for key in order.split(', '))
+        query = 'SELECT ' + ', '.join(COLUMNS) + ' FROM recordings'
+        params = ()
+        if text.strip():
+            query += ' WHERE title LIKE ? OR channel LIKE ?'
+            params = (f'%{text.strip()}%',) * 2
+        rows = self.conn.execute(query + ' ORDER BY ' + order + ', path', params).fetchall()
+        return [Recording(*row) for row in rows]
+
+    def scan(self, directories, progress=None, cancelled=None, workers=PROBE_WORKERS):
+        """Bring the index up to date with `directories`; returns a ScanResult.
+
+        `progress(done, total)` is called as changed files are probed; stops
+        early, keeping what was probed so far, when `cancelled()` is true.
+        Directories that are missing (an unmounted drive, say) keep their
+        entries.
+        """
+        roots = [os.path.abspath(directory) for directory in directories]
+        found = {}
+        for root in roots:
+            if not os.path.isdir(root):
+                print(f"Debug: Library directory {root} is not available")
+                continue
+            for path, size, mtime in walk_media(root):
+                found.setdefault(path, (root, size, mtime))
+
+        known = {row['path']: (row['size'], row['mtime'], row['probed'], row['root'])
+                 for row in self.conn.execute('SELECT path, size, mtime, probed, root FROM recordings')}
+        available = {root for root in roots if os.path.isdir(root)}
+        removed = [path for path, (_, _, _, root) in known.items()
+                   if path not in found and (root in available or root not in roots)]
+        ffprobe = shutil.which('ffprobe')
+        changed = [path for path, (_, size, mtime) in found.items()
+                   if path not in known or known[path][:2] != (size, mtime)
+                   or (ffprobe and not known[path][2])]
+
+        with self.conn:
+            self.conn.executemany('DELETE FROM recordings WHERE path = ?', [(path,) for path in removed])
+        print(f"Debug: Library scan: {len(found)} files, {len(changed)} new or changed, {len(removed)} removed")
+
+        if ffprobe is None:
+            # Index what the file system tells; probed once ffprobe is installed
+            if changed:
+                print("Debug: ffprobe not found, recordings are indexed without metadata")
+            with self.conn:
+                for path in changed:
+                    self._store(path, found[path], dict(zip(('title', 'channel'), names_from_path(path))), 0)
+            return ScanResult(len(found), 0, len(removed), 0)
+
+        done = failed = 0
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(probe_file, path, found[path][1], ffprobe): path for path in changed}
+            pending = []
+            for future in as_completed(futures):
+                path = futures[future]
+                metadata = future.result()
+                if metadata['error']:
+                    failed += 1
+                    print(f"Debug: ffprobe failed for {path}: {metadata['error']}")
+                pending.append((path, metadata))
+                done += 1
+                if len(pending) >= COMMIT_EVERY:
+                    self._store_batch(pending, found)
+                    pending = []
+                if progress:
+                    progress(done, len(changed))
+                if cancelled and cancelled():
+                    for other in futures:
+                        other.cancel()
+                    break
+            self._store_batch(pending, found)
+        finally:
+            pool.shutdown(wait=True)
+        return ScanResult(len(found), done, len(removed), failed)
+
+    def _store_batch(self, results, found):
+        with self.conn:
+            for path, metadata in results:
+                self._store(path, found[path], metadata, 1)
+
+    def _store(self, path, fingerprint, metadata, probed):
+        root, size, mtime = fingerprint
+        row = dict.fromkeys(COLUMNS)
+        row.update(metadata, path=path, root=root, size=size, mtime=mtime, probed=probed)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO recordings (' + ', '.join(COLUMNS) + ') '
+            'VALUES (' + ', '.join('?' * len(COLUMNS)) + ')', [row[column] for column in COLUMNS])
+
+
+def scan_library(db_path, directories, progress=None, cancelled=None):
+    """Rescan through a connection of its own, for use on a worker thread"""
+    library = RecordingLibrary(db_path)
+    try:
+        return library.scan(directories, progress, cancelled)
+    finally:
+        library.close()
@@ -0,0 +1,111 @@
+"""On-disk cache for channel logos with HTTP revalidation"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class LogoDiskCache:
+    """Store downloaded logos in the config dir.
+
+    A logo younger than `max_age` is used without touching the network. Older
+    ones are revalidated with If-None-Match / If-Modified-Since, so an
+    unchanged logo costs a 304 instead of a download. If the server can't be
+    reached the stale copy is used.
+    """
+
+    def __init__(self, cache_dir, max_age=7 * 86400, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.img', base + '.json'
+
+    def _read(self, url):
+        data_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(data_path, 'rb') as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def _write(self, url, data, meta):
+        data_path, meta_path = self._paths(url)
+        # Write data before metadata, each via rename, so a crash never leaves
+        # metadata pointing at a half-written image
+        for path, mode, content in ((data_path, 'wb', data),
+                                    (meta_path, 'w', json.dumps(meta))):
+            if content is None:
+                continue
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, mode) as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+    def get(self, url, auth=None, timeout=(3, 10)):
+        """Return the logo bytes for `url`, or None if unavailable"""
+        data, meta = self._read(url)
+        if data is not None and time.time() - meta.get('fetched_at', 0) < self.max_age:
+            return data
+
+        import requests  # deferred, see resilience
+
+        headers = {}
+        if data is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            response = requests.get(url, auth=auth, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            print(f"Debug: Logo download failed for {url}: {e}")
+            return data
+
+        if response.status_code == 304 and data is not None:
+            meta['fetched_at'] = time.time()
+            self._write(url, None, meta)
+            return data
+        if response.status_code != 200 or not response.content:
+            return data
+
+        meta = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        self._write(url, response.content, meta)
+        return response.content
+
+    def prune(self):
+        """Delete least recently fetched logos until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.img'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            for victim in (path, path[:-4] + '.json'):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+            total -= size
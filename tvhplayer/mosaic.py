@@ -0,0 +1,114 @@
+"""Decoding levels and the resource budget of the multi-channel mosaic.
+
+Qt-free: the mosaic window owns one libVLC player per tile and asks
+MosaicBudget every few seconds which tile to degrade or restore. The
+focused tile always plays at full quality; the others start reduced and
+are pushed down to key frames only while the process uses more CPU, or the
+tiles together more bandwidth, than the budget allows.
+"""
+import os
+import time
+from typing import NamedTuple
+
+GRID_SIZES = (4, 9, 16)
+
+# Tile decoding levels, from most to least expensive
+LEVEL_FULL = 0       # focused tile: audio, every frame
+LEVEL_REDUCED = 1    # no audio, no deblocking, non-reference frames skipped
+LEVEL_KEYFRAMES = 2  # key frames only, about one picture per GOP
+LEVEL_NAMES = ('full', 'reduced', 'key frames')
+
+# Degrade when over budget; restore only well below it, so tiles don't flap
+RESTORE_FRACTION = 0.6
+# Wait this long after any change for the statistics to settle
+HOLD_SECONDS = 10.0
+
+DEFAULT_CPU_BUDGET = 70  # percent of all cores
+
+
+def tile_media_options(level):
+    """libVLC media options for a tile at `level`.
+
+    Decoder options only take effect when the media is opened, so changing a
+    tile's level reopens its stream.
+    """
+    if level == LEVEL_FULL:
+        return []
+    options = [
+        ':no-audio',
+        ':avcodec-skiploopfilter=4',
+        ':avcodec-fast',
+        ':avcodec-hurry-up',
+    ]
+    # avcodec skip-frame: 1 skips non-reference frames, 3 everything but key frames
+    options.append(':avcodec-skip-frame=1' if level == LEVEL_REDUCED else ':avcodec-skip-frame=3')
+    return options
+
+
+class CpuMeter:
+    """CPU use of this process, libVLC's decoder threads included, in percent of all cores"""
+
+    def __init__(self):
+        self.cores = os.cpu_count() or 1
+        self.last = (time.monotonic(), time.process_time())
+
+    def percent(self):
+        now = (time.monotonic(), time.process_time())
+        wall = now[0] - self.last[0]
+        cpu = now[1] - self.last[1]
+        self.last = now
+        if wall <= 0:
+            return 0.0
+        return 100.0 * cpu / wall / self.cores
+
+
+class TileLoad(NamedTuple):
+    index: int
+    level: int
+    focused: bool
+    input_kbps: float
+
+
+class MosaicBudget:
+    """Decides one tile level change at a time from the measured load.
+
+    `bandwidth_kbps` of 0 leaves bandwidth unlimited.
+    """
+
+    def __init__(self, cpu_percent=DEFAULT_CPU_BUDGET, bandwidth_kbps=0):
+        self.cpu_percent = cpu_percent
+        self.bandwidth_kbps = bandwidth_kbps
+        self.changed_at = float('-inf')
+
+    def over(self, cpu, kbps, fraction=1.0):
+        if cpu > self.cpu_percent * fraction:
+            return True
+        return bool(self.bandwidth_kbps) and kbps > self.bandwidth_kbps * fraction
+
+    def plan(self, tiles, cpu, now=None):
+        """Return (tile index, new level) to apply, or None.
+
+        Over budget, the unfocused tile with the most traffic drops one level;
+        well under it, the most degraded unfocused tile gets one level back.
+        """
+        now = time.monotonic() if now is None else now
+        if now - self.changed_at < HOLD_SECONDS:
+            return None
+        kbps = sum(tile.input_kbps for tile in tiles)
+        others = [tile for tile in tiles if not tile.focused]
+        change = None
+        if self.over(cpu, kbps):
+            candidates = [tile for tile in others if tile.level < LEVEL_KEYFRAMES]
+            if candidates:
+                tile = max(candidates, key=lambda tile: (tile.input_kbps, -tile.level))
+                change = (tile.index, tile.level + 1)
+        elif not self.over(cpu, kbps, RESTORE_FRACTION):
+            candidates = [tile for tile in others if tile.level > LEVEL_REDUCED]
+            if candidates:
+                tile = min(candidates, key=lambda tile: tile.input_kbps)
+                change = (tile.index, tile.level - 1)
+        if change is not None:
+            self.changed_at = now
+            print(f"Debug: Mosaic load {cpu:.0f}% CPU, {kbps:.0f} kb/s: "
+                  f"tile {change[0] + 1} -> {LEVEL_NAMES[change[1]]}")
+        return change
@@ -0,0 +1,222 @@
+"""Playback statistics sampled from libVLC while a stream plays.
+
+Qt-free: the GUI calls `PlaybackStats.sample()` from a timer (1 Hz) and
+`on_buffering()` from the VLC event thread. Samples go into a bounded
+ring buffer from which rates, drop percentages and a CSV export are
+derived.
+"""
+import csv
+import threading
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+
+# Counters read from libvlc_media_get_stats(); all are cumulative since the
+# media was opened. libVLC 3 counts pictures dropped for being late as lost
+# pictures, there is no separate late-frame counter.
+MEDIA_COUNTERS = (
+    'read_bytes', 'demux_read_bytes', 'demux_corrupted', 'demux_discontinuity',
+    'decoded_video', 'decoded_audio', 'displayed_pictures', 'lost_pictures',
+    'played_abuffers', 'lost_abuffers',
+)
+
+
+class StatsSample(NamedTuple):
+    time: float
+    read_bytes: int
+    demux_read_bytes: int
+    demux_corrupted: int
+    demux_discontinuity: int
+    decoded_video: int
+    decoded_audio: int
+    displayed_pictures: int
+    lost_pictures: int
+    played_abuffers: int
+    lost_abuffers: int
+    buffering_events: int    # rebuffers after playback had started
+    buffering_seconds: float  # time spent rebuffering
+
+
+class StatsRates(NamedTuple):
+    """Rates over the interval between two samples"""
+    time: float
+    input_kbps: float
+    demux_kbps: float
+    decoded_fps: float
+    displayed_fps: float
+    lost_pictures: int
+    picture_drop_percent: float
+    lost_abuffers: int
+    audio_drop_percent: float
+    corrupted: int
+    discontinuities: int
+    buffering_events: int
+
+    def osd_text(self):
+        """One short line for the on-screen overlay"""
+        text = (f"{self.input_kbps / 1000:.1f} Mb/s  {self.displayed_fps:.0f} fps  "
+                f"drop {self.picture_drop_percent:.1f}%")
+        if self.lost_abuffers:
+            text += f"  audio lost {self.lost_abuffers}"
+        if self.buffering_events:
+            text += f"  rebuffer {self.buffering_events}"
+        return text
+
+
+def read_media_stats(media):
+    """Return the cumulative counters of a vlc.Media as a dict, or None"""
+    if media is None:
+        return None
+    # Different versions of python-vlc have different APIs for get_stats
+    try:
+        # Newer versions (direct call)
+        stats = media.get_stats()
+    except TypeError:
+        # Older versions (requiring a stats object parameter)
+        import vlc
+        stats = vlc.MediaStats()
+        if not media.get_stats(stats):
+            return None
+    if not stats:
+        return None
+    return {name: int(getattr(stats, name, 0) or 0) for name in MEDIA_COUNTERS}
+
+
+def percent(part, whole):
+    return 100.0 * part / whole if whole > 0 else 0.0
+
+
+def interval_rates(previous, current):
+    """Compute StatsRates between two StatsSamples"""
+    elapsed = max(current.time - previous.time, 1e-3)
+    delta = {field: getattr(current, field) - getattr(previous, field)
+             for field in StatsSample._fields[1:]}
+    lost_pictures = max(delta['lost_pictures'], 0)
+    lost_abuffers = max(delta['lost_abuffers'], 0)
+    return StatsRates(
+        current.time,
+        max(delta['read_bytes'], 0) * 8 / elapsed / 1000,
+        max(delta['demux_read_bytes'], 0) * 8 / elapsed / 1000,
+        max(delta['decoded_video'], 0) / elapsed,
+        max(delta['displayed_pictures'], 0) / elapsed,
+        lost_pictures,
+        percent(lost_pictures, max(delta['displayed_pictures'], 0) + lost_pictures),
+        lost_abuffers,
+        percent(lost_abuffers, max(delta['played_abuffers'], 0) + lost_abuffers),
+        max(delta['demux_corrupted'], 0),
+        max(delta['demux_discontinuity'], 0),
+        max(delta['buffering_events'], 0),
+    )
+
+
+class PlaybackStats:
+    """Ring buffer of samples for the stream currently playing.
+
+    `reset(label)` starts a new stream; label names it in exports. The
+    buffer holds `capacity` samples (ten minutes at 1 Hz by default).
+    """
+
+    def __init__(self, capacity=600):
+        self.samples = deque(maxlen=capacity)
+        self.label = ''
+        self.started = 0.0
+        self._lock = threading.Lock()
+        self._buffering_events = 0
+        self._buffering_seconds = 0.0
+        self._buffering_since = None  # set while a rebuffer is in progress
+        self._playing = False         # the first fill after opening is not a rebuffer
+
+    def reset(self, label=''):
+        with self._lock:
+            self.samples.clear()
+            self.label = label
+            self.started = time.time()
+            self._buffering_events = 0
+            self._buffering_seconds = 0.0
+            self._buffering_since = None
+            self._playing = False
+
+    def on_buffering(self, cache_percent):
+        """Feed libVLC's MediaPlayerBuffering event; safe from the VLC event thread"""
+        now = time.monotonic()
+        with self._lock:
+            if cache_percent >= 100:
+                if self._buffering_since is not None:
+                    self._buffering_seconds += now - self._buffering_since
+                    self._buffering_since = None
+                self._playing = True
+            elif self._playing and self._buffering_since is None:
+                self._buffering_events += 1
+                self._buffering_since = now
+
+    def buffering_totals(self):
+        """Return (rebuffer events, seconds spent rebuffering) for the current stream"""
+        with self._lock:
+            seconds = self._buffering_seconds
+            if self._buffering_since is not None:
+                seconds += time.monotonic() - self._buffering_since
+            return self._buffering_events, seconds
+
+    def sample(self, media) -> Optional[StatsRates]:
+        """Record the media's counters now; returns the rates since the previous sample"""
+        counters = read_media_stats(media)
+        if counters is None:
+            return None
+        events, seconds = self.buffering_totals()
+        current = StatsSample(time.time(), buffering_events=events, buffering_seconds=seconds, **counters)
+        with self._lock:
+            previous = self.samples[-1] if self.samples else None
+            if previous is not None and current.read_bytes < previous.read_bytes:
+                # Counters restart when the media is reopened
+                self.samples.clear()
+                previous = None
+            self.samples.append(current)
+        if previous is None:
+            return None
+        return interval_rates(previous, current)
+
+    def history(self):
+        """Return StatsRates for every interval in the buffer, oldest first"""
+        with self._lock:
+            samples = list(self.samples)
+        return [interval_rates(a, b) for a, b in zip(samples, samples[1:])]
+
+    def summary(self):
+        """Totals over the whole buffer as a dict, or None with fewer than two samples"""
+        with self._lock:
+            if len(self.samples) < 2:
+                return None
+            first, last = self.samples[0], self.samples[-1]
+        rates = interval_rates(first, last)
+        return {
+            'seconds': last.time - first.time,
+            'input_kbps': rates.input_kbps,
+            'displayed_fps': rates.displayed_fps,
+            'lost_pictures': rates.lost_pictures,
+            'picture_drop_percent': rates.picture_drop_percent,
+            'lost_abuffers': rates.lost_abuffers,
+            'audio_drop_percent': rates.audio_drop_percent,
+            'corrupted': rates.corrupted,
+            'discontinuities': rates.discontinuities,
+            'buffering_events': last.buffering_events,
+            'buffering_seconds': last.buffering_seconds,
+        }
+
+    def export_csv(self, path):
+        """Write every sample with its interval rates to a CSV file"""
+        with self._lock:
+            samples = list(self.samples)
+        rate_fields = StatsRates._fields[1:]
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            # Interval counts get a suffix where they share a name with the cumulative counters
+            writer.writerow(('stream',) + StatsSample._fields + tuple(
+                f'{name}_interval' if name in StatsSample._fields else name for name in rate_fields))
+            previous = None
+            for sample in samples:
+                rates = interval_rates(previous, sample)[1:] if previous else ('',) * len(rate_fields)
+                writer.writerow((self.label,) + tuple(sample) + tuple(
+                    round(value, 2) if isinstance(value, float) else value for value in rates))
+                previous = sample
+        return len(samples)
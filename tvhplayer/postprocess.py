@@ -0,0 +1,269 @@
+"""Deferred conversion of local captures into their requested container.
+
+Captures are written as MPEG-TS with the streams copied (see recorder).
+When a recording was asked for as .mp4 or .mkv, a job here converts the
+finished capture afterwards, at low priority, into a temporary file that
+only replaces the target once ffmpeg succeeded; the capture is deleted
+after that. Jobs are kept in a JSON journal, so ones that were queued or
+running when the app stopped are run again on the next start.
+"""
+import itertools
+import json
+import os
+import subprocess
+import threading
+
+try:
+    from . import recorder
+    from .config import atomic_write_json
+    from .library import probe_file
+except ImportError:
+    import recorder
+    from config import atomic_write_json
+    from library import probe_file
+
+
+MAX_WORKERS = 1
+
+# Lower runs first
+PRIORITY_NOW = 0
+PRIORITY_NORMAL = 10
+
+# PostJob.state values
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class PostProcessError(Exception):
+    pass
+
+
+class PostJob:
+    """Conversion of one capture into `target`"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, source, target, priority=PRIORITY_NORMAL, delete_source=True, state=QUEUED, error=None):
+        self.id = next(self._ids)
+        self.source = source
+        self.target = target
+        self.priority = priority
+        self.delete_source = delete_source
+        self.state = state
+        self.error = error
+        self.progress = 0.0  # fraction done; not journaled
+        self.process = None
+
+    @property
+    def title(self):
+        return os.path.basename(self.target)
+
+    def to_dict(self):
+        return {
+            'source': self.source,
+            'target': self.target,
+            'priority': self.priority,
+            'delete_source': self.delete_source,
+            'state': self.state,
+            'error': self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['source'], data['target'], data.get('priority', PRIORITY_NORMAL),
+                  data.get('delete_source', True), data.get('state', QUEUED), data.get('error'))
+        if job.state == RUNNING:
+            job.state = QUEUED  # interrupted; its output was a temporary file
+        return job
+
+
+def parse_progress(line, duration):
+    """Fraction done from one line of ffmpeg's -progress output, or None"""
+    key, _, value = line.strip().partition('=')
+    if key == 'progress' and value == 'end':
+        return 1.0
+    # out_time_ms is in microseconds too, despite its name
+    if key in ('out_time_us', 'out_time_ms') and duration and value.isdigit():
+        return min(int(value) / 1e6 / duration, 1.0)
+    return None
+
+
+def convert(source, target, progress=None, started=None):
+    """Convert `source` into `target` with ffmpeg; blocks until done.
+
+    `progress(fraction)` is called as ffmpeg reports; `started(process)`
+    receives the ffmpeg process, e.g. to kill it. Raises PostProcessError.
+    """
+    if not os.path.exists(source):
+        raise PostProcessError(f"{source} does not exist")
+    duration = probe_file(source, os.path.getsize(source))['duration']
+    tmp_path = f'{target}.{os.getpid()}.tmp'
+    try:
+        process = subprocess.Popen(recorder.convert_command(source, target, tmp_path),
+                                   stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, universal_newlines=True,
+                                   **recorder.low_priority())
+    except OSError as e:
+        raise PostProcessError(f"Cannot run ffmpeg: {e}")
+    if started:
+        started(process)
+    errors = []
+    # stderr only carries errors at this log level; drain it so ffmpeg can't block on it
+    drain = threading.Thread(target=lambda: errors.extend(process.stderr), daemon=True)
+    drain.start()
+    for line in process.stdout:
+        fraction = parse_progress(line, duration)
+        if fraction is not None and progress:
+            progress(fraction)
+    return_code = process.wait()
+    drain.join()
+    if return_code != 0 or not os.path.exists(tmp_path):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        message = ''.join(errors).strip()[-300:] or f"ffmpeg exit code {return_code}"
+        raise PostProcessError(message)
+    os.replace(tmp_path, target)
+
+
+class PostProcessQueue:
+    """Runs PostJobs, `max_workers` at a time, in priority order.
+
+    `on_change(job)` is called on a worker thread whenever a job's state or
+    progress changes. The journal holds every job that is not done.
+    """
+
+    def __init__(self, journal_path, max_workers=MAX_WORKERS, on_change=None, paused=False):
+        self.journal_path = journal_path
+        self.on_change = on_change
+        self.jobs = []
+        self.paused = paused
+        self.closed = False
+        self._cond = threading.Condition()
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                self.jobs = [PostJob.from_dict(data) for data in json.load(f)]
+        except (OSError, ValueError, KeyError):
+            pass
+        if self.jobs:
+            print(f"Debug: Resuming {len(self.jobs)} post-processing job(s)")
+        for _ in range(max_workers):
+            threading.Thread(target=self._work, name='postprocess', daemon=True).start()
+
+    def add(self, source, target, priority=PRIORITY_NORMAL, delete_source=True):
+        job = PostJob(source, target, priority, delete_source)
+        with self._cond:
+            self.jobs.append(job)
+            self._save()
+            self._cond.notify()
+        return job
+
+    def run_next(self, job):
+        """Move a job to the front of the queue"""
+        with self._cond:
+            job.priority = PRIORITY_NOW
+            if job.state == FAILED:
+                job.state = QUEUED
+                job.error = None
+            self._save()
+            self._cond.notify()
+
+    def cancel(self, job):
+        """Drop a job, keeping its capture; a running conversion is stopped"""
+        with self._cond:
+            if job in self.jobs:
+                self.jobs.remove(job)
+            process = job.process
+            job.state = CANCELLED
+            self._save()
+        if process is not None:
+            process.kill()
+        self._changed(job)
+
+    def set_paused(self, paused):
+        """Hold back new jobs, e.g. while a capture is running; running ones finish"""
+        with self._cond:
+            if paused != self.paused:
+                print(f"Debug: Post-processing {'paused' if paused else 'resumed'}")
+            self.paused = paused
+            self._cond.notify_all()
+
+    def close(self):
+        """Stop the workers; running jobs stay journaled and run again next time"""
+        with self._cond:
+            self.closed = True
+            processes = [job.process for job in self.jobs if job.process is not None]
+            self._cond.notify_all()
+        for process in processes:
+            process.kill()
+
+    def _save(self):
+        try:
+            atomic_write_json(self.journal_path, [job.to_dict() for job in self.jobs], indent=None)
+        except OSError as e:
+            print(f"Debug: Cannot write the post-processing journal: {e}")
+
+    def _next_job(self):
+        queued = [job for job in self.jobs if job.state == QUEUED]
+        if not queued:
+            return None
+        # Same priority: first come, first served
+        return min(queued, key=lambda job: (job.priority, job.id))
+
+    def _changed(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = None
+                while not self.closed:
+                    job = None if self.paused else self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                if self.closed:
+                    return
+                job.state = RUNNING
+                job.progress = 0.0
+                self._save()
+            self._changed(job)
+            self._run(job)
+
+    def _run(self, job):
+        def progress(fraction):
+            job.progress = fraction
+            self._changed(job)
+
+        def started(process):
+            job.process = process
+
+        print(f"Debug: Converting {job.source} to {job.target}")
+        try:
+            convert(job.source, job.target, progress, started)
+            state, error = DONE, None
+        except PostProcessError as e:
+            state, error = FAILED, str(e)
+        with self._cond:
+            job.process = None
+            if job.state == CANCELLED or self.closed:
+                return  # killed on purpose; a closed queue resumes the job next time
+            job.state, job.error = state, error
+            if state == DONE:
+                self.jobs.remove(job)
+            self._save()
+        if state == DONE:
+            print(f"Debug: Converted {job.source} to {job.target}")
+            if job.delete_source and job.source != job.target:
+                try:
+                    os.remove(job.source)
+                except OSError as e:
+                    print(f"Debug: Cannot remove {job.source}: {e}")
+        else:
+            print(f"Debug: Converting {job.source} failed: {error}")
+        self._changed(job)
@@ -0,0 +1,128 @@
+"""Server-side stream profiles and automatic bitrate switching.
+
+TVHeadend serves a channel through a stream profile: "pass" forwards the
+broadcast as it is, "matroska" remuxes it, transcode profiles re-encode it
+at a lower bitrate. A server and each of its channels can be set to a fixed
+profile or to automatic selection, in which AutoProfileSwitcher walks down
+a ladder of ever cheaper profiles while the link can't keep up and, after a
+long clean stretch, tries one step back up.
+"""
+import time
+from collections import deque
+
+# Server and channel settings: empty for the server's default profile,
+# AUTO_PROFILE for automatic selection, otherwise a profile name
+AUTO_PROFILE = 'auto'
+
+# Step down after this many rebuffers within WINDOW_SECONDS...
+REBUFFER_LIMIT = 2
+WINDOW_SECONDS = 60
+# ...and pick a step whose bitrate fits this share of the measured throughput
+THROUGHPUT_HEADROOM = 0.8
+# Step back up after this long without a rebuffer; doubled each time an
+# upgrade had to be taken back, so a marginal link does not flap
+UPGRADE_AFTER = 900
+MAX_UPGRADE_AFTER = 4 * 3600
+
+
+def stream_profile_setting(server, channel_uuid):
+    """The profile setting for a channel: its own, else the server's"""
+    setting = server.get('channel_profiles', {}).get(channel_uuid)
+    if setting is None:
+        setting = server.get('stream_profile', '')
+    return setting
+
+
+def profile_ladder(profiles, base=''):
+    """Profile names for automatic selection, best first.
+
+    The ladder starts with `base` ('' is the server's default) and continues
+    with the transcode profiles, highest known bitrate first; transcode
+    profiles without a known bitrate keep their server order at the end.
+    """
+    transcode = [p for p in profiles if p.transcode and p.name != base]
+    known = sorted((p for p in transcode if p.bitrate), key=lambda p: -p.bitrate)
+    unknown = [p for p in transcode if not p.bitrate]
+    return [base] + [p.name for p in known + unknown]
+
+
+class AutoProfileSwitcher:
+    """Chooses the ladder step for a stream from its playback statistics.
+
+    The chosen step is remembered per server, since it is the link to the
+    server that limits the bitrate; the next channel on the same server
+    starts on the step the previous one ended on.
+    """
+
+    def __init__(self):
+        self.levels = {}        # server url -> ladder index
+        self.upgrade_after = {}  # server url -> seconds of clean playback before stepping up
+        self.server_url = None
+        self.ladder = []
+        self.bitrates = {}
+        self.samples = deque()  # (time, input kbps, rebuffers) within the window
+        self.clean_since = 0.0
+        self.upgraded_at = None
+
+    def start(self, server_url, ladder, bitrates=None, now=None):
+        """Begin observing a stream; returns the profile name to open it with.
+
+        `bitrates` maps profile names to their bitrate in kb/s where known.
+        """
+        now = time.monotonic() if now is None else now
+        self.server_url = server_url
+        self.ladder = ladder
+        self.bitrates = bitrates or {}
+        self.samples.clear()
+        self.clean_since = now
+        level = min(self.levels.get(server_url, 0), len(ladder) - 1)
+        self.levels[server_url] = level
+        return ladder[level]
+
+    def stop(self):
+        self.server_url = None
+
+    @property
+    def active(self):
+        return self.server_url is not None
+
+    def observe(self, input_kbps, rebuffers, now=None):
+        """Feed one interval of statistics; returns a profile name to switch to, or None"""
+        if not self.active or not self.ladder:
+            return None
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, input_kbps, rebuffers))
+        while self.samples and now - self.samples[0][0] > WINDOW_SECONDS:
+            self.samples.popleft()
+
+        level = self.levels[self.server_url]
+        upgrade_after = self.upgrade_after.get(self.server_url, UPGRADE_AFTER)
+        if rebuffers:
+            self.clean_since = now
+            if self.upgraded_at is not None and now - self.upgraded_at < upgrade_after:
+                # The last step up did not hold; wait longer before the next one
+                self.upgrade_after[self.server_url] = min(upgrade_after * 2, MAX_UPGRADE_AFTER)
+                self.upgraded_at = None
+
+        if sum(sample[2] for sample in self.samples) >= REBUFFER_LIMIT and level < len(self.ladder) - 1:
+            throughput = sum(sample[1] for sample in self.samples) / len(self.samples)
+            new_level = level + 1
+            # Skip steps that are known to need more than the link delivered
+            while (new_level < len(self.ladder) - 1 and
+                   self.bitrates.get(self.ladder[new_level], 0) > throughput * THROUGHPUT_HEADROOM):
+                new_level += 1
+            return self._switch(new_level, now, f"{throughput:.0f} kb/s with rebuffers")
+
+        if level > 0 and now - self.clean_since >= upgrade_after:
+            self.upgraded_at = now
+            return self._switch(level - 1, now, f"{now - self.clean_since:.0f} s without rebuffers")
+        return None
+
+    def _switch(self, level, now, reason):
+        old = self.ladder[self.levels[self.server_url]]
+        self.levels[self.server_url] = level
+        self.samples.clear()
+        self.clean_since = now
+        new = self.ladder[level]
+        print(f"Debug: Stream profile {old or 'default'} -> {new or 'default'} ({reason})")
+        return new
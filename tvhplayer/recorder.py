@@ -0,0 +1,121 @@
+"""Local stream recording with ffmpeg, shared by the GUI and the command line.
+
+Captures are always copied into MPEG-TS as they arrive, which costs next
+to no CPU and survives an interrupted ffmpeg. Other containers are made
+from the capture afterwards (see postprocess).
+"""
+import base64
+import os
+import subprocess
+import sys
+
+NICENESS = 10
+
+
+def capture_path(file_path):
+    """Where to capture a recording meant to end up in `file_path`"""
+    root, ext = os.path.splitext(file_path)
+    return file_path if ext.lower() == '.ts' else root + '.ts'
+
+
+def ffmpeg_command(stream_url, file_path, auth=None, duration=None):
+    """Build the ffmpeg command line that records `stream_url` into `file_path` as MPEG-TS.
+
+    Both streams are copied. `duration` (seconds) makes ffmpeg stop on its
+    own, which is what unattended captures want.
+    """
+    cmd = [
+        'ffmpeg',
+        '-hide_banner',
+        '-loglevel', 'warning',
+        '-nostats',
+        '-y'  # Overwrite output
+    ]
+
+    # Add auth headers if needed
+    if auth:
+        cmd.extend(['-headers', f'Authorization: Basic {basic_auth_token(auth)}\r\n'])
+
+    # Add input options
+    cmd.extend([
+        '-analyzeduration', '10M',  # Increase analyze duration
+        '-probesize', '10M',        # Increase probe size
+        '-i', stream_url,
+    ])
+
+    if duration:
+        cmd.extend(['-t', str(int(duration))])
+
+    cmd.extend([
+        '-c', 'copy',           # Copy both streams without transcoding
+        '-f', 'mpegts'          # Force MPEG-TS format
+    ])
+
+    cmd.append(file_path)
+    return cmd
+
+
+def output_options(file_path):
+    """ffmpeg output options for the container of `file_path`'s extension"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in ('.mp4', '.m4v'):
+        return [
+            '-c:v', 'copy',
+            '-c:a', 'aac',          # Transcode audio to AAC
+            '-b:a', '192k',         # Audio bitrate
+            '-movflags', '+faststart',
+            '-f', 'mp4'
+        ]
+    if ext == '.mkv':
+        return ['-c', 'copy', '-f', 'matroska']
+    return ['-c', 'copy', '-f', 'mpegts']
+
+
+def convert_command(source, target, output):
+    """ffmpeg command that converts `source` for `target`'s container, written to `output`.
+
+    Progress goes to stdout as key=value lines (see postprocess).
+    """
+    cmd = [
+        'ffmpeg',
+        '-hide_banner',
+        '-loglevel', 'error',
+        '-nostdin',
+        '-nostats',
+        '-progress', 'pipe:1',
+        '-y',
+        '-i', source,
+        '-map', '0:v?', '-map', '0:a?',
+    ]
+    cmd.extend(output_options(target))
+    cmd.append(output)
+    return cmd
+
+
+def low_priority():
+    """Popen arguments that start a process below normal priority"""
+    if sys.platform == 'win32':
+        return {'creationflags': subprocess.BELOW_NORMAL_PRIORITY_CLASS}
+    return {'preexec_fn': lambda: os.nice(NICENESS)}
+
+
+def basic_auth_token(auth):
+    return base64.b64encode(f"{auth[0]}:{auth[1]}".encode('utf-8')).decode('ascii')
+
+
+def printable_command(cmd, auth=None):
+    """The command as one string with the credentials masked, for logs"""
+    text = ' '.join(cmd)
+    if auth:
+        text = text.replace(basic_auth_token(auth), '***')
+    return text
+
+
+def start_ffmpeg(cmd, capture_log=True):
+    """Start ffmpeg; its warnings go to a pipe the caller must drain, or to our stderr"""
+    return subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE if capture_log else None
+    )
@@ -0,0 +1,301 @@
+"""Retry/backoff and circuit breaker policy shared by all TVHeadend API calls"""
+import random
+import threading
+import time
+
+# requests (with urllib3) is imported inside the functions that use it: it is
+# one of the slowest imports at startup and the first API call runs off the
+# GUI thread anyway
+
+
+# Per-endpoint (connect, read) timeouts in seconds - the longest matching prefix wins
+ENDPOINT_TIMEOUTS = {
+    '/api/channel/grid': (5, 15),
+    '/api/epg/events/grid': (5, 20),
+    '/api/dvr/entry/grid': (5, 10),
+    '/api/dvr/entry/': (5, 10),
+    '/api/status/': (3, 5),
+    '/api/serverinfo': (3, 5),
+}
+DEFAULT_TIMEOUT = (5, 10)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while a server's circuit is open"""
+
+    def __init__(self, server_url, retry_in):
+        super().__init__(f"Server {server_url} is unavailable (next attempt in {retry_in:.0f}s)")
+        self.server_url = server_url
+        self.retry_in = retry_in
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter"""
+
+    def __init__(self, max_attempts=3, base_delay=0.25, max_delay=4.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        """Return the delay before retrying after failed attempt number `attempt` (1-based)"""
+        cap = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, cap)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+
+class CircuitBreaker:
+    """Per-server circuit breaker.
+
+    After `failure_threshold` consecutive failed requests the circuit opens and
+    requests are refused until the (jittered) reset timeout expires. A single
+    probe request is then let through; if it fails the reset timeout doubles,
+    so a server that stays down is contacted less and less often and clients
+    don't all reconnect at the same moment once it comes back.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=15.0, max_reset_timeout=300.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._open_for = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Return True if a request may be sent now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self._open_for:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_in(self):
+        """Seconds until the next probe request will be allowed"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self._open_for - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN:
+                # Probe failed - back off further before the next one
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self._trip()
+            elif self.failures >= self.failure_threshold:
+                self._trip()
+
+    def release_probe(self):
+        """Let another probe through after one ended without telling anything
+        about the server, e.g. because it was cancelled"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """Close the circuit, e.g. when the user explicitly asks to retry"""
+        self.record_success()
+
+    def _trip(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._open_for = self.reset_timeout * random.uniform(0.8, 1.2)
+        self._probe_in_flight = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+# Last good JSON response per (server url, path, params) for serving stale data
+_response_cache = {}
+_response_cache_lock = threading.Lock()
+
+
+def normalize_url(url):
+    """Return the server URL with a scheme and without a trailing slash"""
+    url = url.strip().rstrip('/')
+    if not url.startswith(('http://', 'https://')):
+        url = f'http://{url}'
+    return url
+
+
+def get_circuit_breaker(server_url):
+    """Return the circuit breaker shared by all requests to `server_url`"""
+    key = normalize_url(server_url)
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = _breakers[key] = CircuitBreaker()
+        return breaker
+
+
+def endpoint_timeout(path):
+    """Return the (connect, read) timeout for an API path"""
+    best = None
+    for prefix in ENDPOINT_TIMEOUTS:
+        if path.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return ENDPOINT_TIMEOUTS[best] if best else DEFAULT_TIMEOUT
+
+
+def server_auth(server):
+    """Return a requests auth tuple for the server, or None"""
+    if server.get('username') or server.get('password'):
+        return (server.get('username', ''), server.get('password', ''))
+    return None
+
+
+class Attempts:
+    """Bookkeeping of one request under the circuit breaker and retry policy.
+
+    Raises CircuitOpenError while the server's circuit is open. The transport
+    (requests here, aiohttp in api) runs the attempts itself and reports how
+    each went: `failed(error)` for a retryable failure returns the backoff
+    delay, or raises once the attempts are used up; `broken()` is for other
+    transport errors and `interrupted()` for cancellation.
+    """
+
+    def __init__(self, server_url, method, path, retry_policy=None):
+        self.base_url = normalize_url(server_url)
+        self.breaker = get_circuit_breaker(self.base_url)
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(self.base_url, self.breaker.retry_in())
+        self.method = method.upper()
+        self.path = path
+        if retry_policy is None:
+            retry_policy = DEFAULT_RETRY_POLICY if self.method == 'GET' else NO_RETRY
+        self.retry_policy = retry_policy
+        self.attempt = 0
+
+    @property
+    def url(self):
+        return f'{self.base_url}{self.path}'
+
+    def start(self):
+        self.attempt += 1
+
+    def succeeded(self):
+        self.breaker.record_success()
+
+    def failed(self, error):
+        """A retryable failure: returns the delay before the next attempt, or raises `error`"""
+        if self.attempt >= self.retry_policy.max_attempts:
+            self.breaker.record_failure()
+            raise error
+        delay = self.retry_policy.delay(self.attempt)
+        print(f"Debug: {self.method} {self.path} failed ({error}), "
+              f"retry {self.attempt}/{self.retry_policy.max_attempts - 1} in {delay:.2f}s")
+        return delay
+
+    def broken(self):
+        """A failure not worth retrying (a broken body, a redirect loop, a bad URL);
+        still counted, or a half-open probe would never end"""
+        self.breaker.record_failure()
+
+    def interrupted(self):
+        """Cancelled or interrupted: no verdict on the server, but the next request may probe"""
+        self.breaker.release_probe()
+
+
+def request(server, method, path, retry_policy=None, timeout=None, session=None, **kwargs):
+    """Send a request to a TVHeadend server under the shared resilience policy.
+
+    GET requests are retried with backoff by default; other methods are not
+    retried unless a policy is passed, so a slow server never gets a duplicate
+    recording. Server errors (5xx), timeouts and connection errors count as
+    failures for the circuit breaker; any other response is returned as is.
+    Pass a requests `session` to reuse its pooled connections.
+    """
+    attempts = Attempts(server['url'], method, path, retry_policy)
+
+    import requests
+
+    if timeout is None:
+        timeout = endpoint_timeout(path)
+    kwargs.setdefault('auth', server_auth(server))
+
+    while True:
+        attempts.start()
+        try:
+            response = (session or requests).request(attempts.method, attempts.url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            delay = attempts.failed(e)
+        except requests.RequestException:
+            attempts.broken()
+            raise
+        except BaseException:
+            attempts.interrupted()
+            raise
+        else:
+            if response.status_code < 500:
+                attempts.succeeded()
+                return response
+            delay = attempts.failed(requests.HTTPError(
+                f"Server error {response.status_code} for {path}", response=response))
+        try:
+            time.sleep(delay)
+        except BaseException:
+            attempts.interrupted()
+            raise
+
+
+def _cache_key(server, path, params):
+    return (normalize_url(server['url']), path, tuple(sorted((params or {}).items())))
+
+
+def remember_response(server, path, params, data):
+    """Keep `data` as the last good response for serving stale copies later"""
+    with _response_cache_lock:
+        _response_cache[_cache_key(server, path, params)] = data
+
+
+def last_response(server, path, params=None):
+    """Return the last good response remembered for a request, or None"""
+    with _response_cache_lock:
+        return _response_cache.get(_cache_key(server, path, params))
+
+
+def get_json(server, path, params=None, **kwargs):
+    """GET a JSON document, falling back to the last good copy if the server is down.
+
+    Returns a (data, stale) tuple; `stale` is True when cached data was served.
+    Raises if the request failed and nothing is cached.
+    """
+    import requests
+
+    try:
+        response = request(server, 'GET', path, params=params, **kwargs)
+        response.raise_for_status()
+        data = response.json()
+    except (CircuitOpenError, requests.RequestException, ValueError):
+        cached = last_response(server, path, params)
+        if cached is None:
+            raise
+        print(f"Debug: Serving cached response for {path}")
+        return cached, True
+
+    remember_response(server, path, params, data)
+    return data, False
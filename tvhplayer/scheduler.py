@@ -0,0 +1,287 @@
+"""Local recordings scheduled from the EPG.
+
+Jobs are kept in a JSON journal in the config dir. LocalScheduler holds
+one heap of (time, action, job) events; the GUI arms a single timer for
+the earliest one, so any number of future jobs cost nothing until one is
+due. Events of removed or already handled jobs are skipped when they
+reach the top of the heap rather than searched for.
+
+ffmpeg is started with the remaining duration and stops on its own; the
+scheduler only checks on it now and then, restarting a capture that died
+early into a new part file. A job whose window is still open when the app
+starts, e.g. after a crash or restart, is picked up for the rest of it.
+"""
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import subprocess
+import time
+
+try:
+    from .config import atomic_write_json
+    from .recorder import capture_path
+except ImportError:
+    from config import atomic_write_json
+    from recorder import capture_path
+
+
+DEFAULT_PRE_PADDING = 2 * 60
+DEFAULT_POST_PADDING = 5 * 60
+# Look at running captures this often
+CHECK_INTERVAL = 60
+# ffmpeg stops itself at the end; stop it if it is still running this much later
+STOP_GRACE = 30
+# Don't restart a capture that died with less than this left
+MIN_RESTART_SECONDS = 30
+# Longest the timer sleeps, so a suspend or a clock change is noticed
+MAX_SLEEP = 3600
+
+# LocalJob.state values
+SCHEDULED = 'scheduled'
+RECORDING = 'recording'
+DONE = 'done'
+FAILED = 'failed'
+MISSED = 'missed'
+
+# Heap event actions
+START = 'start'
+CHECK = 'check'
+STOP = 'stop'
+
+
+class SchedulerError(Exception):
+    pass
+
+
+def job_id(server_url, channel_uuid, start):
+    """Stable id of a programme, so it can't be scheduled twice"""
+    return hashlib.sha1(f'{server_url}|{channel_uuid}|{start}'.encode('utf-8')).hexdigest()[:16]
+
+
+def unique_path(path):
+    """`path`, or `name (2).ext` and so on if it exists"""
+    root, ext = os.path.splitext(path)
+    for n in itertools.count(2):
+        if not os.path.exists(path):
+            return path
+        path = f'{root} ({n}){ext}'
+
+
+class LocalJob:
+    """A programme to record locally; `path` is the requested output file"""
+
+    def __init__(self, server, channel_uuid, channel_name, title, start, stop, path,
+                 pre_padding=DEFAULT_PRE_PADDING, post_padding=DEFAULT_POST_PADDING,
+                 state=SCHEDULED, error=None, captures=None):
+        self.id = job_id(server, channel_uuid, start)
+        self.server = server
+        self.channel_uuid = channel_uuid
+        self.channel_name = channel_name
+        self.title = title
+        self.start = start
+        self.stop = stop
+        self.path = path
+        self.pre_padding = pre_padding
+        self.post_padding = post_padding
+        self.state = state
+        self.error = error
+        self.captures = captures or []  # capture files, more than one if ffmpeg had to be restarted
+
+    @property
+    def begin(self):
+        return self.start - self.pre_padding
+
+    @property
+    def end(self):
+        return self.stop + self.post_padding
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in (
+            'server', 'channel_uuid', 'channel_name', 'title', 'start', 'stop', 'path',
+            'pre_padding', 'post_padding', 'state', 'error', 'captures')}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class LocalScheduler:
+    """Starts and stops scheduled captures; all methods run on the caller's (GUI) thread.
+
+    `start_capture(job, path, seconds)` starts ffmpeg recording the job's
+    channel into `path` for `seconds` and returns the process.
+    `on_finished(job)` is called when a job is done or failed.
+    """
+
+    def __init__(self, journal_path, start_capture, on_finished=None):
+        self.journal_path = journal_path
+        self.start_capture = start_capture
+        self.on_finished = on_finished
+        self.jobs = {}
+        self.processes = {}  # job id -> ffmpeg process
+        self.heap = []
+        self._seq = itertools.count()
+        try:
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for data in json.load(f):
+                    job = LocalJob.from_dict(data)
+                    self.jobs[job.id] = job
+        except (OSError, ValueError, TypeError) as e:
+            if os.path.exists(journal_path):
+                print(f"Debug: Cannot read the local schedule: {e}")
+        now = time.time()
+        for job in self.jobs.values():
+            if job.state == RECORDING:
+                # The app stopped while recording; record the rest, if any, into a new part
+                job.state = SCHEDULED
+            if job.state == SCHEDULED:
+                self._push(max(job.begin, now), START, job)
+        print(f"Debug: Local schedule: {len(self.heap)} pending of {len(self.jobs)} jobs")
+
+    def _push(self, when, action, job):
+        heapq.heappush(self.heap, (when, next(self._seq), action, job.id))
+
+    def _valid(self, action, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if action == START and job.state != SCHEDULED:
+            return None
+        if action in (CHECK, STOP) and job.state != RECORDING:
+            return None
+        return job
+
+    def _save(self):
+        try:
+            atomic_write_json(self.journal_path, [job.to_dict() for job in self.jobs.values()], indent=None)
+        except OSError as e:
+            print(f"Debug: Cannot write the local schedule: {e}")
+
+    def add(self, job):
+        """Schedule a job; returns False if that programme is already scheduled"""
+        existing = self.jobs.get(job.id)
+        if existing is not None and existing.state in (SCHEDULED, RECORDING):
+            return False
+        if job.end <= time.time():
+            raise SchedulerError(f"{job.title} is already over")
+        self.jobs[job.id] = job
+        self._push(job.begin, START, job)
+        self._save()
+        return True
+
+    def remove(self, job_id):
+        """Forget a job, stopping its capture if it is recording"""
+        job = self.jobs.pop(job_id, None)
+        process = self.processes.pop(job_id, None)
+        if process is not None:
+            self._terminate(process)
+        self._save()
+        return job
+
+    def recording(self):
+        return bool(self.processes)
+
+    def upcoming(self):
+        return sorted(self.jobs.values(), key=lambda job: (job.start, job.channel_name))
+
+    def next_wakeup(self):
+        """Time of the next event, or None; skips events that no longer apply"""
+        while self.heap and self._valid(self.heap[0][2], self.heap[0][3]) is None:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def run_due(self, now=None):
+        """Handle every event that is due"""
+        now = time.time() if now is None else now
+        changed = False
+        while self.heap and self.heap[0][0] <= now:
+            _, _, action, job_id = heapq.heappop(self.heap)
+            job = self._valid(action, job_id)
+            if job is None:
+                continue
+            if action == START:
+                self._start(job, now)
+            elif action == CHECK:
+                self._check(job, now)
+            else:
+                self._stop(job)
+            changed = True
+        if changed:
+            self._save()
+
+    def _start(self, job, now):
+        if now >= job.end - MIN_RESTART_SECONDS:
+            if job.captures:
+                self._stop(job)  # interrupted near the end; keep what was recorded
+            else:
+                job.state = MISSED
+                print(f"Debug: Missed local recording of {job.title}")
+            return
+        # Captures are MPEG-TS; later parts get a numbered name next to the first
+        path = unique_path(capture_path(job.path))
+        try:
+            process = self.start_capture(job, path, job.end - now)
+        except Exception as e:
+            print(f"Debug: Local recording of {job.title} could not start: {e}")
+            job.state = FAILED
+            job.error = str(e)
+            self._finished(job)
+            return
+        print(f"Debug: Local recording of {job.title} started into {path}")
+        self.processes[job.id] = process
+        job.captures.append(path)
+        job.state = RECORDING
+        self._push(min(now + CHECK_INTERVAL, job.end + STOP_GRACE), CHECK, job)
+        self._push(job.end + STOP_GRACE, STOP, job)
+
+    def _check(self, job, now):
+        process = self.processes.get(job.id)
+        if process is not None and process.poll() is not None and now < job.end - MIN_RESTART_SECONDS:
+            print(f"Debug: Capture of {job.title} ended early (exit code {process.returncode}), restarting")
+            del self.processes[job.id]
+            job.state = SCHEDULED
+            self._start(job, now)
+            return
+        if now + CHECK_INTERVAL < job.end + STOP_GRACE:
+            self._push(now + CHECK_INTERVAL, CHECK, job)
+
+    def _stop(self, job):
+        process = self.processes.pop(job.id, None)
+        if process is not None and process.poll() is None:
+            self._terminate(process)
+        captures = [path for path in job.captures if os.path.exists(path) and os.path.getsize(path) > 0]
+        if captures:
+            job.state = DONE
+            print(f"Debug: Local recording of {job.title} finished: {', '.join(captures)}")
+        else:
+            job.state = FAILED
+            job.error = "Nothing was recorded"
+        job.captures = captures
+        self._finished(job)
+
+    def _finished(self, job):
+        if self.on_finished:
+            self.on_finished(job)
+
+    @staticmethod
+    def _terminate(process):
+        # Let ffmpeg finalize the file
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    def close(self):
+        """Stop running captures; their jobs stay journaled as recording and resume next start"""
+        for process in self.processes.values():
+            self._terminate(process)
+        self.processes.clear()
+        self._save()
+
+    def clear_finished(self):
+        for job_id in [job.id for job in self.jobs.values() if job.state not in (SCHEDULED, RECORDING)]:
+            del self.jobs[job_id]
+        self._save()
@@ -0,0 +1,172 @@
+"""Precomputed search index for filtering the channel list"""
+import bisect
+import unicodedata
+from collections import defaultdict
+
+
+# Minimum share of the query's word trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.3
+
+# Rank buckets, best first
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_NUMBER = 3
+RANK_SUBSTRING = 4
+RANK_FUZZY = 5
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.casefold().split())
+
+
+def trigrams(text):
+    """Return the set of 3-character substrings of `text`"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(text):
+    """Return the trigrams of each word padded at its boundaries, as used for fuzzy matching"""
+    grams = set()
+    for word in text.split():
+        grams |= trigrams(f'  {word} ')
+    return grams
+
+
+class ChannelSearchIndex:
+    """Search index over channel names and numbers.
+
+    Built once per channel list load. Channels are identified by their position
+    in the sequence passed to the constructor. Substring matches are found via
+    trigram posting lists, word prefixes via a sorted word table and numbers
+    via a sorted table of number strings. When a query extends the previous
+    one, only the previous matches are re-checked.
+    """
+
+    def __init__(self, channels):
+        """`channels` is an iterable of (name, number) pairs"""
+        self.names = []
+        self.numbers = []
+        self.trigram_table = defaultdict(set)
+        self.fuzzy_table = defaultdict(set)
+        word_table = []
+        number_table = []
+
+        for channel_id, (name, number) in enumerate(channels):
+            norm = normalize(name)
+            self.names.append(norm)
+            number = str(number) if number else ''
+            self.numbers.append(number)
+            for gram in trigrams(norm):
+                self.trigram_table[gram].add(channel_id)
+            for gram in word_trigrams(norm):
+                self.fuzzy_table[gram].add(channel_id)
+            for word in set(norm.split()):
+                word_table.append((word, channel_id))
+            if number:
+                number_table.append((number, channel_id))
+
+        word_table.sort()
+        number_table.sort()
+        self.words = [word for word, _ in word_table]
+        self.word_ids = [channel_id for _, channel_id in word_table]
+        self.number_keys = [number for number, _ in number_table]
+        self.number_ids = [channel_id for _, channel_id in number_table]
+
+        self._last_query = ''
+        self._last_name_matches = None
+        self._last_number_matches = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix_lookup(self, keys, ids, prefix):
+        """Return ids whose key in the sorted `keys` table starts with `prefix`"""
+        start = bisect.bisect_left(keys, prefix)
+        end = bisect.bisect_left(keys, prefix + '\uffff')
+        return set(ids[start:end])
+
+    def _name_candidates(self, query):
+        if self._last_name_matches is not None and query.startswith(self._last_query):
+            # Anything containing the longer query also contains the previous one
+            return self._last_name_matches
+        if len(query) < 3:
+            return range(len(self.names))
+        candidates = None
+        for gram in sorted(trigrams(query), key=lambda g: len(self.trigram_table.get(g, ()))):
+            posting = self.trigram_table.get(gram)
+            if not posting:
+                return set()
+            candidates = set(posting) if candidates is None else candidates & posting
+            if not candidates:
+                break
+        return candidates
+
+    def _fuzzy_matches(self, query):
+        """Return {id: similarity} for names sharing enough trigrams with the query"""
+        grams = word_trigrams(query)
+        if not grams:
+            return {}
+        hits = defaultdict(int)
+        for gram in grams:
+            for channel_id in self.fuzzy_table.get(gram, ()):
+                hits[channel_id] += 1
+        return {
+            channel_id: count / len(grams)
+            for channel_id, count in hits.items()
+            if count / len(grams) >= FUZZY_THRESHOLD
+        }
+
+    def search(self, query):
+        """Return matching channel ids, best match first.
+
+        Returns None for an empty query, meaning "no filter".
+        """
+        query = normalize(query)
+        if not query:
+            self._last_query = ''
+            self._last_name_matches = self._last_number_matches = None
+            return None
+
+        names = self.names
+        name_matches = {i for i in self._name_candidates(query) if query in names[i]}
+
+        if query.isdigit():
+            if self._last_number_matches is not None and query.startswith(self._last_query):
+                number_matches = {i for i in self._last_number_matches
+                                  if self.numbers[i].startswith(query)}
+            else:
+                number_matches = self._prefix_lookup(self.number_keys, self.number_ids, query)
+        else:
+            number_matches = set()
+
+        self._last_query = query
+        self._last_name_matches = name_matches
+        self._last_number_matches = number_matches if query.isdigit() else None
+
+        word_prefix = self._prefix_lookup(self.words, self.word_ids, query.split()[0])
+        ranked = []
+        for channel_id in name_matches | number_matches:
+            name = names[channel_id]
+            if name == query or self.numbers[channel_id] == query:
+                rank = RANK_EXACT
+            elif name.startswith(query):
+                rank = RANK_PREFIX
+            elif channel_id in word_prefix and channel_id in name_matches:
+                rank = RANK_WORD_PREFIX
+            elif channel_id in number_matches:
+                rank = RANK_NUMBER
+            else:
+                rank = RANK_SUBSTRING
+            ranked.append((rank, len(name), channel_id))
+
+        if not ranked and len(query) >= 3:
+            # Nothing contains the query - fall back to typo-tolerant matching
+            for channel_id, similarity in self._fuzzy_matches(query).items():
+                ranked.append((RANK_FUZZY, -similarity, channel_id))
+
+        ranked.sort()
+        return [channel_id for _, _, channel_id in ranked]
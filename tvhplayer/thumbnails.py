@@ -0,0 +1,233 @@
+"""Thumbnails and preview strips of recordings, grabbed from key frames by ffmpeg.
+
+A preview strip is STRIP_FRAMES frames spread over the recording, side by
+side in one JPEG; the thumbnail is one of its frames, so each recording
+costs a single ffmpeg run. Every frame comes from a fast input seek with
+only key frames decoded, which keeps remote recordings down to a few range
+requests. Strips are cached on disk under a hash of what identifies the
+recording's content (path, size and mtime; server, entry and file size).
+ThumbnailQueue runs at most a few ffmpeg processes at a time, at low
+priority, newest request first, and can be paused while playback needs the
+CPU.
+"""
+import hashlib
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+try:
+    from .recorder import basic_auth_token, low_priority
+except ImportError:
+    from recorder import basic_auth_token, low_priority
+
+
+FRAME_WIDTH = 160
+FRAME_HEIGHT = 90
+STRIP_FRAMES = 8
+# Grab from here when the duration is unknown
+FALLBACK_SECONDS = 10
+
+MAX_WORKERS = 2
+JOB_TIMEOUT = 90
+# Hold back new work while playing and this process uses more CPU than this
+PAUSE_CPU_PERCENT = 50
+
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ThumbnailJob(NamedTuple):
+    key: str
+    source: str             # file path or URL
+    duration: Optional[float]
+    auth: Optional[Tuple[str, str]] = None
+
+
+def thumbnail_key(*identity):
+    """Cache key of a recording from what changes whenever its content does"""
+    text = '\0'.join(str(part) for part in identity + (FRAME_WIDTH, FRAME_HEIGHT, STRIP_FRAMES))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def frame_positions(duration, frames=STRIP_FRAMES):
+    """Seconds to grab the strip's frames at: the middles of equal slices"""
+    if not duration or duration <= 0:
+        return [FALLBACK_SECONDS]
+    return [duration * (i + 0.5) / frames for i in range(frames)]
+
+
+def thumbnail_index(frames):
+    """Which frame of a strip serves as the thumbnail; the first is often a title card"""
+    return min(1, frames - 1)
+
+
+def strip_command(job, output):
+    """ffmpeg command that writes the preview strip of `job` to `output` as JPEG"""
+    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    positions = frame_positions(job.duration)
+    for seconds in positions:
+        if job.auth:
+            cmd.extend(['-headers', f'Authorization: Basic {basic_auth_token(job.auth)}\r\n'])
+        cmd.extend(['-skip_frame', 'nokey', '-ss', f'{seconds:.1f}', '-i', job.source])
+    filters = [f'[{i}:v:0]scale={FRAME_WIDTH}:{FRAME_HEIGHT}:force_original_aspect_ratio=decrease,'
+               f'pad={FRAME_WIDTH}:{FRAME_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1[f{i}]'
+               for i in range(len(positions))]
+    if len(positions) > 1:
+        filters.append(''.join(f'[f{i}]' for i in range(len(positions))) +
+                       f'hstack=inputs={len(positions)}[strip]')
+        label = '[strip]'
+    else:
+        label = '[f0]'
+    cmd.extend(['-filter_complex', ';'.join(filters), '-map', label,
+                '-frames:v', '1', '-q:v', '5', '-f', 'mjpeg', output])
+    return cmd
+
+
+class ThumbnailCache:
+    """Preview strips on disk, fanned out by the first two characters of their key"""
+
+    def __init__(self, cache_dir, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.jpg')
+
+    def get(self, key):
+        """Path of a cached strip, or None; marks it recently used"""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def prune(self):
+        """Delete least recently used strips until the cache fits in max_bytes"""
+        entries = []
+        total = 0
+        for directory, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+class ThumbnailQueue:
+    """Generates preview strips on worker threads, each driving one ffmpeg process.
+
+    `callback(key, path)` is called on a worker thread, with path None if
+    the strip could not be made.
+    """
+
+    def __init__(self, cache, max_workers=MAX_WORKERS):
+        self.cache = cache
+        self.pending = OrderedDict()  # key -> job, oldest first
+        self.callbacks = {}           # key -> callbacks of pending and running jobs
+        self.failed = set()
+        self.processes = set()
+        self.paused = False
+        self.closed = False
+        self._cond = threading.Condition()
+        threading.Thread(target=self.cache.prune, name='thumbnail-prune', daemon=True).start()
+        for _ in range(max_workers):
+            threading.Thread(target=self._work, name='thumbnails', daemon=True).start()
+
+    def request(self, job, callback):
+        """Queue a strip unless it is known to fail; newer requests run first"""
+        with self._cond:
+            if job.key in self.failed:
+                return False
+            self.callbacks.setdefault(job.key, []).append(callback)
+            if job.key in self.pending:
+                self.pending.move_to_end(job.key)
+            elif len(self.callbacks[job.key]) == 1:
+                self.pending[job.key] = job
+            self._cond.notify()
+        return True
+
+    def discard(self, keys):
+        """Drop queued jobs nobody needs any more, e.g. rows scrolled out of view"""
+        with self._cond:
+            for key in keys:
+                if self.pending.pop(key, None) is not None:
+                    self.callbacks.pop(key, None)
+
+    def set_paused(self, paused):
+        with self._cond:
+            if paused != self.paused:
+                print(f"Debug: Thumbnail generation {'paused' if paused else 'resumed'}")
+            self.paused = paused
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self.pending.clear()
+            self.callbacks.clear()
+            processes = list(self.processes)
+            self._cond.notify_all()
+        for process in processes:
+            process.kill()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self.closed and (self.paused or not self.pending):
+                    self._cond.wait()
+                if self.closed:
+                    return
+                key, job = self.pending.popitem(last=True)
+            path = self.cache.get(key) or self._generate(job)
+            with self._cond:
+                if path is None:
+                    self.failed.add(key)
+                callbacks = self.callbacks.pop(key, [])
+            for callback in callbacks:
+                callback(key, path)
+
+    def _generate(self, job):
+        path = self.cache.path(job.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            process = subprocess.Popen(strip_command(job, tmp_path), stdin=subprocess.DEVNULL,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **low_priority())
+        except OSError as e:
+            print(f"Debug: Cannot run ffmpeg for thumbnails: {e}")
+            return None
+        with self._cond:
+            self.processes.add(process)
+        try:
+            _, errors = process.communicate(timeout=JOB_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            _, errors = process.communicate()
+            errors = b'timed out'
+        finally:
+            with self._cond:
+                self.processes.discard(process)
+        if process.returncode == 0 and os.path.exists(tmp_path):
+            os.replace(tmp_path, path)
+            return path
+        print(f"Debug: Thumbnail of {job.source} failed: {errors.decode('utf-8', 'replace').strip()[-300:]}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
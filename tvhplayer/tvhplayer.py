@@ -1,19 +1,23 @@
+import time
+# Reference point of the --profile-startup timeline
+STARTUP_T0 = time.perf_counter()
 from datetime import datetime, timedelta
 import sys
-from tkinter.filedialog import FileDialog
-import vlc
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+    QActionGroup, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QToolBar, QComboBox, QAction, QSplitter, QFrame,
     QListWidget, QDialog, QFormLayout, QLineEdit,
     QDialogButtonBox, QMessageBox, QApplication,
     QPushButton, QLabel, QSlider, QStatusBar, QGridLayout, QMenuBar, QRadioButton, QSpinBox, QGraphicsOpacityEffect, QFileDialog,
-    QMenu, QListWidgetItem, QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget, QTextEdit, QSizePolicy, QToolButton, QShortcut, QCheckBox, QGroupBox  # Added QGroupBox here
+    QMenu, QListWidgetItem, QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget, QTextEdit, QSizePolicy, QToolButton, QShortcut, QCheckBox, QGroupBox, QInputDialog,  # Added QGroupBox here
+    QTimeEdit
+)
+from PyQt5.QtCore import (
+    Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QAbstractAnimation, QRect, QCoreApplication, QThread, pyqtSignal,
+    QObject, QRunnable, QThreadPool, QTime
 )
-from PyQt5.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve, QAbstractAnimation, QRect, QCoreApplication
-from PyQt5.QtGui import QIcon, QPainter, QColor, QKeySequence, QPalette
+from PyQt5.QtGui import QIcon, QPainter, QColor, QKeySequence, QPalette, QImage, QPixmap
 import json
-import requests
 # Replace this line:
 #from . import resources_rc
 
@@ -24,15 +28,113 @@ except ImportError:
     import resources_rc  # Fall back to direct import when running from source
 # or
 #from tvhplayer import resources_rc  # Use absolute import
-import time
+try:
+    from . import resilience, recorder
+    from .api import GENRE_NAMES, get_api, get_async_api, radio_channel_uuids
+    from .asyncloop import bridge, TaskScope, run_blocking, drain_pipe
+    from .search import ChannelSearchIndex
+    from .epgsearch import EPGSearchIndex, sync_epg_async, load_upcoming_events
+    from .logocache import LogoDiskCache
+    from .playstats import PlaybackStats, read_media_stats
+    from .caching import CachingTuner, probe_rtts
+    from .latency import measure as measure_latency, format_report as format_latency_report
+    from .profiles import AUTO_PROFILE, AutoProfileSwitcher, profile_ladder, stream_profile_setting
+    from . import mosaic
+    from .dvrfile import RangeReader, RangeNotSupported, media_from_reader
+    from . import download, thumbnails, postprocess, scheduler, conflicts, autorecord
+    from .library import RecordingLibrary, scan_library
+    from .config import ConfigStore, ChannelListCache, default_config_dir
+except ImportError:
+    import resilience
+    import recorder
+    from api import GENRE_NAMES, get_api, get_async_api, radio_channel_uuids
+    from asyncloop import bridge, TaskScope, run_blocking, drain_pipe
+    from search import ChannelSearchIndex
+    from epgsearch import EPGSearchIndex, sync_epg_async, load_upcoming_events
+    from logocache import LogoDiskCache
+    from playstats import PlaybackStats, read_media_stats
+    from caching import CachingTuner, probe_rtts
+    from latency import measure as measure_latency, format_report as format_latency_report
+    from profiles import AUTO_PROFILE, AutoProfileSwitcher, profile_ladder, stream_profile_setting
+    import mosaic
+    from dvrfile import RangeReader, RangeNotSupported, media_from_reader
+    import download
+    import thumbnails
+    import postprocess
+    import scheduler
+    import conflicts
+    import autorecord
+    from library import RecordingLibrary, scan_library
+    from config import ConfigStore, ChannelListCache, default_config_dir
+import re
 import subprocess
 import os
+import functools
+import threading
 import traceback
+from collections import OrderedDict, defaultdict, deque
 from pathlib import Path
 import logging
 import platform
 
 
+# python-vlc and libVLC are loaded by VLCLoader on a worker thread
+VLC_ARGS = [
+    # Enable hardware decoding
+    '--avcodec-hw=any',  # Try any hardware acceleration method
+    '--file-caching=1000',  # Increase file caching for smoother playback
+    '--network-caching=1000',  # Default; live channels may get a tuned value, see caching.py
+    '--no-video-title-show',  # Don't show the video title
+    '--no-snapshot-preview',  # Don't show snapshot previews
+]
+
+# Per-media options of the low latency profile: a minimal cache, no clock
+# smoothing, and late pictures dropped rather than letting the clock slip
+LOW_LATENCY_CACHING_MS = 150
+LOW_LATENCY_OPTIONS = [
+    f':network-caching={LOW_LATENCY_CACHING_MS}',
+    f':live-caching={LOW_LATENCY_CACHING_MS}',
+    ':clock-jitter=0',
+    ':clock-synchro=0',
+    ':drop-late-frames',
+    ':skip-frames',
+]
+
+
+class StartupProfiler:
+    """Timeline of startup phases, printed with --profile-startup"""
+
+    def __init__(self, start):
+        self.start = start
+        self.enabled = False
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now))
+        if self.enabled and self.reported:
+            # Background phases that finish after the window became interactive
+            print(f"[startup] {(now - self.start) * 1000:8.1f} ms            {phase}")
+
+    def report(self):
+        """Print the phases up to now; later ones are printed as they complete"""
+        if self.reported:
+            return
+        self.mark("window interactive")
+        self.reported = True
+        if not self.enabled:
+            return
+        print("[startup] Timeline (ms since tvhplayer was imported):")
+        previous = self.start
+        for phase, at in self.phases:
+            print(f"[startup] {(at - self.start) * 1000:8.1f} ms  +{(at - previous) * 1000:7.1f}  {phase}")
+            previous = at
+
+
+startup_profiler = StartupProfiler(STARTUP_T0)
+
+
 
 
 class Logger:
@@ -135,7 +237,172 @@ class Logger:
     def exception(self, msg):
         self.logger.exception(msg)
 
+class ThumbnailColumn(QObject):
+    """Recording thumbnails as the icons of a table column, loaded for the visible rows only.
+
+    Moving the mouse across a thumbnail scrubs through the recording's
+    preview strip.
+    """
+    ICON_SIZE = QSize(96, 54)
+    MAX_STRIP_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, table, column, queue):
+        super().__init__()
+        self.table = table
+        self.column = column
+        self.queue = queue
+        self.jobs = []              # ThumbnailJob (or None) per row
+        self.strips = OrderedDict()  # key -> QPixmap, least recently used first
+        self.strip_bytes = 0
+        self.requested = set()
+        self.scrubbed_row = None
+        self.closed = False
+        table.setIconSize(self.ICON_SIZE)
+        table.verticalHeader().setDefaultSectionSize(self.ICON_SIZE.height() + 6)
+        table.setMouseTracking(True)
+        table.viewport().installEventFilter(self)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(100)
+        self.timer.timeout.connect(self.load_visible)
+        table.verticalScrollBar().valueChanged.connect(self.timer.start)
+
+    def set_jobs(self, jobs):
+        self.jobs = jobs
+        self.scrubbed_row = None
+        self.timer.start()
+
+    def close(self):
+        self.closed = True
+        self.timer.stop()
+        self.table.viewport().removeEventFilter(self)
+        self.queue.discard(self.requested)
+
+    def visible_rows(self):
+        first = self.table.rowAt(0)
+        if first < 0:
+            return range(0)
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0:
+            last = self.table.rowCount() - 1
+        return range(first, min(last, len(self.jobs) - 1) + 1)
+
+    def load_visible(self):
+        if self.closed:
+            return
+        wanted = set()
+        for row in self.visible_rows():
+            job = self.jobs[row]
+            item = self.table.item(row, self.column)
+            if job is None or item is None or not item.icon().isNull():
+                continue
+            strip = self.strip(job.key)
+            if strip is not None:
+                item.setIcon(QIcon(self.frame(strip)))
+            elif self.queue.request(job, self.on_ready):
+                wanted.add(job.key)
+        # Rows scrolled away no longer need their strips
+        self.queue.discard(self.requested - wanted)
+        self.requested = wanted
+
+    def on_ready(self, key, path):
+        # Called on a thumbnail worker thread
+        bridge.call_in_gui(self.show_strip, key, path)
+
+    def show_strip(self, key, path):
+        if self.closed or path is None:
+            return
+        self.requested.discard(key)
+        for row in self.visible_rows():
+            job = self.jobs[row]
+            item = self.table.item(row, self.column)
+            if job is not None and job.key == key and item is not None:
+                strip = self.strip(key)
+                if strip is not None:
+                    item.setIcon(QIcon(self.frame(strip)))
+
+    def strip(self, key):
+        """The preview strip of a recording from memory or the disk cache, or None"""
+        strip = self.strips.get(key)
+        if strip is not None:
+            self.strips.move_to_end(key)
+            return strip
+        path = self.queue.cache.get(key)
+        if path is None:
+            return None
+        strip = QPixmap(path)
+        if strip.isNull():
+            return None
+        self.strips[key] = strip
+        self.strip_bytes += strip.width() * strip.height() * 4
+        while self.strip_bytes > self.MAX_STRIP_BYTES and len(self.strips) > 1:
+            _, old = self.strips.popitem(last=False)
+            self.strip_bytes -= old.width() * old.height() * 4
+        return strip
+
+    @staticmethod
+    def frame(strip, fraction=None):
+        """The frame of a strip at `fraction` of the recording, or the thumbnail frame"""
+        frames = max(strip.width() // thumbnails.FRAME_WIDTH, 1)
+        if fraction is None:
+            index = thumbnails.thumbnail_index(frames)
+        else:
+            index = min(max(int(fraction * frames), 0), frames - 1)
+        return strip.copy(index * thumbnails.FRAME_WIDTH, 0, thumbnails.FRAME_WIDTH, strip.height())
+
+    def restore_scrubbed(self):
+        row, self.scrubbed_row = self.scrubbed_row, None
+        if row is None or row >= len(self.jobs) or self.jobs[row] is None:
+            return
+        strip = self.strips.get(self.jobs[row].key)
+        item = self.table.item(row, self.column)
+        if strip is not None and item is not None:
+            item.setIcon(QIcon(self.frame(strip)))
+
+    def eventFilter(self, obj, event):
+        if event.type() == event.MouseMove:
+            index = self.table.indexAt(event.pos())
+            row = index.row()
+            if row != self.scrubbed_row:
+                self.restore_scrubbed()
+            if index.column() == self.column and 0 <= row < len(self.jobs) and self.jobs[row] is not None:
+                strip = self.strips.get(self.jobs[row].key)
+                rect = self.table.visualRect(index)
+                x = event.pos().x() - rect.left()
+                if strip is not None and 0 <= x < self.ICON_SIZE.width():
+                    self.table.item(row, self.column).setIcon(
+                        QIcon(self.frame(strip, x / self.ICON_SIZE.width())))
+                    self.scrubbed_row = row
+                elif row == self.scrubbed_row:
+                    self.restore_scrubbed()
+        elif event.type() == event.Leave:
+            self.restore_scrubbed()
+        elif event.type() == event.Resize:
+            self.timer.start()
+        return False
+
+
+def newest_uuid(entries):
+    """uuid heading a page fetched newest first, None for an empty grid"""
+    return entries[0].uuid if entries else None
+
+
+class DVRPage:
+    """A DVR tab whose entries are fetched a page at a time"""
+
+    def __init__(self, title, table):
+        self.title = title
+        self.table = table
+        self.entries = []
+        self.total = None
+        self.newest = None
+        self.loaded = False
+        self.task = None
+
+
 class DVRStatusDialog(QDialog):
+    PAGE_SIZE = 100
+
     def __init__(self, server, parent=None):
         super().__init__(parent)
         self.server = server
@@ -143,6 +410,11 @@ class DVRStatusDialog(QDialog):
         self.resize(800, 600)
         self.setup_ui()
         
+        # Polls run as coroutines; closing the dialog cancels them
+        self.tasks = TaskScope()
+        self.update_task = None
+        self.finished.connect(self.stop_updates)
+        
         # Update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_status)
@@ -171,6 +443,7 @@ class DVRStatusDialog(QDialog):
         self.finished_table.setHorizontalHeaderLabels(['Channel', 'Title', 'Start Time', 'Duration'])
         self.finished_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         self.tabs.addTab(self.finished_table, "Finished")
+        self.finished_thumbnails = ThumbnailColumn(self.finished_table, 1, self.parent().ensure_thumbnails())
         
         # Failed recordings tab
         self.failed_table = QTableWidget()
@@ -178,120 +451,295 @@ class DVRStatusDialog(QDialog):
         self.failed_table.setHorizontalHeaderLabels(['Channel', 'Title', 'Start Time', 'Error'])
         self.failed_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
         self.tabs.addTab(self.failed_table, "Failed")
-        
+
+        # Finished and failed entries load as their tabs are shown and scrolled
+        self.pages = {
+            'finished': DVRPage("Finished", self.finished_table),
+            'failed': DVRPage("Failed", self.failed_table),
+        }
+        for kind, page in self.pages.items():
+            page.table.verticalScrollBar().valueChanged.connect(
+                lambda value, kind=kind: self.on_scrolled(kind, value))
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        # Upcoming entries change state, so the poll refetches every shown
+        # row; scrolling to the end makes it fetch another page
+        self.upcoming_entries = []
+        self.upcoming_total = None
+        self.upcoming_limit = self.PAGE_SIZE
+        self.upcoming_table.verticalScrollBar().valueChanged.connect(self.on_upcoming_scrolled)
+
+        # Rows can be multi-selected; each action goes out as batched requests
+        for table in (self.upcoming_table, self.finished_table, self.failed_table):
+            table.setSelectionBehavior(QTableWidget.SelectRows)
+            table.setSelectionMode(QTableWidget.ExtendedSelection)
+            table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        button_layout = QHBoxLayout()
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setToolTip("Stop the selected recordings, keeping what was recorded")
+        self.stop_btn.clicked.connect(
+            lambda: self.run_action("Stopping", 'stop_dvr_entries', self.selected_entries(recording=True)))
+        button_layout.addWidget(self.stop_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setToolTip("Cancel the selected scheduled recordings")
+        self.cancel_btn.clicked.connect(
+            lambda: self.run_action("Cancelling", 'cancel_dvr_entries', self.selected_entries(recording=False)))
+        button_layout.addWidget(self.cancel_btn)
+        self.delete_btn = QPushButton("Delete")
+        self.delete_btn.setToolTip("Delete the selected recordings and their files")
+        self.delete_btn.clicked.connect(self.delete_selected)
+        button_layout.addWidget(self.delete_btn)
+        self.play_btn = QPushButton("Play")
+        self.play_btn.setToolTip("Play the selected finished recording")
+        self.play_btn.clicked.connect(self.play_selected)
+        button_layout.addWidget(self.play_btn)
+        self.finished_table.doubleClicked.connect(self.play_selected)
+        self.download_btn = QPushButton("Download")
+        self.download_btn.setToolTip("Download the selected finished recordings to the recording directory")
+        self.download_btn.clicked.connect(self.download_selected)
+        button_layout.addWidget(self.download_btn)
+        self.action_label = QLabel()
+        button_layout.addWidget(self.action_label)
+        button_layout.addStretch()
+
         # Close button
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(self.accept)
-        layout.addWidget(close_btn)
-        
-    def update_status(self):
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        self.update_action_buttons()
+        
+    def update_status(self, restart=False):
+        if self.update_task is not None and not self.update_task.done():
+            if not restart:
+                return  # previous poll still running
+            self.update_task.cancel()
+        self.update_task = self.tasks.spawn(self.fetch_status(), self.show_status, self.on_update_failed)
+
+    async def fetch_status(self):
+        """Fetch the shown upcoming entries and the heads of the finished and failed grids.
+
+        Finished and failed entries are not polled: their tabs load pages as
+        they are scrolled and reload only when a grid's size or newest entry
+        changes.
+        """
+        api = get_async_api(self.server)
+        upcoming, finished, failed = await api.batch(
+            functools.partial(api.dvr_page, 'upcoming', limit=self.upcoming_limit),
+            functools.partial(api.dvr_page, 'finished', limit=1, direction='DESC'),
+            functools.partial(api.dvr_page, 'failed', limit=1, direction='DESC'))
+        if isinstance(upcoming, Exception):
+            raise upcoming
+        heads = {kind: None if isinstance(page, Exception) else (page[0], newest_uuid(page[1]))
+                 for kind, page in (('finished', finished), ('failed', failed))}
+        return upcoming, heads
+
+    def on_update_failed(self, error):
+        print(f"Debug: Error updating DVR status: {str(error)}")
+
+    def show_status(self, result):
+        (total, upcoming), heads = result
+        print(f"Debug: DVR entries - Upcoming: {total}, Finished: {heads['finished']}, "
+              f"Failed: {heads['failed']}")
+        self.upcoming_total = total
+        self.tabs.setTabText(self.tabs.indexOf(self.upcoming_table), f"Upcoming/Current ({total})")
+        self.show_upcoming(upcoming)
+        for kind, head in heads.items():
+            page = self.pages[kind]
+            if head is None or head == (page.total, page.newest):
+                continue
+            page.total, page.newest = head
+            self.tabs.setTabText(self.tabs.indexOf(page.table), f"{page.title} ({page.total})")
+            # Something was added or removed: start over if the tab was loaded.
+            # A deletion and a new entry in one poll leave the size alone but
+            # change the newest entry.
+            if page.loaded or self.tabs.currentWidget() is page.table:
+                self.reload_page(kind)
+
+    def show_upcoming(self, upcoming):
+        self.upcoming_entries = upcoming
         try:
-            # Create auth if needed
-            auth = None
-            if self.server.get('username') or self.server.get('password'):
-                auth = (self.server.get('username', ''), self.server.get('password', ''))
-            
-            # Get DVR entries
-            api_url = f'{self.server["url"]}/api/dvr/entry/grid'
-            response = requests.get(api_url, auth=auth)
-            
-            if response.status_code == 200:
-                data = response.json()
-                entries = data.get('entries', [])
-                print(f"Debug: Found {len(entries)} DVR entries")
-                
-                # Sort entries by status
-                upcoming = []
-                finished = []
-                failed = []
+            # Update tables
+            self.upcoming_table.setRowCount(len(upcoming))
+            for i, entry in enumerate(upcoming):
+                self.set_entry_row(self.upcoming_table, i, entry, str(timedelta(seconds=entry.duration)))
                 
-                for entry in entries:
-                    status = entry.get('status', '')  # Don't convert to lowercase yet
-                    sched_status = entry.get('sched_status', '').lower()
-                    errors = entry.get('errors', 0)
-                    error_code = entry.get('errorcode', 0)
-                    
-                    print(f"\nDebug: Processing entry: {entry.get('disp_title', 'Unknown')}")
-                    print(f"  Status: {status}")
-                    print(f"  Sched Status: {sched_status}")
-                    
-                    # Check status (case-sensitive for "Running")
-                    if status == "Running":
-                        print(f"Debug: Found active recording: {entry.get('disp_title', 'Unknown')}")
-                        upcoming.append((entry.get('channelname', 'Unknown'), entry.get('disp_title', 'Unknown'), datetime.fromtimestamp(entry.get('start', 0)), timedelta(seconds=entry.get('duration', 0)), True))
-                    elif 'scheduled' in status.lower() or sched_status == 'scheduled':
-                        upcoming.append((entry.get('channelname', 'Unknown'), entry.get('disp_title', 'Unknown'), datetime.fromtimestamp(entry.get('start', 0)), timedelta(seconds=entry.get('duration', 0)), False))
-                    elif 'completed' in status.lower() or status.lower() == 'finished':
-                        finished.append((entry.get('channelname', 'Unknown'), entry.get('disp_title', 'Unknown'), datetime.fromtimestamp(entry.get('start', 0)), timedelta(seconds=entry.get('duration', 0))))
-                    elif ('failed' in status.lower() or 'invalid' in status.lower() or 
-                          'error' in status.lower() or errors > 0 or error_code != 0):
-                        error_msg = entry.get('error', '')
-                        if not error_msg and errors > 0:
-                            error_msg = f"Recording failed with {errors} errors"
-                        if not error_msg and error_code != 0:
-                            error_msg = f"Error code: {error_code}"
-                        if not error_msg:
-                            error_msg = "Unknown error"
-                        failed.append((entry.get('channelname', 'Unknown'), entry.get('disp_title', 'Unknown'), datetime.fromtimestamp(entry.get('start', 0)), error_msg))
-                        print(f"Debug: Added to failed: {entry.get('disp_title', 'Unknown')} (Error: {error_msg})")
-                    else:
-                        print(f"Debug: Unhandled status: {status} for entry: {entry.get('disp_title', 'Unknown')}")
-                
-                print(f"\nDebug: Sorted entries - Upcoming: {len(upcoming)}, "
-                      f"Finished: {len(finished)}, Failed: {len(failed)}")
-                
-                # Sort upcoming recordings by start time
-                upcoming.sort(key=lambda x: x[2])  # Sort by start_time
-                
-                # Update tables
-                self.upcoming_table.setRowCount(len(upcoming))
-                for i, (channel, title, start, duration, is_recording) in enumerate(upcoming):
-                    self.upcoming_table.setItem(i, 0, QTableWidgetItem(channel))
-                    self.upcoming_table.setItem(i, 1, QTableWidgetItem(title))
-                    self.upcoming_table.setItem(i, 2, QTableWidgetItem(start.strftime('%Y-%m-%d %H:%M')))
-                    self.upcoming_table.setItem(i, 3, QTableWidgetItem(str(duration)))
-                    
-                    # Add status column
-                    status = "Recording" if is_recording else entry.get('sched_status', 'scheduled').capitalize()
-                    self.upcoming_table.setItem(i, 4, QTableWidgetItem(status))
-                    
-                    # Highlight currently recording entries
-                    if is_recording:
-                        for col in range(5):  # Update range to include new column
-                            self.upcoming_table.item(i, col).setBackground(Qt.green)
+                # Add status column
+                status = "Recording" if entry.is_recording else (entry.sched_status or 'scheduled').capitalize()
+                self.upcoming_table.setItem(i, 4, QTableWidgetItem(status))
                 
-                # Sort finished recordings by start time (most recent first)
-                finished.sort(key=lambda x: x[2], reverse=True)
-                
-                self.finished_table.setRowCount(len(finished))
-                for i, (channel, title, start, duration) in enumerate(finished):
-                    self.finished_table.setItem(i, 0, QTableWidgetItem(channel))
-                    self.finished_table.setItem(i, 1, QTableWidgetItem(title))
-                    self.finished_table.setItem(i, 2, QTableWidgetItem(start.strftime('%Y-%m-%d %H:%M')))
-                    self.finished_table.setItem(i, 3, QTableWidgetItem(str(duration)))
-                
-                # Sort failed recordings by start time (most recent first)
-                failed.sort(key=lambda x: x[2], reverse=True)
-                
-                self.failed_table.setRowCount(len(failed))
-                for i, (channel, title, start, error) in enumerate(failed):
-                    self.failed_table.setItem(i, 0, QTableWidgetItem(channel))
-                    self.failed_table.setItem(i, 1, QTableWidgetItem(title))
-                    self.failed_table.setItem(i, 2, QTableWidgetItem(start.strftime('%Y-%m-%d %H:%M')))
-                    self.failed_table.setItem(i, 3, QTableWidgetItem(error))
-                    # Highlight failed entries in red
-                    for col in range(4):
-                        self.failed_table.item(i, col).setBackground(Qt.red)
-                
-            else:
-                print(f"Debug: Failed to fetch DVR entries. Status code: {response.status_code}")
+                # Highlight currently recording entries
+                if entry.is_recording:
+                    for col in range(5):
+                        self.upcoming_table.item(i, col).setBackground(Qt.green)
                 
         except Exception as e:
             print(f"Debug: Error updating DVR status: {str(e)}")
             print(f"Debug: Traceback: {traceback.format_exc()}")
+
+    def on_tab_changed(self, index):
+        self.update_action_buttons()
+        for kind, page in self.pages.items():
+            if self.tabs.widget(index) is page.table and not page.loaded:
+                self.load_more(kind)
+
+    def on_upcoming_scrolled(self, value):
+        if value < self.upcoming_table.verticalScrollBar().maximum() - 5:
+            return
+        # Fewer rows than asked for: the last page is shown or still coming
+        if len(self.upcoming_entries) < self.upcoming_limit or self.upcoming_total is None:
+            return
+        if len(self.upcoming_entries) < self.upcoming_total:
+            self.upcoming_limit += self.PAGE_SIZE
+            self.update_status(restart=True)
+
+    def on_scrolled(self, kind, value):
+        if value >= self.pages[kind].table.verticalScrollBar().maximum() - 5:
+            self.load_more(kind)
+
+    def reload_page(self, kind):
+        page = self.pages[kind]
+        if page.task is not None:
+            page.task.cancel()
+            page.task = None
+        page.entries = []
+        page.loaded = False
+        page.table.setRowCount(0)
+        if kind == 'finished':
+            self.finished_thumbnails.set_jobs([])
+        self.load_more(kind)
+
+    def load_more(self, kind):
+        """Fetch the next page of a tab, most recent recordings first"""
+        page = self.pages[kind]
+        if page.task is not None and not page.task.done():
+            return
+        if page.loaded and page.total is not None and len(page.entries) >= page.total:
+            return
+        start = len(page.entries)
+        page.task = self.tasks.spawn(
+            get_async_api(self.server).dvr_page(kind, start, self.PAGE_SIZE, direction='DESC'),
+            lambda result: self.show_page(kind, start, *result),
+            self.on_update_failed)
+
+    def show_page(self, kind, start, total, entries):
+        page = self.pages[kind]
+        if start != len(page.entries):
+            return  # reloaded meanwhile
+        page.loaded = True
+        page.total = total
+        if start == 0:
+            page.newest = newest_uuid(entries)
+        self.tabs.setTabText(self.tabs.indexOf(page.table), f"{page.title} ({total})")
+        page.entries.extend(entries)
+        table = page.table
+        table.setRowCount(len(page.entries))
+        for i, entry in enumerate(entries, start):
+            if kind == 'failed':
+                self.set_entry_row(table, i, entry, entry.error_message)
+                # Highlight failed entries in red
+                for col in range(4):
+                    table.item(i, col).setBackground(Qt.red)
+            else:
+                self.set_entry_row(table, i, entry, str(timedelta(seconds=entry.duration)))
+        if kind == 'finished':
+            self.finished_thumbnails.set_jobs([self.thumbnail_job(entry) for entry in page.entries])
+        # Keep going until the table can scroll, or everything is shown
+        if entries and table.verticalScrollBar().maximum() == 0:
+            self.load_more(kind)
+
+    def update_action_buttons(self, busy=False):
+        upcoming = self.tabs.currentWidget() is self.upcoming_table
+        self.stop_btn.setEnabled(upcoming and not busy)
+        self.cancel_btn.setEnabled(upcoming and not busy)
+        self.delete_btn.setEnabled(not upcoming and not busy)
+        self.play_btn.setEnabled(self.tabs.currentWidget() is self.finished_table)
+        self.download_btn.setEnabled(self.tabs.currentWidget() is self.finished_table)
+
+    def selected_entries(self, recording=None):
+        """Entries of the selected rows in the current tab; `recording` filters upcoming ones"""
+        table = self.tabs.currentWidget()
+        if table is self.upcoming_table:
+            entries = self.upcoming_entries
+        else:
+            entries = next(page.entries for page in self.pages.values() if page.table is table)
+        rows = sorted({index.row() for index in table.selectionModel().selectedRows()})
+        selected = [entries[row] for row in rows if row < len(entries)]
+        if recording is not None:
+            selected = [entry for entry in selected if entry.is_recording == recording]
+        return selected
+
+    def play_selected(self):
+        entries = self.selected_entries()
+        if entries:
+            self.parent().play_recording(self.server, entries[0])
+
+    def download_selected(self):
+        entries = self.selected_entries()
+        if entries:
+            self.parent().download_recordings(self.server, entries)
+
+    def delete_selected(self):
+        entries = self.selected_entries()
+        if entries and QMessageBox.question(
+                self, "Delete Recordings",
+                f"Delete {len(entries)} recording(s) and their files from the server?",
+                QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
+            self.run_action("Deleting", 'remove_dvr_entries', entries)
+
+    def run_action(self, label, method, entries):
+        """Apply a DVR action to entries with batched, concurrent requests"""
+        if not entries:
+            self.action_label.setText("Nothing selected to apply this to")
+            return
+        uuids = [entry.uuid for entry in entries]
+        print(f"Debug: {label} {len(uuids)} DVR entries")
+        self.update_action_buttons(busy=True)
+        self.show_action_progress(label, 0, len(uuids))
+        kind = next((kind for kind, page in self.pages.items() if page.table is self.tabs.currentWidget()), None)
+        api = get_async_api(self.server)
+        self.tasks.spawn(
+            getattr(api, method)(uuids, lambda done, total: bridge.call_in_gui(
+                self.show_action_progress, label, done, total)),
+            lambda done: self.on_action_done(kind, done),
+            self.on_action_failed)
+
+    def show_action_progress(self, label, done, total):
+        if not self.tasks.closed:
+            self.action_label.setText(f"{label} {done}/{total}...")
+
+    def on_action_done(self, kind, done):
+        self.action_label.setText(f"Done: {done} entries")
+        self.update_action_buttons()
+        self.update_status()
+        if kind is not None:
+            self.reload_page(kind)
+
+    def on_action_failed(self, error):
+        print(f"Debug: DVR action failed: {str(error)}")
+        self.action_label.setText(f"Failed: {str(error)}")
+        self.update_action_buttons()
+        self.update_status()
+
+    def thumbnail_job(self, entry):
+        api = get_api(self.server)
+        return thumbnails.ThumbnailJob(
+            thumbnails.thumbnail_key(resilience.normalize_url(self.server['url']), entry.uuid, entry.filesize),
+            api.dvr_file_url(entry.uuid), entry.duration or None, resilience.server_auth(self.server))
+
+    def set_entry_row(self, table, row, entry, last_column):
+        table.setItem(row, 0, QTableWidgetItem(entry.channel_name))
+        table.setItem(row, 1, QTableWidgetItem(entry.title))
+        table.setItem(row, 2, QTableWidgetItem(datetime.fromtimestamp(entry.start).strftime('%Y-%m-%d %H:%M')))
+        table.setItem(row, 3, QTableWidgetItem(last_column))
+
+    def stop_updates(self):
+        self.update_timer.stop()
+        self.tasks.cancel()
+        self.finished_thumbnails.close()
     
     def closeEvent(self, event):
-        self.update_timer.stop()
+        self.stop_updates()
         super().closeEvent(event)
 
 class RecordingDurationDialog(QDialog):
@@ -418,7 +866,8 @@ class ServerDialog(QDialog):
             dialog = ServerConfigDialog(self)
             dialog.set_server_config(self.servers[current_row])
             if dialog.exec_() == QDialog.Accepted:
-                self.servers[current_row] = dialog.get_server_config()
+                # Keep settings the dialog does not edit, such as stream profiles
+                self.servers[current_row] = {**self.servers[current_row], **dialog.get_server_config()}
                 print(f"Debug: Updated server: {self.servers[current_row]['name']}")
                 self.server_list.item(current_row).setText(self.servers[current_row]['name'])
                 
@@ -463,6 +912,11 @@ class ServerConfigDialog(QDialog):
         self.username_input.setPlaceholderText("Optional")
         layout.addRow("Password:", self.password_input)
         self.password_input.setPlaceholderText("Optional")
+        # Used to warn about recordings the tuners can't all take
+        self.tuners_input = QSpinBox()
+        self.tuners_input.setRange(0, 64)
+        self.tuners_input.setSpecialValueText("From server status")
+        layout.addRow("Tuners:", self.tuners_input)
         
         buttons = QDialogButtonBox(
             QDialogButtonBox.Ok | QDialogButtonBox.Cancel
@@ -476,7 +930,8 @@ class ServerConfigDialog(QDialog):
             'name': self.name_input.text(),
             'url': self.url_input.text(),
             'username': self.username_input.text(),
-            'password': self.password_input.text()
+            'password': self.password_input.text(),
+            'tuners': self.tuners_input.value()
         }
         
     def set_server_config(self, config):
@@ -484,6 +939,7 @@ class ServerConfigDialog(QDialog):
         self.url_input.setText(config.get('url', ''))
         self.username_input.setText(config.get('username', ''))
         self.password_input.setText(config.get('password', ''))
+        self.tuners_input.setValue(config.get('tuners') or 0)
 
     def validate_url(self, url):
         """Validate server URL format"""
@@ -596,6 +1052,11 @@ class ServerStatusDialog(QDialog):
         self.resize(800, 600)
         self.setup_ui()
         
+        # Polls run as coroutines; closing the dialog cancels them
+        self.tasks = TaskScope()
+        self.update_task = None
+        self.finished.connect(self.stop_updates)
+        
         # Update timer
         self.update_timer = QTimer()
         self.update_timer.timeout.connect(self.update_status)
@@ -648,177 +1109,126 @@ class ServerStatusDialog(QDialog):
         layout.addWidget(close_btn)
         
     def update_status(self):
+        if self.update_task is not None and not self.update_task.done():
+            return  # previous poll still running
+        self.update_task = self.tasks.spawn(self.fetch_status(), self.show_status)
+
+    async def fetch_status(self):
+        # The four status calls are independent, so send them together
+        api = get_async_api(self.server)
+        return await api.batch(api.server_info, api.inputs, api.connections, api.subscriptions)
+
+    def show_status(self, results):
         try:
-            auth = None
-            if self.server.get('username') or self.server.get('password'):
-                auth = (self.server.get('username', ''), self.server.get('password', ''))
+            server_data, inputs, connections, subscriptions = results
 
             # 1. Update Server Info Tab
             server_info = f"Server Information:\n\n"
             server_info += f"Name: {self.server.get('name', 'Unknown')}\n"
             server_info += f"URL: {self.server.get('url', 'Unknown')}\n"
             
-            # Get server version and capabilities
-            version_url = f"{self.server['url']}/api/serverinfo"
-            try:
-                version_response = requests.get(version_url, auth=auth)
-                if version_response.status_code == 200:
-                    server_data = version_response.json()
-                    server_info += f"\nServer Version: {server_data.get('sw_version', 'Unknown')}\n"
-                    server_info += f"API Version: {server_data.get('api_version', 'Unknown')}\n"
-                    server_info += f"Server Name: {server_data.get('server_name', 'Unknown')}\n"
-                    
-                    if 'capabilities' in server_data:
-                        server_info += "\nCapabilities:\n"
-                        for cap in server_data['capabilities']:
-                            server_info += f"- {cap}\n"
-            except Exception as e:
-                server_info += f"\nError fetching server info: {str(e)}\n"
+            # Server version and capabilities
+            if isinstance(server_data, Exception):
+                server_info += f"\nError fetching server info: {str(server_data)}\n"
+            else:
+                server_info += f"\nServer Version: {server_data.sw_version}\n"
+                server_info += f"API Version: {server_data.api_version}\n"
+                server_info += f"Server Name: {server_data.name}\n"
+                
+                if server_data.capabilities:
+                    server_info += "\nCapabilities:\n"
+                    for cap in server_data.capabilities:
+                        server_info += f"- {cap}\n"
             
             self.info_text.setText(server_info)
 
             # 2. Update Signal Status Tab
-            inputs_url = f"{self.server['url']}/api/status/inputs"
-            try:
-                inputs_response = requests.get(inputs_url, auth=auth)
+            if isinstance(inputs, Exception):
+                print(f"Debug: Error updating signal status: {str(inputs)}")
+            else:
+                # Set up table with double the rows (signal and SNR on separate rows)
+                self.signal_table.setRowCount(len(inputs) * 2)
                 
-                if inputs_response.status_code == 200:
-                    inputs = inputs_response.json().get('entries', [])
+                for i, input in enumerate(inputs):
+                    # Base row for this input (multiply by 2 since we're using 2 rows per input)
+                    base_row = i * 2
                     
-                    # Set up table with double the rows (signal and SNR on separate rows)
-                    self.signal_table.setRowCount(len(inputs) * 2)
+                    # Input name spans both rows
+                    input_item = QTableWidgetItem(input.input)
+                    self.signal_table.setItem(base_row, 0, input_item)
+                    self.signal_table.setSpan(base_row, 0, 2, 1)  # Span 2 rows
                     
-                    for i, input in enumerate(inputs):
-                        # Base row for this input (multiply by 2 since we're using 2 rows per input)
-                        base_row = i * 2
-                        
-                        # Input name spans both rows
-                        input_item = QTableWidgetItem(str(input.get('input', 'Unknown')))
-                        self.signal_table.setItem(base_row, 0, input_item)
-                        self.signal_table.setSpan(base_row, 0, 2, 1)  # Span 2 rows
-                        
-                        # Signal row
-                        signal = input.get('signal')
-                        signal_scale = input.get('signal_scale', 0)
-                        if signal is not None and signal_scale > 0:
-                            if signal_scale == 1:  # Relative (65535 = 100%)
-                                signal_value = f"{(signal * 100 / 65535):.1f}%"
-                            elif signal_scale == 2:  # Absolute (1000 = 1dB)
-                                signal_value = f"{(signal / 1000):.1f} dB"
-                            else:
-                                signal_value = "N/A"
-                        else:
-                            signal_value = "N/A"
-                        
-                        signal_item = QTableWidgetItem(signal_value)
-                        self.signal_table.setItem(base_row, 1, signal_item)
-                        self.signal_table.setItem(base_row, 2, QTableWidgetItem("Signal"))
-                        
-                        # SNR row
-                        snr = input.get('snr')
-                        snr_scale = input.get('snr_scale', 0)
-                        if snr is not None and snr_scale > 0:
-                            if snr_scale == 1:  # Relative (65535 = 100%)
-                                snr_value = f"{(snr * 100 / 65535):.1f}%"
-                            elif snr_scale == 2:  # Absolute (1000 = 1dB)
-                                snr_value = f"{(snr / 1000):.1f} dB"
-                            else:
-                                snr_value = "N/A"
-                        else:
-                            snr_value = "N/A"
-                        
-                        snr_item = QTableWidgetItem(snr_value)
-                        self.signal_table.setItem(base_row + 1, 1, snr_item)
-                        self.signal_table.setItem(base_row + 1, 2, QTableWidgetItem("SNR"))
-                        
-                        # Stream and Weight info (spans both rows)
-                        self.signal_table.setItem(base_row, 3, QTableWidgetItem(str(input.get('stream', 'N/A'))))
-                        self.signal_table.setItem(base_row, 4, QTableWidgetItem(str(input.get('weight', 'N/A'))))
-                        self.signal_table.setSpan(base_row, 3, 2, 1)  # Span 2 rows for stream
-                        self.signal_table.setSpan(base_row, 4, 2, 1)  # Span 2 rows for weight
-                        
-                        # Color coding for signal and SNR
-                        self.color_code_cell(signal_item, signal, signal_scale, 'signal')
-                        self.color_code_cell(snr_item, snr, snr_scale, 'snr')
-            except Exception as e:
-                print(f"Debug: Error updating signal status: {str(e)}")
-
-            # 3. Update Active Streams Tab
-            connections_url = f"{self.server['url']}/api/status/connections"
-            subscriptions_url = f"{self.server['url']}/api/status/subscriptions"
-            
-            try:
-                # Get both connections and subscriptions
-                connections_response = requests.get(connections_url, auth=auth)
-                subscriptions_response = requests.get(subscriptions_url, auth=auth)
-                
-                if connections_response.status_code == 200 and subscriptions_response.status_code == 200:
-                    connections = connections_response.json().get('entries', [])
-                    subscriptions = subscriptions_response.json().get('entries', [])
+                    # Signal row
+                    signal_item = QTableWidgetItem(self.scaled_text(input.signal, input.signal_scale))
+                    self.signal_table.setItem(base_row, 1, signal_item)
+                    self.signal_table.setItem(base_row, 2, QTableWidgetItem("Signal"))
                     
-                    # Calculate total rows needed (connections + subscriptions)
-                    total_rows = len(connections) + len(subscriptions)
-                    self.subscriptions_table.setRowCount(total_rows)
+                    # SNR row
+                    snr_item = QTableWidgetItem(self.scaled_text(input.snr, input.snr_scale))
+                    self.signal_table.setItem(base_row + 1, 1, snr_item)
+                    self.signal_table.setItem(base_row + 1, 2, QTableWidgetItem("SNR"))
                     
-                    # Add connections
-                    row = 0
-                    for conn in connections:
-                        # Peer (IP address/hostname)
-                        peer = conn.get('peer', 'Unknown')
-                        self.subscriptions_table.setItem(row, 0, QTableWidgetItem(str(peer)))
-                        self.subscriptions_table.setItem(row, 1, QTableWidgetItem(str(conn.get('user', 'N/A'))))
-                        
-                        # Start time
-                        start = datetime.fromtimestamp(conn.get('started', 0)).strftime('%H:%M:%S')
-                        self.subscriptions_table.setItem(row, 2, QTableWidgetItem(start))
-                        
-                        # Duration
-                        duration = int(time.time() - conn.get('started', 0))
-                        hours = duration // 3600
-                        minutes = (duration % 3600) // 60
-                        seconds = duration % 60
-                        duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.subscriptions_table.setItem(row, 3, QTableWidgetItem(duration_str))
-                        
-                        # Type/Status
-                        self.subscriptions_table.setItem(row, 4, QTableWidgetItem("Connection"))
-                        
-                        row += 1
+                    # Stream and Weight info (spans both rows)
+                    self.signal_table.setItem(base_row, 3, QTableWidgetItem(input.stream))
+                    self.signal_table.setItem(base_row, 4, QTableWidgetItem(str(input.weight)))
+                    self.signal_table.setSpan(base_row, 3, 2, 1)  # Span 2 rows for stream
+                    self.signal_table.setSpan(base_row, 4, 2, 1)  # Span 2 rows for weight
                     
-                    # Add subscriptions
-                    for sub in subscriptions:
-                        # Channel/Service name
-                        channel = sub.get('channel', 'Unknown')
-                        if isinstance(channel, dict):
-                            channel = channel.get('name', 'Unknown')
-                        self.subscriptions_table.setItem(row, 0, QTableWidgetItem(str(channel)))
-                        self.subscriptions_table.setItem(row, 1, QTableWidgetItem(str(sub.get('username', 'N/A'))))
-                        
-                        # Start time
-                        start = datetime.fromtimestamp(sub.get('start', 0)).strftime('%H:%M:%S')
-                        self.subscriptions_table.setItem(row, 2, QTableWidgetItem(start))
-                        
-                        # Duration
-                        duration = int(time.time() - sub.get('start', 0))
-                        hours = duration // 3600
-                        minutes = (duration % 3600) // 60
-                        seconds = duration % 60
-                        duration_str = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
-                        self.subscriptions_table.setItem(row, 3, QTableWidgetItem(duration_str))
-                        
-                        # Type/Status
-                        status = f"Subscription ({sub.get('state', 'Unknown')})"
-                        self.subscriptions_table.setItem(row, 4, QTableWidgetItem(status))
-                        
-                        row += 1
+                    # Color coding for signal and SNR
+                    self.color_code_cell(signal_item, input.signal, input.signal_scale, 'signal')
+                    self.color_code_cell(snr_item, input.snr, input.snr_scale, 'snr')
 
-            except Exception as e:
-                print(f"Debug: Error fetching connections/subscriptions: {str(e)}")
+            # 3. Update Active Streams Tab
+            if isinstance(connections, Exception) or isinstance(subscriptions, Exception):
+                error = connections if isinstance(connections, Exception) else subscriptions
+                print(f"Debug: Error fetching connections/subscriptions: {str(error)}")
+            else:
+                # Calculate total rows needed (connections + subscriptions)
+                self.subscriptions_table.setRowCount(len(connections) + len(subscriptions))
+                
+                row = 0
+                for conn in connections:
+                    self.set_stream_row(row, conn.peer, conn.user, conn.started, "Connection")
+                    row += 1
+                
+                for sub in subscriptions:
+                    self.set_stream_row(row, sub.channel, sub.username, sub.start,
+                                        f"Subscription ({sub.state})")
+                    row += 1
 
         except Exception as e:
             print(f"Debug: Error in update_status: {str(e)}")
             print(f"Debug: Traceback: {traceback.format_exc()}")
 
+    def set_stream_row(self, row, name, user, started, status):
+        self.subscriptions_table.setItem(row, 0, QTableWidgetItem(name))
+        self.subscriptions_table.setItem(row, 1, QTableWidgetItem(user))
+        
+        # Start time
+        start = datetime.fromtimestamp(started).strftime('%H:%M:%S')
+        self.subscriptions_table.setItem(row, 2, QTableWidgetItem(start))
+        
+        # Duration
+        duration = int(time.time() - started)
+        hours = duration // 3600
+        minutes = (duration % 3600) // 60
+        seconds = duration % 60
+        self.subscriptions_table.setItem(row, 3, QTableWidgetItem(f"{hours:02d}:{minutes:02d}:{seconds:02d}"))
+        
+        # Type/Status
+        self.subscriptions_table.setItem(row, 4, QTableWidgetItem(status))
+
+    @staticmethod
+    def scaled_text(value, scale):
+        """Format a signal or SNR reading according to its scale"""
+        if value is None or scale <= 0:
+            return "N/A"
+        if scale == 1:  # Relative (65535 = 100%)
+            return f"{(value * 100 / 65535):.1f}%"
+        if scale == 2:  # Absolute (1000 = 1dB)
+            return f"{(value / 1000):.1f} dB"
+        return "N/A"
+
     def color_code_cell(self, item, value, scale, type='signal'):
         """Helper method to color code signal and SNR values"""
         if value is not None and scale > 0:
@@ -838,24 +1248,169 @@ class ServerStatusDialog(QDialog):
                 item.setBackground(Qt.darkYellow)
             else:
                 item.setBackground(Qt.red)
+
+    def stop_updates(self):
+        self.update_timer.stop()
+        self.tasks.cancel()
     
     def closeEvent(self, event):
-        self.update_timer.stop()
+        self.stop_updates()
         super().closeEvent(event)
 
+class LogoTask(QRunnable):
+    """Download (or read from disk) and decode one logo on a pool thread"""
+
+    def __init__(self, url, auth, size, disk_cache, signals):
+        super().__init__()
+        self.url = url
+        self.auth = auth
+        self.size = size
+        self.disk_cache = disk_cache
+        self.signals = signals
+
+    def run(self):
+        image = QImage()
+        try:
+            data = self.disk_cache.get(self.url, self.auth)
+            if data and image.loadFromData(data):
+                # Scale once here so the GUI thread only wraps it in a pixmap
+                image = image.scaled(self.size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        except Exception as e:
+            print(f"Debug: Error loading logo {self.url}: {str(e)}")
+        self.signals.decoded.emit(self.url, image)
+
+
+class LogoSignals(QObject):
+    decoded = pyqtSignal(str, QImage)
+
+
+class CallableTask(QRunnable):
+    """Run a plain function on a QThreadPool"""
+
+    def __init__(self, func):
+        super().__init__()
+        self.func = func
+
+    def run(self):
+        try:
+            self.func()
+        except Exception as e:
+            print(f"Debug: Background task failed: {str(e)}")
+
+
+class ChannelLogoLoader(QObject):
+    """Load channel logos in the background into a size-bounded pixmap LRU"""
+    logo_ready = pyqtSignal(str)
+    logo_evicted = pyqtSignal(str)
+
+    def __init__(self, cache_dir, size, parent=None, max_threads=4, max_bytes=8 * 1024 * 1024):
+        super().__init__(parent)
+        self.size = size
+        self.disk_cache = LogoDiskCache(cache_dir)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self.signals = LogoSignals()
+        self.signals.decoded.connect(self.on_decoded)
+        self.pixmaps = OrderedDict()
+        self.pixmap_bytes = 0
+        self.max_bytes = max_bytes
+        self.in_flight = set()
+        self.failed = set()
+
+        # Trim the disk cache off the GUI thread
+        self.pool.start(CallableTask(self.disk_cache.prune))
+
+    def pixmap(self, url):
+        """Return the cached pixmap for a logo URL, or None"""
+        pixmap = self.pixmaps.get(url)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(url)
+        return pixmap
+
+    def request(self, url, auth=None):
+        """Queue a logo for loading unless it is cached, loading or known broken"""
+        if url in self.pixmaps or url in self.in_flight or url in self.failed:
+            return
+        self.in_flight.add(url)
+        self.pool.start(LogoTask(url, auth, self.size, self.disk_cache, self.signals))
+
+    def on_decoded(self, url, image):
+        self.in_flight.discard(url)
+        if image.isNull():
+            self.failed.add(url)
+            return
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps[url] = pixmap
+        self.pixmap_bytes += pixmap.width() * pixmap.height() * 4
+        while self.pixmap_bytes > self.max_bytes and len(self.pixmaps) > 1:
+            old_url, old_pixmap = self.pixmaps.popitem(last=False)
+            self.pixmap_bytes -= old_pixmap.width() * old_pixmap.height() * 4
+            self.logo_evicted.emit(old_url)
+        self.logo_ready.emit(url)
+
+    def clear_pending(self):
+        """Drop queued (not yet started) downloads, e.g. when the channel list changes"""
+        self.pool.clear()
+        self.in_flight.clear()
+
+
+class VLCLoader(QThread):
+    """Create the libVLC instance and media player off the GUI thread.
+
+    libVLC scans its plugin directory on instance creation, which takes longer
+    than building the whole UI. `error` holds the failure message, if any.
+    """
+
+    def __init__(self, vlc_args, parent=None):
+        super().__init__(parent)
+        self.vlc_args = vlc_args
+        self.instance = None
+        self.media_player = None
+        self.error = None
+
+    def run(self):
+        print("Debug: Initializing VLC instance")
+        try:
+            if getattr(sys, 'frozen', False):
+                # If running as compiled executable
+                base_path = sys._MEIPASS
+                plugin_path = os.path.join(base_path, 'vlc', 'plugins')
+
+                # Set VLC plugin path via environment variable
+                os.environ['VLC_PLUGIN_PATH'] = plugin_path
+
+                # On Linux, might also need these
+                if sys.platform.startswith('linux'):
+                    os.environ['LD_LIBRARY_PATH'] = base_path
+
+                print(f"Debug: VLC plugin path set to: {plugin_path}")
+
+            import vlc
+
+            self.instance = vlc.Instance(self.vlc_args)
+            if not self.instance:
+                raise RuntimeError("VLC Instance creation returned None")
+
+            print("Debug: VLC instance created successfully with hardware acceleration")
+
+            self.media_player = self.instance.media_player_new()
+            if not self.media_player:
+                raise RuntimeError("VLC media player creation returned None")
+
+            print("Debug: VLC media player created successfully")
+
+        except Exception as e:
+            print(f"Error initializing VLC: {str(e)}")
+            self.error = str(e)
+
+
 class TVHeadendClient(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setup_paths()
         
-        # Get OS-specific config path using sys.platform
-        if sys.platform == 'darwin':  # macOS
-            self.config_dir = os.path.join(os.path.expanduser('~/Library/Application Support'), 'TVHplayer')
-        elif sys.platform == 'win32':  # Windows
-            self.config_dir = os.path.join(os.getenv('APPDATA'), 'TVHplayer')
-        else:  # Linux/Unix
-            CONFIG_HOME = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
-            self.config_dir = os.path.join(CONFIG_HOME, "tvhplayer")
+        # Get OS-specific config path
+        self.config_dir = default_config_dir()
         
         # Ensure config directory exists
         os.makedirs(self.config_dir, exist_ok=True)
@@ -863,9 +1418,12 @@ class TVHeadendClient(QMainWindow):
         # Set config file path
         self.config_file = os.path.join(self.config_dir, 'tvhplayer.conf')
         print(f"Debug: Config file location: {self.config_file}")
-        self.config = self.load_config()
+        # Changes are written in the background, coalesced and atomically
+        self.config_store = ConfigStore(self.config_file)
+        self.config = self.config_store.data
         print(f"Debug: Current config: {json.dumps(self.config, indent=2)}")
         print("Debug: Initializing TVHeadendClient")
+        startup_profiler.mark("config loaded")
         
         # Initialize fullscreen state        
         # Rest of initialization code...
@@ -888,7 +1446,86 @@ class TVHeadendClient(QMainWindow):
         # Initialize channels list
         self.channels = []
         
+        # Channel search index, rebuilt on every channel list load
+        self.channel_index = None
+        self.channel_items = []  # name column item per index id
+        self.hidden_channel_ids = set()
+
+        # Channel logos, loaded only for rows in the viewport
+        self.logo_loader = ChannelLogoLoader(os.path.join(self.config_dir, 'logos'), QSize(40, 24), self)
+        self.logo_loader.logo_ready.connect(self.on_logo_ready)
+        self.logo_loader.logo_evicted.connect(self.on_logo_evicted)
+        self.pending_logo_items = defaultdict(list)
+        self.decorated_logo_items = defaultdict(list)
+        
         self.is_fullscreen = False
+
+        # Playback statistics, sampled once a second while a stream plays
+        self.playback_stats = PlaybackStats()
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setInterval(1000)
+        self.stats_timer.timeout.connect(self.sample_playback_stats)
+        self.stats_osd_enabled = False
+        self.stats_dialog = None
+
+        # Adaptive network caching learns from the rebuffers of each channel
+        self.caching_tuner = CachingTuner(os.path.join(self.config_dir, 'cache', 'caching.json'))
+        self.tuned_stream = None  # (server url, channel uuid) being observed
+        self.tuner_fed_at = 0.0
+        self.tuner_rebuffers = 0
+        self.now_playing = None  # (server, channel data, caching ms) of the live channel
+
+        # Audio-only playback: radio channels are opened without video, TV
+        # channels drop their video track on demand or while minimised
+        self.radio_channels = set()  # uuids of the radio channels of the current server
+        self.audio_only = False
+        self.hidden_video_track = None  # video track to restore when video is wanted again
+
+        # Finished recording being played through a range reader, with its seek bar
+        self.recording_reader = None
+        self.recording_entry = None
+        self.seek_timer = QTimer(self)
+        self.seek_timer.setInterval(500)
+        self.seek_timer.timeout.connect(self.update_seek_bar)
+
+        # Recording downloads; created on first use, see ensure_downloads()
+        self.downloads = None
+        self.downloads_dialog = None
+        self.download_servers = {}  # download path -> server url, to restore unfinished ones
+
+        # Recording thumbnails; created on first use, see ensure_thumbnails()
+        self.thumbnails = None
+
+        # Local recordings scheduled from the EPG; one timer is armed for the
+        # next start or stop, and jobs whose time has come are picked up at once
+        self.local_scheduler = scheduler.LocalScheduler(
+            os.path.join(self.config_dir, 'local_schedule.json'),
+            self.start_scheduled_capture, self.on_scheduled_recording_finished)
+        self.schedule_timer = QTimer(self)
+        self.schedule_timer.setSingleShot(True)
+        self.schedule_timer.timeout.connect(self.run_local_schedule)
+        self.schedule_dialog = None
+
+        # Conversion of local captures into .mp4/.mkv after recording; jobs
+        # left over from the last session carry on right away
+        self.postprocess = None
+        self.postprocess_dialog = None
+        self.local_recording_paths = None  # (capture, target) of the running local recording
+        if os.path.exists(self.postprocess_journal()):
+            self.ensure_postprocess()
+        self.arm_schedule_timer()
+
+        # Autorecord rules are applied to the events each EPG sync finds new;
+        # servers with rules get their EPG synced now and then for that
+        self.autorecord_timer = QTimer(self)
+        self.autorecord_timer.setInterval(autorecord.SYNC_INTERVAL * 1000)
+        self.autorecord_timer.timeout.connect(self.sync_autorecord)
+        self.autorecord_timer.start()
+        QTimer.singleShot(autorecord.STARTUP_DELAY * 1000, self.sync_autorecord)
+
+        # Server-side stream profiles, fetched with the channel list
+        self.stream_profiles = {}  # server url -> [StreamProfile]
+        self.auto_profile = AutoProfileSwitcher()
  
         
         # Add recording indicator variables
@@ -898,75 +1535,113 @@ class TVHeadendClient(QMainWindow):
         self.recording_animation = None
         self.opacity_effect = None
         
-        # Initialize VLC with basic instance first
-        print("Debug: Initializing VLC instance")
-        try:
-            if getattr(sys, 'frozen', False):
-                # If running as compiled executable
-                base_path = sys._MEIPASS
-                plugin_path = os.path.join(base_path, 'vlc', 'plugins')
-                
-                # Set VLC plugin path via environment variable
-                os.environ['VLC_PLUGIN_PATH'] = plugin_path
-                
-                # On Linux, might also need these
-                if sys.platform.startswith('linux'):
-                    os.environ['LD_LIBRARY_PATH'] = base_path
-                    
-                print(f"Debug: VLC plugin path set to: {plugin_path}")
-                
-            # Initialize VLC with hardware acceleration parameters
-            vlc_args = [
-                # Enable hardware decoding
-                '--avcodec-hw=any',  # Try any hardware acceleration method
-                '--file-caching=1000',  # Increase file caching for smoother playback
-                '--network-caching=1000',  # Increase network caching for streaming
-                '--no-video-title-show',  # Don't show the video title
-                '--no-snapshot-preview',  # Don't show snapshot previews
-            ]
-            
-            self.instance = vlc.Instance(vlc_args)
-            if not self.instance:
-                raise RuntimeError("VLC Instance creation returned None")
-                
-            print("Debug: VLC instance created successfully with hardware acceleration")
-            
-            self.media_player = self.instance.media_player_new()
-            if not self.media_player:
-                raise RuntimeError("VLC media player creation returned None")
-                
-            print("Debug: VLC media player created successfully")
-            
-        except Exception as e:
-            print(f"Error initializing VLC: {str(e)}")
-            raise RuntimeError(f"Failed to initialize VLC: {str(e)}")
+        # Start libVLC while the UI is being built; see ensure_vlc()
+        self.vlc_configured = False
+        self.vlc_loader = VLCLoader(VLC_ARGS, self)
+        self.vlc_loader.finished.connect(self.on_vlc_ready)
+        self.vlc_loader.start()
+        startup_profiler.mark("VLC start-up launched")
+
+        # Network I/O runs as coroutines on the asyncio loop; all of the
+        # window's tasks are cancelled when it closes
+        self.tasks = TaskScope()
+
+        # Channel lists are fetched in the background and cached on disk
+        self.channel_cache = ChannelListCache(os.path.join(self.config_dir, 'cache'))
+        self.channel_entries = None  # entries currently in the table
+        self.channel_task = None
+        self.channel_generation = 0  # results of older fetches are dropped
         
         # Then setup UI
         self.setup_ui()
+        startup_profiler.mark("UI built")
         
-        # Update to use config for last server
+        # Update to use config for last server; the fetch below does the
+        # initial load, so on_server_changed must not start a second one
+        self.server_combo.blockSignals(True)
         self.server_combo.setCurrentIndex(self.config.get('last_server', 0))
-        
-        # Now configure hardware acceleration after UI is set up
-        try:
-            # Set player window - with proper type conversion
-            if sys.platform.startswith('linux'):
-                handle = self.video_frame.winId().__int__()
-                if handle is not None:
-                    self.media_player.set_xwindow(handle)
-            elif sys.platform == "win32":
-                self.media_player.set_hwnd(self.video_frame.winId().__int__())
-            elif sys.platform == "darwin":
-                self.media_player.set_nsobject(self.video_frame.winId().__int__())
+        self.server_combo.blockSignals(False)
+        self.fetch_channels()
+
+    @property
+    def instance(self):
+        return self.ensure_vlc().instance
+
+    @property
+    def media_player(self):
+        return self.ensure_vlc().media_player
+
+    def ensure_vlc(self):
+        """Return the VLC loader, waiting for the background start-up if still running"""
+        if not self.vlc_configured:
+            self.vlc_loader.wait()
+            self.on_vlc_ready()
+        if self.vlc_loader.error:
+            raise RuntimeError(f"Failed to initialize VLC: {self.vlc_loader.error}")
+        return self.vlc_loader
+
+    def vlc_ready(self, wait=True):
+        """Whether `instance` and `media_player` can be used.
+
+        Slots check this first, as the window stays open without VLC. With
+        `wait` it waits for the background start-up like ensure_vlc() and
+        tells the user when playback is unavailable; timers pass False.
+        """
+        if not self.vlc_configured:
+            if not wait:
+                return False
+            self.vlc_loader.wait()
+            self.on_vlc_ready()
+        if self.vlc_loader.error:
+            if wait:
+                self.statusbar.showMessage("Playback unavailable: VLC failed to initialize")
+            return False
+        return True
+
+    def on_vlc_ready(self):
+        """Attach the new media player to the video frame"""
+        if self.vlc_configured:
+            return
+        self.vlc_configured = True
+        startup_profiler.mark("VLC ready")
+        if self.vlc_loader.error:
+            self.statusbar.showMessage("Failed to initialize VLC")
+            QMessageBox.critical(self, "VLC Error", f"Failed to initialize VLC:\n{self.vlc_loader.error}")
+            return
+        media_player = self.vlc_loader.media_player
+
+        # Now configure hardware acceleration
+        try:
+            # Set player window - with proper type conversion
+            if sys.platform.startswith('linux'):
+                handle = self.video_frame.winId().__int__()
+                if handle is not None:
+                    media_player.set_xwindow(handle)
+            elif sys.platform == "win32":
+                media_player.set_hwnd(self.video_frame.winId().__int__())
+            elif sys.platform == "darwin":
+                media_player.set_nsobject(self.video_frame.winId().__int__())
             
             # Set hardware decoding to automatic
-            if hasattr(self.media_player, 'set_hardware_decoding'):
-                self.media_player.set_hardware_decoding(True)
+            if hasattr(media_player, 'set_hardware_decoding'):
+                media_player.set_hardware_decoding(True)
             else:
                 # Alternative method for older VLC Python bindings
-                self.media_player.video_set_key_input(False)
-                self.media_player.video_set_mouse_input(False)
+                media_player.video_set_key_input(False)
+                media_player.video_set_mouse_input(False)
             
+            # Rebuffering shows up as buffering events after playback started;
+            # the callback runs on a VLC thread and only updates counters
+            import vlc
+            media_player.event_manager().event_attach(
+                vlc.EventType.MediaPlayerBuffering,
+                lambda event: self.playback_stats.on_buffering(event.u.new_cache))
+            # A new video output means a video track was (re)selected; drop it
+            # again if audio-only playback is wanted
+            media_player.event_manager().event_attach(
+                vlc.EventType.MediaPlayerVout,
+                lambda event: bridge.call_in_gui(self.apply_audio_only))
+
             # Add a timer to check which hardware acceleration method is being used
             # This will check after playback starts
             self.hw_check_timer = QTimer()
@@ -1071,6 +1746,48 @@ class TVHeadendClient(QMainWindow):
         fullscreen_action.triggered.connect(self.toggle_fullscreen)
         view_menu.addAction(fullscreen_action)
 
+        # Playback diagnostics
+        self.stats_osd_action = QAction("Statistics Overlay", self)
+        self.stats_osd_action.setShortcut("I")
+        self.stats_osd_action.setCheckable(True)
+        self.stats_osd_action.toggled.connect(self.set_stats_osd)
+        view_menu.addAction(self.stats_osd_action)
+        stats_action = QAction("Playback Statistics...", self)
+        stats_action.setShortcut("Ctrl+I")
+        stats_action.triggered.connect(self.show_playback_stats)
+        view_menu.addAction(stats_action)
+
+        # Network caching: learned per channel, or a fixed value
+        caching_menu = view_menu.addMenu("Network Caching")
+        caching_group = QActionGroup(self)
+        current_caching = self.config.get('network_caching', 'adaptive')
+        for label, value in (("Adaptive", 'adaptive'), ("300 ms", 300), ("1000 ms", 1000), ("3000 ms", 3000)):
+            action = QAction(label, self, checkable=True)
+            action.setChecked(value == current_caching)
+            action.triggered.connect(lambda checked, value=value: self.set_network_caching(value))
+            caching_group.addAction(action)
+            caching_menu.addAction(action)
+
+        # Audio only: stop decoding video, for radio or listening in the background
+        self.audio_only_action = QAction("Audio Only", self, checkable=True)
+        self.audio_only_action.setShortcut("A")
+        self.audio_only_action.toggled.connect(self.set_audio_only)
+        view_menu.addAction(self.audio_only_action)
+        audio_minimized_action = QAction("Audio Only When Minimised", self, checkable=True)
+        audio_minimized_action.setChecked(self.config.get('audio_only_minimized', False))
+        audio_minimized_action.toggled.connect(self.set_audio_only_minimized)
+        view_menu.addAction(audio_minimized_action)
+
+        low_latency_action = QAction("Low Latency Mode", self, checkable=True)
+        low_latency_action.setChecked(self.config.get('low_latency', False))
+        low_latency_action.toggled.connect(self.set_low_latency)
+        view_menu.addAction(low_latency_action)
+        self.profile_menu = view_menu.addMenu("Stream Profile")
+        self.profile_menu.aboutToShow.connect(lambda: self.fill_profile_menu(self.profile_menu))
+        latency_action = QAction("Measure Latency...", self)
+        latency_action.triggered.connect(self.show_latency_meter)
+        view_menu.addAction(latency_action)
+
         # Add Settings action to View menu
         #settings_action = QAction("Settings", self)
         ##view_menu.addAction(settings_action)
@@ -1131,7 +1848,15 @@ class TVHeadendClient(QMainWindow):
         self.channel_list.setSelectionMode(QTableWidget.SingleSelection)
         self.channel_list.setSortingEnabled(True)
         self.channel_list.setEditTriggers(QTableWidget.NoEditTriggers)
-        
+        self.channel_list.setIconSize(QSize(40, 24))
+
+        # Request logos for newly visible rows once scrolling settles
+        self.logo_timer = QTimer(self)
+        self.logo_timer.setSingleShot(True)
+        self.logo_timer.setInterval(50)
+        self.logo_timer.timeout.connect(self.request_visible_logos)
+        self.channel_list.verticalScrollBar().valueChanged.connect(self.logo_timer.start)
+
         # Connect double-click to play
         self.channel_list.itemDoubleClicked.connect(self.play_channel_from_table)
         
@@ -1158,6 +1883,18 @@ class TVHeadendClient(QMainWindow):
         """)
         
         right_layout.addWidget(self.video_frame)
+
+        # Seek bar, shown while a finished recording plays
+        self.seek_bar = QWidget()
+        seek_layout = QHBoxLayout(self.seek_bar)
+        seek_layout.setContentsMargins(0, 0, 0, 0)
+        self.seek_slider = QSlider(Qt.Horizontal)
+        self.seek_slider.sliderReleased.connect(self.seek_recording)
+        seek_layout.addWidget(self.seek_slider)
+        self.seek_label = QLabel()
+        seek_layout.addWidget(self.seek_label)
+        self.seek_bar.hide()
+        right_layout.addWidget(self.seek_bar)
         
         # Player controls
         controls_layout = QHBoxLayout()
@@ -1188,7 +1925,7 @@ class TVHeadendClient(QMainWindow):
         self.stop_btn.setIcon(QIcon(f"{self.icons_dir}/stop.svg"))
         self.stop_btn.setIconSize(QSize(48, 48))
         self.stop_btn.setStyleSheet("QPushButton { border-radius: 24px; }")
-        self.stop_btn.clicked.connect(self.media_player.stop)
+        self.stop_btn.clicked.connect(self.stop_playback)
         self.stop_btn.setToolTip("Stop playback")
         playback_layout.addWidget(self.stop_btn)
         
@@ -1352,9 +2089,6 @@ class TVHeadendClient(QMainWindow):
             self.status_label.setText(message)
         self.statusbar.showMessage = custom_show_message
         
-        # Initialize
-        self.fetch_channels()
-        
         # Connect channel list double click to play
         
         # Add event filter to video frame for double-click
@@ -1370,6 +2104,26 @@ class TVHeadendClient(QMainWindow):
         # Add DVR Status to View menu
         dvr_status_action = view_menu.addAction("DVR Status")
         dvr_status_action.triggered.connect(self.show_dvr_status)
+        downloads_action = view_menu.addAction("Downloads")
+        downloads_action.triggered.connect(self.show_downloads)
+        library_action = view_menu.addAction("Recordings Library")
+        library_action.setShortcut("Ctrl+L")
+        library_action.triggered.connect(self.show_library)
+        postprocess_action = view_menu.addAction("Post-processing Queue")
+        postprocess_action.triggered.connect(self.show_postprocess)
+        schedule_action = view_menu.addAction("Local Recording Schedule")
+        schedule_action.triggered.connect(self.show_local_schedule)
+        autorecord_action = view_menu.addAction("Autorecord Rules")
+        autorecord_action.triggered.connect(self.show_autorecord)
+        
+        # Add EPG Search to View menu
+        epg_search_action = view_menu.addAction("Search EPG")
+        epg_search_action.setShortcut("Ctrl+E")
+        epg_search_action.triggered.connect(self.show_epg_search)
+
+        mosaic_action = view_menu.addAction("Mosaic")
+        mosaic_action.setShortcut("Ctrl+M")
+        mosaic_action.triggered.connect(self.show_mosaic)
         
         # Add search box before styling it
         search_layout = QHBoxLayout()
@@ -1383,7 +2137,14 @@ class TVHeadendClient(QMainWindow):
         self.search_box.setPalette(search_palette)
         
         self.search_box.setPlaceholderText("Press S to search channels...")
-        self.search_box.textChanged.connect(self.filter_channels)
+        
+        # Debounce typing so the filter runs once per pause, not per keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(120)
+        self.search_timer.timeout.connect(lambda: self.filter_channels(self.search_box.text()))
+        self.search_box.textChanged.connect(self.search_timer.start)
+        self.search_box.returnPressed.connect(self.play_top_search_result)
         self.search_box.setClearButtonEnabled(True)  # Add clear button inside search box
         
         # Add Ctrl+F shortcut for search box
@@ -1406,146 +2167,171 @@ class TVHeadendClient(QMainWindow):
         search_layout.setSpacing(5)
         
     def fetch_channels(self):
-        """Fetch channel list from current TVHeadend server"""
-        try:
-            if not self.servers:
-                print("Debug: No servers configured")
-                self.statusbar.showMessage("No servers configured")
-                return
-                
-            server = self.servers[self.server_combo.currentIndex()]
-            print(f"Debug: Fetching channels from server: {server['url']}")
-            
-            # Initialize verification list
-            channel_verification = []
-            
-            # Update status bar
-            self.statusbar.showMessage("Connecting to server...")
-            
-            # Clean and format the URL properly
-            url = server['url']
-            if url.startswith('https://') or url.startswith('http://'):
-                base_url = url
-            else:
-                base_url = f"http://{url}"
-            
-            api_url = f'{base_url}/api/channel/grid?limit=10000'
-            print(f"Debug: Making request to: {api_url}")
-            
-            # Create auth tuple if credentials exist
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                print(f"Debug: Using authentication with username: {server.get('username', '')}")
-            
-            # Add timeout parameter (10 seconds)
-            response = requests.get(api_url, auth=auth, timeout=10)
-            
-            channels = response.json()['entries']
-            print(f"Debug: Found {len(channels)} channels")
-            
-            # First, disable sorting while adding items
-            #self.channel_list.setSortingEnabled(False)
-            
-            # Clear existing items
-            self.channel_list.setRowCount(0)
-            
-            # Create a list to store channel data for sorting
-            channel_data = []
-            
-            # Process all channels first
-            for channel in channels:
-                try:
-                    channel_name = channel.get('name', 'Unknown Channel')
-                    channel_number = channel.get('number', 0)  # Use 0 as default for unnumbered channels
-                    
-                    # Store channel data for sorting
-                    channel_data.append({
-                        'number': channel_number,
-                        'name': channel_name,
-                        'data': channel
-                    })
-                    
-                except Exception as e:
-                    print(f"Debug: Error processing channel {channel.get('name', 'Unknown')}: {str(e)}")
-                    continue
-            
-            # Sort channels by number, then name
-            channel_data.sort(key=lambda x: (x['number'] or float('inf'), x['name'].lower()))
-            
-            # Now add sorted channels to the table
-            for idx, channel in enumerate(channel_data):
-                try:
-                    print(f"Debug: Adding channel {idx + 1}/{len(channel_data)}: {channel['name']}")
-                    
-                    row = self.channel_list.rowCount()
-                    self.channel_list.insertRow(row)
-                    
-                    # Create and add number item
-                    number_item = QTableWidgetItem()
-                    number_item.setData(Qt.DisplayRole, channel['number'])
-                    self.channel_list.setItem(row, 0, number_item)
-                    
-                    # Create and add name item
-                    name_item = QTableWidgetItem(channel['name'])
-                    name_item.setData(Qt.UserRole, channel['data'])
-                    self.channel_list.setItem(row, 1, name_item)
-                    
-                    # Add to verification list
-                    channel_verification.append({
-                        'row': row,
-                        'name': channel['name'],
-                        'number': channel['number']
-                    })
-                    
-                    print(f"Debug: Added channel to row {row}: {channel['name']}")
-                    
-                except Exception as e:
-                    print(f"Debug: Error adding channel to table: {str(e)}")
-                    continue
-            
-            # Re-enable sorting but don't trigger an automatic sort
-            self.channel_list.setSortingEnabled(True)
-            
-            # Verify the final table contents
-            print("\nDebug: Channel Verification:")
-            print(f"Original channel count: {len(channels)}")
-            print(f"Added channel count: {len(channel_verification)}")
-            print(f"Table row count: {self.channel_list.rowCount()}")
-            
-            print("\nDebug: Final Table Contents:")
-            for row in range(self.channel_list.rowCount()):
-                number_item = self.channel_list.item(row, 0)
-                name_item = self.channel_list.item(row, 1)
-                if number_item and name_item:
-                    number = number_item.data(Qt.DisplayRole)
-                    name = name_item.text()
-                    print(f"Row {row}: #{number} - {name}")
-                else:
-                    print(f"Row {row}: Missing items")
-            
+        """Show the cached channel list of the current server and refresh it in the background"""
+        if not self.servers:
+            print("Debug: No servers configured")
+            self.statusbar.showMessage("No servers configured")
+            return
+
+        server = self.servers[self.server_combo.currentIndex()]
+        print(f"Debug: Fetching channels from server: {server['url']}")
+        self.show_cached_channels(server)
+        self.statusbar.showMessage("Connecting to server...")
+
+        if self.channel_task is not None:
+            self.channel_task.cancel()
+        self.channel_generation += 1
+        generation = self.channel_generation
+        self.channel_task = self.tasks.spawn(
+            self.fetch_channel_grid(server),
+            lambda result: self.on_channels_loaded(generation, server, *result),
+            lambda error: self.on_channels_failed(generation, server, error))
+
+    async def fetch_channel_grid(self, server):
+        """Fetch a server's channel grid and refresh its on-disk copy"""
+        # Served from cache if the server is down and was reachable earlier
+        entries, stale = await get_async_api(server).channel_grid()
+        if not stale:
+            await run_blocking(self.channel_cache.store, resilience.normalize_url(server['url']), entries)
+        return entries, stale
+
+    def show_cached_channels(self, server):
+        """Fill the table from the disk cache, or empty it if nothing is cached"""
+        entries = self.channel_cache.load(resilience.normalize_url(server['url']))
+        if entries is None:
+            if self.channel_entries is not None:
+                self.load_channels([])
+                self.channel_entries = None
+            return
+        if entries != self.channel_entries:
+            self.load_channels(entries)
+        startup_profiler.mark("cached channel list shown")
+
+    def on_channels_loaded(self, generation, server, channels, stale):
+        if generation != self.channel_generation:
+            return  # the server was switched meanwhile
+        startup_profiler.mark("channels fetched")
+        print(f"Debug: Found {len(channels)} channels")
+        if channels != self.channel_entries:
+            self.load_channels(channels)
+        if not stale:
+            self.tasks.spawn(self.fetch_radio_channels(server, channels),
+                             lambda radio: self.on_radio_channels(generation, radio))
+            server_url = resilience.normalize_url(server['url'])
+            self.tasks.spawn(get_async_api(server).stream_profiles(),
+                             lambda profiles: self.stream_profiles.__setitem__(server_url, profiles),
+                             lambda error: print(f"Debug: Could not fetch stream profiles: {error}"))
+        if stale:
+            self.statusbar.showMessage("Server unavailable - showing cached channel list")
+        else:
             self.statusbar.showMessage("Channels loaded successfully")
-            
-        except Exception as e:
-            print(f"Debug: Error in fetch_channels: {str(e)}")
-            print(f"Debug: Error type: {type(e)}")
-            import traceback
-            print(f"Debug: Traceback: {traceback.format_exc()}")
-            
-            # Show error dialog
-            dialog = ConnectionErrorDialog(
-                server['name'], 
-                f"Unexpected error: {str(e)}", 
-                self
-            )
-            if dialog.exec_() == QDialog.Accepted:
-                print("Debug: Retrying connection...")
-                self.fetch_channels()
-            else:
-                print("Debug: Connection attempt aborted by user")
-                self.statusbar.showMessage("Connection aborted")
-                self.channel_list.clear()
+
+    async def fetch_radio_channels(self, server, entries):
+        """Find the radio channels among a server's channel grid entries"""
+        api = get_async_api(server)
+        tags, services = await api.batch(api.channel_tags, api.radio_service_uuids)
+        # The service grid needs admin rights; tags alone still find most radio
+        if isinstance(tags, Exception):
+            print(f"Debug: Could not fetch channel tags: {tags}")
+            tags = {}
+        if isinstance(services, Exception):
+            print(f"Debug: Could not fetch service types: {services}")
+            services = set()
+        return radio_channel_uuids(entries, tags, services)
+
+    def on_radio_channels(self, generation, radio):
+        if generation != self.channel_generation:
+            return
+        print(f"Debug: {len(radio)} radio channels")
+        self.radio_channels = radio
+
+    def on_channels_failed(self, generation, server, error):
+        if generation != self.channel_generation:
+            return
+        print(f"Debug: Error in fetch_channels: {str(error)}")
+        print(f"Debug: Error type: {type(error)}")
+        if self.channel_entries is not None:
+            # The list from the disk cache stays usable
+            self.statusbar.showMessage("Server unavailable - showing cached channel list")
+            return
+
+        # Show error dialog; the resilience policy already retried with backoff,
+        # so each further attempt is an explicit user decision
+        dialog = ConnectionErrorDialog(
+            server['name'],
+            f"Unexpected error: {str(error)}",
+            self
+        )
+        if dialog.exec_() != QDialog.Accepted:
+            print("Debug: Connection attempt aborted by user")
+            self.statusbar.showMessage("Connection aborted")
+            self.channel_list.setRowCount(0)
+            return
+        print("Debug: Retrying connection...")
+        resilience.get_circuit_breaker(server['url']).reset()
+        self.fetch_channels()
+
+    def load_channels(self, channels):
+        """Fill the channel table with the entries of a channel grid"""
+        self.channel_entries = channels
+
+        # Create a list to store channel data for sorting
+        channel_data = []
+        
+        # Process all channels first
+        for channel in channels:
+            try:
+                channel_name = channel.get('name', 'Unknown Channel')
+                channel_number = channel.get('number', 0)  # Use 0 as default for unnumbered channels
+                
+                # Store channel data for sorting
+                channel_data.append({
+                    'number': channel_number,
+                    'name': channel_name,
+                    'data': channel
+                })
+                
+            except Exception as e:
+                print(f"Debug: Error processing channel {channel.get('name', 'Unknown')}: {str(e)}")
+                continue
+        
+        # Sort channels by number, then name
+        channel_data.sort(key=lambda x: (x['number'] or float('inf'), x['name'].lower()))
+        
+        # Clear existing items
+        self.pending_logo_items.clear()
+        self.decorated_logo_items.clear()
+        self.logo_loader.clear_pending()
+
+        # Disable sorting while adding items, otherwise every setItem re-sorts the table
+        self.channel_list.setSortingEnabled(False)
+        self.channel_list.setRowCount(0)
+        self.channel_list.setRowCount(len(channel_data))
+        
+        # Now add sorted channels to the table
+        for row, channel in enumerate(channel_data):
+            # Create and add number item
+            number_item = QTableWidgetItem()
+            number_item.setData(Qt.DisplayRole, channel['number'])
+            self.channel_list.setItem(row, 0, number_item)
+            
+            # Create and add name item
+            name_item = QTableWidgetItem(channel['name'])
+            name_item.setData(Qt.UserRole, channel['data'])
+            self.channel_list.setItem(row, 1, name_item)
+        
+        # Re-enable sorting but don't trigger an automatic sort
+        self.channel_list.setSortingEnabled(True)
         
+        # Rebuild the search index; ids follow channel_data order
+        self.channel_items = [self.channel_list.item(row, 1) for row in range(self.channel_list.rowCount())]
+        self.channel_index = ChannelSearchIndex((c['name'], c['number']) for c in channel_data)
+        self.hidden_channel_ids = set()
+        if hasattr(self, 'search_box') and self.search_box.text():
+            self.filter_channels(self.search_box.text())
+        self.logo_timer.start()
+        
+        print(f"Debug: Channel table filled: {len(channels)} channels, {self.channel_list.rowCount()} rows")
 
     def start_recording(self):
         print("Debug: Starting recording")
@@ -1573,81 +2359,245 @@ class TVHeadendClient(QMainWindow):
             server = self.servers[self.server_combo.currentIndex()]
             print(f"Debug: Using server: {server['url']}")
             
-            # Create auth if needed
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                print(f"Debug: Using authentication with username: {server.get('username', '')}")
-            
-            # First, get channel UUID
-            api_url = f'{server["url"]}/api/channel/grid?limit=10000'
-            print(f"Debug: Getting channel UUID from: {api_url}")
-            
-            response = requests.get(api_url, auth=auth)
-            print(f"Debug: Channel list response status: {response.status_code}")
-            
-            channels = response.json()['entries']
-            channel_uuid = None
-            for channel in channels:
-                if channel['name'] == channel_name:
-                    channel_uuid = channel['uuid']
-                    print(f"Debug: Found channel UUID: {channel_uuid}")
-                    break
-                
-            if not channel_uuid:
-                print(f"Debug: Channel UUID not found for: {channel_name}")
-                self.statusbar.showMessage("Channel not found")
-                return
-            
-            # Prepare recording request
-            now = int(datetime.now().timestamp())
-            stop_time = now + duration
-            
-            # Format exactly as in the working curl command
-            conf_data = {
-                "start": now,
-                "stop": stop_time,
-                "channel": channel_uuid,
-                "title": {"eng": "Instant Recording"},
-                "subtitle": {"eng": "Recorded via TVHplayer"}
-            }
-            
-            # Convert to string format as expected by the API
-            data = {'conf': json.dumps(conf_data)}
-            print(f"Debug: Recording data: {data}")
-            
-            # Make recording request
-            record_url = f'{server["url"]}/api/dvr/entry/create'
-            print(f"Debug: Sending recording request to: {record_url}")
-            
-            response = requests.post(record_url, data=data, auth=auth)
-            print(f"Debug: Recording response status: {response.status_code}")
-            print(f"Debug: Recording response: {response.text}")
-            
-            if response.status_code == 200:
-                duration_minutes = duration // 60
-                self.statusbar.showMessage(
-                    f"Recording started for: {channel_name} ({duration_minutes} minutes)"
-                )
-                print("Debug: Recording started successfully")
-                self.start_recording_indicator()  # Start the recording indicator
-            else:
-                self.statusbar.showMessage("Failed to start recording")
-                print(f"Debug: Recording failed with status {response.status_code}")
+            self.statusbar.showMessage(f"Starting recording of {channel_name}...")
+            self.tasks.spawn(self.create_instant_recording(server, channel_name, duration),
+                             lambda uuid: self.on_recording_started(channel_name, duration),
+                             self.on_recording_failed)
                 
         except Exception as e:
-            print(f"Debug: Recording error: {str(e)}")
-            print(f"Debug: Error type: {type(e)}")
-            import traceback
-            print(f"Debug: Traceback: {traceback.format_exc()}")
-            self.statusbar.showMessage(f"Recording error: {str(e)}")
+            self.on_recording_failed(e)
+
+    async def create_instant_recording(self, server, channel_name, duration):
+        """Create a DVR entry recording a channel from now on; returns its uuid"""
+        api = get_async_api(server)
+        print("Debug: Getting channel UUID from channel grid")
+        channel_uuid = await api.channel_uuid(channel_name)
+        if not channel_uuid:
+            raise LookupError(f"Channel not found: {channel_name}")
+        print(f"Debug: Found channel UUID: {channel_uuid}")
+        now = int(datetime.now().timestamp())
+        print("Debug: Sending recording request to: /api/dvr/entry/create")
+        uuid = await api.create_recording(channel_uuid, now, now + duration, "Instant Recording",
+                                          subtitle="Recorded via TVHplayer")
+        print(f"Debug: Created DVR entry: {uuid}")
+        return uuid
+
+    def on_recording_started(self, channel_name, duration):
+        duration_minutes = duration // 60
+        self.statusbar.showMessage(
+            f"Recording started for: {channel_name} ({duration_minutes} minutes)"
+        )
+        print("Debug: Recording started successfully")
+        self.start_recording_indicator()  # Start the recording indicator
+
+    def on_recording_failed(self, error):
+        print(f"Debug: Recording error: {str(error)}")
+        print(f"Debug: Error type: {type(error)}")
+        self.statusbar.showMessage(f"Recording error: {str(error)}")
             
     def stop_playback(self):
         print("Debug: Stopping playback")
         """Stop current playback"""
+        if not self.vlc_ready():
+            return
         self.media_player.stop()
+        self.auto_profile.stop()
+        self.close_recording()
+        self.stop_playback_stats()
         self.statusbar.showMessage("Playback stopped")
 
+    def start_playback_stats(self, label, tuned_stream=None):
+        """Begin sampling statistics for a newly started stream.
+
+        `tuned_stream` is the (server url, channel uuid) whose rebuffers feed
+        the adaptive network caching, if it was opened with a tuned value.
+        """
+        self.now_playing = None  # set again by play_channel_by_data for live channels
+        self.feed_caching_tuner()
+        self.playback_stats.reset(label)
+        self.tuned_stream = tuned_stream
+        self.tuner_fed_at = time.monotonic()
+        self.tuner_rebuffers = 0
+        self.stats_timer.start()
+
+    def stop_playback_stats(self):
+        self.now_playing = None
+        self.feed_caching_tuner()
+        self.tuned_stream = None
+        self.stats_timer.stop()
+        self.show_stats_osd(None)
+
+    def sample_playback_stats(self):
+        if not self.vlc_ready(wait=False) or not self.media_player.is_playing():
+            return
+        if self.tuned_stream and time.monotonic() - self.tuner_fed_at >= 60:
+            self.feed_caching_tuner()
+        rates = self.playback_stats.sample(self.media_player.get_media())
+        if rates is None:
+            return
+        if self.auto_profile.active and self.now_playing is not None:
+            profile = self.auto_profile.observe(rates.input_kbps, rates.buffering_events)
+            if profile is not None:
+                self.statusbar.showMessage(f"Switching to stream profile {profile or 'server default'}")
+                self.play_channel_by_data(self.now_playing[1])
+                return
+        if self.stats_osd_enabled:
+            self.show_stats_osd(rates.osd_text())
+        if self.stats_dialog is not None and self.stats_dialog.isVisible():
+            self.stats_dialog.refresh()
+
+    def network_caching(self, server, channel_uuid):
+        """Return (caching ms, tuned) for opening a channel"""
+        mode = self.config.get('network_caching', 'adaptive')
+        if mode != 'adaptive':
+            return int(mode), False
+        server_url = resilience.normalize_url(server['url'])
+        if self.caching_tuner.needs_probe(server_url):
+            # Only affects the next playback; this one starts with what is known
+            self.tasks.spawn(probe_rtts(get_async_api(server)),
+                             lambda rtts: self.on_latency_probed(server_url, rtts))
+        return self.caching_tuner.caching_for(server_url, channel_uuid), True
+
+    def on_latency_probed(self, server_url, rtts):
+        self.caching_tuner.record_probe(server_url, rtts)
+        self.tasks.spawn(run_blocking(self.caching_tuner.save))
+
+    def feed_caching_tuner(self):
+        """Report the rebuffers since the last call to the tuner"""
+        if not self.tuned_stream:
+            return
+        rebuffers, _ = self.playback_stats.buffering_totals()
+        now = time.monotonic()
+        self.caching_tuner.observe(*self.tuned_stream, now - self.tuner_fed_at,
+                                   rebuffers - self.tuner_rebuffers)
+        self.tuner_fed_at = now
+        self.tuner_rebuffers = rebuffers
+        self.tasks.spawn(run_blocking(self.caching_tuner.save))
+
+    def set_audio_only(self, enabled):
+        self.audio_only = enabled
+        self.apply_audio_only()
+        self.statusbar.showMessage("Audio only" if enabled else "Video restored")
+
+    def set_audio_only_minimized(self, enabled):
+        self.config['audio_only_minimized'] = enabled
+        self.save_config()
+
+    def video_wanted(self):
+        if self.audio_only:
+            return False
+        return not (self.isMinimized() and self.config.get('audio_only_minimized', False))
+
+    def apply_audio_only(self):
+        """Disable or restore the video track of the current stream.
+
+        Without a video track libVLC stops decoding and rendering video while
+        the audio continues; selecting the track again resumes video at the
+        next keyframe without reopening the stream.
+        """
+        if not self.vlc_ready(wait=False):
+            return
+        player = self.media_player
+        current = player.video_get_track()
+        if not self.video_wanted():
+            if current != -1:
+                print(f"Debug: Disabling video track {current}")
+                self.hidden_video_track = current
+                player.video_set_track(-1)
+        elif current == -1 and self.hidden_video_track is not None:
+            print(f"Debug: Restoring video track {self.hidden_video_track}")
+            player.video_set_track(self.hidden_video_track)
+            self.hidden_video_track = None
+
+    def changeEvent(self, event):
+        if event.type() == event.WindowStateChange:
+            self.apply_audio_only()
+        super().changeEvent(event)
+
+    def fill_profile_menu(self, menu, channel_uuid=None):
+        """List the stream profile choices for the server, or for one of its channels"""
+        menu.clear()
+        if not self.servers:
+            return
+        server = self.servers[self.server_combo.currentIndex()]
+        if channel_uuid is None:
+            current = server.get('stream_profile', '')
+            choices = [("Server Default", '')]
+        else:
+            current = server.get('channel_profiles', {}).get(channel_uuid)
+            choices = [("Same as Server", None), ("Server Default", '')]
+        choices.append(("Automatic", AUTO_PROFILE))
+        for profile in self.stream_profiles.get(resilience.normalize_url(server['url']), []):
+            choices.append((profile.name, profile.name))
+        group = QActionGroup(menu)
+        for label, value in choices:
+            action = menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(value == current)
+            group.addAction(action)
+            action.triggered.connect(
+                lambda checked, value=value: self.set_stream_profile(server, channel_uuid, value))
+
+    def set_stream_profile(self, server, channel_uuid, value):
+        """Store a profile setting; None removes a channel's own setting"""
+        if channel_uuid is None:
+            server['stream_profile'] = value
+        elif value is None:
+            server.get('channel_profiles', {}).pop(channel_uuid, None)
+        else:
+            server.setdefault('channel_profiles', {})[channel_uuid] = value
+        self.save_config()
+        if self.now_playing is not None and self.now_playing[0] is server and (
+                channel_uuid is None or self.now_playing[1]['uuid'] == channel_uuid):
+            self.play_channel_by_data(self.now_playing[1])
+
+    def set_low_latency(self, enabled):
+        self.config['low_latency'] = enabled
+        self.save_config()
+        self.statusbar.showMessage("Low latency mode applies from the next channel change")
+
+    def show_latency_meter(self):
+        """Measure the latency of the channel that is playing"""
+        if self.now_playing is None:
+            self.statusbar.showMessage("Start a channel to measure its latency")
+            return
+        server, channel_data, caching = self.now_playing
+        dialog = LatencyDialog(server, channel_data, caching, self)
+        dialog.show()
+
+    def set_network_caching(self, value):
+        self.config['network_caching'] = value
+        self.save_config()
+        self.statusbar.showMessage("Network caching applies from the next channel change")
+
+    def set_stats_osd(self, enabled):
+        self.stats_osd_enabled = enabled
+        if not enabled:
+            self.show_stats_osd(None)
+
+    def show_stats_osd(self, text):
+        """Draw `text` over the video with VLC's marquee filter; None hides it"""
+        if not self.vlc_ready(wait=False):
+            return
+        import vlc
+        player = self.media_player
+        if text is None:
+            player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 0)
+            return
+        player.video_set_marquee_int(vlc.VideoMarqueeOption.Enable, 1)
+        player.video_set_marquee_int(vlc.VideoMarqueeOption.Position, 5)  # top left
+        player.video_set_marquee_int(vlc.VideoMarqueeOption.Size, 16)
+        player.video_set_marquee_int(vlc.VideoMarqueeOption.Timeout, 0)
+        player.video_set_marquee_string(vlc.VideoMarqueeOption.Text, text)
+
+    def show_playback_stats(self):
+        """Show the playback statistics window"""
+        if self.stats_dialog is None:
+            self.stats_dialog = PlaybackStatsDialog(self.playback_stats, self)
+        self.stats_dialog.refresh()
+        self.stats_dialog.show()
+        self.stats_dialog.raise_()
+
                 # Create a new fullscreen window
     def toggle_fullscreen(self):
         """Toggle fullscreen mode for VLC player"""
@@ -1772,10 +2722,8 @@ class TVHeadendClient(QMainWindow):
             # Update last server
             self.config['last_server'] = self.server_combo.currentIndex()
             
-            # Save to file
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-            print("Debug: Configuration saved successfully")
+            # Queue for the background writer
+            self.config_store.save()
         except Exception as e:
             print(f"Debug: Error saving config: {str(e)}")
 
@@ -1834,19 +2782,16 @@ class TVHeadendClient(QMainWindow):
             # Update config with new server selection
             self.config['last_server'] = index
             
-            # Save updated config to file
-            try:
-                with open(self.config_file, 'w') as f:
-                    json.dump(self.config, f)
-                print(f"Debug: Saved server index {index} to config")
-            except Exception as e:
-                print(f"Debug: Error saving config: {e}")
+            # Queue the updated config for writing; never blocks on disk
+            self.config_store.save()
                 
             # Load channels from newly selected server
             self.fetch_channels()
 
     def on_volume_changed(self, value):
         print(f"Debug: Volume changed to {value}")
+        if not self.vlc_ready():
+            return
         self.media_player.audio_set_volume(value)
 
     def eventFilter(self, obj, event):
@@ -1870,6 +2815,8 @@ class TVHeadendClient(QMainWindow):
     def toggle_mute(self):
         """Toggle audio mute state"""
         print("Debug: Toggling mute")
+        if not self.vlc_ready():
+            return
         is_muted = self.media_player.audio_get_mute()
         self.media_player.audio_set_mute(not is_muted)
         
@@ -1963,60 +2910,35 @@ class TVHeadendClient(QMainWindow):
             server = self.servers[self.server_combo.currentIndex()]
             print(f"Debug: Using server: {server['url']}")
             
-            # Create auth if needed
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                print(f"Debug: Using authentication with username: {server.get('username', '')}")
-            
-            # Get list of active recordings
-            api_url = f'{server["url"]}/api/dvr/entry/grid'
-            print(f"Debug: Getting recordings from: {api_url}")
-            
-            response = requests.get(api_url, auth=auth)
-            print(f"Debug: Recording list response status: {response.status_code}")
-            
-            recordings = response.json()['entries']
-            print(f"Debug: Total recordings found: {len(recordings)}")
-            
-            # Print all recordings and their statuses for debugging
-            for recording in recordings:
-                print(f"Debug: Recording '{recording.get('disp_title', 'Unknown')}' - Status: {recording.get('status', 'unknown')}")
-            
-            # Look for recordings with status 'Running' (this seems to be the actual status used by TVHeadend)
-            active_recordings = [r for r in recordings if r['status'] in ['Running', 'recording']]
-            if not active_recordings:
-                print("Debug: No active recordings found")
-                self.statusbar.showMessage("No active recordings to stop")
-                self.stop_recording_indicator()  # Make sure to hide indicator
-                return
-                
-            print(f"Debug: Found {len(active_recordings)} active recordings")
-            
-            # Stop each active recording
-            for recording in active_recordings:
-                stop_url = f'{server["url"]}/api/dvr/entry/stop'
-                data = {'uuid': recording['uuid']}
-                
-                print(f"Debug: Stopping recording: {recording.get('disp_title', 'Unknown')} ({recording['uuid']})")
-                stop_response = requests.post(stop_url, data=data, auth=auth)
-                
-                if stop_response.status_code == 200:
-                    print(f"Debug: Successfully stopped recording: {recording['uuid']}")
-                else:
-                    print(f"Debug: Failed to stop recording: {recording['uuid']}")
-                    print(f"Debug: Response: {stop_response.text}")
-            
-            self.stop_recording_indicator()  # Hide the indicator after stopping recordings
-            self.statusbar.showMessage(f"Stopped {len(active_recordings)} recording(s)")
+            self.tasks.spawn(self.stop_running_recordings(server),
+                             self.on_recordings_stopped, self.on_stop_recordings_failed)
             
         except Exception as e:
-            print(f"Debug: Error stopping recordings: {str(e)}")
-            print(f"Debug: Error type: {type(e)}")
-            import traceback
-            print(f"Debug: Traceback: {traceback.format_exc()}")
-            self.statusbar.showMessage(f"Error stopping recordings: {str(e)}")
-            self.stop_recording_indicator()  # Make sure to hide indicator even on error
+            self.on_stop_recordings_failed(e)
+
+    async def stop_running_recordings(self, server):
+        """Stop a server's running recordings; returns how many there were"""
+        print("Debug: Getting running recordings from: /api/dvr/entry/grid_upcoming")
+        api = get_async_api(server)
+        active_recordings = await api.running_dvr_entries()
+        if active_recordings:
+            print(f"Debug: Stopping {len(active_recordings)} active recordings")
+            await api.stop_dvr_entries([r.uuid for r in active_recordings])
+        return len(active_recordings)
+
+    def on_recordings_stopped(self, count):
+        if count:
+            self.statusbar.showMessage(f"Stopped {count} recording(s)")
+        else:
+            print("Debug: No active recordings found")
+            self.statusbar.showMessage("No active recordings to stop")
+        self.stop_recording_indicator()  # Hide the indicator after stopping recordings
+
+    def on_stop_recordings_failed(self, error):
+        print(f"Debug: Error stopping recordings: {str(error)}")
+        print(f"Debug: Error type: {type(error)}")
+        self.statusbar.showMessage(f"Error stopping recordings: {str(error)}")
+        self.stop_recording_indicator()  # Make sure to hide indicator even on error
 
     def start_recording_indicator(self):
         """Start the recording indicator with smooth pulsing animation"""
@@ -2060,207 +2982,506 @@ class TVHeadendClient(QMainWindow):
             server = self.servers[self.server_combo.currentIndex()]
             print(f"Debug: Using server: {server}")
 
-            # Test connection first
-            test_url = f"{server['url']}/api/status/connections"
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                print(f"Debug: Using authentication with username: {server.get('username', '')}")
-
-            print(f"Debug: Testing connection to: {test_url}")
-            try:
-                test_response = requests.get(test_url, auth=auth, timeout=5)
-                print(f"Debug: Connection test response: {test_response.status_code}")
-                if test_response.status_code == 200:
-                    print("Debug: Server connection successful")
-                else:
-                    print(f"Debug: Server connection failed with status {test_response.status_code}")
-                    self.statusbar.showMessage("Failed to connect to server")
-                    return
-            except Exception as conn_err:
-                print(f"Debug: Connection test failed: {str(conn_err)}")
-                self.statusbar.showMessage("Failed to connect to server")
-                return
-
-            # Now try to get DVR data
-            dvr_url = f"{server['url']}/api/dvr/entry/grid"
-            print(f"Debug: Fetching DVR data from: {dvr_url}")
-            try:
-                dvr_response = requests.get(dvr_url, auth=auth, timeout=5)
-                print(f"Debug: DVR data response: {dvr_response.status_code}")
-                if dvr_response.status_code == 200:
-                    dvr_data = dvr_response.json()
-                    print(f"Debug: DVR data received: {len(dvr_data.get('entries', []))} entries")
-                    # Print first entry as sample if available
-                    if dvr_data.get('entries'):
-                        print("Debug: Sample DVR entry:")
-                        print(dvr_data['entries'][0])
-                else:
-                    print(f"Debug: Failed to get DVR data: {dvr_response.text}")
-                    self.statusbar.showMessage("Failed to get DVR data")
-                    return
-            except Exception as dvr_err:
-                print(f"Debug: DVR data fetch failed: {str(dvr_err)}")
-                self.statusbar.showMessage("Failed to get DVR data")
-                return
+            # Make sure the server answers before opening the dialog
+            self.tasks.spawn(get_async_api(server).dvr_page('upcoming', limit=1),
+                             lambda page: self.open_dvr_status(server, page[0]),
+                             self.on_dvr_status_failed)
+            
+        except Exception as e:
+            print(f"Debug: Error showing DVR status: {str(e)}")
+            print(f"Debug: Traceback: {traceback.format_exc()}")
+            self.statusbar.showMessage("Error showing DVR status")
 
-            # If we got here, show the dialog
+    def open_dvr_status(self, server, total):
+        print(f"Debug: DVR data received: {total} upcoming entries")
+        try:
             dialog = DVRStatusDialog(server, self)
             dialog.show()
-            
         except Exception as e:
             print(f"Debug: Error showing DVR status: {str(e)}")
             print(f"Debug: Traceback: {traceback.format_exc()}")
             self.statusbar.showMessage("Error showing DVR status")
 
+    def on_dvr_status_failed(self, error):
+        print(f"Debug: DVR data fetch failed: {str(error)}")
+        self.statusbar.showMessage("Failed to get DVR data")
+
     def play_url(self, url):
         """Play media from URL"""
+        if not self.vlc_ready():
+            return
         try:
             media = self.instance.media_new(url)
+            self.auto_profile.stop()
+            self.close_recording()
+            self.hidden_video_track = None
             self.media_player.set_media(media)
             self.media_player.play()
+            self.start_playback_stats(url)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to play media: {str(e)}")
 
-    def start_local_recording(self, channel_name):
-        """Record channel stream to local disk using ffmpeg"""
-        try:
-            if not channel_name:
-                print("Debug: No channel selected for recording")
-                self.statusbar.showMessage("Please select a channel to record")
-                return
+    def play_recording(self, server, entry):
+        """Play a finished DVR recording, reading it ahead in byte ranges"""
+        api = get_api(server)
+        reader = RangeReader(api.session, api.dvr_file_url(entry.uuid), duration=entry.duration or None)
+        self.statusbar.showMessage(f"Opening recording: {entry.title}")
+        # The first block also tells the file size; fetch it off the GUI thread
+        self.tasks.spawn(run_blocking(reader.open),
+                         lambda size: self.start_recording_playback(entry, reader),
+                         lambda error: self.on_recording_open_failed(server, entry, error))
 
-            print(f"Debug: Starting local recording for channel: {channel_name}")
-            
-            # Show file save dialog
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            default_filename = f"recording_{channel_name}_{timestamp}.ts"  # Using .ts format initially
-            
-            file_path, _ = QFileDialog.getSaveFileName(
-                self,
-                "Save Recording As",
-                default_filename,
-                "TS Files (*.ts);;MP4 Files (*.mp4);;All Files (*.*)"
-            )
-            
-            if not file_path:  # User cancelled
-                print("Debug: Recording cancelled - no file selected")
-                return
-                
-            # Get current server and auth info
-            server = self.servers[self.server_combo.currentIndex()]
-            
-            # Get channel UUID
-            api_url = f'{server["url"]}/api/channel/grid?limit=10000'
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-            
-            print(f"Debug: Fetching channel list from: {api_url}")
-            response = requests.get(api_url, auth=auth)
-            channels = response.json()['entries']
-            
-            channel_uuid = None
-            for channel in channels:
-                if channel['name'] == channel_name:
-                    channel_uuid = channel['uuid']
-                    break
-                    
-            if not channel_uuid:
-                print(f"Debug: Channel UUID not found for: {channel_name}")
-                self.statusbar.showMessage("Channel not found")
-                return
-                
-            # Create stream URL
-            server_url = server['url'].rstrip('/')
-            if not server_url.startswith(('http://', 'https://')):
-                server_url = f'http://{server_url}'
-            
-            stream_url = f'{server_url}/stream/channel/{channel_uuid}'
-            
-            # Build ffmpeg command
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-hide_banner',
-                '-loglevel', 'warning',
-                '-nostats',
-                '-y'  # Overwrite output
-            ]
-            
-            # Add auth headers if needed
-            if auth:
-                import base64
-                auth_string = f"{auth[0]}:{auth[1]}"
-                auth_bytes = auth_string.encode('ascii')
-                base64_bytes = base64.b64encode(auth_bytes)
-                base64_auth = base64_bytes.decode('ascii')
-                ffmpeg_cmd.extend([
-                    '-headers', f'Authorization: Basic {base64_auth}\r\n'
-                ])
-            
-            # Add input options
-            ffmpeg_cmd.extend([
-                '-i', stream_url,
-                '-analyzeduration', '10M',  # Increase analyze duration
-                '-probesize', '10M'         # Increase probe size
-            ])
-
-            # Add output options based on file extension
-            if file_path.lower().endswith('.mp4'):
-                ffmpeg_cmd.extend([
-                    '-c:v', 'copy',
-                    '-c:a', 'aac',          # Transcode audio to AAC
-                    '-b:a', '192k',         # Audio bitrate
-                    '-movflags', '+faststart',
-                    '-f', 'mp4'
-                ])
-            else:  # Default to .ts
-                ffmpeg_cmd.extend([
-                    '-c', 'copy',           # Copy both streams without transcoding
-                    '-f', 'mpegts'          # Force MPEG-TS format
-                ])
-            
-            # Add output file
-            ffmpeg_cmd.append(file_path)
-            
-            print("Debug: Starting ffmpeg with command:")
-            # Print command with hidden auth if present
-            safe_cmd = ' '.join(ffmpeg_cmd)
-            if auth:
-                safe_cmd = safe_cmd.replace(base64_auth, "***")
-            print(f"Debug: {safe_cmd}")
-            
-            # Start ffmpeg process
-            self.ffmpeg_process = subprocess.Popen(
-                ffmpeg_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=10**8
-            )
-            
-            # Start monitoring process
-            self.recording_monitor = QTimer()
-            self.recording_monitor.timeout.connect(
-                lambda: self.check_recording_status(file_path))  # Close parenthesis here
-            self.recording_monitor.start(2000)  # Check every 2 seconds
-            
-            self.statusbar.showMessage(f"Local recording started: {file_path}")
-            self.start_recording_indicator()
-            
-            # After starting ffmpeg process successfully:
-            self.recording_status_dialog = RecordingStatusDialog(channel_name, file_path, self)
-            self.recording_status_dialog.finished.connect(self.stop_local_recording)
-            self.recording_status_dialog.show()
-            
-        except Exception as e:
-            print(f"Debug: Local recording error: {str(e)}")
-            print(f"Debug: Error type: {type(e)}")
-            import traceback
-            print(f"Debug: Traceback: {traceback.format_exc()}")
-            self.statusbar.showMessage(f"Local recording error: {str(e)}")
+    def on_recording_open_failed(self, server, entry, error):
+        if isinstance(error, RangeNotSupported):
+            # libVLC can still stream it, just without our read-ahead
+            print(f"Debug: {error}; playing the file URL directly")
+            self.play_url(get_api(server).dvr_file_url(entry.uuid, embed_auth=True))
+            return
+        print(f"Debug: Error opening recording: {str(error)}")
+        self.statusbar.showMessage(f"Could not open recording: {str(error)}")
 
-    def check_recording_status(self, file_path):
-        """Check if the recording is actually working"""
+    def start_recording_playback(self, entry, reader):
+        if not self.vlc_ready():
+            reader.close()
+            return
+        self.auto_profile.stop()
+        self.close_recording()
+        self.hidden_video_track = None
+        self.media_player.set_media(media_from_reader(self.instance, reader))
+        self.media_player.play()
+        self.start_playback_stats(entry.title)
+        self.recording_reader = reader
+        self.recording_entry = entry
+        duration = entry.duration or int(reader.index.seconds_for(reader.size) or 0)
+        self.seek_slider.setRange(0, max(duration, 1))
+        self.seek_slider.setValue(0)
+        self.seek_bar.show()
+        self.seek_timer.start()
+        self.statusbar.showMessage(f"Playing recording: {entry.title}")
+
+    def close_recording(self):
+        """Forget the recording being played, if any, and hide the seek bar"""
+        if self.recording_reader is None:
+            return
+        self.recording_reader.close()
+        self.recording_reader = None
+        self.recording_entry = None
+        self.seek_timer.stop()
+        self.seek_bar.hide()
+
+    def update_seek_bar(self):
+        reader = self.recording_reader
+        if reader is None or not self.vlc_ready(wait=False):
+            return
+        ms = self.media_player.get_time()
+        seconds = ms / 1000 if ms >= 0 else reader.index.seconds_for(reader.position) or 0
+        if not self.seek_slider.isSliderDown():
+            self.seek_slider.setValue(int(seconds))
+        else:
+            seconds = self.seek_slider.value()
+        self.seek_label.setText(
+            f"{timedelta(seconds=int(seconds))} / {timedelta(seconds=self.seek_slider.maximum())}"
+            f"  (+{reader.buffered_seconds():.0f} s)")
+
+    def seek_recording(self):
+        """Jump to the slider's time through the byte offset the time index gives"""
+        reader = self.recording_reader
+        if reader is None or not self.vlc_ready():
+            return
+        seconds = self.seek_slider.value()
+        offset = reader.index.offset_for(seconds)
+        if offset is None:
+            self.media_player.set_time(int(seconds * 1000))
+        else:
+            self.media_player.set_position(offset / reader.size)
+        print(f"Debug: Seeking recording to {timedelta(seconds=seconds)} (byte {offset})")
+
+    def queue_capture_conversion(self):
+        """Hand the finished capture to the post-processing queue if it needs converting"""
+        paths, self.local_recording_paths = self.local_recording_paths, None
+        self.update_postprocess_pause()
+        if paths is None:
+            return
+        capture_path, file_path = paths
+        if capture_path == file_path:
+            return
+        if not os.path.exists(capture_path) or os.path.getsize(capture_path) == 0:
+            return
+        self.ensure_postprocess().add(capture_path, file_path)
+        self.statusbar.showMessage(f"Local recording stopped; converting to {os.path.basename(file_path)}")
+
+    def ensure_downloads(self):
+        """Create the download manager, restoring unfinished downloads paused"""
+        if self.downloads is not None:
+            return self.downloads
+        self.downloads = download.DownloadManager(
+            rate=self.config.get('download_limit_kbps', 0) * 125)
+        servers = {resilience.normalize_url(server['url']): server for server in self.servers}
+        for item in self.config.get('downloads', []):
+            server = servers.get(item['server'])
+            if server is None:
+                continue
+            self.download_servers[item['path']] = item['server']
+            self.downloads.add(download.Download(
+                get_api(server).session, item['url'], item['path'], item.get('size'), item.get('title', ''),
+                self.config.get('download_connections', download.DEFAULT_CONNECTIONS)), start=False)
+        # Set after restoring, which would save the list half restored
+        self.downloads.on_change = lambda item: bridge.call_in_gui(self.save_downloads)
+        return self.downloads
+
+    def unfinished_downloads(self):
+        return [{
+            'server': self.download_servers.get(item.path, ''),
+            'url': item.url,
+            'path': item.path,
+            'size': item.size,
+            'title': item.title,
+        } for item in self.downloads.unfinished() if item.path in self.download_servers]
+
+    def save_downloads(self):
+        """Keep the unfinished downloads in the config, should the player not close cleanly"""
+        self.config['downloads'] = self.unfinished_downloads()
+        self.save_config()
+
+    def download_recordings(self, server, entries):
+        """Queue finished recordings for download into the recording directory"""
+        manager = self.ensure_downloads()
+        directory = self.config.get('recording_path') or str(Path.home())
+        api = get_api(server)
+        queued = {item.path for item in manager.downloads}
+        added = 0
+        for entry in entries:
+            path = os.path.join(directory, download.local_filename(entry))
+            if path in queued:
+                continue
+            if entry.filesize and os.path.exists(path) and os.path.getsize(path) == entry.filesize:
+                print(f"Debug: {path} is already downloaded")
+                continue
+            self.download_servers[path] = resilience.normalize_url(server['url'])
+            manager.add(download.Download(
+                api.session, api.dvr_file_url(entry.uuid), path, entry.filesize or None, entry.title,
+                self.config.get('download_connections', download.DEFAULT_CONNECTIONS)))
+            added += 1
+        self.statusbar.showMessage(f"Downloading {added} recording(s) to {directory}")
+        self.show_downloads()
+
+    def show_downloads(self):
+        if self.downloads_dialog is None:
+            self.downloads_dialog = DownloadsDialog(self.ensure_downloads(), self)
+        self.downloads_dialog.show()
+        self.downloads_dialog.raise_()
+
+    def ensure_thumbnails(self):
+        """Create the thumbnail queue and the timer that holds it back during heavy playback"""
+        if self.thumbnails is None:
+            self.thumbnails = thumbnails.ThumbnailQueue(
+                thumbnails.ThumbnailCache(os.path.join(self.config_dir, 'thumbnails')))
+            self.thumbnail_cpu = mosaic.CpuMeter()
+            self.thumbnail_throttle = QTimer(self)
+            self.thumbnail_throttle.setInterval(2000)
+            self.thumbnail_throttle.timeout.connect(self.throttle_thumbnails)
+            self.thumbnail_throttle.start()
+        return self.thumbnails
+
+    def throttle_thumbnails(self):
+        # ffmpeg runs in processes of its own, so this is the player's load
+        cpu = self.thumbnail_cpu.percent()
+        playing = self.vlc_ready(wait=False) and self.media_player.is_playing()
+        self.thumbnails.set_paused(playing and cpu > thumbnails.PAUSE_CPU_PERCENT)
+
+    def postprocess_journal(self):
+        return os.path.join(self.config_dir, 'postprocess.json')
+
+    def ensure_postprocess(self):
+        if self.postprocess is None:
+            self.postprocess = postprocess.PostProcessQueue(
+                self.postprocess_journal(),
+                on_change=lambda job: bridge.call_in_gui(self.on_postprocess_changed, job),
+                paused=self.capturing())
+        return self.postprocess
+
+    def capturing(self):
+        """Whether a local capture is running, manual or scheduled"""
+        return self.local_recording_paths is not None or self.local_scheduler.recording()
+
+    def update_postprocess_pause(self):
+        # Conversions wait until no capture is running
+        if self.postprocess is not None:
+            self.postprocess.set_paused(self.capturing())
+
+    def arm_schedule_timer(self):
+        wakeup = self.local_scheduler.next_wakeup()
+        if wakeup is None:
+            self.schedule_timer.stop()
+            return
+        delay = min(max(wakeup - time.time(), 0), scheduler.MAX_SLEEP)
+        self.schedule_timer.start(int(delay * 1000))
+
+    def run_local_schedule(self):
+        self.local_scheduler.run_due()
+        self.update_postprocess_pause()
+        self.arm_schedule_timer()
+        if self.schedule_dialog is not None:
+            self.schedule_dialog.refresh()
+
+    def start_scheduled_capture(self, job, path, seconds):
+        servers = {resilience.normalize_url(server['url']): server for server in self.servers}
+        server = servers.get(job.server)
+        if server is None:
+            raise scheduler.SchedulerError(f"Server {job.server} is no longer configured")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        auth = resilience.server_auth(server)
+        cmd = recorder.ffmpeg_command(get_api(server).stream_url(job.channel_uuid), path, auth, seconds)
+        print(f"Debug: {recorder.printable_command(cmd, auth)}")
+        # ffmpeg's warnings go to our stderr; nothing has to drain them
+        return recorder.start_ffmpeg(cmd, capture_log=False)
+
+    def on_scheduled_recording_finished(self, job):
+        if job.state != scheduler.DONE:
+            self.statusbar.showMessage(f"Local recording of {job.title} failed: {job.error}")
+            return
+        self.statusbar.showMessage(f"Local recording of {job.title} finished")
+        self.add_library_directory(os.path.dirname(os.path.abspath(job.path)))
+        extension = os.path.splitext(job.path)[1]
+        for capture in job.captures:
+            target = os.path.splitext(capture)[0] + extension
+            if target != capture:
+                self.ensure_postprocess().add(capture, target)
+
+    def schedule_local_recording(self, server, event, parent=None):
+        """Record an EPGEvent to local disk while it is on air, with padding on both ends"""
+        parent = parent or self
+        directory = self.config.get('recording_path') or str(Path.home())
+        channel = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '_', event.channel_name or 'channel')
+        stamp = datetime.fromtimestamp(event.start).strftime("%Y%m%d_%H%M%S")
+        extension = self.config.get('local_recording_format', 'ts')
+        job = scheduler.LocalJob(
+            resilience.normalize_url(server['url']), event.channel_uuid, event.channel_name,
+            event.title or 'Scheduled Recording', event.start, event.stop,
+            os.path.join(directory, f"recording_{channel}_{stamp}.{extension}"),
+            self.config.get('local_pre_padding', scheduler.DEFAULT_PRE_PADDING),
+            self.config.get('local_post_padding', scheduler.DEFAULT_POST_PADDING))
+        try:
+            added = self.local_scheduler.add(job)
+        except scheduler.SchedulerError as e:
+            QMessageBox.warning(parent, "Record Locally", str(e))
+            return
+        if not added:
+            QMessageBox.information(parent, "Record Locally", f"{job.title} is already scheduled")
+            return
+        self.arm_schedule_timer()
+        print(f"Debug: Scheduled local recording of {job.title} into {job.path}")
+        begin = datetime.fromtimestamp(job.begin).strftime('%a %d.%m. %H:%M')
+        QMessageBox.information(parent, "Record Locally",
+                                f"{job.title} will be recorded from {begin} to {job.path}\n"
+                                "TVHplayer has to be running at that time.")
+        if self.schedule_dialog is not None:
+            self.schedule_dialog.refresh()
+
+    def show_local_schedule(self):
+        if self.schedule_dialog is None:
+            self.schedule_dialog = LocalScheduleDialog(self.local_scheduler, self)
+        self.schedule_dialog.refresh()
+        self.schedule_dialog.show()
+        self.schedule_dialog.raise_()
+
+    def epg_index_path(self):
+        return os.path.join(self.config_dir, 'epg.sqlite')
+
+    def autorecord_rules(self, server):
+        """The autorecord rules of a server"""
+        key = resilience.normalize_url(server['url'])
+        rules = []
+        for data in self.config.get('autorecord_rules', []):
+            if data.get('server') != key:
+                continue
+            try:
+                rules.append(autorecord.Rule.from_dict(data))
+            except (autorecord.RuleError, TypeError) as e:
+                print(f"Debug: Ignoring autorecord rule {data.get('name')}: {e}")
+        return rules
+
+    def save_autorecord_rules(self, server, rules):
+        """Replace the autorecord rules of a server"""
+        key = resilience.normalize_url(server['url'])
+        others = [data for data in self.config.get('autorecord_rules', []) if data.get('server') != key]
+        self.config['autorecord_rules'] = others + [rule.to_dict() for rule in rules]
+        self.save_config()
+
+    def run_autorecord(self, server, events=None, on_done=None):
+        """Schedule what a server's rules match among `events`, the new ones of an
+        EPG sync, or among all stored events when None"""
+        rules = [rule for rule in self.autorecord_rules(server) if rule.enabled]
+        if not rules:
+            return
+
+        def finished(scheduled):
+            if scheduled:
+                self.statusbar.showMessage(f"Autorecord scheduled {len(scheduled)} recording(s) on {server['name']}")
+            if on_done:
+                on_done(scheduled)
+
+        def failed(error):
+            print(f"Debug: Autorecord failed: {str(error)}")
+            self.statusbar.showMessage(f"Autorecord failed: {error}")
+
+        self.tasks.spawn(self.apply_autorecord_rules(server, rules, events), finished, failed)
+
+    async def apply_autorecord_rules(self, server, rules, events):
+        if events is None:
+            events = await run_blocking(load_upcoming_events, server['url'], self.epg_index_path())
+
+        def booked(event):
+            conflicts.add_booking(server, conflicts.Booking(
+                event.channel_uuid, event.channel_name, event.title, event.start, event.stop))
+
+        return await run_blocking(autorecord.apply_rules, server, rules, events,
+                                  os.path.join(self.config_dir, 'autorecord_history.json'), booked)
+
+    def sync_autorecord(self):
+        """Sync the EPG of every server with rules and apply them to the new events"""
+        for server in self.servers:
+            if not any(rule.enabled for rule in self.autorecord_rules(server)):
+                continue
+            print(f"Debug: Syncing the EPG of {server['name']} for autorecord")
+            self.tasks.spawn(
+                sync_epg_async(server, self.epg_index_path()),
+                functools.partial(self.run_autorecord, server),
+                lambda error, server=server: print(f"Debug: EPG sync of {server['name']} failed: {str(error)}"))
+
+    def show_autorecord(self):
+        if not self.servers:
+            self.statusbar.showMessage("No servers configured")
+            return
+        dialog = AutorecordDialog(self.servers[self.server_combo.currentIndex()], self)
+        dialog.show()
+
+    def on_postprocess_changed(self, job):
+        if job.state == postprocess.DONE:
+            self.statusbar.showMessage(f"Saved {job.target}")
+        elif job.state == postprocess.FAILED:
+            self.statusbar.showMessage(f"Converting {job.title} failed: {job.error}")
+
+    def show_postprocess(self):
+        if self.postprocess_dialog is None:
+            self.postprocess_dialog = PostProcessDialog(self.ensure_postprocess(), self)
+        self.postprocess_dialog.show()
+        self.postprocess_dialog.raise_()
+
+    def library_directories(self):
+        return self.config.get('library_dirs') or [self.config.get('recording_path') or str(Path.home())]
+
+    def add_library_directory(self, directory):
+        """Index `directory` from now on, unless it is inside one that already is"""
+        directory = os.path.abspath(directory)
+        directories = self.library_directories()
+        for known in directories:
+            known = os.path.abspath(known)
+            if directory == known or directory.startswith(known.rstrip(os.sep) + os.sep):
+                return False
+        self.config['library_dirs'] = directories + [directory]
+        self.save_config()
+        return True
+
+    def remove_library_directory(self, directory):
+        self.config['library_dirs'] = [d for d in self.library_directories() if d != directory]
+        self.save_config()
+
+    def show_library(self):
+        dialog = LibraryDialog(os.path.join(self.config_dir, 'library.sqlite'), self)
+        dialog.show()
+
+    def start_local_recording(self, channel_name):
+        """Record channel stream to local disk using ffmpeg"""
+        try:
+            if not channel_name:
+                print("Debug: No channel selected for recording")
+                self.statusbar.showMessage("Please select a channel to record")
+                return
+
+            print(f"Debug: Starting local recording for channel: {channel_name}")
+            
+            # Show file save dialog
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            default_filename = f"recording_{channel_name}_{timestamp}.ts"  # Using .ts format initially
+            
+            file_path, _ = QFileDialog.getSaveFileName(
+                self,
+                "Save Recording As",
+                default_filename,
+                "TS Files (*.ts);;MP4 Files (*.mp4);;MKV Files (*.mkv);;All Files (*.*)"
+            )
+            
+            if not file_path:  # User cancelled
+                print("Debug: Recording cancelled - no file selected")
+                return
+                
+            # Get current server
+            server = self.servers[self.server_combo.currentIndex()]
+            
+            print("Debug: Fetching channel list from channel grid")
+            self.tasks.spawn(get_async_api(server).channel_uuid(channel_name),
+                             lambda channel_uuid: self.begin_local_recording(
+                                 server, channel_name, channel_uuid, file_path),
+                             self.on_local_recording_failed)
+            
+        except Exception as e:
+            self.on_local_recording_failed(e)
+
+    def begin_local_recording(self, server, channel_name, channel_uuid, file_path):
+        """Start ffmpeg capturing a channel into file_path"""
+        try:
+            if not channel_uuid:
+                print(f"Debug: Channel UUID not found for: {channel_name}")
+                self.statusbar.showMessage("Channel not found")
+                return
+                
+            # Create stream URL
+            auth = resilience.server_auth(server)
+            stream_url = get_api(server).stream_url(channel_uuid)
+            
+            # Capture losslessly into MPEG-TS; other containers are made afterwards
+            capture_path = recorder.capture_path(file_path)
+            ffmpeg_cmd = recorder.ffmpeg_command(stream_url, capture_path, auth)
+            
+            print("Debug: Starting ffmpeg with command:")
+            print(f"Debug: {recorder.printable_command(ffmpeg_cmd, auth)}")
+            
+            # Start ffmpeg process; its log is drained by a coroutine so a
+            # full pipe can never stall the recording
+            self.ffmpeg_process = recorder.start_ffmpeg(ffmpeg_cmd)
+            self.ffmpeg_errors = deque(maxlen=50)
+            self.local_recording_paths = (capture_path, file_path)
+            self.update_postprocess_pause()
+            # Wherever the file went, the library should find it
+            self.add_library_directory(os.path.dirname(file_path))
+            self.tasks.spawn(drain_pipe(self.ffmpeg_process.stderr, self.ffmpeg_errors))
+            
+            # Start monitoring process
+            self.recording_monitor = QTimer()
+            self.recording_monitor.timeout.connect(
+                lambda: self.check_recording_status(capture_path))
+            self.recording_monitor.start(2000)  # Check every 2 seconds
+            
+            self.statusbar.showMessage(f"Local recording started: {file_path}")
+            self.start_recording_indicator()
+            
+            # After starting ffmpeg process successfully:
+            self.recording_status_dialog = RecordingStatusDialog(channel_name, file_path, self)
+            self.recording_status_dialog.finished.connect(self.stop_local_recording)
+            self.recording_status_dialog.show()
+            
+        except Exception as e:
+            self.on_local_recording_failed(e)
+            print(f"Debug: Traceback: {traceback.format_exc()}")
+
+    def on_local_recording_failed(self, error):
+        print(f"Debug: Local recording error: {str(error)}")
+        print(f"Debug: Error type: {type(error)}")
+        self.statusbar.showMessage(f"Local recording error: {str(error)}")
+
+    def check_recording_status(self, file_path):
+        """Check if the recording is actually working"""
         try:
             import os
             # Add start time tracking if not exists
@@ -2296,10 +3517,9 @@ class TVHeadendClient(QMainWindow):
                 return_code = self.ffmpeg_process.poll()
                 if return_code is not None:
                     # Process has ended
-                    _, stderr = self.ffmpeg_process.communicate()
                     print(f"Debug: FFmpeg process ended with return code: {return_code}")
-                    if stderr:
-                        print(f"Debug: FFmpeg error output: {stderr.decode()}")
+                    if self.ffmpeg_errors:
+                        print("Debug: FFmpeg error output: " + "\n".join(self.ffmpeg_errors))
                     
                     if file_size == 0 or return_code != 0:
                         print("Debug: Recording failed - stopping processes")
@@ -2363,52 +3583,33 @@ class TVHeadendClient(QMainWindow):
             
             self.statusbar.showMessage("Local recording stopped")
             self.stop_recording_indicator()
+            self.queue_capture_conversion()
             
         except Exception as e:
             print(f"Debug: Error stopping local recording: {str(e)}")
             self.statusbar.showMessage(f"Error stopping local recording: {str(e)}")
             self.stop_recording_indicator()
 
-    def load_config(self):
-        """Load application configuration"""
-        try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-            else:
-                # Return default configuration
-                return {
-                    'volume': 50,
-                    'last_server': 0,
-                    'recording_path': str(Path.home()),
-                    'window_geometry': {
-                        'x': 100,
-                        'y': 100,
-                        'width': 1200,
-                        'height': 700
-                    },
-                }
-        except Exception as e:
-            print(f"Debug: Error loading config: {str(e)}")
-            return self.get_default_config()
-
-    def get_default_config(self):
-        """Return default configuration"""
-        return {
-            'volume': 50,
-            'last_server': 0,
-            'recording_path': str(Path.home()),
-            'window_geometry': {
-                'x': 100,
-                'y': 100,
-                'width': 1200,
-                'height': 700
-            },
-        }
-
     def closeEvent(self, event):
         """Save configuration when closing the application"""
+        if self.downloads is not None:
+            # Their journals let them continue where they stopped next time
+            self.config['downloads'] = self.unfinished_downloads()
+            for item in self.downloads.downloads:
+                item.pause()
+        if self.thumbnails is not None:
+            self.thumbnails.close()
+        if self.postprocess is not None:
+            # Interrupted conversions stay in the journal and run again next time
+            self.postprocess.close()
+        # So do scheduled captures that are running
+        self.local_scheduler.close()
         self.save_config()
+        self.config_store.close()
+        self.feed_caching_tuner()
+        self.tasks.cancel()
+        self.caching_tuner.save()
+        self.vlc_loader.wait()
         super().closeEvent(event)
 
     def show_channel_context_menu(self, position):
@@ -2429,6 +3630,7 @@ class TVHeadendClient(QMainWindow):
             local_record_action = menu.addAction("Record Locally")
             local_record_action.triggered.connect(
                 lambda: self.start_local_recording(channel_data['name']))
+            self.fill_profile_menu(menu.addMenu("Stream Profile"), channel_data['uuid'])
             
             # Add EPG action
             epg_action = menu.addAction("Show EPG")
@@ -2446,59 +3648,34 @@ class TVHeadendClient(QMainWindow):
             server = self.servers[self.server_combo.currentIndex()]
             print(f"Debug: Using server: {server['url']}")
             
-            # Create auth if needed
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                print(f"Debug: Using authentication with username: {server.get('username', '')}")
-            
-            # First get channel UUID
-            api_url = f'{server["url"]}/api/channel/grid?limit=10000'
-            print(f"Debug: Getting channel UUID from: {api_url}")
-            
-            response = requests.get(api_url, auth=auth)
-            print(f"Debug: Channel list response status: {response.status_code}")
-            
-            channels = response.json()['entries']
-            print(f"Debug: Found {len(channels)} channels in response")
-            
-            channel_uuid = None
-            for channel in channels:
-                if channel['name'] == channel_name:
-                    channel_uuid = channel['uuid']
-                    print(f"Debug: Found channel UUID: {channel_uuid}")
-                    break
-            
-            if not channel_uuid:
-                print(f"Debug: Channel UUID not found for: {channel_name}")
-                self.statusbar.showMessage("Channel not found")
-                return
-            
-            # Get EPG data for the channel
-            epg_url = f'{server["url"]}/api/epg/events/grid'
-            params = {
-                'channel': channel_uuid,
-                'limit': 24  # Get next 24 events
-            }
-            print(f"Debug: Fetching EPG data from: {epg_url}")
-            print(f"Debug: With parameters: {params}")
-            
-            response = requests.get(epg_url, params=params, auth=auth)
-            print(f"Debug: EPG response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                epg_data = response.json()['entries']
-                if epg_data:
-                    dialog = EPGDialog(channel_name, epg_data, server, self)
-                    dialog.show()
-                else:
-                    self.statusbar.showMessage("No EPG data available")
-            else:
-                self.statusbar.showMessage("Failed to fetch EPG data")
+            self.tasks.spawn(self.fetch_channel_epg(server, channel_name),
+                             lambda events: self.open_channel_epg(server, channel_name, events),
+                             self.on_channel_epg_failed)
                 
         except Exception as e:
-            print(f"Debug: Error fetching EPG: {str(e)}")
-            self.statusbar.showMessage(f"Error fetching EPG: {str(e)}")
+            self.on_channel_epg_failed(e)
+
+    async def fetch_channel_epg(self, server, channel_name):
+        """The next 24 EPG events of a channel"""
+        api = get_async_api(server)
+        print("Debug: Getting channel UUID from channel grid")
+        channel_uuid = await api.channel_uuid(channel_name)
+        if not channel_uuid:
+            raise LookupError(f"Channel not found: {channel_name}")
+        print("Debug: Fetching EPG data from: /api/epg/events/grid")
+        _, events = await api.epg_events(channel_uuid, limit=24)
+        return events
+
+    def open_channel_epg(self, server, channel_name, events):
+        if events:
+            dialog = EPGDialog(channel_name, events, server, self)
+            dialog.show()
+        else:
+            self.statusbar.showMessage("No EPG data available")
+
+    def on_channel_epg_failed(self, error):
+        print(f"Debug: Error fetching EPG: {str(error)}")
+        self.statusbar.showMessage(f"Error fetching EPG: {str(error)}")
 
     def play_channel_from_table(self, item):
         """Play channel from table selection"""
@@ -2509,43 +3686,55 @@ class TVHeadendClient(QMainWindow):
 
     def play_channel_by_data(self, channel_data):
         """Play channel using channel data"""
+        if not self.vlc_ready():
+            return
         try:
             server = self.servers[self.server_combo.currentIndex()]
             server_url = server['url']
             print(f"Debug: Playing channel from server: {server_url}")
             
-            # Create auth string if credentials exist
-            auth_string = ''
-            auth = None
-            if server.get('username') or server.get('password'):
-                auth = (server.get('username', ''), server.get('password', ''))
-                auth_string = f"{server.get('username', '')}:{server.get('password', '')}@"
-            
             # Use channel UUID directly from stored data
             channel_uuid = channel_data['uuid']
             
             if channel_uuid:
-                # Create media URL with auth if needed
-                if auth_string:
-                    # Ensure server_url starts with http:// or https://
-                    if not server_url.startswith(('http://', 'https://')):
-                        server_url = f'http://{server_url}'
-                    
-                    # Insert auth string after http:// or https://
-                    stream_url = server_url.replace('://', f'://{auth_string}')
-                    stream_url = f'{stream_url}/stream/channel/{channel_uuid}'
-
+                profile = stream_profile_setting(server, channel_uuid)
+                if profile == AUTO_PROFILE:
+                    server_profiles = self.stream_profiles.get(resilience.normalize_url(server_url), [])
+                    profile = self.auto_profile.start(
+                        resilience.normalize_url(server_url), profile_ladder(server_profiles),
+                        {p.name: p.bitrate for p in server_profiles if p.bitrate})
                 else:
-                    if not server_url.startswith(('http://', 'https://')):
-                        server_url = f'http://{server_url}'
-                    stream_url = f'{server_url}/stream/channel/{channel_uuid}'
-                print(f"Debug: Stream URL: {stream_url}")
+                    self.auto_profile.stop()
+                if profile:
+                    print(f"Debug: Stream profile {profile}")
+
+                # VLC gets the credentials inside the URL
+                stream_url = get_api(server).stream_url(channel_uuid, embed_auth=True, profile=profile)
                 
                 media = self.instance.media_new(stream_url)
+                if self.config.get('low_latency', False):
+                    caching, tuned = LOW_LATENCY_CACHING_MS, False
+                    for option in LOW_LATENCY_OPTIONS:
+                        media.add_option(option)
+                else:
+                    caching, tuned = self.network_caching(server, channel_uuid)
+                    media.add_option(f':network-caching={caching}')
+                print(f"Debug: Network caching {caching} ms")
+                radio = channel_uuid in self.radio_channels
+                if radio:
+                    # No video decoder or window at all for radio services
+                    media.add_option(':no-video')
+                self.hidden_video_track = None
+                self.close_recording()
                 self.media_player.set_media(media)
                 self.media_player.play()
+                self.start_playback_stats(
+                    channel_data['name'],
+                    (resilience.normalize_url(server_url), channel_uuid) if tuned else None)
+                self.now_playing = (server, channel_data, caching)
                 print(f"Debug: Started playback")
-                self.statusbar.showMessage(f"Playing: {channel_data['name']}")
+                self.statusbar.showMessage(
+                    f"Playing: {channel_data['name']}" + (" (radio, audio only)" if radio else ""))
             else:
                 print(f"Debug: Channel not found: {channel_data['name']}")
                 self.statusbar.showMessage("Channel not found")
@@ -2554,6 +3743,37 @@ class TVHeadendClient(QMainWindow):
             print(f"Debug: Error in play_channel: {str(e)}")
             self.statusbar.showMessage(f"Playback error: {str(e)}")
 
+    def show_mosaic(self):
+        """Play the selected channel and the ones after it in a grid"""
+        if not self.servers or not self.channel_list.rowCount():
+            self.statusbar.showMessage("No channels to show")
+            return
+        if not self.vlc_ready():
+            return
+        server = self.servers[self.server_combo.currentIndex()]
+        start = max(self.channel_list.currentRow(), 0)
+        rows = list(range(start, self.channel_list.rowCount())) + list(range(start))
+        channels = [self.channel_list.item(row, 1).data(Qt.UserRole)
+                    for row in rows if not self.channel_list.isRowHidden(row)]
+        # The mosaic needs the decoders to itself
+        self.stop_playback()
+        dialog = MosaicDialog(server, channels, self)
+        dialog.show()
+
+    def show_epg_search(self):
+        """Show the EPG search dialog for the current server"""
+        try:
+            if not self.servers:
+                self.statusbar.showMessage("No servers configured")
+                return
+            server = self.servers[self.server_combo.currentIndex()]
+            dialog = EPGSearchDialog(server, self.epg_index_path(), self)
+            dialog.show()
+        except Exception as e:
+            print(f"Debug: Error showing EPG search: {str(e)}")
+            print(f"Debug: Traceback: {traceback.format_exc()}")
+            self.statusbar.showMessage("Error showing EPG search")
+
     def show_server_status(self):
         """Show server status dialog"""
         try:
@@ -2565,17 +3785,97 @@ class TVHeadendClient(QMainWindow):
             self.statusbar.showMessage("Error showing server status")
 
     def filter_channels(self, search_text):
-        """Filter channel list based on search text"""
-        search_text = search_text.lower()
-        for row in range(self.channel_list.rowCount()):
-            item = self.channel_list.item(row, 1)  # Get name column item
-            if item:
-                channel_name = item.text().lower()
-                self.channel_list.setRowHidden(row, search_text not in channel_name)
+        """Filter channel list based on search text and select the best match"""
+        if self.channel_index is None:
+            return
+        
+        ranked = self.channel_index.search(search_text)
+        if ranked is None:
+            hidden = set()
+        else:
+            hidden = set(range(len(self.channel_items))).difference(ranked)
+        
+        # Only touch rows whose visibility actually changes
+        self.channel_list.setUpdatesEnabled(False)
+        try:
+            for channel_id in hidden - self.hidden_channel_ids:
+                self.channel_list.setRowHidden(self.channel_items[channel_id].row(), True)
+            for channel_id in self.hidden_channel_ids - hidden:
+                self.channel_list.setRowHidden(self.channel_items[channel_id].row(), False)
+        finally:
+            self.channel_list.setUpdatesEnabled(True)
+        self.hidden_channel_ids = hidden
+        
+        if ranked:
+            self.channel_list.setCurrentItem(self.channel_items[ranked[0]])
+        self.logo_timer.start()
+
+    def logo_url(self, server, channel_data):
+        """Return the absolute logo URL of a channel, or None"""
+        icon = channel_data.get('icon_public_url') if channel_data else None
+        if not icon:
+            return None
+        if icon.startswith(('http://', 'https://')):
+            return icon
+        return f"{resilience.normalize_url(server['url'])}/{icon.lstrip('/')}"
+
+    def request_visible_logos(self):
+        """Show or queue logos for the rows currently in the viewport"""
+        if not self.servers or self.channel_list.rowCount() == 0:
+            return
+        first = self.channel_list.rowAt(0)
+        if first < 0:
+            return
+        last = self.channel_list.rowAt(self.channel_list.viewport().height() - 1)
+        if last < 0:
+            last = self.channel_list.rowCount() - 1
+
+        server = self.servers[self.server_combo.currentIndex()]
+        auth = resilience.server_auth(server)
+        for row in range(first, last + 1):
+            if self.channel_list.isRowHidden(row):
+                continue
+            item = self.channel_list.item(row, 1)
+            if item is None or item.data(Qt.DecorationRole) is not None:
+                continue
+            url = self.logo_url(server, item.data(Qt.UserRole))
+            if not url:
+                continue
+            pixmap = self.logo_loader.pixmap(url)
+            if pixmap is not None:
+                item.setData(Qt.DecorationRole, pixmap)
+                self.decorated_logo_items[url].append(item)
+            elif item not in self.pending_logo_items[url]:
+                self.pending_logo_items[url].append(item)
+                self.logo_loader.request(url, auth)
+
+    def on_logo_ready(self, url):
+        pixmap = self.logo_loader.pixmap(url)
+        for item in self.pending_logo_items.pop(url, []):
+            item.setData(Qt.DecorationRole, pixmap)
+            self.decorated_logo_items[url].append(item)
+
+    def on_logo_evicted(self, url):
+        # Release the pixmap; the row reloads it from disk when scrolled back into view
+        for item in self.decorated_logo_items.pop(url, []):
+            item.setData(Qt.DecorationRole, None)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if hasattr(self, 'logo_timer'):
+            self.logo_timer.start()
+
+    def play_top_search_result(self):
+        """Play the best match for the current search (Enter in the search box)"""
+        self.search_timer.stop()
+        self.filter_channels(self.search_box.text())
+        item = self.channel_list.currentItem()
+        if item and not self.channel_list.isRowHidden(item.row()):
+            self.play_channel_by_data(self.channel_list.item(item.row(), 1).data(Qt.UserRole))
 
     def check_hardware_acceleration(self):
         """Check and print which hardware acceleration method is being used"""
-        if not self.media_player:
+        if not self.vlc_ready(wait=False):
             return
             
         # This only works if a media is playing
@@ -2589,22 +3889,12 @@ class TVHeadendClient(QMainWindow):
                 print("No media currently playing")
                 return
                 
-            # Different versions of python-vlc have different APIs for get_stats
-            try:
-                # Newer versions (direct call)
-                stats = media.get_stats()
+            stats = read_media_stats(media)
+            if stats:
                 print("VLC Playback Statistics:")
-                print(f"Decoded video blocks: {stats.decoded_video}")
-                print(f"Displayed pictures: {stats.displayed_pictures}")
-                print(f"Lost pictures: {stats.lost_pictures}")
-            except TypeError:
-                # Older versions (requiring a stats object parameter)
-                stats = vlc.MediaStats()
-                media.get_stats(stats)
-                print("VLC Playback Statistics:")
-                print(f"Decoded video blocks: {stats.decoded_video}")
-                print(f"Displayed pictures: {stats.displayed_pictures}")
-                print(f"Lost pictures: {stats.lost_pictures}")
+                print(f"Decoded video blocks: {stats['decoded_video']}")
+                print(f"Displayed pictures: {stats['displayed_pictures']}")
+                print(f"Lost pictures: {stats['lost_pictures']}")
             
             # Check if hardware decoding is enabled
             if hasattr(self.media_player, 'get_role'):
@@ -2621,6 +3911,90 @@ class TVHeadendClient(QMainWindow):
 
 
 
+def confirm_tuner_capacity(analyser, event, parent=None):
+    """Warn if an EPGEvent would need more tuners than the server has; True to go ahead"""
+    found = analyser.conflicts(event.channel_uuid, event.start, event.stop)
+    if not found:
+        return True
+    print(f"Debug: {event.title} conflicts with {sum(len(c.bookings) for c in found)} recordings")
+    lines = []
+    for conflict in found[:5]:
+        start = datetime.fromtimestamp(conflict.start).strftime('%a %H:%M')
+        stop = datetime.fromtimestamp(conflict.stop).strftime('%H:%M')
+        others = ', '.join(f"{booking.title} ({booking.channel_name})" for booking in conflict.bookings)
+        lines.append(f"{start} - {stop}: {conflict.needed} tuners needed, with {others}")
+    if len(found) > 5:
+        lines.append(f"... and {len(found) - 5} more")
+    answer = QMessageBox.warning(
+        parent,
+        "Tuner Conflict",
+        f"{event.title} overlaps more recordings than the server's {analyser.tuners} tuner(s) "
+        f"can take at once:\n\n" + '\n'.join(lines) + "\n\nSchedule it anyway?",
+        QMessageBox.Yes | QMessageBox.No,
+        QMessageBox.No
+    )
+    return answer == QMessageBox.Yes
+
+
+def preload_conflict_analyser(tasks, server):
+    """Load the upcoming recordings in the background, so the first record click doesn't wait"""
+    tasks.spawn(run_blocking(conflicts.analyser_for, server, get_api(server)),
+                None, lambda error: print(f"Debug: Could not load upcoming recordings: {error}"))
+
+
+def schedule_epg_recording(tasks, server, event, parent=None):
+    """Create a server-side DVR entry for an EPGEvent after checking the tuners are free"""
+    # Waits for the preload if it is still running, off the GUI thread
+    tasks.spawn(run_blocking(conflicts.analyser_for, server, get_api(server)),
+                lambda analyser: record_if_confirmed(tasks, server, event, parent, analyser),
+                lambda error: record_unchecked(tasks, server, event, parent, error))
+
+
+def record_if_confirmed(tasks, server, event, parent, analyser):
+    if not confirm_tuner_capacity(analyser, event, parent):
+        print(f"Debug: Recording of {event.title} not scheduled because of a tuner conflict")
+        return
+    create_epg_recording(tasks, server, event, parent)
+
+
+def record_unchecked(tasks, server, event, parent, error):
+    print(f"Debug: Could not check for tuner conflicts: {str(error)}")
+    create_epg_recording(tasks, server, event, parent)
+
+
+def create_epg_recording(tasks, server, event, parent=None):
+    """Create the DVR entry for an EPGEvent, reporting the outcome to the user"""
+    print(f"Debug: Scheduling recording for: {event.title}")
+    print("Debug: Sending recording request to: /api/dvr/entry/create")
+    tasks.spawn(get_async_api(server).create_recording(
+                    event.channel_uuid, event.start, event.stop,
+                    event.title or 'Scheduled Recording',
+                    description=event.description,
+                    comment="Scheduled via TVHplayer"),
+                lambda uuid: on_epg_recording_created(server, event, parent, uuid),
+                lambda error: on_epg_recording_failed(parent, error))
+
+
+def on_epg_recording_created(server, event, parent, uuid):
+    print(f"Debug: Created DVR entry: {uuid}")
+    conflicts.add_booking(server, conflicts.Booking(
+        event.channel_uuid, event.channel_name, event.title, event.start, event.stop))
+    QMessageBox.information(
+        parent,
+        "Success",
+        f"Recording scheduled successfully for {event.title}"
+    )
+
+
+def on_epg_recording_failed(parent, error):
+    print(f"Debug: Error scheduling recording: {str(error)}")
+    QMessageBox.critical(
+        parent,
+        "Error",
+        f"Failed to schedule recording: {str(error)}"
+    )
+
+
 class EPGDialog(QDialog):
     def __init__(self, channel_name, epg_data, server, parent=None):
         super().__init__(parent)
@@ -2630,6 +4004,7 @@ class EPGDialog(QDialog):
         self.server = server
         self.channel_name = channel_name
         self.setup_ui(epg_data)
+        preload_conflict_analyser(parent.tasks, server)
         
     def setup_ui(self, epg_data):
         layout = QVBoxLayout(self)
@@ -2645,62 +4020,59 @@ class EPGDialog(QDialog):
             item_layout = QHBoxLayout(item_widget)
             item_layout.setContentsMargins(5, 2, 5, 2)
             # Get start and stop times
-            start_time = datetime.fromtimestamp(entry['start']).strftime('%H:%M')
-            stop_time = datetime.fromtimestamp(entry['stop']).strftime('%H:%M')
-            
-            # Get title and description
-            if isinstance(entry.get('title'), dict):
-                title = entry['title'].get('eng', 'No title')
-            else:
-                title = str(entry.get('title', 'No title'))
-                
-            if isinstance(entry.get('description'), dict):
-                description = entry['description'].get('eng', 'No description')
-            else:
-                description = str(entry.get('description', 'No description'))
-                
-                # Create label for program info
-                info_text = f"{start_time} - {stop_time}: {title}"
-                info_label = QLabel(info_text)
-                info_label.setToolTip(description)
-                item_layout.addWidget(info_label, stretch=1)
-                
-                # Create record button with unicode icon
-                record_btn = QPushButton("⏺")  # Unicode record symbol
-                record_btn.setFixedWidth(32)  # Make button smaller since it's just an icon
-                record_btn.setFixedHeight(32)  # Make it square
-                record_btn.setStyleSheet("""
-                    QPushButton {
-                        color: red;
-                        font-size: 16px;
-                        border: 1px solid #ccc;
-                        border-radius: 16px;
-                        padding: 0px;
-                    }
-                    QPushButton:hover {
-                        background-color: #f0f0f0;
-                    }
-                    QPushButton:pressed {
-                        background-color: #e0e0e0;
-                    }
-                """)
-                record_btn.setToolTip("Schedule Recording")
-                record_btn.clicked.connect(
-                    lambda checked, e=entry: self.schedule_recording(e))
-                item_layout.addWidget(record_btn)
-                
-                # Create list item and set custom widget
-                list_item = QListWidgetItem(self.epg_list)
-                list_item.setSizeHint(item_widget.sizeHint())
+            start_time = datetime.fromtimestamp(entry.start).strftime('%H:%M')
+            stop_time = datetime.fromtimestamp(entry.stop).strftime('%H:%M')
+            
+            # Create label for program info
+            info_text = f"{start_time} - {stop_time}: {entry.title or 'No title'}"
+            info_label = QLabel(info_text)
+            info_label.setToolTip(entry.description or 'No description')
+            item_layout.addWidget(info_label, stretch=1)
+            
+            # Create record button with unicode icon
+            record_btn = QPushButton("⏺")  # Unicode record symbol
+            record_btn.setFixedWidth(32)  # Make button smaller since it's just an icon
+            record_btn.setFixedHeight(32)  # Make it square
+            record_btn.setStyleSheet("""
+                QPushButton {
+                    color: red;
+                    font-size: 16px;
+                    border: 1px solid #ccc;
+                    border-radius: 16px;
+                    padding: 0px;
+                }
+                QPushButton:hover {
+                    background-color: #f0f0f0;
+                }
+                QPushButton:pressed {
+                    background-color: #e0e0e0;
+                }
+            """)
+            record_btn.setToolTip("Schedule Recording")
+            record_btn.clicked.connect(
+                lambda checked, e=entry: self.schedule_recording(e))
+            item_layout.addWidget(record_btn)
+
+            local_btn = QPushButton("💾")
+            local_btn.setFixedWidth(32)
+            local_btn.setFixedHeight(32)
+            local_btn.setToolTip("Record Locally when it is on air")
+            local_btn.clicked.connect(
+                lambda checked, e=entry: self.parent().schedule_local_recording(self.server, e, self))
+            item_layout.addWidget(local_btn)
+            
+            # Create list item and set custom widget
+            list_item = QListWidgetItem(self.epg_list)
+            list_item.setSizeHint(item_widget.sizeHint())
+            self.epg_list.addItem(list_item)
+            self.epg_list.setItemWidget(list_item, item_widget)
+            try:
                 self.epg_list.addItem(list_item)
                 self.epg_list.setItemWidget(list_item, item_widget)
-                try:
-                    self.epg_list.addItem(list_item)
-                    self.epg_list.setItemWidget(list_item, item_widget)
-                except Exception as e:
-                    print(f"Debug: Error processing EPG entry: {str(e)}")
-                    print(f"Debug: Problematic entry: {entry}")
-                    continue
+            except Exception as e:
+                print(f"Debug: Error processing EPG entry: {str(e)}")
+                print(f"Debug: Problematic entry: {entry}")
+                continue
 
         # Close button
         close_btn = QPushButton("Close")
@@ -2709,60 +4081,1262 @@ class EPGDialog(QDialog):
         
     def schedule_recording(self, entry):
         """Schedule a recording for the selected EPG entry"""
+        schedule_epg_recording(self.parent().tasks, self.server, entry, self)
+
+class EPGSearchDialog(QDialog):
+    PAGE_SIZE = 50
+    # Re-sync automatically when the local copy is older than this
+    MAX_INDEX_AGE = 3600
+
+    def __init__(self, server, db_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Search EPG - {server.get('name', '')}")
+        self.setModal(False)
+        self.resize(900, 600)
+        self.server = server
+        self.index = EPGSearchIndex(db_path)
+        self.db_path = db_path
+        self.tasks = TaskScope()
+        self.sync_task = None
+        self.offset = 0
+        self.total = 0
+        self.results = []
+        self.setup_ui()
+        preload_conflict_analyser(self.tasks, server)
+
+        if time.time() - self.index.last_sync(server['url']) > self.MAX_INDEX_AGE:
+            self.sync_epg()
+        else:
+            self.update_sync_label()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Query row
+        query_layout = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Search titles, descriptions and genres...")
+        self.query_input.setClearButtonEnabled(True)
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(200)
+        self.query_timer.timeout.connect(self.new_search)
+        self.query_input.textChanged.connect(self.query_timer.start)
+        self.query_input.returnPressed.connect(self.new_search)
+        query_layout.addWidget(self.query_input)
+
+        self.sync_btn = QPushButton("Sync EPG")
+        self.sync_btn.setToolTip("Download the current EPG from the server")
+        self.sync_btn.clicked.connect(self.sync_epg)
+        query_layout.addWidget(self.sync_btn)
+        layout.addLayout(query_layout)
+
+        # Results
+        self.results_table = QTableWidget()
+        self.results_table.setColumnCount(5)
+        self.results_table.setHorizontalHeaderLabels(['Channel', 'Start', 'Title', 'Subtitle', 'Genre'])
+        self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.results_table.horizontalHeader().setStretchLastSection(True)
+        self.results_table.verticalHeader().setVisible(False)
+        self.results_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.results_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.results_table.itemDoubleClicked.connect(lambda item: self.record_selected())
+        layout.addWidget(self.results_table)
+
+        # Paging and actions
+        bottom_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("< Previous")
+        self.prev_btn.clicked.connect(lambda: self.show_page(self.offset - self.PAGE_SIZE))
+        self.next_btn = QPushButton("Next >")
+        self.next_btn.clicked.connect(lambda: self.show_page(self.offset + self.PAGE_SIZE))
+        self.page_label = QLabel("")
+        bottom_layout.addWidget(self.prev_btn)
+        bottom_layout.addWidget(self.page_label)
+        bottom_layout.addWidget(self.next_btn)
+        bottom_layout.addStretch()
+
+        self.sync_label = QLabel("")
+        bottom_layout.addWidget(self.sync_label)
+
+        record_btn = QPushButton("⏺ Record")
+        record_btn.setToolTip("Schedule a recording of the selected programme")
+        record_btn.clicked.connect(self.record_selected)
+        bottom_layout.addWidget(record_btn)
+
+        local_btn = QPushButton("💾 Record Locally")
+        local_btn.setToolTip("Record the selected programme to local disk when it is on air")
+        local_btn.clicked.connect(self.record_selected_locally)
+        bottom_layout.addWidget(local_btn)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        bottom_layout.addWidget(close_btn)
+        layout.addLayout(bottom_layout)
+
+        self.update_paging()
+
+    def new_search(self):
+        self.query_timer.stop()
+        self.show_page(0)
+
+    def show_page(self, offset):
+        text = self.query_input.text()
+        self.offset = max(0, offset)
+        start = time.perf_counter()
+        self.total, self.results = self.index.search(
+            self.server['url'], text, offset=self.offset, limit=self.PAGE_SIZE)
+        print(f"Debug: EPG search '{text}' returned {self.total} results "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        self.results_table.setRowCount(len(self.results))
+        for row, event in enumerate(self.results):
+            start_text = datetime.fromtimestamp(event.start).strftime('%a %d.%m. %H:%M')
+            title = event.title
+            if event.episode:
+                title = f"{title} ({event.episode})"
+            values = [event.channel_name, start_text, title, event.subtitle, event.genre]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value or '')
+                if col == 2:
+                    item.setToolTip(event.description or '')
+                self.results_table.setItem(row, col, item)
+        self.update_paging()
+
+    def update_paging(self):
+        if self.total:
+            self.page_label.setText(
+                f"Results {self.offset + 1}-{self.offset + len(self.results)} of {self.total}")
+        else:
+            self.page_label.setText("No results" if self.query_input.text().strip() else "")
+        self.prev_btn.setEnabled(self.offset > 0)
+        self.next_btn.setEnabled(self.offset + len(self.results) < self.total)
+
+    def update_sync_label(self):
+        last_sync = self.index.last_sync(self.server['url'])
+        if last_sync:
+            count = self.index.event_count(self.server['url'])
+            synced = datetime.fromtimestamp(last_sync).strftime('%Y-%m-%d %H:%M')
+            self.sync_label.setText(f"{count} events, synced {synced}")
+        else:
+            self.sync_label.setText("EPG not synced yet")
+
+    def sync_epg(self):
+        if self.sync_task is not None and not self.sync_task.done():
+            return
+        self.sync_btn.setEnabled(False)
+        self.sync_label.setText("Syncing EPG...")
+        self.sync_task = self.tasks.spawn(
+            sync_epg_async(self.server, self.db_path, progress=self.report_sync_progress),
+            self.on_sync_finished, self.on_sync_failed)
+
+    def report_sync_progress(self, done, total):
+        # Called on the event loop, which may not be the GUI thread
+        bridge.call_in_gui(self.show_sync_progress, done, total)
+
+    def show_sync_progress(self, done, total):
+        if not self.tasks.closed:
+            self.sync_label.setText(f"Syncing EPG... {done}/{total}")
+
+    def on_sync_finished(self, new_events):
+        print(f"Debug: EPG sync finished, {len(new_events)} new events")
+        self.parent().run_autorecord(self.server, new_events)
+        self.sync_btn.setEnabled(True)
+        self.update_sync_label()
+        if self.query_input.text().strip():
+            self.show_page(self.offset)
+
+    def on_sync_failed(self, error):
+        print(f"Debug: EPG sync failed: {str(error)}")
+        self.sync_btn.setEnabled(True)
+        self.sync_label.setText(f"EPG sync failed: {error}")
+
+    def record_selected(self):
+        row = self.results_table.currentRow()
+        if row < 0 or row >= len(self.results):
+            QMessageBox.information(self, "Record", "Please select a programme to record")
+            return
+        schedule_epg_recording(self.tasks, self.server, self.results[row], self)
+
+    def record_selected_locally(self):
+        row = self.results_table.currentRow()
+        if row < 0 or row >= len(self.results):
+            QMessageBox.information(self, "Record Locally", "Please select a programme to record")
+            return
+        self.parent().schedule_local_recording(self.server, self.results[row], self)
+
+    def closeEvent(self, event):
+        # The sync stores through its own connection, so the index can close now
+        self.tasks.cancel()
+        self.index.close()
+        super().closeEvent(event)
+
+    def accept(self):
+        self.close()
+        super().accept()
+
+
+class PlaybackStatsDialog(QDialog):
+    """Live table of playback statistics with CSV export"""
+    COLUMNS = ['Time', 'Input Mb/s', 'Demux Mb/s', 'Decoded fps', 'Displayed fps',
+               'Lost pictures', 'Drop %', 'Lost audio', 'Corrupted', 'Discontinuities', 'Rebuffers']
+    ROWS = 60
+
+    def __init__(self, stats, parent=None):
+        super().__init__(parent)
+        self.stats = stats
+        self.setWindowTitle("Playback Statistics")
+        self.setModal(False)
+        self.resize(900, 450)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        export_btn = QPushButton("Export CSV...")
+        export_btn.clicked.connect(self.export_csv)
+        button_layout.addWidget(export_btn)
+        button_layout.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+
+    def refresh(self):
+        summary = self.stats.summary()
+        if summary is None:
+            self.summary_label.setText("No statistics yet - start playback")
+        else:
+            self.summary_label.setText(
+                f"<b>{self.stats.label}</b> - last {summary['seconds']:.0f} s: "
+                f"{summary['input_kbps'] / 1000:.2f} Mb/s, {summary['displayed_fps']:.1f} fps, "
+                f"{summary['lost_pictures']} pictures lost ({summary['picture_drop_percent']:.2f}%), "
+                f"{summary['lost_abuffers']} audio buffers lost ({summary['audio_drop_percent']:.2f}%), "
+                f"{summary['buffering_events']} rebuffers ({summary['buffering_seconds']:.1f} s)")
+
+        # Newest first
+        history = self.stats.history()[-self.ROWS:][::-1]
+        self.table.setRowCount(len(history))
+        for row, rates in enumerate(history):
+            values = [
+                datetime.fromtimestamp(rates.time).strftime('%H:%M:%S'),
+                f"{rates.input_kbps / 1000:.2f}",
+                f"{rates.demux_kbps / 1000:.2f}",
+                f"{rates.decoded_fps:.1f}",
+                f"{rates.displayed_fps:.1f}",
+                str(rates.lost_pictures),
+                f"{rates.picture_drop_percent:.1f}",
+                str(rates.lost_abuffers),
+                str(rates.corrupted),
+                str(rates.discontinuities),
+                str(rates.buffering_events),
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if rates.lost_pictures or rates.lost_abuffers or rates.buffering_events:
+                    item.setBackground(Qt.yellow)
+                self.table.setItem(row, column, item)
+
+    def export_csv(self):
+        default_filename = f"playback_stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Export Statistics", default_filename, "CSV Files (*.csv);;All Files (*.*)")
+        if not file_path:
+            return
         try:
-            print(f"Debug: Scheduling recording for: {entry.get('title', 'Unknown')}")
-            
-            # Create auth if needed
-            auth = None
-            if self.server.get('username') or self.server.get('password'):
-                auth = (self.server.get('username', ''), self.server.get('password', ''))
-            
-            # Prepare recording request with proper language object structure
-            conf_data = {
-                "start": entry['start'],
-                "stop": entry['stop'],
-                "channel": entry['channelUuid'],
-                "title": {
-                    "eng": entry.get('title', 'Scheduled Recording')
-                },
-                "description": {
-                    "eng": entry.get('description', '')
-                },
-                "comment": "Scheduled via TVHplayer"
-            }
-            
-            # Convert to string format as expected by the API
-            data = {'conf': json.dumps(conf_data)}
-            print(f"Debug: Recording data: {data}")
-            
-            # Make recording request
-            record_url = f'{self.server["url"]}/api/dvr/entry/create'
-            print(f"Debug: Sending recording request to: {record_url}")
-            
-            response = requests.post(record_url, data=data, auth=auth)
-            print(f"Debug: Recording response status: {response.status_code}")
-            print(f"Debug: Recording response: {response.text}")
-            
-            if response.status_code == 200:
-                QMessageBox.information(
-                    self,
-                    "Success",
-                    f"Recording scheduled successfully for {entry.get('title', 'Unknown')}"
-                )
-            else:
-                QMessageBox.warning(
-                    self,
-                    "Error",
-                    f"Failed to schedule recording: {response.text}"
-                )
-                
-        except Exception as e:
-            print(f"Debug: Error scheduling recording: {str(e)}")
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"Failed to schedule recording: {str(e)}"
+            count = self.stats.export_csv(file_path)
+            print(f"Debug: Exported {count} statistics samples to {file_path}")
+        except OSError as e:
+            QMessageBox.critical(self, "Export Error", f"Could not write {file_path}:\n{str(e)}")
+
+
+class LatencyDialog(QDialog):
+    """Measures a live channel's latency from a second stream connection until closed"""
+
+    def __init__(self, server, channel_data, caching_ms, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Latency - {channel_data['name']}")
+        self.setModal(False)
+        self.resize(600, 450)
+        self.server = server
+        self.caching_ms = caching_ms
+        self.cancel_event = threading.Event()
+        self.last_history = 0.0
+        self.tasks = TaskScope()
+        self.setup_ui()
+
+        api = get_api(server)
+        url = api.stream_url(channel_data['uuid'])
+        self.tasks.spawn(
+            run_blocking(measure_latency, url, resilience.server_auth(server), None,
+                         self.report_progress, self.cancel_event.is_set, caching_ms),
+            self.show_report, self.on_failed)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        note = QLabel(f"Player cache: {self.caching_ms} ms. The measurement opens its own "
+                      "connection to the server, which may use a subscription.")
+        note.setWordWrap(True)
+        layout.addWidget(note)
+        self.report_label = QLabel("Waiting for stream...")
+        layout.addWidget(self.report_label)
+
+        # Drift over time, one row every ten seconds
+        self.history_table = QTableWidget()
+        self.history_table.setColumnCount(4)
+        self.history_table.setHorizontalHeaderLabels(['Time', 'Source delay', 'Jitter', 'Drift'])
+        self.history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.history_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.history_table)
+
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        layout.addWidget(close_btn)
+
+    def report_progress(self, report):
+        # Called on the measuring thread
+        bridge.call_in_gui(self.show_report, report)
+
+    def show_report(self, report):
+        if self.tasks.closed:
+            return
+        self.report_label.setText("\n".join(format_latency_report(report)))
+        if report['jitter_ms'] is None or report['seconds'] - self.last_history < 10:
+            return
+        self.last_history = report['seconds']
+        delay = report['source_delay']
+        row = self.history_table.rowCount()
+        self.history_table.insertRow(row)
+        for column, value in enumerate([
+                f"{report['seconds']:.0f} s",
+                f"{delay * 1000:.0f} ms" if delay is not None else "n/a",
+                f"{report['jitter_ms']:.1f} ms",
+                f"{report['drift_ms_per_min']:+.1f} ms/min"]):
+            self.history_table.setItem(row, column, QTableWidgetItem(value))
+        self.history_table.scrollToBottom()
+
+    def on_failed(self, error):
+        self.report_label.setText(f"Measurement failed: {str(error)}")
+
+    def closeEvent(self, event):
+        self.cancel_event.set()
+        self.tasks.cancel()
+        super().closeEvent(event)
+
+
+class DownloadsDialog(QDialog):
+    """Progress of recording downloads, with pause, resume and a bandwidth cap"""
+    COLUMNS = ['Title', 'Size', 'Progress', 'Speed', 'State']
+
+    def __init__(self, manager, parent):
+        super().__init__(parent)
+        self.manager = manager
+        self.client = parent
+        self.setWindowTitle("Downloads")
+        self.setModal(False)
+        self.resize(800, 400)
+        self.last_received = {}  # id(download) -> (bytes, time)
+        self.setup_ui()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.ExtendedSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        settings = QHBoxLayout()
+        settings.addWidget(QLabel("Bandwidth cap:"))
+        self.limit_spin = QSpinBox()
+        self.limit_spin.setRange(0, 10000)
+        self.limit_spin.setSuffix(" Mb/s")
+        self.limit_spin.setSpecialValueText("Unlimited")
+        self.limit_spin.setValue(self.client.config.get('download_limit_kbps', 0) // 1000)
+        self.limit_spin.valueChanged.connect(self.set_limit)
+        settings.addWidget(self.limit_spin)
+        settings.addWidget(QLabel("Connections per file:"))
+        self.connections_spin = QSpinBox()
+        self.connections_spin.setRange(1, 8)
+        self.connections_spin.setValue(
+            self.client.config.get('download_connections', download.DEFAULT_CONNECTIONS))
+        self.connections_spin.valueChanged.connect(self.set_connections)
+        settings.addWidget(self.connections_spin)
+        settings.addStretch()
+        layout.addLayout(settings)
+
+        buttons = QHBoxLayout()
+        for label, handler in (("Pause", self.manager.pause), ("Resume", self.manager.resume),
+                               ("Remove", self.manager.remove)):
+            button = QPushButton(label)
+            button.clicked.connect(lambda checked, handler=handler: self.apply(handler))
+            buttons.addWidget(button)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def set_limit(self, mbps):
+        self.client.config['download_limit_kbps'] = mbps * 1000
+        self.client.save_config()
+        self.manager.limiter.set_rate(mbps * 125000)
+
+    def set_connections(self, connections):
+        # Applies to downloads that start or resume from now on
+        self.client.config['download_connections'] = connections
+        self.client.save_config()
+        for item in self.manager.downloads:
+            item.connections = connections
+
+    def apply(self, handler):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        downloads = list(self.manager.downloads)
+        for row in rows:
+            if row < len(downloads):
+                handler(downloads[row])
+        self.refresh()
+
+    def refresh(self):
+        downloads = list(self.manager.downloads)
+        self.table.setRowCount(len(downloads))
+        now = time.monotonic()
+        for row, item in enumerate(downloads):
+            previous = self.last_received.get(id(item))
+            speed = ''
+            if previous and item.state == download.DOWNLOADING and now > previous[1]:
+                speed = f"{(item.received - previous[0]) * 8 / (now - previous[1]) / 1e6:.1f} Mb/s"
+            self.last_received[id(item)] = (item.received, now)
+            state = item.state.capitalize()
+            if item.error:
+                state += f": {item.error}"
+            size = f"{item.size / (1024 * 1024):.0f} MB" if item.size else ''
+            for column, value in enumerate([item.title, size, f"{item.progress() * 100:.1f}%", speed, state]):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+
+class LocalScheduleDialog(QDialog):
+    """Local recordings scheduled from the EPG"""
+    COLUMNS = ['Start', 'Channel', 'Title', 'State', 'File']
+
+    def __init__(self, local_scheduler, parent):
+        super().__init__(parent)
+        self.scheduler = local_scheduler
+        self.client = parent
+        self.jobs = []
+        self.setWindowTitle("Local Recording Schedule")
+        self.setModal(False)
+        self.resize(850, 400)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.ExtendedSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        remove_btn = QPushButton("Remove")
+        remove_btn.setToolTip("Unschedule the selected recordings; running ones stop")
+        remove_btn.clicked.connect(self.remove_selected)
+        buttons.addWidget(remove_btn)
+        clear_btn = QPushButton("Clear Finished")
+        clear_btn.clicked.connect(self.clear_finished)
+        buttons.addWidget(clear_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        self.jobs = self.scheduler.upcoming()
+        self.table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            state = job.state.capitalize()
+            if job.error:
+                state += f": {job.error}"
+            start = datetime.fromtimestamp(job.start).strftime('%a %d.%m. %H:%M')
+            stop = datetime.fromtimestamp(job.stop).strftime('%H:%M')
+            for column, value in enumerate([f"{start}-{stop}", job.channel_name, job.title, state, job.path]):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def remove_selected(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        for row in rows:
+            if row < len(self.jobs):
+                self.scheduler.remove(self.jobs[row].id)
+        self.client.update_postprocess_pause()
+        self.client.arm_schedule_timer()
+        self.refresh()
+
+    def clear_finished(self):
+        self.scheduler.clear_finished()
+        self.refresh()
+
+
+class AutorecordRuleDialog(QDialog):
+    """Edits one autorecord rule"""
+    WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+    def __init__(self, server_key, channel_names, rule=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Autorecord Rule")
+        self.setModal(True)
+        self.server_key = server_key
+        self.rule_id = rule.id if rule else None
+        self.result_rule = None
+
+        layout = QFormLayout(self)
+        self.name_input = QLineEdit(rule.name if rule else '')
+        self.name_input.setPlaceholderText("Defaults to the title")
+        layout.addRow("Name:", self.name_input)
+        self.title_input = QLineEdit(rule.title if rule else '')
+        self.title_input.setPlaceholderText("Regular expression, e.g. ^Doctor Who$")
+        layout.addRow("Title:", self.title_input)
+
+        self.channel_list = QListWidget()
+        self.channel_list.setMaximumHeight(150)
+        chosen = set(rule.channels if rule else ())
+        for name in list(dict.fromkeys(sorted(chosen) + list(channel_names))):
+            item = QListWidgetItem(name, self.channel_list)
+            item.setCheckState(Qt.Checked if name in chosen else Qt.Unchecked)
+        layout.addRow("Channels:", self.channel_list)
+        layout.addRow("", QLabel("None checked: any channel"))
+
+        self.genre_combo = QComboBox()
+        self.genre_combo.addItem("Any")
+        self.genre_combo.addItems(list(GENRE_NAMES.values()))
+        if rule and rule.genre:
+            self.genre_combo.setCurrentText(rule.genre)
+        layout.addRow("Genre:", self.genre_combo)
+
+        time_layout = QHBoxLayout()
+        self.window_check = QCheckBox("Starting between")
+        self.after_edit = QTimeEdit(QTime.fromString(rule.after, 'HH:mm') if rule and rule.after else QTime(20, 0))
+        self.before_edit = QTimeEdit(QTime.fromString(rule.before, 'HH:mm') if rule and rule.before else QTime(23, 59))
+        self.window_check.setChecked(bool(rule and (rule.after or rule.before)))
+        time_layout.addWidget(self.window_check)
+        time_layout.addWidget(self.after_edit)
+        time_layout.addWidget(QLabel("and"))
+        time_layout.addWidget(self.before_edit)
+        layout.addRow("Time:", time_layout)
+
+        days_layout = QHBoxLayout()
+        self.day_checks = []
+        for day, name in enumerate(self.WEEKDAYS):
+            check = QCheckBox(name)
+            check.setChecked(bool(rule and day in rule.weekdays))
+            days_layout.addWidget(check)
+            self.day_checks.append(check)
+        layout.addRow("Days:", days_layout)
+        layout.addRow("", QLabel("None checked: every day"))
+
+        self.dedupe_check = QCheckBox("Skip episodes already recorded or scheduled")
+        self.dedupe_check.setChecked(rule.dedupe if rule else True)
+        layout.addRow("", self.dedupe_check)
+        self.enabled_check = QCheckBox("Enabled")
+        self.enabled_check.setChecked(rule.enabled if rule else True)
+        layout.addRow("", self.enabled_check)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def accept(self):
+        channels = [self.channel_list.item(row).text() for row in range(self.channel_list.count())
+                    if self.channel_list.item(row).checkState() == Qt.Checked]
+        genre = self.genre_combo.currentText() if self.genre_combo.currentIndex() > 0 else ''
+        title = self.title_input.text().strip()
+        if not (title or channels or genre):
+            QMessageBox.warning(self, "Autorecord Rule",
+                                "Please give a title, channels or a genre; this rule would record everything")
+            return
+        windowed = self.window_check.isChecked()
+        try:
+            self.result_rule = autorecord.Rule(
+                self.name_input.text().strip() or title or ', '.join(channels) or genre,
+                server=self.server_key,
+                title=title,
+                channels=channels,
+                genre=genre,
+                after=self.after_edit.time().toString('HH:mm') if windowed else '',
+                before=self.before_edit.time().toString('HH:mm') if windowed else '',
+                weekdays=[day for day, check in enumerate(self.day_checks) if check.isChecked()],
+                dedupe=self.dedupe_check.isChecked(),
+                enabled=self.enabled_check.isChecked(),
+                id=self.rule_id,
             )
+        except autorecord.RuleError as e:
+            QMessageBox.warning(self, "Autorecord Rule", str(e))
+            return
+        super().accept()
+
+
+class AutorecordDialog(QDialog):
+    """Rules that schedule recordings of matching EPG events on one server"""
+    COLUMNS = ['Enabled', 'Name', 'Title', 'Channels', 'Genre', 'Time', 'Repeats']
+
+    def __init__(self, server, parent):
+        super().__init__(parent)
+        self.client = parent
+        self.server = server
+        self.rules = parent.autorecord_rules(server)
+        self.setWindowTitle(f"Autorecord Rules - {server.get('name', '')}")
+        self.setModal(False)
+        self.resize(850, 400)
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.itemDoubleClicked.connect(self.edit_rule)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel("Rules apply to the programmes found by each EPG sync")
+        layout.addWidget(self.status_label)
+
+        buttons = QHBoxLayout()
+        for text, slot in [("Add...", self.add_rule), ("Edit...", self.edit_rule), ("Remove", self.remove_rule)]:
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        run_btn = QPushButton("Run Now")
+        run_btn.setToolTip("Apply the rules to the whole synced EPG")
+        run_btn.clicked.connect(self.run_now)
+        buttons.addWidget(run_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        self.refresh()
+
+    def refresh(self):
+        self.table.setRowCount(len(self.rules))
+        for row, rule in enumerate(self.rules):
+            window = f"{rule.after or '00:00'}-{rule.before or '23:59'}" if rule.after or rule.before else ''
+            if rule.weekdays:
+                days = ', '.join(AutorecordRuleDialog.WEEKDAYS[day] for day in rule.weekdays)
+                window = f"{days} {window}".strip()
+            values = ["Yes" if rule.enabled else "No", rule.name, rule.title, ', '.join(rule.channels),
+                      rule.genre, window, "Skipped" if rule.dedupe else "Recorded"]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def channel_names(self):
+        return [entry.get('name', '') for entry in self.client.channel_entries or []]
+
+    def save(self, apply=True):
+        self.client.save_autorecord_rules(self.server, self.rules)
+        self.refresh()
+        if apply:
+            # Events synced earlier never show up as new again; try the rules on them now
+            self.run_now()
+
+    def add_rule(self):
+        dialog = AutorecordRuleDialog(resilience.normalize_url(self.server['url']), self.channel_names(), None, self)
+        if dialog.exec_() == QDialog.Accepted:
+            self.rules.append(dialog.result_rule)
+            self.save()
+
+    def edit_rule(self, *args):
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.rules):
+            return
+        dialog = AutorecordRuleDialog(resilience.normalize_url(self.server['url']), self.channel_names(),
+                                      self.rules[row], self)
+        if dialog.exec_() == QDialog.Accepted:
+            self.rules[row] = dialog.result_rule
+            self.save()
+
+    def remove_rule(self):
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.rules):
+            return
+        del self.rules[row]
+        self.save(apply=False)
+
+    def run_now(self):
+        if not any(rule.enabled for rule in self.rules):
+            return
+        self.status_label.setText("Applying rules...")
+        self.client.run_autorecord(self.server, on_done=self.on_applied)
+
+    def on_applied(self, scheduled):
+        if not scheduled:
+            self.status_label.setText("No new programmes to record")
+            return
+        self.status_label.setText(f"Scheduled {len(scheduled)} recording(s): " +
+                                  ', '.join(event.title for _, event in scheduled[:5]) +
+                                  (" ..." if len(scheduled) > 5 else ''))
+
+
+class PostProcessDialog(QDialog):
+    """Conversions of local captures waiting or running, with their progress"""
+    COLUMNS = ['File', 'Progress', 'State']
+
+    def __init__(self, queue, parent):
+        super().__init__(parent)
+        self.queue = queue
+        self.setWindowTitle("Post-processing Queue")
+        self.setModal(False)
+        self.resize(700, 300)
+        self.jobs = []
+        self.setup_ui()
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+        self.refresh_timer.start()
+        self.refresh()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.ExtendedSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        run_next_btn = QPushButton("Run Next")
+        run_next_btn.setToolTip("Convert the selected files before the others; retries failed ones")
+        run_next_btn.clicked.connect(lambda: self.apply(self.queue.run_next))
+        buttons.addWidget(run_next_btn)
+        cancel_btn = QPushButton("Cancel")
+        cancel_btn.setToolTip("Drop the selected conversions and keep the .ts captures")
+        cancel_btn.clicked.connect(lambda: self.apply(self.queue.cancel))
+        buttons.addWidget(cancel_btn)
+        buttons.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+
+    def apply(self, handler):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        for row in rows:
+            if row < len(self.jobs):
+                handler(self.jobs[row])
+        self.refresh()
+
+    def refresh(self):
+        self.jobs = list(self.queue.jobs)
+        self.table.setRowCount(len(self.jobs))
+        for row, job in enumerate(self.jobs):
+            state = job.state.capitalize()
+            if job.error:
+                state += f": {job.error}"
+            elif job.state == postprocess.QUEUED and self.queue.paused:
+                state += " (waiting for the capture to finish)"
+            for column, value in enumerate([job.target, f"{job.progress * 100:.0f}%", state]):
+                item = QTableWidgetItem(value)
+                if column == 0:
+                    item.setToolTip(job.source)
+                self.table.setItem(row, column, item)
+
+
+class LibraryDialog(QDialog):
+    """Sortable list of the local recordings, rescanned incrementally when opened"""
+    # Header label and library sort key of each column
+    COLUMNS = [('Title', 'title'), ('Channel', 'channel'), ('Recorded', 'recorded'),
+               ('Duration', 'duration'), ('Size', 'size'), ('Bitrate', 'bitrate'), ('Codecs', 'codecs')]
+
+    def __init__(self, db_path, parent):
+        super().__init__(parent)
+        self.client = parent
+        self.db_path = db_path
+        self.library = RecordingLibrary(db_path)
+        self.thumbnails = None
+        self.tasks = TaskScope()
+        self.scan_task = None
+        self.scan_cancel = threading.Event()
+        self.recordings = []
+        self.sort_column = 2
+        self.sort_order = Qt.DescendingOrder
+        self.setWindowTitle("Recordings Library")
+        self.setModal(False)
+        self.resize(1000, 600)
+        self.setup_ui()
+        self.show_recordings()
+        self.rescan()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by title or channel...")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(200)
+        self.filter_timer.timeout.connect(self.show_recordings)
+        self.filter_input.textChanged.connect(self.filter_timer.start)
+        filter_layout.addWidget(self.filter_input)
+        self.rescan_btn = QPushButton("Rescan")
+        self.rescan_btn.clicked.connect(self.rescan)
+        filter_layout.addWidget(self.rescan_btn)
+        add_btn = QPushButton("Add Folder...")
+        add_btn.clicked.connect(self.add_folder)
+        filter_layout.addWidget(add_btn)
+        remove_btn = QPushButton("Remove Folder...")
+        remove_btn.clicked.connect(self.remove_folder)
+        filter_layout.addWidget(remove_btn)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([label for label, _ in self.COLUMNS])
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        # Sorted by the index, not by the table, so numbers sort as numbers
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(self.sort_column, self.sort_order)
+        header.sectionClicked.connect(self.sort_by)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.itemDoubleClicked.connect(lambda item: self.play_selected())
+        layout.addWidget(self.table)
+        self.thumbnails = ThumbnailColumn(self.table, 0, self.client.ensure_thumbnails())
+
+        bottom_layout = QHBoxLayout()
+        self.status_label = QLabel("")
+        bottom_layout.addWidget(self.status_label)
+        bottom_layout.addStretch()
+        play_btn = QPushButton("▶ Play")
+        play_btn.clicked.connect(self.play_selected)
+        bottom_layout.addWidget(play_btn)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        bottom_layout.addWidget(close_btn)
+        layout.addLayout(bottom_layout)
+
+    def sort_by(self, column):
+        if column == self.sort_column:
+            self.sort_order = Qt.AscendingOrder if self.sort_order == Qt.DescendingOrder else Qt.DescendingOrder
+        else:
+            self.sort_column = column
+            # Newest, longest and biggest first; names A to Z
+            self.sort_order = Qt.AscendingOrder if column in (0, 1, 6) else Qt.DescendingOrder
+        self.table.horizontalHeader().setSortIndicator(self.sort_column, self.sort_order)
+        self.show_recordings()
+
+    def show_recordings(self):
+        start = time.perf_counter()
+        self.recordings = self.library.recordings(
+            self.COLUMNS[self.sort_column][1], self.sort_order == Qt.DescendingOrder,
+            self.filter_input.text())
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.table.setRowCount(len(self.recordings))
+            for row, recording in enumerate(self.recordings):
+                duration = ''
+                if recording.duration:
+                    minutes, seconds = divmod(int(recording.duration), 60)
+                    duration = f"{minutes // 60}:{minutes % 60:02d}:{seconds:02d}"
+                codecs = '/'.join(c for c in (recording.video_codec, recording.audio_codec) if c)
+                if recording.height:
+                    codecs += f" {recording.height}p"
+                values = [
+                    recording.title,
+                    recording.channel or '',
+                    datetime.fromtimestamp(recording.mtime / 1e9).strftime('%Y-%m-%d %H:%M'),
+                    duration,
+                    f"{recording.size / (1024 * 1024):.0f} MB",
+                    f"{recording.bitrate / 1e6:.1f} Mb/s" if recording.bitrate else '',
+                    codecs,
+                ]
+                for column, value in enumerate(values):
+                    item = QTableWidgetItem(value)
+                    if column == 0:
+                        item.setToolTip(recording.error or recording.path)
+                    self.table.setItem(row, column, item)
+        finally:
+            self.table.setUpdatesEnabled(True)
+        self.thumbnails.set_jobs([
+            thumbnails.ThumbnailJob(thumbnails.thumbnail_key(r.path, r.size, r.mtime), r.path, r.duration)
+            for r in self.recordings])
+        print(f"Debug: Listed {len(self.recordings)} recordings in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        if self.scan_task is None or self.scan_task.done():
+            self.status_label.setText(f"{len(self.recordings)} recordings")
+
+    def rescan(self):
+        if self.scan_task is not None and not self.scan_task.done():
+            return
+        self.rescan_btn.setEnabled(False)
+        self.status_label.setText("Scanning...")
+        self.scan_cancel.clear()
+        self.scan_task = self.tasks.spawn(
+            run_blocking(scan_library, self.db_path, self.client.library_directories(),
+                         self.report_scan_progress, self.scan_cancel.is_set),
+            self.on_scan_finished, self.on_scan_failed)
+
+    def report_scan_progress(self, done, total):
+        # Called on a worker thread
+        bridge.call_in_gui(self.show_scan_progress, done, total)
+
+    def show_scan_progress(self, done, total):
+        if not self.tasks.closed:
+            self.status_label.setText(f"Reading {done}/{total} new or changed recordings...")
+
+    def on_scan_finished(self, result):
+        self.rescan_btn.setEnabled(True)
+        self.show_recordings()
+        if result.failed:
+            self.status_label.setText(f"{len(self.recordings)} recordings, {result.failed} unreadable")
+
+    def on_scan_failed(self, error):
+        print(f"Debug: Library scan failed: {error}")
+        self.rescan_btn.setEnabled(True)
+        self.status_label.setText(f"Scan failed: {error}")
+
+    def add_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, "Add Recordings Folder",
+                                                     self.client.library_directories()[0])
+        if directory and self.client.add_library_directory(directory):
+            self.rescan()
+
+    def remove_folder(self):
+        directory, ok = QInputDialog.getItem(self, "Remove Recordings Folder", "Folder:",
+                                             self.client.library_directories(), 0, False)
+        if ok and directory:
+            self.client.remove_library_directory(directory)
+            self.rescan()
+
+    def play_selected(self):
+        row = self.table.currentRow()
+        if row < 0 or row >= len(self.recordings):
+            return
+        self.client.play_url(Path(self.recordings[row].path).as_uri())
+        self.client.statusbar.showMessage(f"Playing {self.recordings[row].title}")
+
+    def closeEvent(self, event):
+        # The scan writes through its own connection; stop it at the next file
+        self.scan_cancel.set()
+        self.tasks.cancel()
+        self.thumbnails.close()
+        self.library.close()
+        super().closeEvent(event)
+
+
+class MosaicTile:
+    """One cell of the mosaic: a video frame, a caption and its own media player"""
+
+    def __init__(self, player):
+        self.player = player
+        self.channel = None
+        self.level = mosaic.LEVEL_REDUCED
+        self.frame = QFrame()
+        self.frame.setStyleSheet("background-color: black;")
+        self.frame.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.caption = QLabel()
+        self.widget = QFrame()
+        self.widget.setObjectName("mosaicTile")
+        self.widget.setFrameStyle(QFrame.Box)
+        layout = QVBoxLayout(self.widget)
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.addWidget(self.frame)
+        layout.addWidget(self.caption)
+        self.read_bytes = None
+        self.sampled_at = 0.0
+        self.input_kbps = 0.0
+
+    def sample(self):
+        """Update the tile's input rate from its media counters"""
+        counters = read_media_stats(self.player.get_media())
+        now = time.monotonic()
+        if counters is None:
+            return
+        if self.read_bytes is not None and counters['read_bytes'] >= self.read_bytes:
+            self.input_kbps = (counters['read_bytes'] - self.read_bytes) * 8 / max(now - self.sampled_at, 1e-3) / 1000
+        self.read_bytes = counters['read_bytes']
+        self.sampled_at = now
+
+
+class MosaicDialog(QDialog):
+    """Plays 4, 9 or 16 channels at once, one libVLC player per tile.
+
+    Unfocused tiles are decoded without audio and with frames skipped; when
+    the process uses more CPU, or the tiles more bandwidth, than the budget
+    set in the toolbar, tiles drop to key frames only. Clicking a tile
+    focuses it and plays it at full quality.
+    """
+
+    def __init__(self, server, channels, parent):
+        super().__init__(parent)
+        self.client = parent
+        self.server = server
+        self.channels = channels
+        self.setWindowTitle(f"Mosaic - {server['name']}")
+        self.setModal(False)
+        self.resize(1280, 760)
+        config = self.client.config
+        self.budget = mosaic.MosaicBudget(config.get('mosaic_cpu_budget', mosaic.DEFAULT_CPU_BUDGET),
+                                          config.get('mosaic_bandwidth_kbps', 0))
+        self.cpu_meter = mosaic.CpuMeter()
+        self.tiles = []
+        self.focused = None
+        self.setup_ui()
+        self.build_tiles(config.get('mosaic_size', 4))
+
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(2000)
+        self.load_timer.timeout.connect(self.check_load)
+        self.load_timer.start()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+
+        controls.addWidget(QLabel("Tiles:"))
+        self.size_combo = QComboBox()
+        for size in mosaic.GRID_SIZES:
+            self.size_combo.addItem(str(size), size)
+        self.size_combo.setCurrentIndex(
+            max(self.size_combo.findData(self.client.config.get('mosaic_size', 4)), 0))
+        self.size_combo.currentIndexChanged.connect(
+            lambda: self.build_tiles(self.size_combo.currentData()))
+        controls.addWidget(self.size_combo)
+
+        # A low-resolution transcode profile for the unfocused tiles takes
+        # most of the decoding off this machine
+        controls.addWidget(QLabel("Tile profile:"))
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItem("Server Default", '')
+        server_url = resilience.normalize_url(self.server['url'])
+        for profile in self.client.stream_profiles.get(server_url, []):
+            self.profile_combo.addItem(profile.name, profile.name)
+        self.profile_combo.setCurrentIndex(
+            max(self.profile_combo.findData(self.server.get('mosaic_profile', '')), 0))
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_changed)
+        controls.addWidget(self.profile_combo)
+
+        controls.addWidget(QLabel("CPU budget:"))
+        self.cpu_spin = QSpinBox()
+        self.cpu_spin.setRange(10, 100)
+        self.cpu_spin.setSuffix(" %")
+        self.cpu_spin.setValue(self.budget.cpu_percent)
+        self.cpu_spin.valueChanged.connect(self.on_budget_changed)
+        controls.addWidget(self.cpu_spin)
+
+        controls.addWidget(QLabel("Bandwidth:"))
+        self.bandwidth_spin = QSpinBox()
+        self.bandwidth_spin.setRange(0, 1000)
+        self.bandwidth_spin.setSuffix(" Mb/s")
+        self.bandwidth_spin.setSpecialValueText("Unlimited")
+        self.bandwidth_spin.setValue(self.budget.bandwidth_kbps // 1000)
+        self.bandwidth_spin.valueChanged.connect(self.on_budget_changed)
+        controls.addWidget(self.bandwidth_spin)
+
+        controls.addStretch()
+        self.load_label = QLabel()
+        controls.addWidget(self.load_label)
+        layout.addLayout(controls)
+
+        self.grid = QGridLayout()
+        self.grid.setSpacing(2)
+        layout.addLayout(self.grid)
+
+    def build_tiles(self, size):
+        """(Re)create the grid with `size` tiles, keeping the channels already shown"""
+        shown = [tile.channel for tile in self.tiles if tile.channel is not None]
+        self.release_tiles()
+        self.client.config['mosaic_size'] = size
+        columns = int(size ** 0.5)
+        queue = shown + [channel for channel in self.channels if channel not in shown]
+        for index in range(size):
+            tile = MosaicTile(self.client.instance.media_player_new())
+            self.grid.addWidget(tile.widget, index // columns, index % columns)
+            # Let clicks through to the frame instead of the video window
+            tile.player.video_set_mouse_input(False)
+            tile.player.video_set_key_input(False)
+            tile.frame.installEventFilter(self)
+            tile.frame.setContextMenuPolicy(Qt.CustomContextMenu)
+            tile.frame.customContextMenuRequested.connect(
+                lambda position, index=index: self.show_tile_menu(index, position))
+            self.tiles.append(tile)
+            if index < len(queue):
+                tile.channel = queue[index]
+        # Window handles exist only once the frames are laid out
+        QTimer.singleShot(0, self.start_tiles)
+
+    def start_tiles(self):
+        for index, tile in enumerate(self.tiles):
+            handle = tile.frame.winId().__int__()
+            if sys.platform.startswith('linux'):
+                tile.player.set_xwindow(handle)
+            elif sys.platform == "win32":
+                tile.player.set_hwnd(handle)
+            elif sys.platform == "darwin":
+                tile.player.set_nsobject(handle)
+            self.open_tile(index)
+        if self.tiles:
+            self.focus_tile(0)
+
+    def release_tiles(self):
+        self.focused = None
+        for tile in self.tiles:
+            tile.player.stop()
+            tile.player.release()
+            self.grid.removeWidget(tile.widget)
+            tile.widget.deleteLater()
+        self.tiles = []
+
+    def open_tile(self, index):
+        """(Re)open a tile's stream with the options of its level"""
+        tile = self.tiles[index]
+        if tile.channel is None:
+            tile.player.stop()
+            tile.caption.setText("(empty)")
+            return
+        uuid = tile.channel['uuid']
+        if tile.level == mosaic.LEVEL_FULL:
+            profile = stream_profile_setting(self.server, uuid)
+            if profile == AUTO_PROFILE:
+                profile = ''
+        else:
+            profile = self.profile_combo.currentData()
+        url = get_api(self.server).stream_url(uuid, embed_auth=True, profile=profile)
+        media = self.client.instance.media_new(url)
+        caching, _ = self.client.network_caching(self.server, uuid)
+        media.add_option(f':network-caching={caching}')
+        for option in mosaic.tile_media_options(tile.level):
+            media.add_option(option)
+        tile.player.set_media(media)
+        tile.player.play()
+        tile.read_bytes = None
+        tile.input_kbps = 0.0
+        self.update_caption(tile)
+
+    def update_caption(self, tile):
+        if tile.channel is None:
+            return
+        text = f"{tile.channel['name']} - {mosaic.LEVEL_NAMES[tile.level]}"
+        if tile.input_kbps:
+            text += f", {tile.input_kbps / 1000:.1f} Mb/s"
+        tile.caption.setText(text)
+
+    def set_level(self, index, level):
+        tile = self.tiles[index]
+        if tile.level != level:
+            tile.level = level
+            self.open_tile(index)
+
+    def focus_tile(self, index):
+        """Promote a tile to full quality; the previously focused one is reduced"""
+        if index == self.focused:
+            return
+        if self.focused is not None:
+            self.tiles[self.focused].widget.setStyleSheet("")
+            self.set_level(self.focused, mosaic.LEVEL_REDUCED)
+        self.focused = index
+        self.tiles[index].widget.setStyleSheet("#mosaicTile { border: 2px solid #2a82da; }")
+        self.set_level(index, mosaic.LEVEL_FULL)
+
+    def eventFilter(self, obj, event):
+        if event.type() == event.MouseButtonPress:
+            for index, tile in enumerate(self.tiles):
+                if obj is tile.frame:
+                    self.focus_tile(index)
+                    return True
+        return super().eventFilter(obj, event)
+
+    def show_tile_menu(self, index, position):
+        menu = QMenu(self)
+        change_action = menu.addAction("Change Channel...")
+        change_action.triggered.connect(lambda: self.choose_channel(index))
+        clear_action = menu.addAction("Clear Tile")
+        clear_action.triggered.connect(lambda: self.set_tile_channel(index, None))
+        menu.exec_(self.tiles[index].frame.mapToGlobal(position))
+
+    def choose_channel(self, index):
+        names = [channel['name'] for channel in self.channels]
+        current = self.tiles[index].channel
+        name, ok = QInputDialog.getItem(self, "Change Channel", "Channel:", names,
+                                        names.index(current['name']) if current in self.channels else 0,
+                                        False)
+        if ok:
+            self.set_tile_channel(index, self.channels[names.index(name)])
+
+    def set_tile_channel(self, index, channel):
+        self.tiles[index].channel = channel
+        self.open_tile(index)
+
+    def on_profile_changed(self):
+        self.server['mosaic_profile'] = self.profile_combo.currentData()
+        for index, tile in enumerate(self.tiles):
+            if tile.level != mosaic.LEVEL_FULL:
+                self.open_tile(index)
+
+    def on_budget_changed(self):
+        self.budget.cpu_percent = self.cpu_spin.value()
+        self.budget.bandwidth_kbps = self.bandwidth_spin.value() * 1000
+        self.client.config['mosaic_cpu_budget'] = self.budget.cpu_percent
+        self.client.config['mosaic_bandwidth_kbps'] = self.budget.bandwidth_kbps
+
+    def check_load(self):
+        """Sample the tiles and the CPU, and degrade or restore one tile if needed"""
+        for tile in self.tiles:
+            tile.sample()
+            self.update_caption(tile)
+        cpu = self.cpu_meter.percent()
+        kbps = sum(tile.input_kbps for tile in self.tiles)
+        self.load_label.setText(f"CPU {cpu:.0f}%  {kbps / 1000:.1f} Mb/s")
+        loads = [mosaic.TileLoad(index, tile.level, index == self.focused, tile.input_kbps)
+                 for index, tile in enumerate(self.tiles) if tile.channel is not None]
+        change = self.budget.plan(loads, cpu)
+        if change is not None:
+            self.set_level(*change)
+
+    def done(self, result):
+        # Reached from the close button and Escape alike; hidden players must not keep decoding
+        self.load_timer.stop()
+        self.release_tiles()
+        self.client.save_config()
+        super().done(result)
+
 
 class RecordingStatusDialog(QDialog):
     def __init__(self, channel_name, file_path, parent=None):
@@ -2831,6 +5405,9 @@ class RecordingStatusDialog(QDialog):
         """Signal that user wants to stop recording"""
         self.accept()
 
+startup_profiler.mark("modules imported")
+
+
 def main():
     """Main entry point for the application"""
     try:
@@ -2839,10 +5416,19 @@ def main():
         QCoreApplication.setAttribute(Qt.AA_X11InitThreads, True)
         os.environ["QT_QPA_PLATFORM"] = "xcb"
         
+        if '--profile-startup' in sys.argv:
+            sys.argv.remove('--profile-startup')
+            startup_profiler.enabled = True
+        
         app = QApplication(sys.argv)
+        bridge.install(app)
+        startup_profiler.mark("QApplication created")
         player = TVHeadendClient()
         player.show()
-        sys.exit(app.exec_())
+        startup_profiler.mark("window shown")
+        # Runs on the first event loop pass, once the window has been exposed
+        QTimer.singleShot(0, startup_profiler.report)
+        sys.exit(bridge.exec_(app))
     except Exception as e:
         print(f"Error starting application: {str(e)}")
         print(f"Traceback: {traceback.format_exc()}")